@@ -0,0 +1,444 @@
+from __future__ import absolute_import
+from __future__ import print_function
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+'''
+Benchmarks the nss.ssl bindings with a client and an ssl.Server running
+in this process over the loopback interface:
+
+handshake
+    full and resumed handshakes per second for each cipher suite and
+    protocol version, each connection makes one small request
+bulk
+    throughput sending data from client to server for a range of write
+    (record) sizes
+latency
+    percentiles of the time to connect, handshake and get a reply, and
+    of the round trip time of a request on an established connection
+scaling
+    full handshakes per second with an increasing number of client
+    threads, this shows how much of the work runs without the GIL
+
+Everything runs in one process, so the numbers include both ends of
+each connection. They are most useful compared between builds of the
+bindings on the same machine, e.g. to catch regressions in GIL handling
+or callback overhead. Use --json to write machine readable results.
+
+io.Socket.new_tcp_pair() is not used, on Unix it creates AF_UNIX sockets
+which libssl clients do not support.
+
+The server certificate is read from an NSS database, see ssl_example.py
+for the options. Example:
+
+    python ssl_benchmark.py -d sql:pki -n test_server --json results.json
+'''
+
+import argparse
+import getpass
+import json
+import platform
+import sys
+import threading
+import time
+
+from nss.error import NSPRError
+import nss.io as io
+import nss.nss as nss
+import nss.ssl as ssl
+
+versions = {
+    'tls1.2': ssl.SSL_LIBRARY_VERSION_TLS_1_2,
+    'tls1.3': ssl.SSL_LIBRARY_VERSION_TLS_1_3,
+}
+
+tls13_cipher_suites = (ssl.TLS_AES_128_GCM_SHA256,
+                       ssl.TLS_AES_256_GCM_SHA384,
+                       ssl.TLS_CHACHA20_POLY1305_SHA256)
+
+# -----------------------------------------------------------------------------
+# Callback Functions
+# -----------------------------------------------------------------------------
+
+def password_callback(slot, retry, password):
+    if password: return password
+    return getpass.getpass("Enter password: ");
+
+def auth_certificate_callback(sock, check_sig, is_server, certdb):
+    # The benchmark measures the bindings, not certificate validation.
+    # The server certificate is the one we loaded ourselves.
+    return True
+
+# -----------------------------------------------------------------------------
+# Server
+# -----------------------------------------------------------------------------
+
+def handler(sock, client_addr):
+    '''
+    Serves one connection. The first line is the command:
+
+    BULK n
+        read n octets and reply OK
+    ECHO
+        echo lines until the client closes the connection
+    '''
+    try:
+        command = sock.readline()
+        if command.startswith(b'BULK '):
+            remaining = int(command.split()[1])
+            while remaining > 0:
+                buf = sock.recv(min(remaining, 65536))
+                if not buf:
+                    return
+                remaining -= len(buf)
+            sock.send(b'OK\n')
+        elif command == b'ECHO\n':
+            while True:
+                line = sock.readline()
+                if not line:
+                    return
+                sock.send(line)
+    except NSPRError:
+        # The client went away
+        pass
+
+# -----------------------------------------------------------------------------
+# Client
+# -----------------------------------------------------------------------------
+
+def connect(port, version=None, cipher_suite=None):
+    '''
+    Returns a client socket connected to the server with the handshake
+    completed. If cipher_suite is given only that cipher suite is
+    offered.
+    '''
+    net_addr = io.NetworkAddress(io.PR_IpAddrLoopback, port)
+    sock = ssl.SSLSocket(net_addr.family)
+    sock.set_hostname('localhost')
+    sock.set_auth_certificate_callback(auth_certificate_callback,
+                                       nss.get_default_certdb())
+    sock.set_ssl_option(ssl.SSL_ENABLE_SESSION_TICKETS, True)
+    sock.set_socket_option(io.PR_SockOpt_NoDelay, True)
+    if version is not None:
+        sock.set_ssl_version_range(version, version)
+    if cipher_suite is not None:
+        for suite in ssl.ssl_implemented_ciphers:
+            sock.set_cipher_pref(suite, suite == cipher_suite)
+    sock.connect(net_addr)
+    sock.force_handshake()
+    return sock
+
+def request(sock):
+    '''
+    Makes one request and closes the connection. TLS 1.3 servers send
+    the session ticket after the handshake, the client only picks it up
+    when it reads from the connection.
+    '''
+    sock.send(b'ECHO\nping\n')
+    if sock.readline() != b'ping\n':
+        raise ValueError('unexpected reply')
+    sock.close()
+
+def percentiles(samples):
+    samples = sorted(samples)
+    n = len(samples)
+    return {
+        'count': n,
+        'mean':  sum(samples) / n,
+        'min':   samples[0],
+        'p50':   samples[n * 50 // 100],
+        'p90':   samples[n * 90 // 100],
+        'p99':   samples[n * 99 // 100],
+        'max':   samples[-1],
+    }
+
+def cipher_suite_name(suite):
+    return ssl.get_cipher_suite_info(suite).cipher_suite_name
+
+def n_resumed():
+    return ssl.get_statistics()['hsh_sid_cache_hits']
+
+# -----------------------------------------------------------------------------
+# Benchmarks
+# -----------------------------------------------------------------------------
+
+def cipher_suites(version):
+    '''
+    Cipher suites enabled by default which are usable with the version
+    and the server certificate.
+    '''
+    suites = []
+    for suite in ssl.ssl_implemented_ciphers:
+        if not ssl.get_default_cipher_pref(suite):
+            continue
+        if (suite in tls13_cipher_suites) != (version == ssl.SSL_LIBRARY_VERSION_TLS_1_3):
+            continue
+        if options.ciphers and cipher_suite_name(suite) not in options.ciphers:
+            continue
+        try:
+            request(connect(port, version, suite))
+        except NSPRError:
+            continue
+        suites.append(suite)
+    return suites
+
+def bench_handshake():
+    results = []
+    for version_name in options.versions:
+        version = versions[version_name]
+        for suite in cipher_suites(version):
+            for resumed in (False, True):
+                if resumed:
+                    # Prime the client session cache
+                    request(connect(port, version, suite))
+                ssl.reset_statistics()
+                start = time.perf_counter()
+                for i in range(options.iterations):
+                    if not resumed:
+                        ssl.clear_session_cache()
+                    request(connect(port, version, suite))
+                elapsed = time.perf_counter() - start
+                result = {
+                    'benchmark':          'handshake',
+                    'version':            version_name,
+                    'cipher_suite':       cipher_suite_name(suite),
+                    'resumed':            resumed,
+                    'handshakes':         options.iterations,
+                    'resumed_handshakes': n_resumed(),
+                    'handshakes_per_sec': options.iterations / elapsed,
+                }
+                report(result, '%(version)-7s %(cipher_suite)-45s %(resumed)-6s %(handshakes_per_sec)10.1f/s')
+                results.append(result)
+    return results
+
+def bench_bulk():
+    results = []
+    total = options.bulk_size * 1024 * 1024
+    for version_name in options.versions:
+        for write_size in options.write_sizes:
+            buf = b'x' * write_size
+            n_writes = total // write_size
+            sock = connect(port, versions[version_name])
+            info = sock.get_ssl_channel_info()
+            start = time.perf_counter()
+            sock.send(b'BULK %d\n' % (n_writes * write_size))
+            for i in range(n_writes):
+                sock.send(buf)
+            reply = sock.readline()
+            elapsed = time.perf_counter() - start
+            sock.close()
+            if reply != b'OK\n':
+                raise ValueError('unexpected reply %r' % reply)
+            result = {
+                'benchmark':     'bulk',
+                'version':       version_name,
+                'cipher_suite':  cipher_suite_name(info.cipher_suite),
+                'write_size':    write_size,
+                'bytes':         n_writes * write_size,
+                'mbytes_per_sec': n_writes * write_size / elapsed / (1024 * 1024),
+            }
+            report(result, '%(version)-7s %(cipher_suite)-45s %(write_size)6d %(mbytes_per_sec)10.1f MiB/s')
+            results.append(result)
+    return results
+
+def bench_latency():
+    results = []
+    for version_name in options.versions:
+        version = versions[version_name]
+
+        samples = []
+        for i in range(options.iterations):
+            ssl.clear_session_cache()
+            start = time.perf_counter()
+            sock = connect(port, version)
+            sock.send(b'ECHO\nping\n')
+            sock.readline()
+            samples.append(time.perf_counter() - start)
+            sock.close()
+        result = {'benchmark': 'latency', 'version': version_name,
+                  'operation': 'connect'}
+        result.update(percentiles(samples))
+        report(result, '%(version)-7s %(operation)-8s p50 %(p50)8.6fs p90 %(p90)8.6fs p99 %(p99)8.6fs')
+        results.append(result)
+
+        samples = []
+        sock = connect(port, version)
+        sock.send(b'ECHO\n')
+        for i in range(options.iterations):
+            start = time.perf_counter()
+            sock.send(b'ping\n')
+            sock.readline()
+            samples.append(time.perf_counter() - start)
+        sock.close()
+        result = {'benchmark': 'latency', 'version': version_name,
+                  'operation': 'request'}
+        result.update(percentiles(samples))
+        report(result, '%(version)-7s %(operation)-8s p50 %(p50)8.6fs p90 %(p90)8.6fs p99 %(p99)8.6fs')
+        results.append(result)
+    return results
+
+def bench_scaling():
+    results = []
+    for version_name in options.versions:
+        version = versions[version_name]
+        for n_threads in options.threads:
+            counts = [0] * n_threads
+            deadline = time.monotonic() + options.duration
+
+            def client(index):
+                while time.monotonic() < deadline:
+                    request(connect(port, version))
+                    counts[index] += 1
+
+            # Full handshakes only, clients do not reuse sessions
+            ssl.set_ssl_default_option(ssl.SSL_NO_CACHE, True)
+            threads = [threading.Thread(target=client, args=(i,)) for i in range(n_threads)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            ssl.set_ssl_default_option(ssl.SSL_NO_CACHE, False)
+
+            result = {
+                'benchmark':          'scaling',
+                'version':            version_name,
+                'threads':            n_threads,
+                'handshakes':         sum(counts),
+                'handshakes_per_sec': sum(counts) / elapsed,
+            }
+            report(result, '%(version)-7s %(threads)3d threads %(handshakes_per_sec)10.1f/s')
+            results.append(result)
+    return results
+
+benchmarks = {
+    'handshake': bench_handshake,
+    'bulk':      bench_bulk,
+    'latency':   bench_latency,
+    'scaling':   bench_scaling,
+}
+
+def report(result, fmt):
+    if options.json != '-':
+        print(fmt % result)
+
+def csv_list(convert):
+    return lambda value: [convert(x) for x in value.split(',') if x]
+
+# -----------------------------------------------------------------------------
+
+parser = argparse.ArgumentParser(description='nss.ssl benchmark suite',
+                                 formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+parser.add_argument('-d', '--db-name',
+                    help='NSS database name (e.g. "sql:pki")')
+
+parser.add_argument('-n', '--server-nickname',
+                    help='server certificate nickname')
+
+parser.add_argument('-w', '--password',
+                    help='certificate database password')
+
+parser.add_argument('-b', '--benchmarks', type=csv_list(str),
+                    help='comma separated benchmarks to run, one or more of %s' %
+                    ', '.join(sorted(benchmarks)))
+
+parser.add_argument('--versions', type=csv_list(str),
+                    help='comma separated protocol versions, one or more of %s' %
+                    ', '.join(sorted(versions)))
+
+parser.add_argument('--ciphers', type=csv_list(str),
+                    help='comma separated cipher suite names for the handshake '
+                    'benchmark, default is all usable suites enabled by default')
+
+parser.add_argument('-i', '--iterations', type=int,
+                    help='handshakes or requests per measurement')
+
+parser.add_argument('--bulk-size', type=int,
+                    help='MiB sent per bulk measurement')
+
+parser.add_argument('--write-sizes', type=csv_list(int),
+                    help='comma separated write sizes for the bulk benchmark')
+
+parser.add_argument('--threads', type=csv_list(int),
+                    help='comma separated client thread counts for the scaling benchmark')
+
+parser.add_argument('--duration', type=float,
+                    help='seconds per scaling measurement')
+
+parser.add_argument('--json',
+                    help='write the results as JSON to this file, - for stdout')
+
+parser.set_defaults(db_name = 'sql:pki',
+                    server_nickname = 'test_server',
+                    password = 'DB_passwd',
+                    benchmarks = ['handshake', 'bulk', 'latency', 'scaling'],
+                    versions = ['tls1.2', 'tls1.3'],
+                    ciphers = [],
+                    iterations = 200,
+                    bulk_size = 64,
+                    write_sizes = [256, 1024, 4096, 16384, 65536],
+                    threads = [1, 2, 4, 8],
+                    duration = 2.0,
+                    json = None,
+                   )
+
+options = parser.parse_args()
+
+for name in options.benchmarks:
+    if name not in benchmarks:
+        parser.error('unknown benchmark "%s"' % name)
+for name in options.versions:
+    if name not in versions:
+        parser.error('unknown version "%s"' % name)
+
+nss.nss_init(options.db_name)
+ssl.set_domestic_policy()
+nss.set_password_callback(password_callback)
+ssl.config_server_session_id_cache()
+
+server_cert = nss.find_cert_from_nickname(options.server_nickname, options.password)
+priv_key = nss.find_key_by_any_cert(server_cert, options.password)
+
+server = ssl.Server(io.NetworkAddress(io.PR_IpAddrLoopback, 0),
+                    server_cert, priv_key, handler,
+                    workers=max(options.threads),
+                    options={ssl.SSL_ENABLE_SESSION_TICKETS: True})
+# Accepted connections inherit this, the server writes small replies
+server.socket.set_socket_option(io.PR_SockOpt_NoDelay, True)
+server.start()
+port = server.net_addr.port
+
+results = []
+for name in options.benchmarks:
+    if options.json != '-':
+        print('%s:' % name)
+    results.extend(benchmarks[name]())
+
+server.shutdown()
+
+if options.json:
+    output = {
+        'environment': {
+            'python':   platform.python_version(),
+            'nss':      nss.nss_get_version(),
+            'platform': platform.platform(),
+            'time':     time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        },
+        'options': {
+            'iterations': options.iterations,
+            'bulk_size':  options.bulk_size,
+            'duration':   options.duration,
+        },
+        'server': server.get_stats(),
+        'results': results,
+    }
+    if options.json == '-':
+        json.dump(output, sys.stdout, indent=2)
+        print()
+    else:
+        with open(options.json, 'w') as f:
+            json.dump(output, f, indent=2)
@@ -0,0 +1,318 @@
+from __future__ import absolute_import
+from __future__ import print_function
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+'''
+Measures the time from starting a TLS connection until the first
+response arrives, the latency a client speaks first protocol (e.g. HTTP)
+sees, for:
+
+  * a full TLS 1.3 handshake
+  * a resumed TLS 1.3 handshake
+  * a resumed TLS 1.3 handshake sending the request as early data (0-RTT)
+  * a full TLS 1.2 handshake
+  * a full TLS 1.2 handshake using False Start
+
+Client and server run in this process and talk over the loopback
+interface. A loopback round trip is only a few microseconds, which hides
+the round trips False Start and early data save, so the connection is
+relayed through a delay line which adds a configurable one way delay to
+each direction (--rtt sets the emulated round trip time).
+
+libssl servers only send application data once the handshake has
+completed, so early data does not let the response go out sooner.
+What it saves is the time the server spends producing the response,
+which overlaps with the client's final handshake flight (--server-work
+sets how long the server takes per request).
+
+The server certificate is read from an NSS database, see ssl_example.py
+for the options. Example:
+
+    python ssl_early_data_benchmark.py -d sql:pki -n test_server --rtt 20
+'''
+
+import argparse
+import collections
+import getpass
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from nss.error import NSPRError
+import nss.io as io
+import nss.nss as nss
+import nss.ssl as ssl
+
+REQUEST = b'GET / HTTP/1.0\r\n\r\n'
+RESPONSE = b'HTTP/1.0 200 OK\r\n\r\n'
+
+# -----------------------------------------------------------------------------
+# Callback Functions
+# -----------------------------------------------------------------------------
+
+def password_callback(slot, retry, password):
+    if password: return password
+    return getpass.getpass("Enter password: ");
+
+def auth_certificate_callback(sock, check_sig, is_server, certdb):
+    # The benchmark measures latency, not certificate validation. The
+    # server certificate is the one we loaded ourselves.
+    return True
+
+def can_false_start_callback(sock):
+    return sock.recommended_can_false_start()
+
+# -----------------------------------------------------------------------------
+# Server
+# -----------------------------------------------------------------------------
+
+class Server(threading.Thread):
+    def __init__(self, server_cert, priv_key, work):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.work = work
+        net_addr = io.NetworkAddress(io.PR_IpAddrLoopback, 0)
+        self.sock = ssl.SSLSocket(net_addr.family)
+        self.sock.set_socket_option(io.PR_SockOpt_Reuseaddr, True)
+        self.sock.bind(net_addr)
+        self.sock.listen(32)
+        self.sock.config_secure_server(server_cert, priv_key, server_cert.find_kea_type())
+        self.sock.enable_early_data()
+        self.port = self.sock.get_sock_name().port
+
+    def run(self):
+        while True:
+            client_sock, client_addr = self.sock.accept()
+            try:
+                client_sock.reset_handshake(True)
+                # Start on a request sent as early data right away,
+                # before the client has completed the handshake.
+                request = client_sock.recv_early_data(1024)
+                while not request.endswith(b'\r\n\r\n'):
+                    buf = client_sock.recv(1024)
+                    if not buf:
+                        break
+                    request += buf
+                time.sleep(self.work)
+                client_sock.send(RESPONSE)
+                client_sock.shutdown()
+            except NSPRError as e:
+                print("server: %s" % e)
+            finally:
+                client_sock.close()
+
+# -----------------------------------------------------------------------------
+# Delay line
+# -----------------------------------------------------------------------------
+
+class DelayLine(threading.Thread):
+    '''
+    Relays TCP connections to a target port, delaying all data by
+    delay seconds in each direction.
+    '''
+
+    def __init__(self, target_port, delay):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.target_addr = io.NetworkAddress(io.PR_IpAddrLoopback, target_port)
+        self.delay = delay
+        net_addr = io.NetworkAddress(io.PR_IpAddrLoopback, 0)
+        self.sock = io.Socket(net_addr.family)
+        self.sock.set_socket_option(io.PR_SockOpt_Reuseaddr, True)
+        self.sock.bind(net_addr)
+        self.sock.listen(32)
+        self.port = self.sock.get_sock_name().port
+
+    def run(self):
+        while True:
+            client_sock, client_addr = self.sock.accept()
+            client_sock.set_socket_option(io.PR_SockOpt_NoDelay, True)
+            server_sock = io.Socket(self.target_addr.family)
+            server_sock.connect(self.target_addr)
+            server_sock.set_socket_option(io.PR_SockOpt_NoDelay, True)
+            self.pump(client_sock, server_sock)
+            self.pump(server_sock, client_sock)
+
+    def pump(self, src, dst):
+        pending = queue.Queue()
+
+        def reader():
+            while True:
+                try:
+                    buf = src.recv(16384)
+                except NSPRError:
+                    buf = b''
+                pending.put((time.monotonic() + self.delay, buf))
+                if not buf:
+                    break
+
+        def writer():
+            while True:
+                deadline, buf = pending.get()
+                now = time.monotonic()
+                if deadline > now:
+                    time.sleep(deadline - now)
+                try:
+                    if not buf:
+                        dst.shutdown(io.PR_SHUTDOWN_SEND)
+                        break
+                    dst.send(buf)
+                except NSPRError:
+                    break
+
+        for func in (reader, writer):
+            thread = threading.Thread(target=func)
+            thread.daemon = True
+            thread.start()
+
+# -----------------------------------------------------------------------------
+# Client
+# -----------------------------------------------------------------------------
+
+def request(port, version, false_start=False, early_data=False):
+    '''
+    Sends REQUEST, reads the response and returns a tuple of the
+    elapsed time in seconds and the channel information.
+    '''
+    net_addr = io.NetworkAddress(io.PR_IpAddrLoopback, port)
+    sock = ssl.SSLSocket(net_addr.family)
+    sock.set_ssl_version_range(version, version)
+    sock.set_hostname('localhost')
+    sock.set_auth_certificate_callback(auth_certificate_callback,
+                                       nss.get_default_certdb())
+    sock.set_socket_option(io.PR_SockOpt_NoDelay, True)
+    if false_start:
+        sock.set_ssl_option(ssl.SSL_ENABLE_FALSE_START, True)
+        sock.set_can_false_start_callback(can_false_start_callback)
+    if early_data:
+        sock.enable_early_data()
+    else:
+        sock.set_ssl_option(ssl.SSL_ENABLE_SESSION_TICKETS, True)
+
+    start = time.perf_counter()
+    sock.connect(net_addr)
+    n_sent = 0
+    if early_data:
+        n_sent = sock.send_early_data(REQUEST)
+    sock.send(REQUEST[n_sent:])
+    response = b''
+    while True:
+        buf = sock.recv(1024)
+        if not buf:
+            break
+        response += buf
+    elapsed = time.perf_counter() - start
+
+    info = sock.get_ssl_channel_info()
+    sock.close()
+
+    if response != RESPONSE:
+        raise ValueError("unexpected response %r" % response)
+    return elapsed, info
+
+def run_scenario(port, iterations, version, resume=False, false_start=False,
+                 early_data=False):
+    times = []
+    n_early_data = 0
+    for i in range(iterations):
+        if resume:
+            # Prime the client session cache with a ticket.
+            request(port, version, early_data=early_data)
+        else:
+            ssl.clear_session_cache()
+        elapsed, info = request(port, version, false_start, early_data)
+        times.append(elapsed)
+        if info.early_data_accepted:
+            n_early_data += 1
+    times.sort()
+    return times, n_early_data
+
+def fmt_msecs(secs):
+    return "%8.2f" % (secs * 1000.0)
+
+# -----------------------------------------------------------------------------
+
+parser = argparse.ArgumentParser(description='TLS handshake latency benchmark')
+
+parser.add_argument('-d', '--db-name',
+                    help='NSS database name (e.g. "sql:pki")')
+
+parser.add_argument('-n', '--server-nickname',
+                    help='server certificate nickname')
+
+parser.add_argument('-w', '--password',
+                    help='certificate database password')
+
+parser.add_argument('-i', '--iterations', type=int,
+                    help='number of connections per scenario')
+
+parser.add_argument('--rtt', type=float,
+                    help='emulated network round trip time in milliseconds')
+
+parser.add_argument('--server-work', type=float,
+                    help='time the server spends on each request in milliseconds')
+
+parser.add_argument('--anti-replay-window', type=float,
+                    help='server 0-RTT anti-replay window in seconds')
+
+parser.set_defaults(db_name = 'sql:pki',
+                    server_nickname = 'test_server',
+                    password = 'DB_passwd',
+                    iterations = 50,
+                    rtt = 20.0,
+                    server_work = 10.0,
+                    anti_replay_window = 1.0,
+                   )
+
+options = parser.parse_args()
+
+nss.nss_init(options.db_name)
+ssl.set_domestic_policy()
+nss.set_password_callback(password_callback)
+ssl.config_server_session_id_cache()
+ssl.config_anti_replay(options.anti_replay_window)
+
+server_cert = nss.find_cert_from_nickname(options.server_nickname, options.password)
+priv_key = nss.find_key_by_any_cert(server_cert, options.password)
+
+server = Server(server_cert, priv_key, options.server_work / 1000.0)
+server.start()
+port = server.port
+if options.rtt > 0:
+    delay_line = DelayLine(server.port, options.rtt / 2000.0)
+    delay_line.start()
+    port = delay_line.port
+
+# Early data is rejected until one anti-replay window has passed.
+time.sleep(options.anti_replay_window)
+
+Scenario = collections.namedtuple('Scenario', ['name', 'version', 'resume',
+                                               'false_start', 'early_data'])
+scenarios = [
+    Scenario('TLS 1.3 full',              'tls1.3', False, False, False),
+    Scenario('TLS 1.3 resumed',           'tls1.3', True,  False, False),
+    Scenario('TLS 1.3 resumed + 0-RTT',   'tls1.3', True,  False, True),
+    Scenario('TLS 1.2 full',              'tls1.2', False, False, False),
+    Scenario('TLS 1.2 full + False Start','tls1.2', False, True,  False),
+]
+
+print("emulated RTT %.1f ms, server work %.1f ms, %d connections per scenario, times in ms" %
+      (options.rtt, options.server_work, options.iterations))
+print()
+print("%-28s %8s %8s %8s %8s" % ('scenario', 'min', 'median', 'p90', '0-RTT'))
+for scenario in scenarios:
+    times, n_early_data = run_scenario(port, options.iterations,
+                                       scenario.version, scenario.resume,
+                                       scenario.false_start, scenario.early_data)
+    print("%-28s %s %s %s %8d" % (scenario.name,
+                                  fmt_msecs(times[0]),
+                                  fmt_msecs(times[len(times) // 2]),
+                                  fmt_msecs(times[int(len(times) * 0.9)]),
+                                  n_early_data))
@@ -0,0 +1,60 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+hashlib compatible digests computed by NSS::
+
+    import nss.nss as nss
+    import nss.hashlib as hashlib
+
+    nss.nss_init_nodb()
+    hashlib.sha256(b'data').hexdigest()
+    hashlib.new('sha512', b'data').digest()
+
+The objects are `nss.nss.Hash` instances with hashlib's interface:
+update(), digest(), hexdigest(), copy(), name, digest_size and
+block_size. Libraries taking a hashlib constructor can be handed one of
+the functions below so their digests come from NSS, e.g. its FIPS
+token. NSS must be initialized first.
+"""
+
+from nss.nss import Hash
+
+__all__ = ['new', 'algorithms_guaranteed', 'algorithms_available',
+           'md5', 'sha1', 'sha224', 'sha256', 'sha384', 'sha512']
+
+algorithms_guaranteed = frozenset(('md5', 'sha1', 'sha224', 'sha256', 'sha384', 'sha512'))
+algorithms_available = algorithms_guaranteed
+
+
+def new(name, data=b'', **kwargs):
+    '''
+    Return a new digest object for the algorithm name. Keyword
+    arguments of hashlib.new() such as usedforsecurity are accepted
+    and ignored.
+    '''
+    return Hash(name, data)
+
+
+def md5(data=b'', **kwargs):
+    return Hash('md5', data)
+
+
+def sha1(data=b'', **kwargs):
+    return Hash('sha1', data)
+
+
+def sha224(data=b'', **kwargs):
+    return Hash('sha224', data)
+
+
+def sha256(data=b'', **kwargs):
+    return Hash('sha256', data)
+
+
+def sha384(data=b'', **kwargs):
+    return Hash('sha384', data)
+
+
+def sha512(data=b'', **kwargs):
+    return Hash('sha512', data)
@@ -0,0 +1,47 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+hmac compatible message authentication codes computed by NSS::
+
+    import nss.nss as nss
+    import nss.hmac as hmac
+
+    nss.nss_init_nodb()
+    hmac.new(key, b'message', 'sha256').hexdigest()
+
+The objects are `nss.nss.HMAC` instances with the interface of
+hmac.HMAC. digestmod may be an algorithm name or a hashlib style
+constructor, from `nss.hashlib` or from the standard hashlib.
+"""
+
+from hmac import compare_digest
+
+from nss.nss import HMAC
+
+__all__ = ['new', 'digest', 'compare_digest']
+
+
+def _digest_name(digestmod):
+    if digestmod is None:
+        raise TypeError("Missing required parameter 'digestmod'.")
+    if isinstance(digestmod, (str, int)):
+        return digestmod
+    if callable(digestmod):
+        return digestmod().name
+    return digestmod.new().name
+
+
+def new(key, msg=None, digestmod=None):
+    '''
+    Return a new HMAC object keyed with key for the hash algorithm
+    digestmod, msg is passed to update() if given.
+    '''
+    return HMAC(key, msg, _digest_name(digestmod))
+
+
+def digest(key, msg, digest):
+    '''
+    Return the HMAC of msg keyed with key for the hash algorithm digest.
+    '''
+    return HMAC(key, msg, _digest_name(digest)).digest()
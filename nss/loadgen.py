@@ -0,0 +1,568 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+TLS load generator using the NSS stack::
+
+    python -m nss.loadgen [options] host:port
+    python -m nss.loadgen --local -d sql:pki -n test_server [options]
+
+Opens --concurrency connections, one per client thread, and makes
+requests on them for --duration seconds. The threads are started
+evenly over --ramp-up seconds. NSS I/O releases the GIL, so the
+threads spend most of their time waiting on the network in parallel.
+
+After each response the connection is kept for the next request with
+the probability given by --reuse, otherwise it is closed and a new one
+is opened. New connections resume a cached session unless
+--no-resume is given.
+
+By default requests use a small framing understood by the --local
+server: a line ``<request size> <response size>`` followed by the
+request payload, answered by a response payload of the requested size.
+For other servers give the literal request with --request (e.g.
+'GET / HTTP/1.1\\r\\nHost: example.com\\r\\n\\r\\n') and the expected
+response size with --response-size, or omit --response-size to read
+until the server closes the connection.
+
+--local runs an `ssl.Server` in the same process with the certificate
+--server-nickname from the NSS database, so no network or external
+server is needed. The server certificate is not verified in local mode
+or with --insecure.
+
+The report lists connections per second, requests per second,
+throughput and histograms of the connect (TCP and handshake),
+handshake and request latencies. --json writes it as JSON instead.
+"""
+
+import argparse
+import codecs
+import json
+import math
+import random
+import sys
+import threading
+import time
+
+from nss.error import NSPRError
+import nss.io as io
+import nss.nss as nss
+import nss.ssl as ssl
+
+# Upper bounds of the histogram buckets in seconds, the last bucket
+# holds everything larger.
+HISTOGRAM_BOUNDS = [0.0001 * 2 ** i for i in range(18)]
+
+# Percentiles are computed from finer logarithmic buckets,
+# PERCENTILE_BUCKETS per doubling above PERCENTILE_MIN seconds. A bucket
+# is about 2% wide, the reported percentile is its midpoint.
+PERCENTILE_BUCKETS = 32
+PERCENTILE_MIN = 0.000001
+
+versions = {
+    'tls1.0': ssl.SSL_LIBRARY_VERSION_TLS_1_0,
+    'tls1.1': ssl.SSL_LIBRARY_VERSION_TLS_1_1,
+    'tls1.2': ssl.SSL_LIBRARY_VERSION_TLS_1_2,
+    'tls1.3': ssl.SSL_LIBRARY_VERSION_TLS_1_3,
+}
+
+# -----------------------------------------------------------------------------
+
+
+class Histogram:
+    """
+    Latency histogram with logarithmic buckets. Samples are not kept,
+    memory use and report time do not grow with the number of samples.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.percentile_counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        for i, bound in enumerate(HISTOGRAM_BOUNDS):
+            if value <= bound:
+                break
+        else:
+            i = len(HISTOGRAM_BOUNDS)
+        self.counts[i] += 1
+
+        i = int(math.floor(math.log2(max(value, PERCENTILE_MIN) / PERCENTILE_MIN) * PERCENTILE_BUCKETS))
+        self.percentile_counts[i] = self.percentile_counts.get(i, 0) + 1
+
+        if not self.count or value < self.min:
+            self.min = value
+        if not self.count or value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def merge(self, other):
+        if not other.count:
+            return
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        for i, count in other.percentile_counts.items():
+            self.percentile_counts[i] = self.percentile_counts.get(i, 0) + count
+        if not self.count or other.min < self.min:
+            self.min = other.min
+        if not self.count or other.max > self.max:
+            self.max = other.max
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        rank = max(1, int(math.ceil(p / 100.0 * self.count)))
+        seen = 0
+        for i in sorted(self.percentile_counts):
+            seen += self.percentile_counts[i]
+            if seen >= rank:
+                break
+        value = PERCENTILE_MIN * 2 ** ((i + 0.5) / PERCENTILE_BUCKETS)
+        return min(max(value, self.min), self.max)
+
+    def to_dict(self):
+        n = self.count
+        return {
+            'count': n,
+            'mean': self.total / n if n else 0.0,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'p999': self.percentile(99.9),
+            'buckets': [
+                {'le': bound, 'count': count}
+                for bound, count in zip(HISTOGRAM_BOUNDS + [None], self.counts)
+            ],
+        }
+
+    def format_lines(self, width=40):
+        lines = []
+        total = self.count
+        if not total:
+            return lines
+        largest = max(self.counts)
+        first = min(i for i, count in enumerate(self.counts) if count)
+        last = max(i for i, count in enumerate(self.counts) if count)
+        for i in range(first, last + 1):
+            if i < len(HISTOGRAM_BOUNDS):
+                label = '<= %9.3f ms' % (HISTOGRAM_BOUNDS[i] * 1000)
+            else:
+                label = ' > %9.3f ms' % (HISTOGRAM_BOUNDS[-1] * 1000)
+            count = self.counts[i]
+            bar = '#' * int(round(width * count / float(largest)))
+            lines.append('  %s %8d %5.1f%% %s' % (label, count, 100.0 * count / total, bar))
+        return lines
+
+
+class Stats:
+    """
+    Counters and histograms of one client thread, merged for the report.
+    """
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.connect = Histogram()
+        self.handshake = Histogram()
+        self.request = Histogram()
+
+    def merge(self, other):
+        self.connections += other.connections
+        self.requests += other.requests
+        self.errors += other.errors
+        self.bytes_sent += other.bytes_sent
+        self.bytes_received += other.bytes_received
+        self.connect.merge(other.connect)
+        self.handshake.merge(other.handshake)
+        self.request.merge(other.request)
+
+
+# -----------------------------------------------------------------------------
+# Local server
+# -----------------------------------------------------------------------------
+
+
+def local_handler(sock, client_addr):
+    """
+    Answers each ``<request size> <response size>`` line and request
+    payload with a response payload until the client closes the
+    connection.
+    """
+    try:
+        while True:
+            line = sock.readline()
+            if not line:
+                return
+            request_size, response_size = [int(x) for x in line.split()]
+            while request_size > 0:
+                buf = sock.recv(min(request_size, 65536))
+                if not buf:
+                    return
+                request_size -= len(buf)
+            sock.send(b'r' * response_size)
+    except (NSPRError, ValueError):
+        pass
+
+
+def start_local_server(options):
+    server_cert = nss.find_cert_from_nickname(options.server_nickname, options.password)
+    priv_key = nss.find_key_by_any_cert(server_cert, options.password)
+    ssl.config_server_session_id_cache()
+    server = ssl.Server(
+        io.NetworkAddress(io.PR_IpAddrLoopback, 0),
+        server_cert,
+        priv_key,
+        local_handler,
+        workers=options.concurrency,
+        options={ssl.SSL_ENABLE_SESSION_TICKETS: True},
+    )
+    server.socket.set_socket_option(io.PR_SockOpt_NoDelay, True)
+    server.start()
+    return server
+
+
+# -----------------------------------------------------------------------------
+# Client
+# -----------------------------------------------------------------------------
+
+
+def auth_certificate_callback(sock, check_sig, is_server, certdb):
+    cert = sock.get_peer_certificate()
+    pin_args = sock.get_pkcs11_pin_arg()
+    if pin_args is None:
+        pin_args = ()
+    try:
+        approved_usage = cert.verify_now(certdb, check_sig, nss.certificateUsageSSLServer, *pin_args)
+    except NSPRError:
+        return False
+    if not approved_usage & nss.certificateUsageSSLServer:
+        return False
+    return cert.verify_hostname(sock.get_hostname())
+
+
+def insecure_auth_certificate_callback(sock, check_sig, is_server, certdb):
+    return True
+
+
+class Client(threading.Thread):
+    def __init__(self, options, net_addr, start_time, stop_time):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.options = options
+        self.net_addr = net_addr
+        self.start_time = start_time
+        self.stop_time = stop_time
+        self.stats = Stats()
+        self.random = random.Random()
+
+    def connect(self):
+        options = self.options
+        sock = ssl.SSLSocket(self.net_addr.family)
+        sock.set_hostname(options.hostname)
+        if options.insecure:
+            sock.set_auth_certificate_callback(insecure_auth_certificate_callback, None)
+        else:
+            sock.set_auth_certificate_callback(auth_certificate_callback, nss.get_default_certdb())
+        sock.set_ssl_option(ssl.SSL_ENABLE_SESSION_TICKETS, options.resume)
+        sock.set_ssl_option(ssl.SSL_NO_CACHE, not options.resume)
+        sock.set_socket_option(io.PR_SockOpt_NoDelay, True)
+        if options.version_range:
+            sock.set_ssl_version_range(*options.version_range)
+        if options.ciphers:
+            for suite in ssl.ssl_implemented_ciphers:
+                sock.set_cipher_pref(suite, suite in options.ciphers)
+
+        try:
+            start = time.perf_counter()
+            sock.connect(self.net_addr, timeout=options.timeout)
+            connected = time.perf_counter()
+            sock.force_handshake()
+            end = time.perf_counter()
+        except NSPRError:
+            sock.close()
+            raise
+
+        self.stats.connections += 1
+        self.stats.connect.add(end - start)
+        self.stats.handshake.add(end - connected)
+        return sock
+
+    def request(self, sock):
+        """
+        Makes a request, returns False if the connection can not be
+        used again.
+        """
+        options = self.options
+        start = time.perf_counter()
+        sock.send(options.request)
+        self.stats.bytes_sent += len(options.request)
+
+        received = 0
+        while options.response_size is None or received < options.response_size:
+            amount = 65536
+            if options.response_size is not None:
+                amount = min(amount, options.response_size - received)
+            buf = sock.recv(amount)
+            if not buf:
+                if options.response_size is not None:
+                    raise ValueError('connection closed after %d of %d response octets' %
+                                     (received, options.response_size))
+                break
+            received += len(buf)
+
+        self.stats.requests += 1
+        self.stats.bytes_received += received
+        self.stats.request.add(time.perf_counter() - start)
+        return options.response_size is not None
+
+    def run(self):
+        sock = None
+        delay = self.start_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        while time.monotonic() < self.stop_time:
+            try:
+                if sock is None:
+                    sock = self.connect()
+                reusable = self.request(sock)
+            except (NSPRError, ValueError) as e:
+                self.stats.errors += 1
+                if self.stats.errors <= 3:
+                    print('%s: %s' % (self.name, e), file=sys.stderr)
+                reusable = False
+            if sock is not None and (not reusable or self.random.random() >= self.options.reuse):
+                try:
+                    sock.close()
+                except NSPRError:
+                    pass
+                sock = None
+        if sock is not None:
+            sock.close()
+
+
+# -----------------------------------------------------------------------------
+# Report
+# -----------------------------------------------------------------------------
+
+
+def build_report(options, stats, elapsed, resumed):
+    return {
+        'target': '%s:%d' % (options.host, options.port),
+        'concurrency': options.concurrency,
+        'duration': elapsed,
+        'ramp_up': options.ramp_up,
+        'reuse': options.reuse,
+        'resume': options.resume,
+        'request_size': len(options.request),
+        'response_size': options.response_size,
+        'connections': stats.connections,
+        'resumed_connections': resumed,
+        'requests': stats.requests,
+        'errors': stats.errors,
+        'connects_per_sec': stats.connections / elapsed,
+        'requests_per_sec': stats.requests / elapsed,
+        'bytes_sent': stats.bytes_sent,
+        'bytes_received': stats.bytes_received,
+        'throughput_mbytes_per_sec': (stats.bytes_sent + stats.bytes_received) / elapsed / (1024 * 1024),
+        'connect_latency': stats.connect.to_dict(),
+        'handshake_latency': stats.handshake.to_dict(),
+        'request_latency': stats.request.to_dict(),
+    }
+
+
+def print_report(report, stats):
+    print('target:        %s' % report['target'])
+    print('concurrency:   %d' % report['concurrency'])
+    print('duration:      %.2f s' % report['duration'])
+    print('connections:   %d (%d resumed), %.1f/s' %
+          (report['connections'], report['resumed_connections'], report['connects_per_sec']))
+    print('requests:      %d, %.1f/s' % (report['requests'], report['requests_per_sec']))
+    print('errors:        %d' % report['errors'])
+    print('throughput:    %.2f MiB/s (%d octets sent, %d received)' %
+          (report['throughput_mbytes_per_sec'], report['bytes_sent'], report['bytes_received']))
+    for name, histogram in (('connect', stats.connect),
+                            ('handshake', stats.handshake),
+                            ('request', stats.request)):
+        summary = report['%s_latency' % name]
+        print()
+        print('%s latency: p50 %.3f ms, p90 %.3f ms, p99 %.3f ms, max %.3f ms' %
+              (name, summary['p50'] * 1000, summary['p90'] * 1000,
+               summary['p99'] * 1000, summary['max'] * 1000))
+        for line in histogram.format_lines():
+            print(line)
+
+
+# -----------------------------------------------------------------------------
+
+
+def parse_version_range(value):
+    try:
+        if ':' in value:
+            min_version, max_version = value.split(':')
+        else:
+            min_version = max_version = value
+        return versions[min_version], versions[max_version]
+    except (KeyError, ValueError):
+        raise argparse.ArgumentTypeError('version range must be VERSION or MIN:MAX, versions are %s' %
+                                         ', '.join(sorted(versions)))
+
+
+def parse_ciphers(value):
+    suites = []
+    for name in value.split(','):
+        try:
+            suites.append(ssl.ssl_cipher_suite_from_name(name))
+        except (KeyError, ValueError):
+            raise argparse.ArgumentTypeError('unknown cipher suite "%s"' % name)
+    return suites
+
+
+def parse_ratio(value):
+    ratio = float(value)
+    if not 0.0 <= ratio <= 1.0:
+        raise argparse.ArgumentTypeError('must be between 0 and 1')
+    return ratio
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m nss.loadgen',
+        description='TLS load generator using NSS',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument('target', nargs='?', help='server to load as host:port, omit with --local')
+    parser.add_argument('--local', action='store_true', help='run a server in this process and load it')
+    parser.add_argument('-d', '--db-name', help='NSS database name (e.g. "sql:pki"), required by --local')
+    parser.add_argument('-n', '--server-nickname', default='test_server', help='server certificate nickname for --local')
+    parser.add_argument('-w', '--password', help='certificate database password')
+    parser.add_argument('-c', '--concurrency', type=int, default=10, help='number of concurrent connections')
+    parser.add_argument('-t', '--duration', type=float, default=10.0, help='seconds to generate load')
+    parser.add_argument('--ramp-up', type=float, default=0.0, help='seconds over which the connections are started')
+    parser.add_argument('--reuse', type=parse_ratio, default=0.0,
+                        help='probability of reusing a connection for the next request')
+    parser.add_argument('--no-resume', dest='resume', action='store_false',
+                        help='perform a full handshake on every connection')
+    parser.add_argument('--request-size', type=int, default=64, help='request payload octets')
+    parser.add_argument('--response-size', type=int, help='response payload octets, default 1024 without --request')
+    parser.add_argument('--request', help='literal request to send, Python escapes are decoded')
+    parser.add_argument('--hostname', help='server name for SNI and verification, default is the target host')
+    parser.add_argument('--insecure', action='store_true', help='do not verify the server certificate')
+    parser.add_argument('--version-range', type=parse_version_range, help='protocol versions, e.g. tls1.2:tls1.3')
+    parser.add_argument('--ciphers', type=parse_ciphers, help='comma separated cipher suite names to offer')
+    parser.add_argument('--timeout', type=float, default=10.0, help='connect timeout in seconds')
+    parser.add_argument('--json', action='store_true', help='write the report as JSON')
+    return parser
+
+
+def parse_args(argv=None):
+    parser = build_parser()
+    options = parser.parse_args(argv)
+
+    if options.local:
+        if options.target:
+            parser.error('a target can not be given with --local')
+        if not options.db_name:
+            parser.error('--local requires --db-name')
+        options.host, options.port = 'localhost', 0
+        options.insecure = True
+    else:
+        if not options.target:
+            parser.error('a target or --local is required')
+        host, sep, port = options.target.rpartition(':')
+        if not sep or not port.isdigit():
+            parser.error('target must be host:port')
+        options.host, options.port = host.strip('[]'), int(port)
+
+    if options.concurrency < 1:
+        parser.error('--concurrency must be positive')
+
+    if options.request is not None:
+        if options.local:
+            parser.error('--request can not be used with --local')
+        options.request = codecs.decode(options.request, 'unicode_escape').encode('latin-1')
+    else:
+        if options.response_size is None:
+            options.response_size = 1024
+        options.request = (b'%d %d\n' % (options.request_size, options.response_size) +
+                           b'q' * options.request_size)
+
+    if options.hostname is None:
+        options.hostname = options.host
+    options.timeout = io.seconds_to_interval(int(math.ceil(options.timeout)))
+    return options
+
+
+def main(argv=None):
+    options = parse_args(argv)
+
+    if options.db_name:
+        nss.nss_init(options.db_name)
+    else:
+        nss.nss_init_nodb()
+    ssl.set_domestic_policy()
+    if options.password:
+        nss.set_password_callback(lambda slot, retry: options.password)
+
+    server = None
+    if options.local:
+        server = start_local_server(options)
+        options.port = server.net_addr.port
+        net_addr = io.NetworkAddress(io.PR_IpAddrLoopback, options.port)
+    else:
+        net_addr = io.AddrInfo(options.host)[0]
+        net_addr.port = options.port
+
+    ssl.reset_statistics()
+    now = time.monotonic()
+    stop_time = now + options.ramp_up + options.duration
+    clients = [
+        Client(options, net_addr, now + options.ramp_up * i / options.concurrency, stop_time)
+        for i in range(options.concurrency)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.monotonic() - now
+
+    stats = Stats()
+    for client in clients:
+        stats.merge(client.stats)
+    resumed = ssl.get_statistics()['hsh_sid_cache_hits']
+
+    if server is not None:
+        server.shutdown()
+        del server
+        ssl.shutdown_server_session_id_cache()
+    ssl.clear_session_cache()
+    try:
+        nss.nss_shutdown()
+    except NSPRError:
+        # NSS may still hold certificates, e.g. after a failed
+        # verification, they are released when the process exits.
+        pass
+
+    report = build_report(options, stats, elapsed, resumed)
+    if options.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report, stats)
+
+    return 1 if stats.requests == 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
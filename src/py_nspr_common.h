@@ -283,6 +283,24 @@ do {                                            \
     Py_CLEAR(tmp);                              \
 } while (0)
 
+/*
+ * Inputs at least this large are processed with the GIL released, for
+ * smaller ones the cost of releasing and reacquiring it dominates.
+ */
+#define GIL_RELEASE_THRESHOLD 8192
+
+/*
+ * Like Py_BEGIN_ALLOW_THREADS/Py_END_ALLOW_THREADS but the GIL is only
+ * released if cond is true.
+ */
+#define Py_BEGIN_ALLOW_THREADS_IF(cond)                                 \
+{                                                                       \
+    PyThreadState *_save = (cond) ? PyEval_SaveThread() : NULL;
+
+#define Py_END_ALLOW_THREADS_IF                                         \
+    if (_save) PyEval_RestoreThread(_save);                             \
+}
+
 
 /******************************************************************************/
 
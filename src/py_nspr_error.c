@@ -204,8 +204,12 @@ set_nspr_error(const char *format, ...)
 
     exception_obj = PyObject_Call((PyObject *)&NSPRErrorType, empty_tuple, kwds);
     Py_DECREF(kwds);
+    Py_XDECREF(error_message);
 
-    PyErr_SetObject((PyObject *)&NSPRErrorType, exception_obj);
+    if (exception_obj) {
+        PyErr_SetObject((PyObject *)&NSPRErrorType, exception_obj);
+        Py_DECREF(exception_obj);
+    }
 
     return NULL;
 }
@@ -250,8 +254,12 @@ set_cert_verify_error(unsigned long usages, PyObject *log, const char *format, .
 
     exception_obj = PyObject_Call((PyObject *)&CertVerifyErrorType, empty_tuple, kwds);
     Py_DECREF(kwds);
+    Py_XDECREF(error_message);
 
-    PyErr_SetObject((PyObject *)&CertVerifyErrorType, exception_obj);
+    if (exception_obj) {
+        PyErr_SetObject((PyObject *)&CertVerifyErrorType, exception_obj);
+        Py_DECREF(exception_obj);
+    }
 
     return NULL;
 }
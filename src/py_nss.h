@@ -53,10 +53,36 @@ typedef struct {
     SECItem item;
     SECItemKind kind;
     int buffer_exports;
+    Py_buffer py_buffer;        /* if py_buffer.obj is set item.data is borrowed from it */
 } SecItem;
 
 #define SecItem_GET_SIZE(op)  (Py_ssize_t)(op->item.len)
 
+/* ========================================================================== */
+/* ============================= DERIterator Class ========================== */
+/* ========================================================================== */
+
+#define DER_MAX_DEPTH 64
+
+/*
+ * Walks the DER TLV's in data, stack[depth-1] is the [pos, end) range
+ * currently being read, when recursive the contents of a constructed
+ * TLV are pushed onto the stack as it is returned. py_view is a read-only
+ * memoryview of the SecItem data it points into, holding it exported
+ * keeps the data from being changed or freed.
+ */
+typedef struct {
+    PyObject_HEAD
+    PyObject *py_view;
+    const unsigned char *data;
+    bool recursive;
+    int depth;
+    struct {
+        Py_ssize_t pos;
+        Py_ssize_t end;
+    } stack[DER_MAX_DEPTH];
+} DERIterator;
+
 /* ========================================================================== */
 /* =============================== PK11Slot Class =========================== */
 /* ========================================================================== */
@@ -66,6 +92,82 @@ typedef struct {
     PK11SlotInfo *slot;
 } PK11Slot;
 
+/* ========================================================================== */
+/* ============================= KeyPairPool Class ========================== */
+/* ========================================================================== */
+
+/*
+ * Key pairs are kept in a ring of high_water entries starting at head.
+ * Everything from head on is protected by lock. The worker threads
+ * generate key pairs while refill is set, which happens when count
+ * drops to low_water, until count reaches high_water; they wait on
+ * work_cond otherwise. added_cond is notified whenever a key pair is
+ * added or a generation fails.
+ */
+typedef struct {
+    PyObject_HEAD
+    PyObject *py_slot;
+    PyObject *py_key_params;
+    unsigned long mechanism;
+    void *key_params;
+    PRBool token;
+    PRBool sensitive;
+    PRThread **threads;
+    int n_threads;
+    SECKEYPublicKey **pub_keys;
+    SECKEYPrivateKey **priv_keys;
+    int low_water;
+    int high_water;
+    PRLock *lock;
+    PRCondVar *work_cond;
+    PRCondVar *added_cond;
+    int head;
+    int count;
+    int n_generating;
+    bool refill;
+    bool closed;
+    unsigned long hits;
+    unsigned long misses;
+    unsigned long generated;
+    unsigned long failures;
+    PRErrorCode error;
+} KeyPairPool;
+
+/* ========================================================================== */
+/* ============================= RandomPool Class =========================== */
+/* ========================================================================== */
+
+/*
+ * Random octets are kept in buf[0:count] and handed out from its end,
+ * everything from buf on is protected by lock. The refill thread tops
+ * buf up to size while refill is set, which happens when count drops to
+ * low_water, generating into scratch with the lock released; it waits
+ * on refill_cond otherwise. filled_cond is notified after every refill.
+ * fork_generation is the number of forks seen when the pool was set up,
+ * a pool inherited by a child process is emptied before it is used.
+ */
+typedef struct {
+    PyObject_HEAD
+    Py_ssize_t size;
+    Py_ssize_t low_water;
+    Py_ssize_t max_request;
+    unsigned int fork_generation;
+    PRThread *thread;
+    unsigned char *scratch;
+    PRLock *lock;
+    PRCondVar *refill_cond;
+    PRCondVar *filled_cond;
+    unsigned char *buf;
+    Py_ssize_t count;
+    bool refill;
+    bool closed;
+    unsigned long hits;
+    unsigned long misses;
+    unsigned long refills;
+    unsigned long failures;
+    PRErrorCode error;
+} RandomPool;
+
 /* ========================================================================== */
 /* ================================ CertDB Class ============================ */
 /* ========================================================================== */
@@ -135,6 +237,31 @@ typedef struct {
     PyObject *py_public_value;
 } PyDSAPublicKey;
 
+/* ========================================================================== */
+/* ============================= PyECParams Class =========================== */
+/* ========================================================================== */
+
+/*
+ * params holds the DER encoding of the curve as PKCS #11 expects it,
+ * in memory owned by the object. curve is the tag of a named curve or
+ * SEC_OID_UNKNOWN.
+ */
+typedef struct {
+    PyObject_HEAD
+    SECKEYECParams params;
+    SECOidTag curve;
+} PyECParams;
+
+/* ========================================================================== */
+/* =========================== PyECPublicKey Class ========================== */
+/* ========================================================================== */
+
+typedef struct {
+    PyObject_HEAD
+    PyObject *py_params;
+    PyObject *py_public_value;
+} PyECPublicKey;
+
 /* ========================================================================== */
 /* ============================ RSAGenParams Class ========================== */
 /* ========================================================================== */
@@ -187,6 +314,7 @@ typedef struct {
     SECKEYPublicKey *pk;
     PyObject *py_rsa_key;
     PyObject *py_dsa_key;
+    PyObject *py_ec_key;
 } PublicKey;
 
 /* ========================================================================== */
@@ -213,11 +341,57 @@ typedef struct {
 /* ============================= PK11Context Class ========================== */
 /* ========================================================================== */
 
+/*
+ * block_size is the cipher block size of an encryption or decryption
+ * context and digest_len the output length of a digest or HMAC context,
+ * each is 0 when it does not apply or is unknown. They bound the output
+ * of the *_into methods.
+ */
 typedef struct {
     PyObject_HEAD
     PK11Context *pk11_context;
+    int block_size;
+    unsigned int digest_len;
 } PyPK11Context;
 
+/* ========================================================================== */
+/* =========================== PK11ContextPool Class ======================== */
+/* ========================================================================== */
+
+/*
+ * py_idle maps a (mechanism, operation, sym_key, sec_param) tuple to a
+ * list of idle PK11Context objects for it, size is the total number of
+ * idle contexts. py_in_use maps each acquired PK11Context to its tuple
+ * until it is released.
+ */
+typedef struct {
+    PyObject_HEAD
+    PyObject *py_idle;
+    PyObject *py_in_use;
+    Py_ssize_t size;
+    Py_ssize_t max_size;
+} PK11ContextPool;
+
+/* ========================================================================== */
+/* ============================ Hash / HMAC Classes ========================= */
+/* ========================================================================== */
+
+/*
+ * context digests the data given to update(). An HMAC is built from two
+ * digest contexts, which unlike PK11 HMAC contexts can be cloned by
+ * copy(): context starts with the key xor ipad and outer_context with
+ * the key xor opad, outer_context is NULL for a plain Hash.
+ */
+typedef struct {
+    PyObject_HEAD
+    PK11Context *context;
+    PK11Context *outer_context;
+    SECOidTag hash_alg;
+    unsigned int digest_size;
+    unsigned int block_size;
+    PyObject *py_name;
+} Hash;
+
 /* ========================================================================== */
 /* ================================= AVA Class ============================== */
 /* ========================================================================== */
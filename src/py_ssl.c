@@ -19,11 +19,21 @@
 #include "py_nspr_error.h"
 
 #include "sslproto.h"           /* for cipher constants */
+#include "sslexp.h"             /* for 0-RTT anti-replay */
 
 static PyObject *empty_tuple = NULL;
 
 static PyObject *py_ssl_implemented_ciphers = NULL;
 
+/*
+ * Table of SSLCipherSuiteInfo objects for the implemented cipher suites,
+ * built on first use by get_cipher_suite_table(). cipher_suite_info_list
+ * is a tuple in ssl_implemented_ciphers order, cipher_suite_info_table
+ * maps the suite number to the same objects.
+ */
+static PyObject *cipher_suite_info_list = NULL;
+static PyObject *cipher_suite_info_table = NULL;
+
 static PyObject *cipher_suite_name_to_value = NULL;
 static PyObject *cipher_suite_value_to_name = NULL;
 
@@ -33,6 +43,48 @@ static PyObject *ssl_library_version_value_to_name = NULL;
 static PyObject *ssl_library_version_alias_to_value = NULL;
 static PyObject *ssl_library_version_value_to_alias = NULL;
 
+/*
+ * NSS does not report how the server session ID cache was configured
+ * nor how full it is, so we remember the parameters which were passed
+ * to the configuration functions (after applying the same defaults and
+ * limits NSS applies) along with the value of the statistics counters
+ * at configuration time.
+ */
+#define SID_CACHE_DEFAULT_ENTRIES 10000
+#define SID_CACHE_MIN_SSL3_TIMEOUT 5
+#define SID_CACHE_MAX_SSL3_TIMEOUT 86400
+
+typedef struct {
+    PRBool configured;
+    PRBool multi_process;
+    int max_cache_entries;
+    PRUint32 ssl3_timeout;
+    long inserted_base;
+} ServerSIDCacheConfig;
+
+static ServerSIDCacheConfig server_sid_cache_config = {PR_FALSE, PR_FALSE, 0, 0, 0};
+
+/* Replay protection for TLS 1.3 early data, see config_anti_replay() */
+static SSLAntiReplayContext *anti_replay_context = NULL;
+
+/* Set to the Server on the threads it runs, see Server_shutdown() */
+static PRUintn server_thread_index;
+
+/*
+ * The anti-replay context holds NSS objects, it must be released before
+ * NSS shuts down. NSS drops its list of shutdown callbacks after calling
+ * them, so the callback is registered again with the next context.
+ */
+static SECStatus
+anti_replay_context_shutdown(void *app_data, void *nss_data)
+{
+    if (anti_replay_context) {
+        SSL_ReleaseAntiReplayContext(anti_replay_context);
+        anti_replay_context = NULL;
+    }
+    return SECSuccess;
+}
+
 static PyObject *
 ssl_version_to_repr_kind(unsigned int major, unsigned int minor,
                          RepresentationKind repr_kind);
@@ -56,6 +108,12 @@ ssl_library_version_from_pyobject(PyObject *py_value, const char *bound, unsigne
 static PyObject *
 SSLChannelInformation_new_from_SSLChannelInfo(SSLChannelInfo *info);
 
+static SECStatus
+ocsp_staple_refresh_apply(SSLSocket *self, PRFileDesc *pr_socket);
+
+static SECStatus
+ocsp_staple_refresh_stop(SSLSocket *self);
+
 
 static PyObject *
 cipher_suite_to_name(unsigned long cipher_suite)
@@ -272,6 +330,460 @@ SSLVersionRange_to_tuple(SSLVersionRange *range, RepresentationKind repr_kind)
     return tuple;
 }
 
+/*
+ * Write coalescing, see SSLSocket.enable_write_coalescing().
+ *
+ * An NSPR I/O layer pushed on top of the SSL layer collects small
+ * writes in a buffer and hands them to libssl in one write, so they go
+ * out as full size TLS records. The buffer is flushed when it fills,
+ * before reading, polling for read, shutting down and closing, and
+ * optionally by a timer thread once the oldest buffered data has waited
+ * flush_delay. All members are protected by lock. An error flushing on
+ * the timer thread is remembered in error and reported by the next
+ * operation on the socket.
+ */
+#define WRITE_COALESCING_MAX_BUFFER_SIZE 16384
+
+struct PRFilePrivate {
+    PRLock *lock;
+    PRCondVar *cv;
+    PRThread *thread;
+    PRBool stop;
+    char *buf;
+    PRInt32 size;
+    PRInt32 len;
+    PRIntervalTime flush_delay;
+    PRIntervalTime first_write;
+    PRErrorCode error;
+    unsigned long n_writes;
+    unsigned long n_flushes;
+};
+
+static PRDescIdentity write_coalescing_identity = PR_INVALID_IO_LAYER;
+static PRIOMethods write_coalescing_methods;
+
+static PRFileDesc *
+write_coalescing_layer(PRFileDesc *pr_socket)
+{
+    if (pr_socket == NULL || write_coalescing_identity == PR_INVALID_IO_LAYER) {
+        return NULL;
+    }
+    return PR_GetIdentitiesLayer(pr_socket, write_coalescing_identity);
+}
+
+/*
+ * Returns the fd libssl writes should go to directly, bypassing the
+ * write coalescing buffer.
+ */
+static PRFileDesc *
+write_coalescing_bypass(PRFileDesc *pr_socket)
+{
+    PRFileDesc *layer;
+
+    if ((layer = write_coalescing_layer(pr_socket)) == NULL) {
+        return pr_socket;
+    }
+    return layer->lower;
+}
+
+static PRInt32
+write_coalescing_send_all(PRFileDesc *lower, const char *buf, PRInt32 amount,
+                          PRIntervalTime timeout)
+{
+    PRInt32 offset = 0;
+    PRInt32 n_bytes;
+
+    while (offset < amount) {
+        if ((n_bytes = lower->methods->send(lower, buf + offset, amount - offset,
+                                            0, timeout)) < 0) {
+            return offset ? offset : -1;
+        }
+        offset += n_bytes;
+    }
+    return offset;
+}
+
+/* Must be called with wc->lock held */
+static PRStatus
+write_coalescing_flush_locked(PRFileDesc *fd, PRIntervalTime timeout)
+{
+    PRFilePrivate *wc = fd->secret;
+    PRInt32 n_bytes;
+
+    if (wc->len == 0) {
+        return PR_SUCCESS;
+    }
+
+    n_bytes = write_coalescing_send_all(fd->lower, wc->buf, wc->len, timeout);
+    wc->n_flushes++;
+
+    if (n_bytes == wc->len) {
+        wc->len = 0;
+        return PR_SUCCESS;
+    }
+
+    if (PR_GetError() == PR_WOULD_BLOCK_ERROR || PR_GetError() == PR_IO_TIMEOUT_ERROR) {
+        /* Keep what has not been sent for the next attempt */
+        if (n_bytes > 0) {
+            memmove(wc->buf, wc->buf + n_bytes, wc->len - n_bytes);
+            wc->len -= n_bytes;
+        }
+    } else {
+        wc->len = 0;
+    }
+    return PR_FAILURE;
+}
+
+/* Must be called with wc->lock held */
+static PRStatus
+write_coalescing_check_error(PRFilePrivate *wc)
+{
+    if (wc->error) {
+        PR_SetError(wc->error, 0);
+        wc->error = 0;
+        return PR_FAILURE;
+    }
+    return PR_SUCCESS;
+}
+
+static PRInt32
+write_coalescing_append(PRFileDesc *fd, const void *buf, PRInt32 amount,
+                        PRIntervalTime timeout)
+{
+    PRFilePrivate *wc = fd->secret;
+    const char *data = buf;
+    PRInt32 remaining = amount;
+    PRInt32 n_bytes;
+
+    PR_Lock(wc->lock);
+
+    if (write_coalescing_check_error(wc) != PR_SUCCESS) {
+        PR_Unlock(wc->lock);
+        return -1;
+    }
+
+    wc->n_writes++;
+
+    while (remaining > 0) {
+        if (wc->len == 0 && remaining >= wc->size) {
+            /* Nothing to combine with, libssl splits it into full records */
+            n_bytes = write_coalescing_send_all(fd->lower, data, remaining, timeout);
+            wc->n_flushes++;
+            if (n_bytes < 0) {
+                PR_Unlock(wc->lock);
+                return -1;
+            }
+            remaining -= n_bytes;
+            break;
+        }
+
+        if (wc->len == 0) {
+            wc->first_write = PR_IntervalNow();
+            if (wc->thread) {
+                PR_NotifyCondVar(wc->cv);
+            }
+        }
+
+        n_bytes = MIN(wc->size - wc->len, remaining);
+        memcpy(wc->buf + wc->len, data, n_bytes);
+        wc->len += n_bytes;
+        data += n_bytes;
+        remaining -= n_bytes;
+
+        if (wc->len == wc->size) {
+            if (write_coalescing_flush_locked(fd, timeout) != PR_SUCCESS) {
+                PR_Unlock(wc->lock);
+                return -1;
+            }
+        }
+    }
+
+    PR_Unlock(wc->lock);
+    return amount - remaining;
+}
+
+static PRStatus
+write_coalescing_flush(PRFileDesc *fd, PRIntervalTime timeout)
+{
+    PRFilePrivate *wc = fd->secret;
+    PRStatus status;
+
+    PR_Lock(wc->lock);
+    if ((status = write_coalescing_check_error(wc)) == PR_SUCCESS) {
+        status = write_coalescing_flush_locked(fd, timeout);
+    }
+    PR_Unlock(wc->lock);
+
+    return status;
+}
+
+static PRInt32 PR_CALLBACK
+write_coalescing_write(PRFileDesc *fd, const void *buf, PRInt32 amount)
+{
+    return write_coalescing_append(fd, buf, amount, PR_INTERVAL_NO_TIMEOUT);
+}
+
+static PRInt32 PR_CALLBACK
+write_coalescing_send(PRFileDesc *fd, const void *buf, PRInt32 amount,
+                      PRIntn flags, PRIntervalTime timeout)
+{
+    return write_coalescing_append(fd, buf, amount, timeout);
+}
+
+static PRInt32 PR_CALLBACK
+write_coalescing_writev(PRFileDesc *fd, const PRIOVec *iov, PRInt32 iov_size,
+                        PRIntervalTime timeout)
+{
+    PRInt32 total = 0;
+    PRInt32 n_bytes;
+    PRInt32 i;
+
+    for (i = 0; i < iov_size; i++) {
+        if ((n_bytes = write_coalescing_append(fd, iov[i].iov_base, iov[i].iov_len, timeout)) < 0) {
+            return total ? total : -1;
+        }
+        total += n_bytes;
+        if (n_bytes < iov[i].iov_len) {
+            break;
+        }
+    }
+    return total;
+}
+
+static PRInt32 PR_CALLBACK
+write_coalescing_read(PRFileDesc *fd, void *buf, PRInt32 amount)
+{
+    if (write_coalescing_flush(fd, PR_INTERVAL_NO_TIMEOUT) != PR_SUCCESS) {
+        return -1;
+    }
+    return fd->lower->methods->read(fd->lower, buf, amount);
+}
+
+static PRInt32 PR_CALLBACK
+write_coalescing_recv(PRFileDesc *fd, void *buf, PRInt32 amount,
+                      PRIntn flags, PRIntervalTime timeout)
+{
+    if (write_coalescing_flush(fd, timeout) != PR_SUCCESS) {
+        return -1;
+    }
+    return fd->lower->methods->recv(fd->lower, buf, amount, flags, timeout);
+}
+
+static PRInt16 PR_CALLBACK
+write_coalescing_poll(PRFileDesc *fd, PRInt16 in_flags, PRInt16 *out_flags)
+{
+    if (in_flags & PR_POLL_READ) {
+        if (write_coalescing_flush(fd, PR_INTERVAL_NO_TIMEOUT) != PR_SUCCESS) {
+            *out_flags = PR_POLL_ERR;
+            return in_flags;
+        }
+    }
+    return fd->lower->methods->poll(fd->lower, in_flags, out_flags);
+}
+
+static PRStatus PR_CALLBACK
+write_coalescing_shutdown(PRFileDesc *fd, PRIntn how)
+{
+    if (how != PR_SHUTDOWN_RCV) {
+        if (write_coalescing_flush(fd, PR_INTERVAL_NO_TIMEOUT) != PR_SUCCESS) {
+            return PR_FAILURE;
+        }
+    }
+    return fd->lower->methods->shutdown(fd->lower, how);
+}
+
+/*
+ * The default accept methods of a layer push a copy of it, sharing its
+ * PRFilePrivate, onto every accepted socket. Accepted sockets must not
+ * get the listener's buffer, so they are returned without this layer.
+ */
+static PRFileDesc * PR_CALLBACK
+write_coalescing_accept(PRFileDesc *fd, PRNetAddr *addr, PRIntervalTime timeout)
+{
+    return fd->lower->methods->accept(fd->lower, addr, timeout);
+}
+
+static PRInt32 PR_CALLBACK
+write_coalescing_acceptread(PRFileDesc *fd, PRFileDesc **nd, PRNetAddr **raddr,
+                            void *buf, PRInt32 amount, PRIntervalTime timeout)
+{
+    return fd->lower->methods->acceptread(fd->lower, nd, raddr, buf, amount, timeout);
+}
+
+static void
+write_coalescing_thread(void *arg)
+{
+    PRFileDesc *fd = arg;
+    PRFilePrivate *wc = fd->secret;
+    PRIntervalTime elapsed;
+
+    PR_Lock(wc->lock);
+    while (!wc->stop) {
+        if (wc->len == 0) {
+            PR_WaitCondVar(wc->cv, PR_INTERVAL_NO_TIMEOUT);
+            continue;
+        }
+        elapsed = (PRIntervalTime)(PR_IntervalNow() - wc->first_write);
+        if (elapsed < wc->flush_delay) {
+            PR_WaitCondVar(wc->cv, wc->flush_delay - elapsed);
+            continue;
+        }
+        if (write_coalescing_flush_locked(fd, PR_INTERVAL_NO_TIMEOUT) != PR_SUCCESS &&
+            !wc->error) {
+            wc->error = PR_GetError();
+        }
+    }
+    PR_Unlock(wc->lock);
+}
+
+static void
+write_coalescing_stop_thread(PRFilePrivate *wc)
+{
+    if (wc->thread == NULL) {
+        return;
+    }
+    PR_Lock(wc->lock);
+    wc->stop = PR_TRUE;
+    PR_NotifyCondVar(wc->cv);
+    PR_Unlock(wc->lock);
+    PR_JoinThread(wc->thread);
+    wc->thread = NULL;
+}
+
+static void
+write_coalescing_free(PRFilePrivate *wc)
+{
+    if (wc->cv) {
+        PR_DestroyCondVar(wc->cv);
+    }
+    if (wc->lock) {
+        PR_DestroyLock(wc->lock);
+    }
+    PyMem_RawFree(wc->buf);
+    PyMem_RawFree(wc);
+}
+
+/*
+ * Flush the buffer and remove the write coalescing layer from the top of
+ * the stack, fd then refers to the SSL layer again.
+ */
+static PRStatus
+write_coalescing_pop(PRFileDesc *fd)
+{
+    PRFilePrivate *wc = fd->secret;
+    PRFileDesc *layer;
+    PRStatus status;
+    PRErrorCode error = 0;
+
+    /* The timer thread uses fd, it must be gone before the layers are swapped */
+    write_coalescing_stop_thread(wc);
+
+    if ((status = write_coalescing_flush(fd, PR_INTERVAL_NO_TIMEOUT)) != PR_SUCCESS) {
+        error = PR_GetError();
+    }
+
+    if ((layer = PR_PopIOLayer(fd, write_coalescing_identity)) == NULL) {
+        return PR_FAILURE;
+    }
+    layer->secret = NULL;
+    layer->dtor(layer);
+    write_coalescing_free(wc);
+
+    if (error) {
+        PR_SetError(error, 0);
+    }
+    return status;
+}
+
+static PRStatus PR_CALLBACK
+write_coalescing_close(PRFileDesc *fd)
+{
+    PRStatus flush_status;
+    PRErrorCode error = 0;
+
+    if ((flush_status = write_coalescing_pop(fd)) != PR_SUCCESS) {
+        error = PR_GetError();
+    }
+
+    if (fd->methods->close(fd) != PR_SUCCESS) {
+        return PR_FAILURE;
+    }
+
+    if (flush_status != PR_SUCCESS) {
+        PR_SetError(error, 0);
+    }
+    return flush_status;
+}
+
+/*
+ * Push a write coalescing layer on pr_socket. Must be called with the
+ * GIL held, raises an exception on failure.
+ */
+static SECStatus
+write_coalescing_push(PRFileDesc *pr_socket, PRInt32 size, PRIntervalTime flush_delay)
+{
+    PRFilePrivate *wc = NULL;
+    PRFileDesc *layer = NULL;
+
+    if (write_coalescing_identity == PR_INVALID_IO_LAYER) {
+        if ((write_coalescing_identity = PR_GetUniqueIdentity("nss.ssl write coalescing")) == PR_INVALID_IO_LAYER) {
+            set_nspr_error(NULL);
+            return SECFailure;
+        }
+        write_coalescing_methods = *PR_GetDefaultIOMethods();
+        write_coalescing_methods.close      = write_coalescing_close;
+        write_coalescing_methods.read       = write_coalescing_read;
+        write_coalescing_methods.write      = write_coalescing_write;
+        write_coalescing_methods.writev     = write_coalescing_writev;
+        write_coalescing_methods.recv       = write_coalescing_recv;
+        write_coalescing_methods.send       = write_coalescing_send;
+        write_coalescing_methods.poll       = write_coalescing_poll;
+        write_coalescing_methods.shutdown   = write_coalescing_shutdown;
+        write_coalescing_methods.accept     = write_coalescing_accept;
+        write_coalescing_methods.acceptread = write_coalescing_acceptread;
+    }
+
+    if ((wc = PyMem_RawCalloc(1, sizeof(PRFilePrivate))) == NULL ||
+        (wc->buf = PyMem_RawMalloc(size)) == NULL) {
+        PyMem_RawFree(wc);
+        PyErr_NoMemory();
+        return SECFailure;
+    }
+    wc->size = size;
+    wc->flush_delay = flush_delay;
+
+    if ((wc->lock = PR_NewLock()) == NULL ||
+        (wc->cv = PR_NewCondVar(wc->lock)) == NULL ||
+        (layer = PR_CreateIOLayerStub(write_coalescing_identity,
+                                      &write_coalescing_methods)) == NULL) {
+        set_nspr_error(NULL);
+        write_coalescing_free(wc);
+        return SECFailure;
+    }
+    layer->secret = wc;
+
+    if (PR_PushIOLayer(pr_socket, PR_TOP_IO_LAYER, layer) != PR_SUCCESS) {
+        set_nspr_error(NULL);
+        layer->secret = NULL;
+        layer->dtor(layer);
+        write_coalescing_free(wc);
+        return SECFailure;
+    }
+
+    /* pr_socket is now the write coalescing layer */
+    if (flush_delay != PR_INTERVAL_NO_TIMEOUT) {
+        if ((wc->thread = PR_CreateThread(PR_USER_THREAD, write_coalescing_thread, pr_socket,
+                                          PR_PRIORITY_NORMAL, PR_GLOBAL_THREAD,
+                                          PR_JOINABLE_THREAD, 0)) == NULL) {
+            set_nspr_error(NULL);
+            write_coalescing_pop(pr_socket);
+            return SECFailure;
+        }
+    }
+
+    return SECSuccess;
+}
+
 /* ============================ Attribute Access ============================ */
 
 static PyGetSetDef
@@ -360,6 +872,29 @@ SSL_ROLLBACK_DETECTION: (default=True)\n\
     turning this option off means that your code will not comply with the\n\
     TLS 3.1 and SSL 3.0 specifications regarding rollback attack and will\n\
     therefore be vulnerable to this form of attack.\n\
+SSL_ENABLE_OCSP_STAPLING: (default=False)\n\
+    Is a client option that requests the server send a stapled OCSP\n\
+    response for its certificate during the handshake (the TLS\n\
+    status_request extension). The response can be retrieved with\n\
+    `SSLSocket.get_peer_stapled_ocsp_responses()`. Servers supply the\n\
+    response with `SSLSocket.set_stapled_ocsp_responses()` or\n\
+    `SSLSocket.start_ocsp_staple_refresh()`.\n\
+SSL_ENABLE_FALSE_START: (default=False)\n\
+    Is a client option that allows application data to be sent before\n\
+    the server's Finished message has been verified in a full TLS 1.2\n\
+    (or earlier) handshake, saving a round trip for protocols where the\n\
+    client speaks first. False start is only performed if a callback\n\
+    set with `SSLSocket.set_can_false_start_callback()` approves it.\n\
+SSL_ENABLE_SESSION_TICKETS: (default=False)\n\
+    Enables session tickets (RFC 5077, and the TLS 1.3 equivalent),\n\
+    which allow a session to be resumed without the server keeping\n\
+    per session state in its session ID cache.\n\
+SSL_ENABLE_0RTT_DATA: (default=False)\n\
+    Enables TLS 1.3 early data (0-RTT). A client can then send data with\n\
+    `SSLSocket.send_early_data()` in the first flight of a resumed\n\
+    handshake. A server only accepts early data if a replay window has\n\
+    been configured, see `SSLSocket.enable_early_data()`. Early data can\n\
+    be replayed by an attacker, only enable it for idempotent requests.\n\
     \n\
 Keep the following in mind when deciding on the operating parameters\n\
 you want to use with a particular socket.\n\
@@ -577,6 +1112,11 @@ SSLSocket_accept(SSLSocket *self, PyObject *args, PyObject *kwds)
         goto error;
     }
 
+    if (ocsp_staple_refresh_apply(self, pr_socket) != SECSuccess) {
+        set_nspr_error(NULL);
+        goto error;
+    }
+
     if ((return_value = Py_BuildValue("NN", py_ssl_socket, py_netaddr)) == NULL) {
         goto error;
     }
@@ -1127,71 +1667,575 @@ SSLSocket_set_handshake_callback(SSLSocket *self, PyObject *args)
 }
 
 
-PyDoc_STRVAR(SSLSocket_set_pkcs11_pin_arg_doc,
-"set_pkcs11_pin_arg([user_dataN, ...])\n\
-\n\
-:Parameters:\n\
-    user_dataN : object ...\n\
-        zero or more caller supplied parameters which will be passed\n\
-        to the pk11.password_callback()\n\
-");
-
-static PyObject *
-SSLSocket_set_pkcs11_pin_arg(SSLSocket *self, PyObject *args)
+static SECStatus
+ssl_can_false_start_callback(PRFileDesc *fd, void *arg, PRBool *can_false_start)
 {
-    TraceMethodEnter(self);
+    PyGILState_STATE gstate;
+    Py_ssize_t n_base_args = 1;
+    SSLSocket *py_sslsocket = arg;
+    PyObject *result = NULL;
+    PyObject *args = NULL;
+    PyObject *item;
+    Py_ssize_t argc;
+    int i, j;
+    SECStatus sec_status = SECFailure;
 
-    ASSIGN_REF(self->py_pk11_pin_args, args);
+    *can_false_start = PR_FALSE;
 
-    if (SSL_SetPKCS11PinArg(self->pr_socket, args) != SECSuccess) {
-        Py_CLEAR(self->py_pk11_pin_args);
-        return set_nspr_error(NULL);
-    }
+    gstate = PyGILState_Ensure();
 
-    Py_RETURN_NONE;
-}
+    argc = n_base_args;
+    if (py_sslsocket->py_can_false_start_callback_data)
+        argc += PyTuple_Size(py_sslsocket->py_can_false_start_callback_data);
 
-PyDoc_STRVAR(SSLSocket_get_pkcs11_pin_arg_doc,
-"get_pkcs11_pin_arg()\n\
-\n\
-Returns a tuple of arguments or None if not previously set with\n\
-`SSLSocket.set_pkcs11_pin_arg()`\n\
-");
+    if ((args = PyTuple_New(argc)) == NULL) {
+        PySys_WriteStderr("SSLSocket.can_false_start_callback: out of memory\n");
+	goto exit;
+    }
 
-static PyObject *
-SSLSocket_get_pkcs11_pin_arg(SSLSocket *self, PyObject *args)
-{
-    PyObject *pk11_pin_args = NULL;
+    Py_INCREF(py_sslsocket);
+    PyTuple_SetItem(args, 0, (PyObject *)py_sslsocket);
 
-    TraceMethodEnter(self);
+    for (i = n_base_args, j = 0; i < argc; i++, j++) {
+        item = PyTuple_GetItem(py_sslsocket->py_can_false_start_callback_data, j);
+        Py_INCREF(item);
+        PyTuple_SetItem(args, i, item);
+    }
 
-    pk11_pin_args = SSL_RevealPinArg(self->pr_socket);
+    if ((result = PyObject_CallObject(py_sslsocket->py_can_false_start_callback, args)) == NULL) {
+        PySys_WriteStderr("exception in SSLSocket.can_false_start_callback\n");
+        PyErr_Print();  /* this also clears the error */
+	goto exit;
+    }
 
-    assert(pk11_pin_args == self->py_pk11_pin_args);
+    *can_false_start = PyObject_IsTrue(result) ? PR_TRUE : PR_FALSE;
+    sec_status = SECSuccess;
 
-    if (pk11_pin_args == NULL) {
-        Py_RETURN_NONE;
-    }
+ exit:
+    Py_XDECREF(args);
+    Py_XDECREF(result);
 
-    Py_INCREF(pk11_pin_args);
-    return pk11_pin_args;
+    PyGILState_Release(gstate);
+
+    return sec_status;
 }
 
-PyDoc_STRVAR(SSLSocket_config_secure_server_doc,
-"config_secure_server(cert, key, kea)\n\
+PyDoc_STRVAR(SSLSocket_set_can_false_start_callback_doc,
+"set_can_false_start_callback(callback, [user_data1, ...])\n\
 \n\
 :Parameters:\n\
-    cert : Certificate object\n\
-        Server's certificate as a Certificate object\n\
-    key : PrivateKey object\n\
-        Server's private key as a PrivateKey object\n\
-    kea : integer\n\
-        Key exchange type (e.g. ssl_kea_rsa, ssl_kea_dh, etc.)\n\
+    callback : function pointer or None\n\
+        callback to invoke, None removes the callback\n\
+    user_dataN:\n\
+        zero or more caller supplied parameters which will be passed to the callback\n\
 \n\
-Configures a listen socket with the information needed to handshake as\n\
-an SSL server. `SSLSocket.config_secure_server()` requires the\n\
-certificate for the server and the server's private key.\n\
-");
+The callback has the following signature::\n\
+    \n\
+    callback(socket, [user_data1, ...]) -> bool\n\
+\n\
+socket\n\
+    the SSL socket the handshake is being performed on\n\
+user_dataN\n\
+    zero or more caller supplied optional parameters\n\
+\n\
+The callback returns True if the client may send application data\n\
+before the handshake has completed (TLS False Start). If the callback\n\
+raises an exception the handshake is canceled.\n\
+\n\
+False start is only considered if SSL_ENABLE_FALSE_START has been\n\
+enabled with `SSLSocket.set_ssl_option()`, and only applies to full\n\
+TLS 1.2 and earlier handshakes. The callback is invoked after the\n\
+server certificate has been authenticated. NSS's recommended criteria\n\
+(e.g. a forward secret key exchange and an AEAD cipher) are available\n\
+from `SSLSocket.recommended_can_false_start()`.\n\
+\n\
+Example::\n\
+    \n\
+    def can_false_start_callback(sock):\n\
+        return sock.recommended_can_false_start()\n\
+    \n\
+    sock = ssl.SSLSocket(net_addr.family)\n\
+    sock.set_ssl_option(ssl.SSL_ENABLE_FALSE_START, True)\n\
+    sock.set_can_false_start_callback(can_false_start_callback)\n\
+");
+
+static PyObject *
+SSLSocket_set_can_false_start_callback(SSLSocket *self, PyObject *args)
+{
+    Py_ssize_t n_base_args = 1;
+    Py_ssize_t argc;
+    PyObject *callback;
+    PyObject *callback_args = NULL;
+
+    TraceMethodEnter(self);
+
+    argc = PyTuple_Size(args);
+
+    if ((callback = PyTuple_GetItem(args, 0)) == NULL) {
+        PyErr_SetString(PyExc_TypeError, "set_can_false_start_callback: missing callback argument");
+        return NULL;
+    }
+
+    if (PyNone_Check(callback)) {
+        if (SSL_SetCanFalseStartCallback(self->pr_socket, NULL, NULL) != SECSuccess) {
+            return set_nspr_error(NULL);
+        }
+        Py_CLEAR(self->py_can_false_start_callback);
+        Py_CLEAR(self->py_can_false_start_callback_data);
+        Py_RETURN_NONE;
+    }
+
+    if (!PyCallable_Check(callback)) {
+        PyErr_SetString(PyExc_TypeError, "callback must be callable");
+        return NULL;
+    }
+
+    callback_args = PyTuple_GetSlice(args, n_base_args, argc);
+
+    ASSIGN_REF(self->py_can_false_start_callback, callback);
+    ASSIGN_NEW_REF(self->py_can_false_start_callback_data, callback_args);
+
+    if (SSL_SetCanFalseStartCallback(self->pr_socket, ssl_can_false_start_callback, self) != SECSuccess) {
+        return set_nspr_error(NULL);
+    }
+
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(SSLSocket_recommended_can_false_start_doc,
+"recommended_can_false_start() -> bool\n\
+\n\
+Returns True if NSS's recommended criteria for TLS False Start are met\n\
+by the handshake in progress. Intended to be called from the callback\n\
+set with `SSLSocket.set_can_false_start_callback()`.\n\
+");
+
+static PyObject *
+SSLSocket_recommended_can_false_start(SSLSocket *self, PyObject *args)
+{
+    PRBool can_false_start = PR_FALSE;
+
+    TraceMethodEnter(self);
+
+    if (SSL_RecommendedCanFalseStart(self->pr_socket, &can_false_start) != SECSuccess) {
+        return set_nspr_error(NULL);
+    }
+
+    return PyBool_FromLong(can_false_start);
+}
+
+PyDoc_STRVAR(SSLSocket_enable_early_data_doc,
+"enable_early_data(max_early_data_size=None)\n\
+\n\
+:Parameters:\n\
+    max_early_data_size : integer or None\n\
+        Server only, the maximum number of octets of early data a\n\
+        client may send when resuming a session established on this\n\
+        socket. None keeps the NSS default.\n\
+\n\
+Enables TLS 1.3 early data (0-RTT) on the socket, this is equivalent\n\
+to enabling SSL_ENABLE_0RTT_DATA and SSL_ENABLE_SESSION_TICKETS with\n\
+`SSLSocket.set_ssl_option()` plus the server side replay protection.\n\
+Early data is sent when resuming a session from a session ticket, so\n\
+both client and server need session tickets enabled.\n\
+\n\
+Clients send early data with `SSLSocket.send_early_data()`.\n\
+\n\
+Servers only accept early data if a replay window has been configured\n\
+with `ssl.config_anti_replay()` before this is called, otherwise all\n\
+early data is rejected (the handshake still succeeds and the client\n\
+resends the data after the handshake). Accepted early data is returned\n\
+by the first reads on the connection. Whether early data was accepted\n\
+is reported by `SSLChannelInformation.early_data_accepted`.\n\
+\n\
+Call this on the listening socket before accepting connections.\n\
+");
+
+static PyObject *
+SSLSocket_enable_early_data(SSLSocket *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"max_early_data_size", NULL};
+    PyObject *py_max_early_data_size = Py_None;
+    unsigned long max_early_data_size = 0;
+
+    TraceMethodEnter(self);
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|O:enable_early_data", kwlist,
+                                     &py_max_early_data_size))
+        return NULL;
+
+    if (!PyNone_Check(py_max_early_data_size)) {
+        max_early_data_size = PyLong_AsUnsignedLong(py_max_early_data_size);
+        if (PyErr_Occurred()) {
+            return NULL;
+        }
+        if (max_early_data_size > PR_UINT32_MAX) {
+            PyErr_Format(PyExc_OverflowError, "max_early_data_size too large: %lu",
+                         max_early_data_size);
+            return NULL;
+        }
+    }
+
+    /* TLS 1.3 early data is only possible when resuming with a session ticket */
+    if (SSL_OptionSet(self->pr_socket, SSL_ENABLE_SESSION_TICKETS, PR_TRUE) != SECSuccess ||
+        SSL_OptionSet(self->pr_socket, SSL_ENABLE_0RTT_DATA, PR_TRUE) != SECSuccess) {
+        return set_nspr_error(NULL);
+    }
+
+    if (anti_replay_context) {
+        if (SSL_SetAntiReplayContext(self->pr_socket, anti_replay_context) != SECSuccess) {
+            return set_nspr_error(NULL);
+        }
+    }
+
+    if (!PyNone_Check(py_max_early_data_size)) {
+        if (SSL_SetMaxEarlyDataSize(self->pr_socket, (PRUint32)max_early_data_size) != SECSuccess) {
+            return set_nspr_error(NULL);
+        }
+    }
+
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(SSLSocket_send_early_data_doc,
+"send_early_data(data) -> int\n\
+\n\
+:Parameters:\n\
+    data : buffer object\n\
+        the data to send\n\
+\n\
+Client only. Performs the handshake and, if TLS 1.3 early data (0-RTT)\n\
+can be used, sends up to the permitted amount of data right after the\n\
+ClientHello instead of waiting a round trip for the handshake to\n\
+complete.\n\
+\n\
+Returns the number of octets of data the server accepted as early\n\
+data, the remaining data (all of it if 0 is returned) must be sent\n\
+with `SSLSocket.send()` as usual.\n\
+\n\
+Early data can only be sent when resuming a session with a server\n\
+which permits early data and requires SSL_ENABLE_0RTT_DATA (see\n\
+`SSLSocket.enable_early_data()`). If early data can not be used the\n\
+handshake is performed and 0 is returned. The server may also reject\n\
+the early data, e.g. because it could be a replay, in which case 0 is\n\
+returned as well. `SSLChannelInformation.early_data_accepted` reports\n\
+the outcome after the call.\n\
+\n\
+On a non-blocking socket the handshake is not completed, the number of\n\
+octets sent as early data is returned and the caller must check\n\
+`SSLChannelInformation.early_data_accepted` once the handshake has\n\
+completed.\n\
+\n\
+Example::\n\
+    \n\
+    sock.enable_early_data()\n\
+    sock.connect(net_addr)\n\
+    n_sent = sock.send_early_data(request)\n\
+    sock.send(request[n_sent:])\n\
+");
+
+static PyObject *
+SSLSocket_send_early_data(SSLSocket *self, PyObject *args)
+{
+    Py_buffer py_buffer;
+    PRSocketOptionData nonblocking;
+    PRSocketOptionData opt;
+    SSLPreliminaryChannelInfo pre_info;
+    SSLChannelInfo info;
+    PRErrorCode error = 0;
+    PRBool in_progress = PR_FALSE;
+    PRInt32 amount = 0;
+    PRInt32 n_bytes;
+
+    TraceMethodEnter(self);
+
+    if (!PyArg_ParseTuple(args, "y*:send_early_data", &py_buffer))
+        return NULL;
+
+    if (py_buffer.len > PR_INT32_MAX) {
+        PyBuffer_Release(&py_buffer);
+        PyErr_SetString(PyExc_OverflowError, "data too large");
+        return NULL;
+    }
+
+    nonblocking.option = PR_SockOpt_Nonblocking;
+    opt.option = PR_SockOpt_Nonblocking;
+
+    Py_BEGIN_ALLOW_THREADS
+    /*
+     * Early data can only be written once the ClientHello is out and
+     * before the server's reply has been processed, so drive the
+     * handshake without blocking until it needs to read.
+     */
+    if (PR_GetSocketOption(self->pr_socket, &nonblocking) != PR_SUCCESS) {
+        error = PR_GetError();
+        goto done;
+    }
+
+    if (!nonblocking.value.non_blocking) {
+        opt.value.non_blocking = PR_TRUE;
+        if (PR_SetSocketOption(self->pr_socket, &opt) != PR_SUCCESS) {
+            error = PR_GetError();
+            goto done;
+        }
+    }
+
+    if (SSL_ForceHandshake(self->pr_socket) != SECSuccess) {
+        if (PR_GetError() != PR_WOULD_BLOCK_ERROR) {
+            error = PR_GetError();
+            goto restore;
+        }
+        in_progress = PR_TRUE;
+    }
+
+    if (in_progress) {
+        if (SSL_GetPreliminaryChannelInfo(self->pr_socket, &pre_info, sizeof(pre_info)) != SECSuccess) {
+            error = PR_GetError();
+            goto restore;
+        }
+
+        if (pre_info.canSendEarlyData && pre_info.maxEarlyDataSize > 0) {
+            n_bytes = (PRInt32)MIN((PRUint32)py_buffer.len, pre_info.maxEarlyDataSize);
+            /* The socket is non-blocking, libssl remembers the timeout */
+            if ((amount = PR_Send(write_coalescing_bypass(self->pr_socket), py_buffer.buf, n_bytes, 0,
+                                  PR_INTERVAL_NO_TIMEOUT)) < 0) {
+                if (PR_GetError() != PR_WOULD_BLOCK_ERROR) {
+                    error = PR_GetError();
+                    goto restore;
+                }
+                amount = 0;
+            }
+        }
+    }
+
+ restore:
+    if (!nonblocking.value.non_blocking) {
+        if (PR_SetSocketOption(self->pr_socket, &nonblocking) != PR_SUCCESS && !error) {
+            error = PR_GetError();
+        }
+
+        /* Complete the handshake to learn whether the server accepted the data */
+        if (!error && in_progress) {
+            if (SSL_ForceHandshake(self->pr_socket) != SECSuccess) {
+                error = PR_GetError();
+            }
+        }
+
+        if (!error && amount > 0) {
+            if (SSL_GetChannelInfo(self->pr_socket, &info, sizeof(info)) != SECSuccess) {
+                error = PR_GetError();
+            } else if (!info.earlyDataAccepted) {
+                amount = 0;
+            }
+        }
+    }
+
+ done:
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&py_buffer);
+
+    if (error) {
+        PR_SetError(error, 0);
+        return set_nspr_error(NULL);
+    }
+
+    return PyLong_FromLong(amount);
+}
+
+PyDoc_STRVAR(SSLSocket_recv_early_data_doc,
+"recv_early_data(amount) -> buf\n\
+\n\
+:Parameters:\n\
+    amount : integer\n\
+        the maximum number of bytes to receive\n\
+\n\
+Server only. Processes the client's first flight and returns up to\n\
+amount octets of TLS 1.3 early data (0-RTT) sent with it, without\n\
+waiting for the client to complete the handshake. This lets the server\n\
+work on the request while the client's final handshake flight is in\n\
+transit, saving up to one round trip of response latency. An empty\n\
+buffer is returned if the client sent no early data or it was rejected.\n\
+\n\
+Accepting early data requires `SSLSocket.enable_early_data()` on the\n\
+listening socket. Early data not returned here (e.g. because it\n\
+exceeds amount or arrived later) is returned by `SSLSocket.recv()`.\n\
+libssl does not send application data from a server before the\n\
+handshake has completed, `SSLSocket.send()` waits for the client's\n\
+Finished message.\n\
+\n\
+Example::\n\
+    \n\
+    client_sock, client_addr = sock.accept()\n\
+    client_sock.reset_handshake(True)\n\
+    request = client_sock.recv_early_data(1024)\n\
+    if not request:\n\
+        request = client_sock.recv(1024)\n\
+");
+
+static PyObject *
+SSLSocket_recv_early_data(SSLSocket *self, PyObject *args)
+{
+    long requested_amount = 0;
+    PyObject *py_buf = NULL;
+    PRSocketOptionData nonblocking;
+    PRSocketOptionData opt;
+    PRErrorCode error = 0;
+    PRInt32 amount_read = 0;
+
+    TraceMethodEnter(self);
+
+    if (!PyArg_ParseTuple(args, "l:recv_early_data", &requested_amount))
+        return NULL;
+
+    if (requested_amount < 0 || requested_amount > PR_INT32_MAX) {
+        PyErr_Format(PyExc_ValueError, "amount out of range: %ld", requested_amount);
+        return NULL;
+    }
+
+    if ((py_buf = PyBytes_FromStringAndSize(NULL, requested_amount)) == NULL) {
+        return NULL;
+    }
+
+    nonblocking.option = PR_SockOpt_Nonblocking;
+    opt.option = PR_SockOpt_Nonblocking;
+
+    Py_BEGIN_ALLOW_THREADS
+    if (PR_GetSocketOption(self->pr_socket, &nonblocking) != PR_SUCCESS) {
+        error = PR_GetError();
+        goto done;
+    }
+
+    if (!nonblocking.value.non_blocking) {
+        opt.value.non_blocking = PR_TRUE;
+        if (PR_SetSocketOption(self->pr_socket, &opt) != PR_SUCCESS) {
+            error = PR_GetError();
+            goto done;
+        }
+
+        /*
+         * Wait for the ClientHello, the handshake below must not give
+         * up before the client's first flight has arrived.
+         */
+        {
+            PRPollDesc poll_desc;
+
+            poll_desc.fd = self->pr_socket;
+            poll_desc.in_flags = PR_POLL_READ;
+            poll_desc.out_flags = 0;
+            if (PR_Poll(&poll_desc, 1, PR_INTERVAL_NO_TIMEOUT) < 0) {
+                error = PR_GetError();
+                goto restore;
+            }
+        }
+    }
+
+    if (SSL_ForceHandshake(self->pr_socket) != SECSuccess) {
+        if (PR_GetError() != PR_WOULD_BLOCK_ERROR) {
+            error = PR_GetError();
+            goto restore;
+        }
+
+        /* The handshake is waiting for the client, return any early data */
+        if ((amount_read = PR_Recv(self->pr_socket, PyBytes_AS_STRING(py_buf),
+                                   requested_amount, 0, PR_INTERVAL_NO_TIMEOUT)) < 0) {
+            if (PR_GetError() != PR_WOULD_BLOCK_ERROR) {
+                error = PR_GetError();
+            }
+            amount_read = 0;
+        }
+    }
+
+ restore:
+    if (!nonblocking.value.non_blocking) {
+        if (PR_SetSocketOption(self->pr_socket, &nonblocking) != PR_SUCCESS && !error) {
+            error = PR_GetError();
+        }
+    }
+
+ done:
+    Py_END_ALLOW_THREADS
+
+    if (error) {
+        Py_DECREF(py_buf);
+        PR_SetError(error, 0);
+        return set_nspr_error(NULL);
+    }
+
+    if (amount_read != requested_amount) {
+        if (_PyBytes_Resize(&py_buf, amount_read) < 0) {
+            return NULL;
+        }
+    }
+
+    return py_buf;
+}
+
+PyDoc_STRVAR(SSLSocket_set_pkcs11_pin_arg_doc,
+"set_pkcs11_pin_arg([user_dataN, ...])\n\
+\n\
+:Parameters:\n\
+    user_dataN : object ...\n\
+        zero or more caller supplied parameters which will be passed\n\
+        to the pk11.password_callback()\n\
+");
+
+static PyObject *
+SSLSocket_set_pkcs11_pin_arg(SSLSocket *self, PyObject *args)
+{
+    TraceMethodEnter(self);
+
+    ASSIGN_REF(self->py_pk11_pin_args, args);
+
+    if (SSL_SetPKCS11PinArg(self->pr_socket, args) != SECSuccess) {
+        Py_CLEAR(self->py_pk11_pin_args);
+        return set_nspr_error(NULL);
+    }
+
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(SSLSocket_get_pkcs11_pin_arg_doc,
+"get_pkcs11_pin_arg()\n\
+\n\
+Returns a tuple of arguments or None if not previously set with\n\
+`SSLSocket.set_pkcs11_pin_arg()`\n\
+");
+
+static PyObject *
+SSLSocket_get_pkcs11_pin_arg(SSLSocket *self, PyObject *args)
+{
+    PyObject *pk11_pin_args = NULL;
+
+    TraceMethodEnter(self);
+
+    pk11_pin_args = SSL_RevealPinArg(self->pr_socket);
+
+    assert(pk11_pin_args == self->py_pk11_pin_args);
+
+    if (pk11_pin_args == NULL) {
+        Py_RETURN_NONE;
+    }
+
+    Py_INCREF(pk11_pin_args);
+    return pk11_pin_args;
+}
+
+PyDoc_STRVAR(SSLSocket_config_secure_server_doc,
+"config_secure_server(cert, key, kea)\n\
+\n\
+:Parameters:\n\
+    cert : Certificate object\n\
+        Server's certificate as a Certificate object\n\
+    key : PrivateKey object\n\
+        Server's private key as a PrivateKey object\n\
+    kea : integer\n\
+        Key exchange type (e.g. ssl_kea_rsa, ssl_kea_dh, etc.)\n\
+\n\
+Configures a listen socket with the information needed to handshake as\n\
+an SSL server. `SSLSocket.config_secure_server()` requires the\n\
+certificate for the server and the server's private key.\n\
+");
 
 static PyObject *
 SSLSocket_config_secure_server(SSLSocket *self, PyObject *args)
@@ -2061,40 +3105,2070 @@ SSLSocket_get_negotiated_host(SSLSocket *self, PyObject *args)
 }
 
 
-static PyObject *
+static SECStatus
+SECItem_from_pyobject(PyObject *obj, SECItem *item)
+{
+    Py_buffer py_buffer;
+    SECStatus result;
+
+    if (PySecItem_Check(obj)) {
+        return SECITEM_CopyItem(NULL, item, &((SecItem *)obj)->item);
+    }
+
+    if (!PyObject_CheckBuffer(obj)) {
+        PyErr_Format(PyExc_TypeError, "must be SecItem or buffer object, not %.200s",
+                     Py_TYPE(obj)->tp_name);
+        return SECFailure;
+    }
+
+    if (PyObject_GetBuffer(obj, &py_buffer, PyBUF_SIMPLE) != 0) {
+        return SECFailure;
+    }
+
+    {
+        SECItem tmp = {siBuffer, py_buffer.buf, py_buffer.len};
+        result = SECITEM_CopyItem(NULL, item, &tmp);
+    }
+    PyBuffer_Release(&py_buffer);
+
+    if (result != SECSuccess) {
+        PyErr_NoMemory();
+    }
+    return result;
+}
+
+/*
+ * Convert a single OCSP response (SecItem or buffer object) or a
+ * sequence of them into a newly allocated SECItemArray which must be
+ * freed with SECITEM_FreeArray(array, PR_TRUE). None yields NULL.
+ */
+static SECStatus
+ocsp_responses_from_pyobject(PyObject *py_responses, SECItemArray **responses)
+{
+    PyObject *py_seq = NULL;
+    SECItemArray *array = NULL;
+    Py_ssize_t n_responses, i;
+
+    *responses = NULL;
+
+    if (PyNone_Check(py_responses)) {
+        return SECSuccess;
+    }
+
+    if (PySecItem_Check(py_responses) || PyObject_CheckBuffer(py_responses)) {
+        if ((array = SECITEM_AllocArray(NULL, NULL, 1)) == NULL) {
+            PyErr_NoMemory();
+            return SECFailure;
+        }
+        if (SECItem_from_pyobject(py_responses, &array->items[0]) != SECSuccess) {
+            SECITEM_FreeArray(array, PR_TRUE);
+            return SECFailure;
+        }
+        *responses = array;
+        return SECSuccess;
+    }
+
+    if ((py_seq = PySequence_Fast(py_responses, "OCSP responses must be a SecItem, buffer object, sequence or None")) == NULL) {
+        return SECFailure;
+    }
+
+    n_responses = PySequence_Fast_GET_SIZE(py_seq);
+    if ((array = SECITEM_AllocArray(NULL, NULL, n_responses)) == NULL) {
+        Py_DECREF(py_seq);
+        PyErr_NoMemory();
+        return SECFailure;
+    }
+
+    for (i = 0; i < n_responses; i++) {
+        if (SECItem_from_pyobject(PySequence_Fast_GET_ITEM(py_seq, i), &array->items[i]) != SECSuccess) {
+            SECITEM_FreeArray(array, PR_TRUE);
+            Py_DECREF(py_seq);
+            return SECFailure;
+        }
+    }
+
+    Py_DECREF(py_seq);
+    *responses = array;
+    return SECSuccess;
+}
+
+PyDoc_STRVAR(SSLSocket_set_stapled_ocsp_responses_doc,
+"set_stapled_ocsp_responses(responses, kea=ssl_kea_rsa)\n\
+\n\
+:Parameters:\n\
+    responses : SecItem, buffer object, sequence of them, or None\n\
+        One or more DER encoded OCSP responses for the server\n\
+        certificate. None removes any previously set responses.\n\
+    kea : integer\n\
+        Key exchange type of the server certificate the responses\n\
+        belong to (e.g. nss.ssl_kea_rsa, nss.ssl_kea_ecdh, etc.)\n\
+\n\
+Sets the OCSP responses a server sends to clients which request OCSP\n\
+stapling (see SSL_ENABLE_OCSP_STAPLING in\n\
+`SSLSocket.set_ssl_option()`). Clients can then check the revocation\n\
+status of the server certificate without contacting the OCSP\n\
+responder themselves. The responses are copied.\n\
+\n\
+Set the responses on the listen socket after calling\n\
+`SSLSocket.config_secure_server()` and before accepting connections,\n\
+or on an accepted socket before the handshake. OCSP responses expire,\n\
+long running servers should use `SSLSocket.start_ocsp_staple_refresh()`\n\
+instead.\n\
+");
+
+static PyObject *
+SSLSocket_set_stapled_ocsp_responses(SSLSocket *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"responses", "kea", NULL};
+    PyObject *py_responses = NULL;
+    int kea = ssl_kea_rsa;
+    SECItemArray *responses = NULL;
+    SECStatus status;
+
+    TraceMethodEnter(self);
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|i:set_stapled_ocsp_responses", kwlist,
+                                     &py_responses, &kea))
+        return NULL;
+
+    if (ocsp_responses_from_pyobject(py_responses, &responses) != SECSuccess) {
+        return NULL;
+    }
+
+    status = SSL_SetStapledOCSPResponses(self->pr_socket, responses, kea);
+
+    if (responses) {
+        SECITEM_FreeArray(responses, PR_TRUE);
+    }
+
+    if (status != SECSuccess) {
+        return set_nspr_error(NULL);
+    }
+
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(SSLSocket_get_peer_stapled_ocsp_responses_doc,
+"get_peer_stapled_ocsp_responses() -> (SecItem, ...)\n\
+\n\
+Returns a tuple of the DER encoded OCSP responses the server stapled\n\
+to the handshake. The tuple is empty if the server did not staple a\n\
+response. The client must have enabled SSL_ENABLE_OCSP_STAPLING with\n\
+`SSLSocket.set_ssl_option()` before the handshake.\n\
+\n\
+libssl does not validate the responses, call this from the auth\n\
+certificate callback (see `SSLSocket.set_auth_certificate_callback()`)\n\
+and pass each response to\n\
+`Certificate.cache_ocsp_response_from_side_channel()` before verifying\n\
+the peer certificate. Subsequent OCSP checks of the certificate, e.g.\n\
+by `Certificate.check_ocsp_status()` or an OCSP enabled\n\
+`Certificate.verify_now()`, are then answered from the cache without\n\
+contacting the OCSP responder.\n\
+\n\
+Example::\n\
+    \n\
+    def auth_certificate_callback(sock, check_sig, is_server, certdb):\n\
+        cert = sock.get_peer_certificate()\n\
+        for response in sock.get_peer_stapled_ocsp_responses():\n\
+            cert.cache_ocsp_response_from_side_channel(certdb, None, response)\n\
+        approved_usage = cert.verify_now(certdb, check_sig, nss.certificateUsageSSLServer)\n\
+        ...\n\
+");
+
+static PyObject *
+SSLSocket_get_peer_stapled_ocsp_responses(SSLSocket *self, PyObject *args)
+{
+    const SECItemArray *responses = NULL;
+    PyObject *py_responses = NULL;
+    PyObject *py_response = NULL;
+    unsigned int i;
+
+    TraceMethodEnter(self);
+
+    if ((responses = SSL_PeerStapledOCSPResponses(self->pr_socket)) == NULL) {
+        return set_nspr_error(NULL);
+    }
+
+    if ((py_responses = PyTuple_New(responses->len)) == NULL) {
+        return NULL;
+    }
+
+    for (i = 0; i < responses->len; i++) {
+        if ((py_response = SecItem_new_from_SECItem(&responses->items[i], SECITEM_buffer)) == NULL) {
+            Py_DECREF(py_responses);
+            return NULL;
+        }
+        PyTuple_SetItem(py_responses, i, py_response);
+    }
+
+    return py_responses;
+}
+
+/*
+ * Invoke the Python OCSP staple callback and store the responses it
+ * returns. Must be called with the GIL held.
+ */
+static SECStatus
+ocsp_staple_refresh_call(SSLSocket *self)
+{
+    OCSPStapleRefresh *refresh = self->ocsp_staple_refresh;
+    Py_ssize_t n_base_args = 1;
+    Py_ssize_t argc;
+    PyObject *args = NULL;
+    PyObject *result = NULL;
+    PyObject *item;
+    SECItemArray *responses = NULL;
+    SECItemArray *prev_responses = NULL;
+    SECStatus status = SECFailure;
+    Py_ssize_t i, j;
+
+    argc = n_base_args;
+    if (self->py_ocsp_staple_callback_data)
+        argc += PyTuple_Size(self->py_ocsp_staple_callback_data);
+
+    /*
+     * Keep the socket alive until we are done, the callback may drop
+     * the last reference to it.
+     */
+    Py_INCREF(self);
+
+    if ((args = PyTuple_New(argc)) == NULL) {
+        goto exit;
+    }
+
+    Py_INCREF(self);
+    PyTuple_SetItem(args, 0, (PyObject *)self);
+
+    for (i = n_base_args, j = 0; i < argc; i++, j++) {
+        item = PyTuple_GetItem(self->py_ocsp_staple_callback_data, j);
+        Py_INCREF(item);
+        PyTuple_SetItem(args, i, item);
+    }
+
+    result = PyObject_CallObject(self->py_ocsp_staple_callback, args);
+    Py_DECREF(args);
+
+    if (result == NULL) {
+        goto exit;
+    }
+
+    /* None means keep the current responses */
+    if (PyNone_Check(result)) {
+        Py_DECREF(result);
+        status = SECSuccess;
+        goto exit;
+    }
+
+    if (ocsp_responses_from_pyobject(result, &responses) != SECSuccess) {
+        Py_DECREF(result);
+        goto exit;
+    }
+    Py_DECREF(result);
+
+    /* The callback stopped or restarted the refresh */
+    if (self->ocsp_staple_refresh != refresh) {
+        if (responses) {
+            SECITEM_FreeArray(responses, PR_TRUE);
+        }
+        status = SECSuccess;
+        goto exit;
+    }
+
+    PR_Lock(refresh->lock);
+    prev_responses = refresh->responses;
+    refresh->responses = responses;
+    PR_Unlock(refresh->lock);
+
+    if (prev_responses) {
+        SECITEM_FreeArray(prev_responses, PR_TRUE);
+    }
+    status = SECSuccess;
+
+ exit:
+    Py_DECREF(self);
+    return status;
+}
+
+static void
+ocsp_staple_refresh_free(OCSPStapleRefresh *refresh)
+{
+    if (refresh->responses) {
+        SECITEM_FreeArray(refresh->responses, PR_TRUE);
+    }
+    if (refresh->cv) {
+        PR_DestroyCondVar(refresh->cv);
+    }
+    if (refresh->lock) {
+        PR_DestroyLock(refresh->lock);
+    }
+    PyMem_RawFree(refresh);
+}
+
+static void
+ocsp_staple_refresh_thread(void *arg)
+{
+    OCSPStapleRefresh *refresh = arg;
+    SSLSocket *self = refresh->sock;
+    PyGILState_STATE gstate;
+    PRIntervalTime start, elapsed;
+    PRBool stop;
+
+    PR_Lock(refresh->lock);
+    while (!refresh->stop) {
+        start = PR_IntervalNow();
+        elapsed = 0;
+        while (!refresh->stop && elapsed < refresh->interval) {
+            PR_WaitCondVar(refresh->cv, refresh->interval - elapsed);
+            elapsed = (PRIntervalTime)(PR_IntervalNow() - start);
+        }
+        if (refresh->stop) {
+            break;
+        }
+        PR_Unlock(refresh->lock);
+
+        gstate = PyGILState_Ensure();
+
+        /*
+         * The socket is only guaranteed to be alive if a stop has not
+         * been requested, stop is always set while holding the GIL.
+         */
+        PR_Lock(refresh->lock);
+        stop = refresh->stop;
+        PR_Unlock(refresh->lock);
+
+        if (!stop && ocsp_staple_refresh_call(self) != SECSuccess) {
+            PySys_WriteStderr("exception in SSLSocket OCSP staple refresh callback\n");
+            PyErr_Print();  /* this also clears the error */
+        }
+
+        PyGILState_Release(gstate);
+
+        PR_Lock(refresh->lock);
+    }
+
+    if (refresh->detached) {
+        /* Stopped from within the callback, nobody is waiting for us */
+        PR_Unlock(refresh->lock);
+        ocsp_staple_refresh_free(refresh);
+        return;
+    }
+
+    refresh->done = PR_TRUE;
+    PR_NotifyCondVar(refresh->cv);
+    PR_Unlock(refresh->lock);
+}
+
+/*
+ * Stop the refresh thread and release its resources. Must be called
+ * with the GIL held.
+ */
+static SECStatus
+ocsp_staple_refresh_stop(SSLSocket *self)
+{
+    OCSPStapleRefresh *refresh = self->ocsp_staple_refresh;
+
+    if (refresh == NULL) {
+        return SECSuccess;
+    }
+
+    self->ocsp_staple_refresh = NULL;
+
+    PR_Lock(refresh->lock);
+    refresh->stop = PR_TRUE;
+
+    if (refresh->thread == NULL) {
+        /* Stopped by the initial callback, the thread was never started */
+        PR_Unlock(refresh->lock);
+        ocsp_staple_refresh_free(refresh);
+        return SECSuccess;
+    }
+
+    if (PR_GetCurrentThread() == refresh->thread) {
+        /*
+         * Called from the callback (possibly by deallocating the socket),
+         * the thread frees the shared state itself once the callback
+         * returns.
+         */
+        refresh->detached = PR_TRUE;
+        PR_Unlock(refresh->lock);
+        return SECSuccess;
+    }
+
+    PR_NotifyCondVar(refresh->cv);
+
+    Py_BEGIN_ALLOW_THREADS
+    while (!refresh->done) {
+        PR_WaitCondVar(refresh->cv, PR_INTERVAL_NO_TIMEOUT);
+    }
+    Py_END_ALLOW_THREADS
+
+    PR_Unlock(refresh->lock);
+    ocsp_staple_refresh_free(refresh);
+
+    return SECSuccess;
+}
+
+/*
+ * Apply the current refreshed staple to a newly accepted connection.
+ */
+static SECStatus
+ocsp_staple_refresh_apply(SSLSocket *self, PRFileDesc *pr_socket)
+{
+    OCSPStapleRefresh *refresh = self->ocsp_staple_refresh;
+    SECStatus status = SECSuccess;
+
+    if (refresh == NULL) {
+        return SECSuccess;
+    }
+
+    PR_Lock(refresh->lock);
+    if (refresh->responses) {
+        status = SSL_SetStapledOCSPResponses(pr_socket, refresh->responses, refresh->kea);
+    }
+    PR_Unlock(refresh->lock);
+
+    return status;
+}
+
+PyDoc_STRVAR(SSLSocket_start_ocsp_staple_refresh_doc,
+"start_ocsp_staple_refresh(interval, kea, callback, [user_data1, ...])\n\
+\n\
+:Parameters:\n\
+    interval : number\n\
+        Number of seconds between refreshes.\n\
+    kea : integer\n\
+        Key exchange type of the server certificate the responses\n\
+        belong to (e.g. nss.ssl_kea_rsa, nss.ssl_kea_ecdh, etc.)\n\
+    callback : function pointer\n\
+        callback which supplies the OCSP responses\n\
+    user_dataN:\n\
+        zero or more caller supplied parameters which will be passed to the callback\n\
+\n\
+The callback has the following signature::\n\
+    \n\
+    callback(socket, [user_data1, ...]) -> responses\n\
+\n\
+socket\n\
+    the listening SSL socket\n\
+user_dataN\n\
+    zero or more caller supplied optional parameters\n\
+responses\n\
+    A DER encoded OCSP response as a SecItem or buffer object, a\n\
+    sequence of them, or None to keep the current responses.\n\
+\n\
+Keeps the OCSP responses stapled by a server fresh. The callback is\n\
+invoked once immediately, exceptions it raises are propagated to the\n\
+caller. It is then invoked every interval seconds on a background\n\
+thread. Exceptions raised on the background thread are printed and the\n\
+previous responses are kept.\n\
+\n\
+Each connection subsequently returned by `SSLSocket.accept()` on this\n\
+socket staples the most recently obtained responses (see\n\
+`SSLSocket.set_stapled_ocsp_responses()`). The callback typically\n\
+fetches a new response from the OCSP responder of the server\n\
+certificate, choose an interval well inside the validity period of the\n\
+responses.\n\
+\n\
+Any previously started refresh is stopped first. Stop the refresh with\n\
+`SSLSocket.stop_ocsp_staple_refresh()` before closing the socket and\n\
+before the interpreter exits.\n\
+\n\
+Example::\n\
+    \n\
+    def fetch_staple(sock, cert):\n\
+        return fetch_ocsp_response(cert)\n\
+    \n\
+    sock.config_secure_server(server_cert, priv_key, server_cert_kea)\n\
+    sock.start_ocsp_staple_refresh(3600, server_cert_kea, fetch_staple, server_cert)\n\
+");
+
+static PyObject *
+SSLSocket_start_ocsp_staple_refresh(SSLSocket *self, PyObject *args)
+{
+    Py_ssize_t n_base_args = 3;
+    Py_ssize_t argc;
+    PyObject *parse_args = NULL;
+    double interval;
+    int kea;
+    PyObject *callback = NULL;
+    PyObject *callback_args = NULL;
+    OCSPStapleRefresh *refresh = NULL;
+
+    TraceMethodEnter(self);
+
+    argc = PyTuple_Size(args);
+    if ((parse_args = PyTuple_GetSlice(args, 0, n_base_args)) == NULL) {
+        return NULL;
+    }
+    if (!PyArg_ParseTuple(parse_args, "diO:start_ocsp_staple_refresh",
+                          &interval, &kea, &callback)) {
+        Py_DECREF(parse_args);
+        return NULL;
+    }
+    Py_DECREF(parse_args);
+
+    if (!PyCallable_Check(callback)) {
+        PyErr_SetString(PyExc_TypeError, "callback must be callable");
+        return NULL;
+    }
+
+    if (interval <= 0.0 || interval * PR_TicksPerSecond() >= (double)PR_INTERVAL_NO_TIMEOUT) {
+        PyErr_Format(PyExc_ValueError, "interval out of range: %f", interval);
+        return NULL;
+    }
+
+    if (ocsp_staple_refresh_stop(self) != SECSuccess) {
+        return NULL;
+    }
+
+    if ((refresh = PyMem_RawCalloc(1, sizeof(OCSPStapleRefresh))) == NULL) {
+        return PyErr_NoMemory();
+    }
+    refresh->sock = self;
+    refresh->interval = (PRIntervalTime)(interval * PR_TicksPerSecond());
+    refresh->kea = kea;
+
+    if ((refresh->lock = PR_NewLock()) == NULL ||
+        (refresh->cv = PR_NewCondVar(refresh->lock)) == NULL) {
+        ocsp_staple_refresh_free(refresh);
+        return set_nspr_error(NULL);
+    }
+
+    callback_args = PyTuple_GetSlice(args, n_base_args, argc);
+
+    ASSIGN_REF(self->py_ocsp_staple_callback, callback);
+    ASSIGN_NEW_REF(self->py_ocsp_staple_callback_data, callback_args);
+    self->ocsp_staple_refresh = refresh;
+
+    if (ocsp_staple_refresh_call(self) != SECSuccess) {
+        ocsp_staple_refresh_stop(self);
+        return NULL;
+    }
+
+    /* The initial callback may have stopped the refresh */
+    if (self->ocsp_staple_refresh != refresh) {
+        Py_RETURN_NONE;
+    }
+
+    PR_Lock(refresh->lock);
+    refresh->thread = PR_CreateThread(PR_USER_THREAD, ocsp_staple_refresh_thread, refresh,
+                                      PR_PRIORITY_NORMAL, PR_GLOBAL_THREAD,
+                                      PR_UNJOINABLE_THREAD, 0);
+    PR_Unlock(refresh->lock);
+
+    if (refresh->thread == NULL) {
+        set_nspr_error(NULL);
+        ocsp_staple_refresh_stop(self);
+        return NULL;
+    }
+
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(SSLSocket_stop_ocsp_staple_refresh_doc,
+"stop_ocsp_staple_refresh()\n\
+\n\
+Stops the refresh started by `SSLSocket.start_ocsp_staple_refresh()`\n\
+and waits for the background thread to exit. Connections accepted\n\
+afterwards do not staple an OCSP response unless one was set with\n\
+`SSLSocket.set_stapled_ocsp_responses()`. It is not an error to call\n\
+this if no refresh is running.\n\
+");
+
+static PyObject *
+SSLSocket_stop_ocsp_staple_refresh(SSLSocket *self, PyObject *args)
+{
+    TraceMethodEnter(self);
+
+    if (ocsp_staple_refresh_stop(self) != SECSuccess) {
+        return NULL;
+    }
+
+    Py_CLEAR(self->py_ocsp_staple_callback);
+    Py_CLEAR(self->py_ocsp_staple_callback_data);
+
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(SSLSocket_enable_write_coalescing_doc,
+"enable_write_coalescing(buffer_size=16384, flush_delay=None)\n\
+\n\
+:Parameters:\n\
+    buffer_size : integer\n\
+        Number of octets collected before they are written, at most\n\
+        16384 (the maximum TLS record size).\n\
+    flush_delay : number or None\n\
+        If not None, buffered data is written at the latest this many\n\
+        seconds after it was sent by a background thread.\n\
+\n\
+Applications which send a response in several pieces (e.g. header,\n\
+body chunks, trailer) produce a TLS record, and often a TCP segment,\n\
+for each `SSLSocket.send()`. Each record carries its own MAC and\n\
+encryption overhead. With write coalescing enabled sent data is\n\
+collected in a buffer and handed to libssl once buffer_size octets\n\
+have accumulated, producing full size records. Sends larger than the\n\
+buffer are written directly once the buffered data has been topped up\n\
+and written.\n\
+\n\
+The buffer is also written by `SSLSocket.flush()`, before data is read\n\
+from the socket, when polling the socket for reading, on\n\
+`SSLSocket.shutdown()` and on `SSLSocket.close()`. An error writing\n\
+buffered data is reported by the operation which wrote it, errors from\n\
+the flush_delay thread are reported by the next operation on the\n\
+socket.\n\
+\n\
+Write coalescing only applies to this socket, connections accepted on\n\
+it are returned without it and must enable it themselves. It requires\n\
+a blocking socket. If write coalescing is already enabled the buffered\n\
+data is written and the new parameters take effect.\n\
+");
+
+static PyObject *
+SSLSocket_enable_write_coalescing(SSLSocket *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"buffer_size", "flush_delay", NULL};
+    int buffer_size = WRITE_COALESCING_MAX_BUFFER_SIZE;
+    PyObject *py_flush_delay = Py_None;
+    double flush_delay;
+    PRIntervalTime flush_delay_interval = PR_INTERVAL_NO_TIMEOUT;
+    PRSocketOptionData nonblocking;
+    PRFileDesc *layer;
+    PRStatus status;
+
+    TraceMethodEnter(self);
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|iO:enable_write_coalescing", kwlist,
+                                     &buffer_size, &py_flush_delay))
+        return NULL;
+
+    if (buffer_size < 1 || buffer_size > WRITE_COALESCING_MAX_BUFFER_SIZE) {
+        PyErr_Format(PyExc_ValueError, "buffer_size must be in the range 1 to %d, not %d",
+                     WRITE_COALESCING_MAX_BUFFER_SIZE, buffer_size);
+        return NULL;
+    }
+
+    if (py_flush_delay != Py_None) {
+        if ((flush_delay = PyFloat_AsDouble(py_flush_delay)) == -1.0 && PyErr_Occurred()) {
+            return NULL;
+        }
+        if (flush_delay < 0.0 || flush_delay * PR_TicksPerSecond() >= (double)PR_INTERVAL_NO_TIMEOUT) {
+            PyErr_Format(PyExc_ValueError, "flush_delay out of range: %f", flush_delay);
+            return NULL;
+        }
+        flush_delay_interval = (PRIntervalTime)(flush_delay * PR_TicksPerSecond());
+    }
+
+    nonblocking.option = PR_SockOpt_Nonblocking;
+    if (PR_GetSocketOption(self->pr_socket, &nonblocking) != PR_SUCCESS) {
+        return set_nspr_error(NULL);
+    }
+    if (nonblocking.value.non_blocking) {
+        PyErr_SetString(PyExc_ValueError, "write coalescing requires a blocking socket");
+        return NULL;
+    }
+
+    if ((layer = write_coalescing_layer(self->pr_socket)) != NULL) {
+        Py_BEGIN_ALLOW_THREADS
+        status = write_coalescing_pop(layer);
+        Py_END_ALLOW_THREADS
+        if (status != PR_SUCCESS) {
+            return set_nspr_error(NULL);
+        }
+    }
+
+    if (write_coalescing_push(self->pr_socket, buffer_size, flush_delay_interval) != SECSuccess) {
+        return NULL;
+    }
+
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(SSLSocket_disable_write_coalescing_doc,
+"disable_write_coalescing()\n\
+\n\
+Writes any buffered data and turns off write coalescing (see\n\
+`SSLSocket.enable_write_coalescing()`), subsequent sends are passed to\n\
+libssl immediately. It is not an error to call this if write\n\
+coalescing is not enabled.\n\
+");
+
+static PyObject *
+SSLSocket_disable_write_coalescing(SSLSocket *self, PyObject *args)
+{
+    PRFileDesc *layer;
+    PRStatus status;
+
+    TraceMethodEnter(self);
+
+    if ((layer = write_coalescing_layer(self->pr_socket)) == NULL) {
+        Py_RETURN_NONE;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    status = write_coalescing_pop(layer);
+    Py_END_ALLOW_THREADS
+
+    if (status != PR_SUCCESS) {
+        return set_nspr_error(NULL);
+    }
+
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(SSLSocket_flush_doc,
+"flush()\n\
+\n\
+Writes the data collected by write coalescing (see\n\
+`SSLSocket.enable_write_coalescing()`). Does nothing if write\n\
+coalescing is not enabled.\n\
+");
+
+static PyObject *
+SSLSocket_flush(SSLSocket *self, PyObject *args)
+{
+    PRFileDesc *layer;
+    PRStatus status;
+
+    TraceMethodEnter(self);
+
+    if ((layer = write_coalescing_layer(self->pr_socket)) == NULL) {
+        Py_RETURN_NONE;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    status = write_coalescing_flush(layer, PR_INTERVAL_NO_TIMEOUT);
+    Py_END_ALLOW_THREADS
+
+    if (status != PR_SUCCESS) {
+        return set_nspr_error(NULL);
+    }
+
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(SSLSocket_get_write_coalescing_stats_doc,
+"get_write_coalescing_stats() -> dict or None\n\
+\n\
+Returns None if write coalescing is not enabled, otherwise a dict with\n\
+these keys:\n\
+\n\
+buffer_size\n\
+    the configured buffer size\n\
+flush_delay\n\
+    the configured flush delay in seconds or None\n\
+buffered\n\
+    number of octets currently buffered\n\
+writes\n\
+    number of writes made by the application\n\
+flushes\n\
+    number of writes passed to libssl\n\
+");
+
+static PyObject *
+SSLSocket_get_write_coalescing_stats(SSLSocket *self, PyObject *args)
+{
+    PRFileDesc *layer;
+    PRFilePrivate *wc;
+    PyObject *py_flush_delay = NULL;
+    PyObject *result = NULL;
+    int buffer_size, buffered;
+    unsigned long n_writes, n_flushes;
+    PRIntervalTime flush_delay;
+
+    TraceMethodEnter(self);
+
+    if ((layer = write_coalescing_layer(self->pr_socket)) == NULL) {
+        Py_RETURN_NONE;
+    }
+    wc = layer->secret;
+
+    PR_Lock(wc->lock);
+    buffer_size = wc->size;
+    buffered = wc->len;
+    flush_delay = wc->flush_delay;
+    n_writes = wc->n_writes;
+    n_flushes = wc->n_flushes;
+    PR_Unlock(wc->lock);
+
+    if (flush_delay == PR_INTERVAL_NO_TIMEOUT) {
+        Py_INCREF(Py_None);
+        py_flush_delay = Py_None;
+    } else if ((py_flush_delay = PyFloat_FromDouble((double)flush_delay / PR_TicksPerSecond())) == NULL) {
+        return NULL;
+    }
+
+    result = Py_BuildValue("{si sO si sk sk}",
+                           "buffer_size", buffer_size,
+                           "flush_delay", py_flush_delay,
+                           "buffered",    buffered,
+                           "writes",      n_writes,
+                           "flushes",     n_flushes);
+    Py_DECREF(py_flush_delay);
+    return result;
+}
+
+PyDoc_STRVAR(SSLSocket_dtls_listen_doc,
+"dtls_listen(timeout=PR_INTERVAL_NO_TIMEOUT) -> NetworkAddress\n\
+\n\
+:Parameters:\n\
+    timeout : integer\n\
+        optional timeout value expressed as a NSPR interval\n\
+\n\
+DTLS server only. Waits for the first datagram on a bound DTLS socket,\n\
+connects the socket to its sender, prepares the socket to handshake as\n\
+a server and returns the address of the client. The datagram is left\n\
+in the socket for the handshake to process, follow with\n\
+`SSLSocket.dtls_handshake()`.\n\
+\n\
+libssl associates a DTLS socket with a single peer, a server handling\n\
+several clients uses a socket for each of them.\n\
+");
+
+static PyObject *
+SSLSocket_dtls_listen(SSLSocket *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"timeout", NULL};
+    unsigned int timeout = PR_INTERVAL_NO_TIMEOUT;
+    PRFileDesc *pr_udp_socket;
+    PRNetAddr pr_netaddr;
+    char buf[1];
+    PRErrorCode error = 0;
+
+    TraceMethodEnter(self);
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|I:dtls_listen", kwlist, &timeout))
+        return NULL;
+
+    /* Peek and connect below libssl, it would start a client handshake */
+    if ((pr_udp_socket = PR_GetIdentitiesLayer(self->pr_socket, PR_NSPR_IO_LAYER)) == NULL) {
+        return set_nspr_error(NULL);
+    }
+
+    if (PR_GetDescType(pr_udp_socket) != PR_DESC_SOCKET_UDP) {
+        PyErr_SetString(PyExc_ValueError, "dtls_listen requires a DTLS (PR_DESC_SOCKET_UDP) socket");
+        return NULL;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    if (PR_RecvFrom(pr_udp_socket, buf, sizeof(buf), PR_MSG_PEEK,
+                    &pr_netaddr, timeout) < 0) {
+        error = PR_GetError();
+    } else if (PR_Connect(pr_udp_socket, &pr_netaddr, timeout) != PR_SUCCESS) {
+        error = PR_GetError();
+    } else if (SSL_ResetHandshake(self->pr_socket, PR_TRUE) != SECSuccess) {
+        error = PR_GetError();
+    }
+    Py_END_ALLOW_THREADS
+
+    if (error) {
+        PR_SetError(error, 0);
+        return set_nspr_error(NULL);
+    }
+
+    return NetworkAddress_new_from_PRNetAddr(&pr_netaddr);
+}
+
+PyDoc_STRVAR(SSLSocket_dtls_handshake_doc,
+"dtls_handshake(timeout=PR_INTERVAL_NO_TIMEOUT)\n\
+\n\
+:Parameters:\n\
+    timeout : integer\n\
+        optional timeout value expressed as a NSPR interval\n\
+\n\
+Drives the handshake of a DTLS socket to completion. Datagrams may be\n\
+lost, libssl only retransmits a handshake flight when it is called\n\
+after the retransmission timer expired (see\n\
+`SSLSocket.get_dtls_handshake_timeout()`) and no datagram is\n\
+available. Unlike `SSLSocket.force_handshake()` this waits for\n\
+datagrams no longer than the timer and retransmits as needed, until\n\
+the handshake completes or timeout has elapsed.\n\
+");
+
+static PyObject *
+SSLSocket_dtls_handshake(SSLSocket *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"timeout", NULL};
+    unsigned int timeout = PR_INTERVAL_NO_TIMEOUT;
+    PRSocketOptionData nonblocking;
+    PRSocketOptionData opt;
+    PRPollDesc poll_desc;
+    PRIntervalTime start, elapsed, wait, retransmit;
+    PRErrorCode error = 0;
+
+    TraceMethodEnter(self);
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|I:dtls_handshake", kwlist, &timeout))
+        return NULL;
+
+    nonblocking.option = PR_SockOpt_Nonblocking;
+    opt.option = PR_SockOpt_Nonblocking;
+    opt.value.non_blocking = PR_TRUE;
+
+    Py_BEGIN_ALLOW_THREADS
+    if (PR_GetSocketOption(self->pr_socket, &nonblocking) != PR_SUCCESS) {
+        error = PR_GetError();
+        goto done;
+    }
+
+    /* libssl checks the retransmission timer when a read would block */
+    if (!nonblocking.value.non_blocking) {
+        if (PR_SetSocketOption(self->pr_socket, &opt) != PR_SUCCESS) {
+            error = PR_GetError();
+            goto done;
+        }
+    }
+
+    start = PR_IntervalNow();
+    while (SSL_ForceHandshake(self->pr_socket) != SECSuccess) {
+        if (PR_GetError() != PR_WOULD_BLOCK_ERROR) {
+            error = PR_GetError();
+            break;
+        }
+
+        wait = timeout;
+        if (timeout != PR_INTERVAL_NO_TIMEOUT) {
+            elapsed = (PRIntervalTime)(PR_IntervalNow() - start);
+            if (elapsed >= timeout) {
+                error = PR_IO_TIMEOUT_ERROR;
+                break;
+            }
+            wait = timeout - elapsed;
+        }
+        if (DTLS_GetHandshakeTimeout(self->pr_socket, &retransmit) == SECSuccess &&
+            retransmit < wait) {
+            wait = retransmit;
+        }
+
+        poll_desc.fd = self->pr_socket;
+        poll_desc.in_flags = PR_POLL_READ;
+        poll_desc.out_flags = 0;
+        if (PR_Poll(&poll_desc, 1, wait) < 0) {
+            error = PR_GetError();
+            break;
+        }
+    }
+
+    if (!nonblocking.value.non_blocking) {
+        if (PR_SetSocketOption(self->pr_socket, &nonblocking) != PR_SUCCESS && !error) {
+            error = PR_GetError();
+        }
+    }
+
+ done:
+    Py_END_ALLOW_THREADS
+
+    if (error) {
+        PR_SetError(error, 0);
+        return set_nspr_error(NULL);
+    }
+
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(SSLSocket_get_dtls_handshake_timeout_doc,
+"get_dtls_handshake_timeout() -> interval or None\n\
+\n\
+Returns the time, as a NSPR interval, until libssl retransmits the\n\
+current flight of a DTLS handshake, or None if the socket is not a\n\
+DTLS socket or is not in a handshake. Applications driving the\n\
+handshake with a non-blocking socket should call\n\
+`SSLSocket.force_handshake()` when it expires even if no datagram\n\
+arrived.\n\
+");
+
+static PyObject *
+SSLSocket_get_dtls_handshake_timeout(SSLSocket *self, PyObject *args)
+{
+    PRIntervalTime timeout;
+
+    TraceMethodEnter(self);
+
+    if (DTLS_GetHandshakeTimeout(self->pr_socket, &timeout) != SECSuccess) {
+        Py_RETURN_NONE;
+    }
+
+    return PyLong_FromUnsignedLong(timeout);
+}
+
+static PyObject *
 SSLSocket_connection_info_format_lines(SSLSocket *self, PyObject *args, PyObject *kwds)
 {
     static char *kwlist[] = {"level", NULL};
     int level = 0;
     PyObject *lines = NULL;
-    SSLChannelInfo channel;
-    SSLCipherSuiteInfo suite;
-    unsigned int major, minor;
+    SSLChannelInfo channel;
+    SSLCipherSuiteInfo suite;
+    unsigned int major, minor;
+    PyObject *obj1 = NULL;
+    PyObject *obj2 = NULL;
+    PyObject *obj3 = NULL;
+
+    TraceMethodEnter(self);
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|i:format_lines", kwlist, &level))
+        return NULL;
+
+    if ((lines = PyList_New(0)) == NULL) {
+        return NULL;
+    }
+
+    if (SSL_GetChannelInfo(self->pr_socket, &channel, sizeof(channel))
+        != SECSuccess) {
+        return set_nspr_error(NULL);
+    }
+
+    if (SSL_GetCipherSuiteInfo(channel.cipherSuite, &suite, sizeof(suite))
+        != SECSuccess) {
+        return set_nspr_error(NULL);
+    }
+
+    major = channel.protocolVersion >> 8;
+    minor = channel.protocolVersion & 0xff;
+    if ((obj2 = ssl_version_to_repr_kind(major, minor, AsString)) == NULL) {
+        goto fail;
+    }
+    if ((obj3 = PyBaseString_UTF8(obj2, "ssl_version_to_repr_kind")) == NULL) {
+        goto fail;
+    }
+    if ((obj1 = PyUnicode_FromFormat("%d.%d (%s)",
+                                     channel.protocolVersion >> 8,
+                                     channel.protocolVersion & 0xff,
+                                     PyBytes_AsString(obj3))) == NULL) {
+        goto fail;
+    }
+    FMT_OBJ_AND_APPEND(lines, _("SSL Protocol Version"), obj1, level, fail);
+    Py_CLEAR(obj1);
+    Py_CLEAR(obj2);
+    Py_CLEAR(obj3);
+
+    if ((obj1 = PyUnicode_FromFormat("%d-bit %s",
+                                     suite.effectiveKeyBits,
+                                     suite.symCipherName)) == NULL) {
+        goto fail;
+    }
+    FMT_OBJ_AND_APPEND(lines, _("Cipher"), obj1, level, fail);
+    Py_CLEAR(obj1);
+
+    if ((obj1 = PyUnicode_FromFormat("%d-bit %s",
+                                     suite.macBits,
+                                     suite.macAlgorithmName)) == NULL) {
+        goto fail;
+    }
+    FMT_OBJ_AND_APPEND(lines, _("MAC"), obj1, level, fail);
+    Py_CLEAR(obj1);
+
+    if ((obj1 = PyUnicode_FromFormat("%d-bit %s",
+                                     channel.authKeyBits,
+                                     suite.authAlgorithmName)) == NULL) {
+        goto fail;
+    }
+    FMT_OBJ_AND_APPEND(lines, _("Auth"), obj1, level, fail);
+    Py_CLEAR(obj1);
+
+    if ((obj1 = PyUnicode_FromFormat("%d-bit %s",
+                                     channel.keaKeyBits,
+                                     suite.keaTypeName)) == NULL) {
+        goto fail;
+    }
+    FMT_OBJ_AND_APPEND(lines, _("Key Exchange"), obj1, level, fail);
+    Py_CLEAR(obj1);
+
+    obj1 = PyUnicode_FromString(channel.compressionMethodName);
+    FMT_OBJ_AND_APPEND(lines, _("Compression"), obj1, level, fail);
+    Py_CLEAR(obj1);
+
+    return lines;
+
+ fail:
+    Py_XDECREF(obj1);
+    Py_XDECREF(obj2);
+    Py_XDECREF(obj3);
+    Py_XDECREF(lines);
+    return NULL;
+}
+
+
+static PyObject *
+SSLSocket_connection_info_format(SSLSocket *self, PyObject *args, PyObject *kwds)
+{
+    TraceMethodEnter(self);
+
+    return format_from_lines((format_lines_func)SSLSocket_connection_info_format_lines, (PyObject *)self, args, kwds);
+}
+
+PyDoc_STRVAR(SSLSocket_connection_info_str_doc,
+"connection_info_str() -> str\n\
+Returns a string describing the properties of the SSL connection.\n\
+");
+
+static PyObject *
+SSLSocket_connection_info_str(SSLSocket *self)
+{
+    PyObject *py_formatted_result = NULL;
+
+    TraceMethodEnter(self);
+
+    py_formatted_result =  SSLSocket_connection_info_format(self, empty_tuple, NULL);
+    return py_formatted_result;
+
+}
+
+static PyMethodDef SSLSocket_methods[] = {
+    {"set_ssl_option",                (PyCFunction)SSLSocket_set_ssl_option,                METH_VARARGS,               SSLSocket_set_ssl_option_doc},
+    {"get_ssl_option",                (PyCFunction)SSLSocket_get_ssl_option,                METH_VARARGS,               SSLSocket_get_ssl_option_doc},
+    {"accept",                        (PyCFunction)SSLSocket_accept,                        METH_VARARGS|METH_KEYWORDS, SSLSocket_accept_doc},
+    {"set_auth_certificate_callback", (PyCFunction)SSLSocket_set_auth_certificate_callback, METH_VARARGS,               SSLSocket_set_auth_certificate_callback_doc},
+    {"set_client_auth_data_callback", (PyCFunction)SSLSocket_set_client_auth_data_callback, METH_VARARGS,               SSLSocket_set_client_auth_data_callback_doc},
+    {"set_handshake_callback",        (PyCFunction)SSLSocket_set_handshake_callback,        METH_VARARGS,               SSLSocket_set_handshake_callback_doc},
+    {"set_can_false_start_callback",  (PyCFunction)SSLSocket_set_can_false_start_callback,  METH_VARARGS,               SSLSocket_set_can_false_start_callback_doc},
+    {"recommended_can_false_start",   (PyCFunction)SSLSocket_recommended_can_false_start,   METH_NOARGS,                SSLSocket_recommended_can_false_start_doc},
+    {"enable_early_data",             (PyCFunction)SSLSocket_enable_early_data,             METH_VARARGS|METH_KEYWORDS, SSLSocket_enable_early_data_doc},
+    {"send_early_data",               (PyCFunction)SSLSocket_send_early_data,               METH_VARARGS,               SSLSocket_send_early_data_doc},
+    {"recv_early_data",               (PyCFunction)SSLSocket_recv_early_data,               METH_VARARGS,               SSLSocket_recv_early_data_doc},
+    {"set_pkcs11_pin_arg",            (PyCFunction)SSLSocket_set_pkcs11_pin_arg,            METH_VARARGS,               SSLSocket_set_pkcs11_pin_arg_doc},
+    {"get_pkcs11_pin_arg",            (PyCFunction)SSLSocket_get_pkcs11_pin_arg,            METH_NOARGS,                SSLSocket_get_pkcs11_pin_arg_doc},
+    {"config_secure_server",          (PyCFunction)SSLSocket_config_secure_server,          METH_VARARGS,               SSLSocket_config_secure_server_doc},
+    {"get_peer_certificate",          (PyCFunction)SSLSocket_get_peer_certificate,          METH_VARARGS,               SSLSocket_get_peer_certificate_doc},
+    {"get_certificate",               (PyCFunction)SSLSocket_get_certificate,               METH_VARARGS,               SSLSocket_get_certificate_doc},
+    {"invalidate_session",            (PyCFunction)SSLSocket_invalidate_session,            METH_NOARGS,                SSLSocket_invalidate_session_doc},
+    {"data_pending",                  (PyCFunction)SSLSocket_data_pending,                  METH_NOARGS,                SSLSocket_data_pending_doc},
+    {"get_security_status",           (PyCFunction)SSLSocket_get_security_status,           METH_NOARGS,                SSLSocket_get_security_status_doc},
+    {"get_session_id",                (PyCFunction)SSLSocket_get_session_id,                METH_NOARGS,                SSLSocket_get_session_id_doc},
+    {"set_sock_peer_id",              (PyCFunction)SSLSocket_set_sock_peer_id,              METH_VARARGS,               SSLSocket_set_sock_peer_id_doc},
+    {"set_cipher_pref",               (PyCFunction)SSLSocket_set_cipher_pref,               METH_VARARGS,               SSLSocket_set_cipher_pref_doc},
+    {"get_cipher_pref",               (PyCFunction)SSLSocket_get_cipher_pref,               METH_VARARGS,               SSLSocket_get_cipher_pref_doc},
+    {"set_hostname",                  (PyCFunction)SSLSocket_set_hostname,                  METH_VARARGS,               SSLSocket_set_hostname_doc},
+    {"get_hostname",                  (PyCFunction)SSLSocket_get_hostname,                  METH_NOARGS,                SSLSocket_get_hostname_doc},
+    {"set_certificate_db",            (PyCFunction)SSLSocket_set_certificate_db,            METH_VARARGS,               SSLSocket_set_certificate_db_doc},
+    {"reset_handshake",               (PyCFunction)SSLSocket_reset_handshake,               METH_VARARGS,               SSLSocket_reset_handshake_doc},
+    {"force_handshake",               (PyCFunction)SSLSocket_force_handshake,               METH_NOARGS,                SSLSocket_force_handshake_doc},
+    {"force_handshake_timeout",       (PyCFunction)SSLSocket_force_handshake_timeout,       METH_VARARGS,               SSLSocket_force_handshake_timeout_doc},
+    {"rehandshake",                   (PyCFunction)SSLSocket_rehandshake,                   METH_VARARGS,               SSLSocket_rehandshake_doc},
+    {"rehandshake_timeout",           (PyCFunction)SSLSocket_rehandshake_timeout,           METH_VARARGS,               SSLSocket_rehandshake_timeout_doc},
+    {"import_tcp_socket",             (PyCFunction)SSLSocket_import_tcp_socket,             METH_VARARGS|METH_STATIC,   SSLSocket_import_tcp_socket_doc},
+    {"set_ssl_version_range",         (PyCFunction)SSLSocket_set_ssl_version_range,         METH_VARARGS,               SSLSocket_set_ssl_version_range_doc},
+    {"get_ssl_version_range",         (PyCFunction)SSLSocket_get_ssl_version_range,         METH_VARARGS|METH_KEYWORDS, SSLSocket_get_ssl_version_range_doc},
+    {"get_ssl_channel_info",          (PyCFunction)SSLSocket_get_ssl_channel_info,          METH_NOARGS,                SSLSocket_get_ssl_channel_info_doc},
+    {"get_negotiated_host",           (PyCFunction)SSLSocket_get_negotiated_host,           METH_NOARGS,                SSLSocket_get_negotiated_host_doc},
+    {"set_stapled_ocsp_responses",    (PyCFunction)SSLSocket_set_stapled_ocsp_responses,    METH_VARARGS|METH_KEYWORDS, SSLSocket_set_stapled_ocsp_responses_doc},
+    {"get_peer_stapled_ocsp_responses", (PyCFunction)SSLSocket_get_peer_stapled_ocsp_responses, METH_NOARGS,            SSLSocket_get_peer_stapled_ocsp_responses_doc},
+    {"start_ocsp_staple_refresh",     (PyCFunction)SSLSocket_start_ocsp_staple_refresh,     METH_VARARGS,               SSLSocket_start_ocsp_staple_refresh_doc},
+    {"stop_ocsp_staple_refresh",      (PyCFunction)SSLSocket_stop_ocsp_staple_refresh,      METH_NOARGS,                SSLSocket_stop_ocsp_staple_refresh_doc},
+    {"enable_write_coalescing",       (PyCFunction)SSLSocket_enable_write_coalescing,       METH_VARARGS|METH_KEYWORDS, SSLSocket_enable_write_coalescing_doc},
+    {"disable_write_coalescing",      (PyCFunction)SSLSocket_disable_write_coalescing,      METH_NOARGS,                SSLSocket_disable_write_coalescing_doc},
+    {"flush",                         (PyCFunction)SSLSocket_flush,                         METH_NOARGS,                SSLSocket_flush_doc},
+    {"get_write_coalescing_stats",    (PyCFunction)SSLSocket_get_write_coalescing_stats,    METH_NOARGS,                SSLSocket_get_write_coalescing_stats_doc},
+    {"dtls_listen",                   (PyCFunction)SSLSocket_dtls_listen,                   METH_VARARGS|METH_KEYWORDS, SSLSocket_dtls_listen_doc},
+    {"dtls_handshake",                (PyCFunction)SSLSocket_dtls_handshake,                METH_VARARGS|METH_KEYWORDS, SSLSocket_dtls_handshake_doc},
+    {"get_dtls_handshake_timeout",    (PyCFunction)SSLSocket_get_dtls_handshake_timeout,    METH_NOARGS,                SSLSocket_get_dtls_handshake_timeout_doc},
+
+    {"connection_info_format_lines",  (PyCFunction)SSLSocket_connection_info_format_lines,  METH_VARARGS|METH_KEYWORDS, generic_format_lines_doc},
+    {"connection_info_format",        (PyCFunction)SSLSocket_connection_info_format,        METH_VARARGS|METH_KEYWORDS, generic_format_doc},
+    {"connection_info_str",           (PyCFunction)SSLSocket_connection_info_str,           METH_NOARGS,                SSLSocket_connection_info_str_doc},
+    {NULL, NULL}  /* Sentinel */
+};
+
+
+/* =========================== Class Construction =========================== */
+
+static PyObject *
+SSLSocket_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+    SSLSocket *self;
+
+    TraceObjNewEnter(type);
+
+    if ((self = (SSLSocket *)SocketType.tp_new(type, args, kwds)) == NULL) {
+        return NULL;
+    }
+
+    self->py_auth_certificate_callback = NULL;
+    self->py_auth_certificate_callback_data = NULL;
+    self->py_pk11_pin_args = NULL;
+    self->py_handshake_callback = NULL;
+    self->py_handshake_callback_data = NULL;
+    self->py_client_auth_data_callback = NULL;
+    self->py_client_auth_data_callback_data = NULL;
+    self->py_can_false_start_callback = NULL;
+    self->py_can_false_start_callback_data = NULL;
+    self->py_ocsp_staple_callback = NULL;
+    self->py_ocsp_staple_callback_data = NULL;
+    self->ocsp_staple_refresh = NULL;
+
+    TraceObjNewLeave(self);
+    return (PyObject *)self;
+}
+
+static int
+SSLSocket_traverse(SSLSocket *self, visitproc visit, void *arg)
+{
+    TraceMethodEnter(self);
+
+    Py_VISIT(self->py_auth_certificate_callback);
+    Py_VISIT(self->py_auth_certificate_callback_data);
+    Py_VISIT(self->py_pk11_pin_args);
+    Py_VISIT(self->py_handshake_callback);
+    Py_VISIT(self->py_handshake_callback_data);
+    Py_VISIT(self->py_client_auth_data_callback);
+    Py_VISIT(self->py_client_auth_data_callback_data);
+    Py_VISIT(self->py_can_false_start_callback);
+    Py_VISIT(self->py_can_false_start_callback_data);
+    Py_VISIT(self->py_ocsp_staple_callback);
+    Py_VISIT(self->py_ocsp_staple_callback_data);
+
+    return Py_TYPE(self)->tp_base->tp_traverse((PyObject *)self, visit, arg);
+}
+
+static int
+SSLSocket_clear(SSLSocket* self)
+{
+    TraceMethodEnter(self);
+
+    Py_CLEAR(self->py_auth_certificate_callback);
+    Py_CLEAR(self->py_auth_certificate_callback_data);
+    Py_CLEAR(self->py_pk11_pin_args);
+    Py_CLEAR(self->py_handshake_callback);
+    Py_CLEAR(self->py_handshake_callback_data);
+    Py_CLEAR(self->py_client_auth_data_callback);
+    Py_CLEAR(self->py_client_auth_data_callback_data);
+    Py_CLEAR(self->py_can_false_start_callback);
+    Py_CLEAR(self->py_can_false_start_callback_data);
+    Py_CLEAR(self->py_ocsp_staple_callback);
+    Py_CLEAR(self->py_ocsp_staple_callback_data);
+
+    return Py_TYPE(self)->tp_base->tp_clear((PyObject *)self);
+
+}
+
+static void
+SSLSocket_dealloc(SSLSocket* self)
+{
+
+    TraceMethodEnter(self);
+
+    ocsp_staple_refresh_stop(self);
+    SSLSocket_clear(self);
+    return Py_TYPE(self)->tp_base->tp_dealloc((PyObject *)self);
+}
+
+PyDoc_STRVAR(SSLSocket_doc,
+"SSLSocket(family=PR_AF_INET, type=PR_DESC_SOCKET_TCP)\n\
+\n\
+\n\
+:Parameters:\n\
+    family : integer\n\
+        one of:\n\
+            - PR_AF_INET\n\
+            - PR_AF_INET6\n\
+            - PR_AF_LOCAL\n\
+    type : integer\n\
+        one of:\n\
+            - PR_DESC_SOCKET_TCP\n\
+            - PR_DESC_SOCKET_UDP\n\
+\n\
+Create a new NSPR SSL socket:\n\
+\n\
+A PR_DESC_SOCKET_TCP socket speaks TLS. A PR_DESC_SOCKET_UDP socket\n\
+speaks DTLS, each `Socket.send()` is sent as one datagram and each\n\
+`Socket.recv()` returns the data of one datagram. Version ranges of\n\
+DTLS sockets are given with the TLS version they are based on (see\n\
+SSL_LIBRARY_VERSION_DTLS_1_0, SSL_LIBRARY_VERSION_DTLS_1_2 and\n\
+SSL_LIBRARY_VERSION_DTLS_1_3 or the names \"dtls1.0\", \"dtls1.2\"\n\
+and \"dtls1.3\"). A DTLS client connects and calls\n\
+`SSLSocket.dtls_handshake()`, a DTLS server binds, calls\n\
+`SSLSocket.dtls_listen()` and then `SSLSocket.dtls_handshake()`.\n\
+The SSL_RECORD_SIZE_LIMIT option keeps records, and therefore\n\
+datagrams, below the path MTU.\n\
+");
+
+static int
+SSLSocket_init(SSLSocket *self, PyObject *args, PyObject *kwds)
+{
+    PRFileDesc *ssl_socket = NULL;
+
+    TraceMethodEnter(self);
+
+    if (SocketType.tp_init((PyObject *)self, args, kwds) < 0)
+        return -1;
+
+    if (PR_GetDescType(self->pr_socket) == PR_DESC_SOCKET_UDP) {
+        ssl_socket = DTLS_ImportFD(NULL, self->pr_socket);
+    } else {
+        ssl_socket = SSL_ImportFD(NULL, self->pr_socket);
+    }
+    if (ssl_socket == NULL) {
+        set_nspr_error(NULL);
+        return -1;
+    }
+
+    assert(self->pr_socket == ssl_socket);
+    TraceMethodLeave(self);
+    return 0;
+}
+
+static PyTypeObject SSLSocketType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "nss.ssl.SSLSocket",			/* tp_name */
+    sizeof(SSLSocket),				/* tp_basicsize */
+    0,						/* tp_itemsize */
+    (destructor)SSLSocket_dealloc,		/* tp_dealloc */
+    0,						/* tp_print */
+    0,						/* tp_getattr */
+    0,						/* tp_setattr */
+    0,						/* tp_compare */
+    0,						/* tp_repr */
+    0,						/* tp_as_number */
+    0,						/* tp_as_sequence */
+    0,						/* tp_as_mapping */
+    0,						/* tp_hash */
+    0,						/* tp_call */
+    0,						/* tp_str */
+    0,						/* tp_getattro */
+    0,						/* tp_setattro */
+    0,						/* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | Py_TPFLAGS_HAVE_GC,	/* tp_flags */
+    SSLSocket_doc,				/* tp_doc */
+    (traverseproc)SSLSocket_traverse,		/* tp_traverse */
+    (inquiry)SSLSocket_clear,			/* tp_clear */
+    0,						/* tp_richcompare */
+    0,						/* tp_weaklistoffset */
+    0,						/* tp_iter */
+    0,						/* tp_iternext */
+    SSLSocket_methods,				/* tp_methods */
+    SSLSocket_members,				/* tp_members */
+    SSLSocket_getseters,			/* tp_getset */
+    0,						/* tp_base */
+    0,						/* tp_dict */
+    0,						/* tp_descr_get */
+    0,						/* tp_descr_set */
+    0,						/* tp_dictoffset */
+    (initproc)SSLSocket_init,			/* tp_init */
+    0,						/* tp_alloc */
+    SSLSocket_new,				/* tp_new */
+};
+
+/* ========================================================================== */
+/* ==================== SSLCipherSuiteInformation Class ===================== */
+/* ========================================================================== */
+
+/* ============================ Attribute Access ============================ */
+
+static PyObject *
+SSLCipherSuiteInformation_get_cipher_suite(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.cipherSuite);
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_cipher_suite_name(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    if (self->py_cipher_suite_name) {
+        Py_INCREF(self->py_cipher_suite_name);
+        return self->py_cipher_suite_name;
+    }
+    return PyUnicode_FromString(self->info.cipherSuiteName);
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_auth_algorithm(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.authAlgorithm);
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_auth_algorithm_name(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    if (self->py_auth_algorithm_name) {
+        Py_INCREF(self->py_auth_algorithm_name);
+        return self->py_auth_algorithm_name;
+    }
+    return PyUnicode_FromString(self->info.authAlgorithmName);
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_kea_type(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.keaType);
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_kea_type_name(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    if (self->py_kea_type_name) {
+        Py_INCREF(self->py_kea_type_name);
+        return self->py_kea_type_name;
+    }
+    return PyUnicode_FromString(self->info.keaTypeName);
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_symmetric_cipher(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.symCipher);
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_symmetric_cipher_name(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    if (self->py_symmetric_cipher_name) {
+        Py_INCREF(self->py_symmetric_cipher_name);
+        return self->py_symmetric_cipher_name;
+    }
+    return PyUnicode_FromString(self->info.symCipherName);
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_symmetric_key_bits(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.symKeyBits);
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_symmetric_key_space(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.symKeySpace);
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_effective_key_bits(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.effectiveKeyBits);
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_mac_algorithm(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.macAlgorithm);
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_mac_algorithm_name(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    if (self->py_mac_algorithm_name) {
+        Py_INCREF(self->py_mac_algorithm_name);
+        return self->py_mac_algorithm_name;
+    }
+    return PyUnicode_FromString(self->info.macAlgorithmName);
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_mac_bits(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.macBits);
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_is_fips(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    if (self->info.isFIPS) {
+        Py_RETURN_TRUE;
+    } else {
+        Py_RETURN_FALSE;
+    }
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_is_exportable(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    if (self->info.isExportable) {
+        Py_RETURN_TRUE;
+    } else {
+        Py_RETURN_FALSE;
+    }
+}
+
+static PyObject *
+SSLCipherSuiteInformation_get_is_nonstandard(SSLCipherSuiteInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    if (self->info.nonStandard) {
+        Py_RETURN_TRUE;
+    } else {
+        Py_RETURN_FALSE;
+    }
+}
+
+static
+PyGetSetDef SSLCipherSuiteInformation_getseters[] = {
+    {"cipher_suite",          (getter)SSLCipherSuiteInformation_get_cipher_suite,           NULL, "Returns the cipher suite enum", NULL},
+    {"cipher_suite_name",     (getter)SSLCipherSuiteInformation_get_cipher_suite_name,      NULL, "Returns the cipher suite name", NULL},
+    {"auth_algorithm",        (getter)SSLCipherSuiteInformation_get_auth_algorithm,         NULL, "Returns the auth algorithm enum", NULL},
+    {"auth_algorithm_name",   (getter)SSLCipherSuiteInformation_get_auth_algorithm_name,    NULL, "Returns the auth algorithm name", NULL},
+    {"kea_type",              (getter)SSLCipherSuiteInformation_get_kea_type,               NULL, "Returns the kea type enum", NULL},
+    {"kea_type_name",         (getter)SSLCipherSuiteInformation_get_kea_type_name,          NULL, "Returns the kea type name", NULL},
+    {"symmetric_cipher",      (getter)SSLCipherSuiteInformation_get_symmetric_cipher,       NULL, "Returns the symmetric cipher enum", NULL},
+    {"symmetric_cipher_name", (getter)SSLCipherSuiteInformation_get_symmetric_cipher_name,  NULL, "Returns the symmetric cipher name", NULL},
+    {"symmetric_key_bits",    (getter)SSLCipherSuiteInformation_get_symmetric_key_bits,     NULL, "Returns the symmetric key bits", NULL},
+    {"symmetric_key_space",   (getter)SSLCipherSuiteInformation_get_symmetric_key_space,    NULL, "Returns the symmetric key space", NULL},
+    {"effective_key_bits",    (getter)SSLCipherSuiteInformation_get_effective_key_bits,     NULL, "Returns the effective key bits", NULL},
+    {"mac_algorithm",         (getter)SSLCipherSuiteInformation_get_mac_algorithm,          NULL, "Returns the mac algorithm enum", NULL},
+    {"mac_algorithm_name",    (getter)SSLCipherSuiteInformation_get_mac_algorithm_name,     NULL, "Returns the mac algorithm name", NULL},
+    {"mac_bits",              (getter)SSLCipherSuiteInformation_get_mac_bits,               NULL, "Returns the mac bits", NULL},
+    {"is_fips",               (getter)SSLCipherSuiteInformation_get_is_fips,                NULL, "Returns True if FIPS, False otherwise", NULL},
+    {"is_exportable",         (getter)SSLCipherSuiteInformation_get_is_exportable,          NULL, "Returns True if exportable, False otherwise", NULL},
+    {"is_nonstandard",        (getter)SSLCipherSuiteInformation_get_is_nonstandard,         NULL, "Returns True if nonstandard, False otherwise", NULL},
+    {NULL}  /* Sentinel */
+};
+
+static PyMemberDef SSLCipherSuiteInformation_members[] = {
+    {NULL}  /* Sentinel */
+};
+
+/* ============================== Class Methods ============================= */
+
+static PyObject *
+SSLCipherSuiteInformation_format_lines(SSLCipherSuiteInformation *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"level", NULL};
+    int level = 0;
+    PyObject *lines = NULL;
+    PyObject *obj1 = NULL;
+
+    TraceMethodEnter(self);
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|i:format_lines", kwlist, &level))
+        return NULL;
+
+    if ((lines = PyList_New(0)) == NULL) {
+        return NULL;
+    }
+
+
+    if ((obj1 = PyUnicode_FromFormat("%s (0x%x)",
+                                     self->info.cipherSuiteName,
+                                     self->info.cipherSuite)) == NULL) {
+        goto fail;
+    }
+    FMT_OBJ_AND_APPEND(lines, _("Cipher Suite"), obj1, level, fail);
+    Py_CLEAR(obj1);
+
+    if ((obj1 = PyUnicode_FromFormat("%s (0x%x)",
+                                     self->info.authAlgorithmName,
+                                     self->info.authAlgorithm)) == NULL) {
+        goto fail;
+    }
+    FMT_OBJ_AND_APPEND(lines, _("Auth Algorithm"), obj1, level+1, fail);
+    Py_CLEAR(obj1);
+
+    if ((obj1 = PyUnicode_FromFormat("%s (0x%x)",
+                                     self->info.keaTypeName,
+                                     self->info.keaType)) == NULL) {
+        goto fail;
+    }
+    FMT_OBJ_AND_APPEND(lines, _("Key Exchange Type"), obj1, level+1, fail);
+    Py_CLEAR(obj1);
+
+    if ((obj1 = PyUnicode_FromFormat("%s (0x%x)",
+                                     self->info.symCipherName,
+                                     self->info.symCipher)) == NULL) {
+        goto fail;
+    }
+    FMT_OBJ_AND_APPEND(lines, _("Symmetric Cipher"), obj1, level+1, fail);
+    Py_CLEAR(obj1);
+
+    obj1 = PyLong_FromLong(self->info.symKeyBits);
+    FMT_OBJ_AND_APPEND(lines, _("Symmetric Key Bits"), obj1, level+1, fail);
+    Py_CLEAR(obj1);
+
+    obj1 = PyLong_FromLong(self->info.effectiveKeyBits);
+    FMT_OBJ_AND_APPEND(lines, _("Effective Symmetric Key Bits"), obj1, level+1, fail);
+    Py_CLEAR(obj1);
+
+    obj1 = PyLong_FromLong(self->info.symKeySpace);
+    FMT_OBJ_AND_APPEND(lines, _("Symmetric Key Space"), obj1, level+1, fail);
+    Py_CLEAR(obj1);
+
+    if ((obj1 = PyUnicode_FromFormat("%s (0x%x)",
+                                     self->info.macAlgorithmName,
+                                     self->info.macAlgorithm)) == NULL) {
+        goto fail;
+    }
+    FMT_OBJ_AND_APPEND(lines, _("MAC Algorithm"), obj1, level+1, fail);
+    Py_CLEAR(obj1);
+
+    obj1 = PyLong_FromLong(self->info.macBits);
+    FMT_OBJ_AND_APPEND(lines, _("MAC Bits"), obj1, level+1, fail);
+    Py_CLEAR(obj1);
+
+    obj1 = PyUnicode_FromString(self->info.isFIPS ? "True" : "False");
+    FMT_OBJ_AND_APPEND(lines, _("FIPS"), obj1, level+1, fail);
+    Py_CLEAR(obj1);
+
+    obj1 = PyUnicode_FromString(self->info.isExportable ? "True" : "False");
+    FMT_OBJ_AND_APPEND(lines, _("Exportable"), obj1, level+1, fail);
+    Py_CLEAR(obj1);
+
+    obj1 = PyUnicode_FromString(self->info.nonStandard ? "True" : "False");
+    FMT_OBJ_AND_APPEND(lines, _("Nonstandard"), obj1, level+1, fail);
+    Py_CLEAR(obj1);
+
+    return lines;
+ fail:
+    Py_XDECREF(obj1);
+    Py_XDECREF(lines);
+    return NULL;
+}
+
+static PyObject *
+SSLCipherSuiteInformation_format(SSLCipherSuiteInformation *self, PyObject *args, PyObject *kwds)
+{
+    TraceMethodEnter(self);
+
+    return format_from_lines((format_lines_func)SSLCipherSuiteInformation_format_lines, (PyObject *)self, args, kwds);
+}
+
+static PyObject *
+SSLCipherSuiteInformation_str(SSLCipherSuiteInformation *self)
+{
+    PyObject *py_formatted_result = NULL;
+
+    TraceMethodEnter(self);
+
+    py_formatted_result =  SSLCipherSuiteInformation_format(self, empty_tuple, NULL);
+    return py_formatted_result;
+
+}
+
+static PyMethodDef SSLCipherSuiteInformation_methods[] = {
+    {"format_lines", (PyCFunction)SSLCipherSuiteInformation_format_lines,   METH_VARARGS|METH_KEYWORDS, generic_format_lines_doc},
+    {"format",       (PyCFunction)SSLCipherSuiteInformation_format,         METH_VARARGS|METH_KEYWORDS, generic_format_doc},
+    {NULL, NULL}  /* Sentinel */
+};
+
+
+
+/* =========================== Class Construction =========================== */
+
+static PyObject *
+SSLCipherSuiteInformation_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+    SSLCipherSuiteInformation *self;
+
+    TraceObjNewEnter(type);
+
+    if ((self = (SSLCipherSuiteInformation *)type->tp_alloc(type, 0)) == NULL) {
+        return NULL;
+    }
+
+    TraceObjNewLeave(self);
+    return (PyObject *)self;
+}
+
+static void
+SSLCipherSuiteInformation_dealloc(SSLCipherSuiteInformation* self)
+{
+    TraceMethodEnter(self);
+
+    Py_XDECREF(self->py_cipher_suite_name);
+    Py_XDECREF(self->py_auth_algorithm_name);
+    Py_XDECREF(self->py_kea_type_name);
+    Py_XDECREF(self->py_symmetric_cipher_name);
+    Py_XDECREF(self->py_mac_algorithm_name);
+
+    Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+PyDoc_STRVAR(SSLCipherSuiteInformation_doc,
+"SSLCipherSuiteInformation(obj)\n\
+\n\
+An object representing SSLCipherSuiteInformation.\n\
+");
+
+static int
+SSLCipherSuiteInformation_init(SSLCipherSuiteInformation *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"arg", NULL};
+    PyObject *arg;
+
+    TraceMethodEnter(self);
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|i:SSLCipherSuiteInformation", kwlist,
+                                     &arg))
+        return -1;
+
+    return 0;
+}
+
+static PyTypeObject SSLCipherSuiteInformationType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "nss.ssl.SSLCipherSuiteInfo",		/* tp_name */
+    sizeof(SSLCipherSuiteInformation),		/* tp_basicsize */
+    0,						/* tp_itemsize */
+    (destructor)SSLCipherSuiteInformation_dealloc,	/* tp_dealloc */
+    0,						/* tp_print */
+    0,						/* tp_getattr */
+    0,						/* tp_setattr */
+    0,						/* tp_compare */
+    0,						/* tp_repr */
+    0,						/* tp_as_number */
+    0,						/* tp_as_sequence */
+    0,						/* tp_as_mapping */
+    0,						/* tp_hash */
+    0,						/* tp_call */
+    (reprfunc)SSLCipherSuiteInformation_str,	/* tp_str */
+    0,						/* tp_getattro */
+    0,						/* tp_setattro */
+    0,						/* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE,	/* tp_flags */
+    SSLCipherSuiteInformation_doc,		/* tp_doc */
+    (traverseproc)0,				/* tp_traverse */
+    (inquiry)0,					/* tp_clear */
+    0,						/* tp_richcompare */
+    0,						/* tp_weaklistoffset */
+    0,						/* tp_iter */
+    0,						/* tp_iternext */
+    SSLCipherSuiteInformation_methods,		/* tp_methods */
+    SSLCipherSuiteInformation_members,		/* tp_members */
+    SSLCipherSuiteInformation_getseters,	/* tp_getset */
+    0,						/* tp_base */
+    0,						/* tp_dict */
+    0,						/* tp_descr_get */
+    0,						/* tp_descr_set */
+    0,						/* tp_dictoffset */
+    (initproc)SSLCipherSuiteInformation_init,	/* tp_init */
+    0,						/* tp_alloc */
+    SSLCipherSuiteInformation_new,		/* tp_new */
+};
+
+static PyObject *
+SSLCipherSuiteInformation_new_from_SSLCipherSuiteInfo(SSLCipherSuiteInfo *info)
+{
+    SSLCipherSuiteInformation *self = NULL;
+
+    TraceObjNewEnter(NULL);
+
+    if ((self = (SSLCipherSuiteInformation *) SSLCipherSuiteInformationType.tp_new(&SSLCipherSuiteInformationType, NULL, NULL)) == NULL) {
+        return NULL;
+    }
+
+    self->info = *info;
+
+    if ((self->py_cipher_suite_name = PyUnicode_InternFromString(info->cipherSuiteName)) == NULL ||
+        (self->py_auth_algorithm_name = PyUnicode_InternFromString(info->authAlgorithmName)) == NULL ||
+        (self->py_kea_type_name = PyUnicode_InternFromString(info->keaTypeName)) == NULL ||
+        (self->py_symmetric_cipher_name = PyUnicode_InternFromString(info->symCipherName)) == NULL ||
+        (self->py_mac_algorithm_name = PyUnicode_InternFromString(info->macAlgorithmName)) == NULL) {
+        Py_DECREF(self);
+        return NULL;
+    }
+
+    TraceObjNewLeave(self);
+    return (PyObject *) self;
+}
+
+/*
+ * Returns a borrowed reference to the tuple of SSLCipherSuiteInfo
+ * objects for the implemented cipher suites, building it and
+ * cipher_suite_info_table on the first call. The information is static
+ * in libssl, it does not depend on NSS being initialized or on policy.
+ */
+static PyObject *
+get_cipher_suite_table(void)
+{
+    PRUint16 n_implemented_ciphers = SSL_GetNumImplementedCiphers();
+    const PRUint16 *implemented_ciphers = SSL_GetImplementedCiphers();
+    SSLCipherSuiteInfo info;
+    PyObject *list = NULL;
+    PyObject *table = NULL;
+    PyObject *py_info = NULL;
+    PyObject *py_suite = NULL;
+    Py_ssize_t n_suites = 0;
+    PRUint16 i;
+
+    if (cipher_suite_info_list) {
+        return cipher_suite_info_list;
+    }
+
+    if ((list = PyTuple_New(n_implemented_ciphers)) == NULL) {
+        return NULL;
+    }
+    if ((table = PyDict_New()) == NULL) {
+        goto fail;
+    }
+
+    for (i = 0; i < n_implemented_ciphers; i++) {
+        if (SSL_GetCipherSuiteInfo(implemented_ciphers[i], &info, sizeof(info)) != SECSuccess) {
+            continue;
+        }
+        if ((py_info = SSLCipherSuiteInformation_new_from_SSLCipherSuiteInfo(&info)) == NULL) {
+            goto fail;
+        }
+        if ((py_suite = PyLong_FromLong(info.cipherSuite)) == NULL) {
+            goto fail;
+        }
+        if (PyDict_SetItem(table, py_suite, py_info) < 0) {
+            goto fail;
+        }
+        Py_CLEAR(py_suite);
+        PyTuple_SET_ITEM(list, n_suites++, py_info);
+        py_info = NULL;
+    }
+
+    if (n_suites < n_implemented_ciphers) {
+        if (_PyTuple_Resize(&list, n_suites) < 0) {
+            goto fail;
+        }
+    }
+
+    cipher_suite_info_list = list;
+    cipher_suite_info_table = table;
+    return cipher_suite_info_list;
+
+ fail:
+    Py_XDECREF(py_suite);
+    Py_XDECREF(py_info);
+    Py_XDECREF(list);
+    Py_XDECREF(table);
+    return NULL;
+}
+
+/* ========================================================================== */
+/* ==================== SSLChannelInformation Class ===================== */
+/* ========================================================================== */
+
+/* ============================ Attribute Access ============================ */
+
+static PyObject *
+SSLChannelInformation_get_protocol_version(SSLChannelInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.protocolVersion);
+}
+
+static PyObject *
+SSLChannelInformation_get_protocol_version_str(SSLChannelInformation *self, void *closure)
+{
+    unsigned int major, minor;
+
+    TraceMethodEnter(self);
+
+    major = self->info.protocolVersion >> 8;
+    minor = self->info.protocolVersion & 0xff;
+    return ssl_version_to_repr_kind(major, minor, AsString);
+}
+
+static PyObject *
+SSLChannelInformation_get_protocol_version_enum(SSLChannelInformation *self, void *closure)
+{
+    unsigned int major, minor;
+
+    TraceMethodEnter(self);
+
+    major = self->info.protocolVersion >> 8;
+    minor = self->info.protocolVersion & 0xff;
+    return ssl_version_to_repr_kind(major, minor, AsEnum);
+}
+
+static PyObject *
+SSLChannelInformation_get_major_protocol_version(SSLChannelInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.protocolVersion >> 8);
+}
+
+static PyObject *
+SSLChannelInformation_get_minor_protocol_version(SSLChannelInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.protocolVersion & 0xff);
+}
+
+static PyObject *
+SSLChannelInformation_get_cipher_suite(SSLChannelInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.cipherSuite);
+}
+
+static PyObject *
+SSLChannelInformation_get_auth_key_bits(SSLChannelInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.authKeyBits);
+}
+
+static PyObject *
+SSLChannelInformation_get_kea_key_bits(SSLChannelInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.keaKeyBits);
+}
+
+static PyObject *
+SSLChannelInformation_get_creation_time(SSLChannelInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return timestamp_to_DateTime(self->info.creationTime, false);
+}
+
+static PyObject *
+SSLChannelInformation_get_creation_time_utc(SSLChannelInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return timestamp_to_DateTime(self->info.creationTime, true);
+}
+
+static PyObject *
+SSLChannelInformation_get_last_access_time(SSLChannelInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return timestamp_to_DateTime(self->info.lastAccessTime, false);
+}
+
+static PyObject *
+SSLChannelInformation_get_last_access_time_utc(SSLChannelInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return timestamp_to_DateTime(self->info.lastAccessTime, true);
+}
+
+static PyObject *
+SSLChannelInformation_get_expiration_time(SSLChannelInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return timestamp_to_DateTime(self->info.creationTime, false);
+}
+
+static PyObject *
+SSLChannelInformation_get_expiration_time_utc(SSLChannelInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return timestamp_to_DateTime(self->info.creationTime, true);
+}
+
+static PyObject *
+SSLChannelInformation_get_compression_method(SSLChannelInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyLong_FromLong(self->info.compressionMethod);
+}
+
+static PyObject *
+SSLChannelInformation_get_compression_method_name(SSLChannelInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyUnicode_FromString(self->info.compressionMethodName);
+}
+
+static PyObject *
+SSLChannelInformation_get_session_id(SSLChannelInformation *self, void *closure)
+{
+    SECItem item;
+    TraceMethodEnter(self);
+
+    item.data = self->info.sessionID;
+    item.len = self->info.sessionIDLength;
+    return SecItem_new_from_SECItem(&item, SECITEM_buffer);
+}
+
+static PyObject *
+SSLChannelInformation_get_early_data_accepted(SSLChannelInformation *self, void *closure)
+{
+    TraceMethodEnter(self);
+
+    return PyBool_FromLong(self->info.earlyDataAccepted);
+}
+
+static
+PyGetSetDef SSLChannelInformation_getseters[] = {
+    {"protocol_version",        (getter)SSLChannelInformation_get_protocol_version,        NULL, "Returns the protocol version, major in octet[1], minor in octet[0] ", NULL},
+    {"protocol_version_str",    (getter)SSLChannelInformation_get_protocol_version_str,    NULL, "Returns the protocol version as a descriptive string", NULL},
+    {"protocol_version_enum",   (getter)SSLChannelInformation_get_protocol_version_enum,   NULL, "Returns the protocol version as an enumerated constant", NULL},
+    {"major_protocol_version",  (getter)SSLChannelInformation_get_major_protocol_version,  NULL, "Returns the major protocol version", NULL},
+    {"minor_protocol_version",  (getter)SSLChannelInformation_get_minor_protocol_version,  NULL, "Returns the minor protocol version", NULL},
+    {"cipher_suite",            (getter)SSLChannelInformation_get_cipher_suite,            NULL, "Returns the cipher suite enum", NULL},
+    {"auth_key_bits",           (getter)SSLChannelInformation_get_auth_key_bits,           NULL, "Returns the auth key bits", NULL},
+    {"kea_key_bits",            (getter)SSLChannelInformation_get_kea_key_bits,            NULL, "Returns the kea key bits", NULL},
+    {"creation_time",           (getter)SSLChannelInformation_get_creation_time,           NULL, "Returns creation time as a DateTime object in local time zone", NULL},
+    {"creation_time_utc",       (getter)SSLChannelInformation_get_creation_time_utc,       NULL, "Returns creation time as a DateTime object in UTC time zone", NULL},
+    {"last_access_time",        (getter)SSLChannelInformation_get_last_access_time,        NULL, "Returns last access time as a DateTime object in local time zone", NULL},
+    {"last_access_time_utc",    (getter)SSLChannelInformation_get_last_access_time_utc,    NULL, "Returns last access time as a DateTime object in UTC time zone", NULL},
+    {"expiration_time",         (getter)SSLChannelInformation_get_expiration_time,         NULL, "Returns expiration time as a DateTime object in local time zone", NULL},
+    {"expiration_time_utc",     (getter)SSLChannelInformation_get_expiration_time_utc,     NULL, "Returns expiration time as a DateTime object in UTC time zone", NULL},
+    {"compression_method",      (getter)SSLChannelInformation_get_compression_method,      NULL, "Returns the compression method enum", NULL},
+    {"compression_method_name", (getter)SSLChannelInformation_get_compression_method_name, NULL, "Returns the compression method name", NULL},
+    {"session_id",              (getter)SSLChannelInformation_get_session_id,              NULL, "Returns the session ID as a SecItem object", NULL},
+    {"early_data_accepted",     (getter)SSLChannelInformation_get_early_data_accepted,     NULL, "Returns True if the server accepted TLS 1.3 early data (0-RTT), valid once the handshake has completed", NULL},
+    {NULL}  /* Sentinel */
+};
+
+static PyMemberDef SSLChannelInformation_members[] = {
+    {NULL}  /* Sentinel */
+};
+
+/* ============================== Class Methods ============================= */
+
+static PyObject *
+SSLChannelInformation_format_lines(SSLChannelInformation *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"level", NULL};
+    int level = 0;
+    PyObject *lines = NULL;
     PyObject *obj1 = NULL;
     PyObject *obj2 = NULL;
     PyObject *obj3 = NULL;
+    unsigned int major, minor;
 
     TraceMethodEnter(self);
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|i:format_lines", kwlist, &level))
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|i:format_lines", kwlist,
+                                     &level))
         return NULL;
 
     if ((lines = PyList_New(0)) == NULL) {
         return NULL;
     }
 
-    if (SSL_GetChannelInfo(self->pr_socket, &channel, sizeof(channel))
-        != SECSuccess) {
-        return set_nspr_error(NULL);
-    }
-
-    if (SSL_GetCipherSuiteInfo(channel.cipherSuite, &suite, sizeof(suite))
-        != SECSuccess) {
-        return set_nspr_error(NULL);
-    }
-
-    major = channel.protocolVersion >> 8;
-    minor = channel.protocolVersion & 0xff;
+
+    major = self->info.protocolVersion >> 8;
+    minor = self->info.protocolVersion & 0xff;
     if ((obj2 = ssl_version_to_repr_kind(major, minor, AsString)) == NULL) {
         goto fail;
     }
@@ -2102,54 +5176,82 @@ SSLSocket_connection_info_format_lines(SSLSocket *self, PyObject *args, PyObject
         goto fail;
     }
     if ((obj1 = PyUnicode_FromFormat("%d.%d (%s)",
-                                     channel.protocolVersion >> 8,
-                                     channel.protocolVersion & 0xff,
+                                     self->info.protocolVersion >> 8,
+                                     self->info.protocolVersion & 0xff,
                                      PyBytes_AsString(obj3))) == NULL) {
         goto fail;
     }
-    FMT_OBJ_AND_APPEND(lines, _("SSL Protocol Version"), obj1, level, fail);
+    FMT_OBJ_AND_APPEND(lines, _("Protocol Version"), obj1, level, fail);
     Py_CLEAR(obj1);
     Py_CLEAR(obj2);
     Py_CLEAR(obj3);
 
-    if ((obj1 = PyUnicode_FromFormat("%d-bit %s",
-                                     suite.effectiveKeyBits,
-                                     suite.symCipherName)) == NULL) {
+    if ((obj2 = cipher_suite_to_name(self->info.cipherSuite)) == NULL) {
         goto fail;
     }
-    FMT_OBJ_AND_APPEND(lines, _("Cipher"), obj1, level, fail);
+    if ((obj3 = PyBaseString_UTF8(obj2, "cipher_suite_to_name")) == NULL) {
+        goto fail;
+    }
+    if ((obj1 = PyUnicode_FromFormat("%s (0x%x)",
+                                     PyBytes_AsString(obj3),
+                                     self->info.cipherSuite)) == NULL) {
+        goto fail;
+    }
+    FMT_OBJ_AND_APPEND(lines, _("Cipher Suite"), obj1, level, fail);
+    Py_CLEAR(obj1);
+    Py_CLEAR(obj2);
+    Py_CLEAR(obj3);
+
+    obj1 = PyLong_FromLong(self->info.authKeyBits);
+    FMT_OBJ_AND_APPEND(lines, _("Auth Key Bits"), obj1, level, fail);
     Py_CLEAR(obj1);
 
-    if ((obj1 = PyUnicode_FromFormat("%d-bit %s",
-                                     suite.macBits,
-                                     suite.macAlgorithmName)) == NULL) {
+    obj1 = PyLong_FromLong(self->info.keaKeyBits);
+    FMT_OBJ_AND_APPEND(lines, _("Key Exchange Key Bits"), obj1, level, fail);
+    Py_CLEAR(obj1);
+
+    if ((obj1 = timestamp_to_DateTime(self->info.creationTime, false)) == NULL) {
         goto fail;
     }
-    FMT_OBJ_AND_APPEND(lines, _("MAC"), obj1, level, fail);
+    FMT_OBJ_AND_APPEND(lines, _("Creation Time"), obj1, level, fail);
     Py_CLEAR(obj1);
 
-    if ((obj1 = PyUnicode_FromFormat("%d-bit %s",
-                                     channel.authKeyBits,
-                                     suite.authAlgorithmName)) == NULL) {
+    if ((obj1 = timestamp_to_DateTime(self->info.lastAccessTime, false)) == NULL) {
         goto fail;
     }
-    FMT_OBJ_AND_APPEND(lines, _("Auth"), obj1, level, fail);
+    FMT_OBJ_AND_APPEND(lines, _("Last Access Time"), obj1, level, fail);
     Py_CLEAR(obj1);
 
-    if ((obj1 = PyUnicode_FromFormat("%d-bit %s",
-                                     channel.keaKeyBits,
-                                     suite.keaTypeName)) == NULL) {
+    if ((obj1 = timestamp_to_DateTime(self->info.expirationTime, false)) == NULL) {
         goto fail;
     }
-    FMT_OBJ_AND_APPEND(lines, _("Key Exchange"), obj1, level, fail);
+    FMT_OBJ_AND_APPEND(lines, _("Expiration Time"), obj1, level, fail);
     Py_CLEAR(obj1);
 
-    obj1 = PyUnicode_FromString(channel.compressionMethodName);
-    FMT_OBJ_AND_APPEND(lines, _("Compression"), obj1, level, fail);
+    if ((obj1 = PyUnicode_FromFormat("%s (0x%x)",
+                                     self->info.compressionMethodName,
+                                     self->info.compressionMethod)) == NULL) {
+        goto fail;
+    }
+    FMT_OBJ_AND_APPEND(lines, _("Compression Method"), obj1, level, fail);
     Py_CLEAR(obj1);
 
-    return lines;
+    obj1 = PyBool_FromLong(self->info.earlyDataAccepted);
+    FMT_OBJ_AND_APPEND(lines, _("Early Data Accepted"), obj1, level, fail);
+    Py_CLEAR(obj1);
+
+
+    if ((obj1 = raw_data_to_hex(self->info.sessionID,
+                                self->info.sessionIDLength,
+                                OCTETS_PER_LINE_DEFAULT,
+                                HEX_SEPARATOR_DEFAULT)) == NULL) {
+        goto fail;
+    }
+    FMT_LABEL_AND_APPEND(lines, _("Session ID"), level, fail);
+    APPEND_LINES_AND_CLEAR(lines, obj1, level+1, fail);
+
 
+    return lines;
  fail:
     Py_XDECREF(obj1);
     Py_XDECREF(obj2);
@@ -2158,185 +5260,86 @@ SSLSocket_connection_info_format_lines(SSLSocket *self, PyObject *args, PyObject
     return NULL;
 }
 
-
 static PyObject *
-SSLSocket_connection_info_format(SSLSocket *self, PyObject *args, PyObject *kwds)
+SSLChannelInformation_format(SSLChannelInformation *self, PyObject *args, PyObject *kwds)
 {
     TraceMethodEnter(self);
 
-    return format_from_lines((format_lines_func)SSLSocket_connection_info_format_lines, (PyObject *)self, args, kwds);
+    return format_from_lines((format_lines_func)SSLChannelInformation_format_lines, (PyObject *)self, args, kwds);
 }
 
-PyDoc_STRVAR(SSLSocket_connection_info_str_doc,
-"connection_info_str() -> str\n\
-Returns a string describing the properties of the SSL connection.\n\
-");
-
 static PyObject *
-SSLSocket_connection_info_str(SSLSocket *self)
+SSLChannelInformation_str(SSLChannelInformation *self)
 {
     PyObject *py_formatted_result = NULL;
 
     TraceMethodEnter(self);
 
-    py_formatted_result =  SSLSocket_connection_info_format(self, empty_tuple, NULL);
+    py_formatted_result =  SSLChannelInformation_format(self, empty_tuple, NULL);
     return py_formatted_result;
 
 }
 
-static PyMethodDef SSLSocket_methods[] = {
-    {"set_ssl_option",                (PyCFunction)SSLSocket_set_ssl_option,                METH_VARARGS,               SSLSocket_set_ssl_option_doc},
-    {"get_ssl_option",                (PyCFunction)SSLSocket_get_ssl_option,                METH_VARARGS,               SSLSocket_get_ssl_option_doc},
-    {"accept",                        (PyCFunction)SSLSocket_accept,                        METH_VARARGS|METH_KEYWORDS, SSLSocket_accept_doc},
-    {"set_auth_certificate_callback", (PyCFunction)SSLSocket_set_auth_certificate_callback, METH_VARARGS,               SSLSocket_set_auth_certificate_callback_doc},
-    {"set_client_auth_data_callback", (PyCFunction)SSLSocket_set_client_auth_data_callback, METH_VARARGS,               SSLSocket_set_client_auth_data_callback_doc},
-    {"set_handshake_callback",        (PyCFunction)SSLSocket_set_handshake_callback,        METH_VARARGS,               SSLSocket_set_handshake_callback_doc},
-    {"set_pkcs11_pin_arg",            (PyCFunction)SSLSocket_set_pkcs11_pin_arg,            METH_VARARGS,               SSLSocket_set_pkcs11_pin_arg_doc},
-    {"get_pkcs11_pin_arg",            (PyCFunction)SSLSocket_get_pkcs11_pin_arg,            METH_NOARGS,                SSLSocket_get_pkcs11_pin_arg_doc},
-    {"config_secure_server",          (PyCFunction)SSLSocket_config_secure_server,          METH_VARARGS,               SSLSocket_config_secure_server_doc},
-    {"get_peer_certificate",          (PyCFunction)SSLSocket_get_peer_certificate,          METH_VARARGS,               SSLSocket_get_peer_certificate_doc},
-    {"get_certificate",               (PyCFunction)SSLSocket_get_certificate,               METH_VARARGS,               SSLSocket_get_certificate_doc},
-    {"invalidate_session",            (PyCFunction)SSLSocket_invalidate_session,            METH_NOARGS,                SSLSocket_invalidate_session_doc},
-    {"data_pending",                  (PyCFunction)SSLSocket_data_pending,                  METH_NOARGS,                SSLSocket_data_pending_doc},
-    {"get_security_status",           (PyCFunction)SSLSocket_get_security_status,           METH_NOARGS,                SSLSocket_get_security_status_doc},
-    {"get_session_id",                (PyCFunction)SSLSocket_get_session_id,                METH_NOARGS,                SSLSocket_get_session_id_doc},
-    {"set_sock_peer_id",              (PyCFunction)SSLSocket_set_sock_peer_id,              METH_VARARGS,               SSLSocket_set_sock_peer_id_doc},
-    {"set_cipher_pref",               (PyCFunction)SSLSocket_set_cipher_pref,               METH_VARARGS,               SSLSocket_set_cipher_pref_doc},
-    {"get_cipher_pref",               (PyCFunction)SSLSocket_get_cipher_pref,               METH_VARARGS,               SSLSocket_get_cipher_pref_doc},
-    {"set_hostname",                  (PyCFunction)SSLSocket_set_hostname,                  METH_VARARGS,               SSLSocket_set_hostname_doc},
-    {"get_hostname",                  (PyCFunction)SSLSocket_get_hostname,                  METH_NOARGS,                SSLSocket_get_hostname_doc},
-    {"set_certificate_db",            (PyCFunction)SSLSocket_set_certificate_db,            METH_VARARGS,               SSLSocket_set_certificate_db_doc},
-    {"reset_handshake",               (PyCFunction)SSLSocket_reset_handshake,               METH_VARARGS,               SSLSocket_reset_handshake_doc},
-    {"force_handshake",               (PyCFunction)SSLSocket_force_handshake,               METH_NOARGS,                SSLSocket_force_handshake_doc},
-    {"force_handshake_timeout",       (PyCFunction)SSLSocket_force_handshake_timeout,       METH_VARARGS,               SSLSocket_force_handshake_timeout_doc},
-    {"rehandshake",                   (PyCFunction)SSLSocket_rehandshake,                   METH_VARARGS,               SSLSocket_rehandshake_doc},
-    {"rehandshake_timeout",           (PyCFunction)SSLSocket_rehandshake_timeout,           METH_VARARGS,               SSLSocket_rehandshake_timeout_doc},
-    {"import_tcp_socket",             (PyCFunction)SSLSocket_import_tcp_socket,             METH_VARARGS|METH_STATIC,   SSLSocket_import_tcp_socket_doc},
-    {"set_ssl_version_range",         (PyCFunction)SSLSocket_set_ssl_version_range,         METH_VARARGS,               SSLSocket_set_ssl_version_range_doc},
-    {"get_ssl_version_range",         (PyCFunction)SSLSocket_get_ssl_version_range,         METH_VARARGS|METH_KEYWORDS, SSLSocket_get_ssl_version_range_doc},
-    {"get_ssl_channel_info",          (PyCFunction)SSLSocket_get_ssl_channel_info,          METH_NOARGS,                SSLSocket_get_ssl_channel_info_doc},
-    {"get_negotiated_host",           (PyCFunction)SSLSocket_get_negotiated_host,           METH_NOARGS,                SSLSocket_get_negotiated_host_doc},
-
-    {"connection_info_format_lines",  (PyCFunction)SSLSocket_connection_info_format_lines,  METH_VARARGS|METH_KEYWORDS, generic_format_lines_doc},
-    {"connection_info_format",        (PyCFunction)SSLSocket_connection_info_format,        METH_VARARGS|METH_KEYWORDS, generic_format_doc},
-    {"connection_info_str",           (PyCFunction)SSLSocket_connection_info_str,           METH_NOARGS,                SSLSocket_connection_info_str_doc},
+static PyMethodDef SSLChannelInformation_methods[] = {
+    {"format_lines", (PyCFunction)SSLChannelInformation_format_lines,   METH_VARARGS|METH_KEYWORDS, generic_format_lines_doc},
+    {"format",       (PyCFunction)SSLChannelInformation_format,         METH_VARARGS|METH_KEYWORDS, generic_format_doc},
     {NULL, NULL}  /* Sentinel */
 };
 
 
+
 /* =========================== Class Construction =========================== */
 
 static PyObject *
-SSLSocket_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+SSLChannelInformation_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 {
-    SSLSocket *self;
+    SSLChannelInformation *self;
 
     TraceObjNewEnter(type);
 
-    if ((self = (SSLSocket *)SocketType.tp_new(type, args, kwds)) == NULL) {
+    if ((self = (SSLChannelInformation *)type->tp_alloc(type, 0)) == NULL) {
         return NULL;
     }
 
-    self->py_auth_certificate_callback = NULL;
-    self->py_auth_certificate_callback_data = NULL;
-    self->py_pk11_pin_args = NULL;
-    self->py_handshake_callback = NULL;
-    self->py_handshake_callback_data = NULL;
-    self->py_client_auth_data_callback = NULL;
-    self->py_client_auth_data_callback_data = NULL;
-
     TraceObjNewLeave(self);
     return (PyObject *)self;
 }
 
-static int
-SSLSocket_traverse(SSLSocket *self, visitproc visit, void *arg)
-{
-    TraceMethodEnter(self);
-
-    Py_VISIT(self->py_auth_certificate_callback);
-    Py_VISIT(self->py_auth_certificate_callback_data);
-    Py_VISIT(self->py_pk11_pin_args);
-    Py_VISIT(self->py_handshake_callback);
-    Py_VISIT(self->py_handshake_callback_data);
-    Py_VISIT(self->py_client_auth_data_callback);
-    Py_VISIT(self->py_client_auth_data_callback_data);
-
-    return Py_TYPE(self)->tp_base->tp_traverse((PyObject *)self, visit, arg);
-}
-
-static int
-SSLSocket_clear(SSLSocket* self)
-{
-    TraceMethodEnter(self);
-
-    Py_CLEAR(self->py_auth_certificate_callback);
-    Py_CLEAR(self->py_auth_certificate_callback_data);
-    Py_CLEAR(self->py_pk11_pin_args);
-    Py_CLEAR(self->py_handshake_callback);
-    Py_CLEAR(self->py_handshake_callback_data);
-    Py_CLEAR(self->py_client_auth_data_callback);
-    Py_CLEAR(self->py_client_auth_data_callback_data);
-
-    return Py_TYPE(self)->tp_base->tp_clear((PyObject *)self);
-
-}
-
 static void
-SSLSocket_dealloc(SSLSocket* self)
+SSLChannelInformation_dealloc(SSLChannelInformation* self)
 {
-
     TraceMethodEnter(self);
 
-    SSLSocket_clear(self);
-    return Py_TYPE(self)->tp_base->tp_dealloc((PyObject *)self);
+    Py_TYPE(self)->tp_free((PyObject*)self);
 }
 
-PyDoc_STRVAR(SSLSocket_doc,
-"SSLSocket(family=PR_AF_INET, type=PR_DESC_SOCKET_TCP)\n\
-\n\
-\n\
-:Parameters:\n\
-    family : integer\n\
-        one of:\n\
-            - PR_AF_INET\n\
-            - PR_AF_INET6\n\
-            - PR_AF_LOCAL\n\
-    type : integer\n\
-        one of:\n\
-            - PR_DESC_SOCKET_TCP\n\
-            - PR_DESC_SOCKET_UDP\n\
-\n\
-Create a new NSPR SSL socket:\n\
+PyDoc_STRVAR(SSLChannelInformation_doc,
+"SSLChannelInformation(obj)\n\
 \n\
+An object representing SSLChannelInformation.\n\
 ");
 
 static int
-SSLSocket_init(SSLSocket *self, PyObject *args, PyObject *kwds)
+SSLChannelInformation_init(SSLChannelInformation *self, PyObject *args, PyObject *kwds)
 {
-    PRFileDesc *ssl_socket = NULL;
+    static char *kwlist[] = {"arg", NULL};
+    PyObject *arg;
 
     TraceMethodEnter(self);
 
-    if (SocketType.tp_init((PyObject *)self, args, kwds) < 0)
-        return -1;
-
-    if ((ssl_socket = SSL_ImportFD(NULL, self->pr_socket)) == NULL) {
-        set_nspr_error(NULL);
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|i:SSLChannelInformation", kwlist,
+                                     &arg))
         return -1;
-    }
 
-    assert(self->pr_socket == ssl_socket);
-    TraceMethodLeave(self);
     return 0;
 }
 
-static PyTypeObject SSLSocketType = {
+static PyTypeObject SSLChannelInformationType = {
     PyVarObject_HEAD_INIT(NULL, 0)
-    "nss.ssl.SSLSocket",			/* tp_name */
-    sizeof(SSLSocket),				/* tp_basicsize */
+    "nss.ssl.SSLChannelInfo",			/* tp_name */
+    sizeof(SSLChannelInformation),		/* tp_basicsize */
     0,						/* tp_itemsize */
-    (destructor)SSLSocket_dealloc,		/* tp_dealloc */
+    (destructor)SSLChannelInformation_dealloc,	/* tp_dealloc */
     0,						/* tp_print */
     0,						/* tp_getattr */
     0,						/* tp_setattr */
@@ -2347,386 +5350,789 @@ static PyTypeObject SSLSocketType = {
     0,						/* tp_as_mapping */
     0,						/* tp_hash */
     0,						/* tp_call */
-    0,						/* tp_str */
+    (reprfunc)SSLChannelInformation_str,	/* tp_str */
     0,						/* tp_getattro */
     0,						/* tp_setattro */
     0,						/* tp_as_buffer */
-    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | Py_TPFLAGS_HAVE_GC,	/* tp_flags */
-    SSLSocket_doc,				/* tp_doc */
-    (traverseproc)SSLSocket_traverse,		/* tp_traverse */
-    (inquiry)SSLSocket_clear,			/* tp_clear */
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE,	/* tp_flags */
+    SSLChannelInformation_doc,			/* tp_doc */
+    (traverseproc)0,				/* tp_traverse */
+    (inquiry)0,					/* tp_clear */
     0,						/* tp_richcompare */
     0,						/* tp_weaklistoffset */
     0,						/* tp_iter */
     0,						/* tp_iternext */
-    SSLSocket_methods,				/* tp_methods */
-    SSLSocket_members,				/* tp_members */
-    SSLSocket_getseters,			/* tp_getset */
+    SSLChannelInformation_methods,		/* tp_methods */
+    SSLChannelInformation_members,		/* tp_members */
+    SSLChannelInformation_getseters,		/* tp_getset */
     0,						/* tp_base */
     0,						/* tp_dict */
     0,						/* tp_descr_get */
     0,						/* tp_descr_set */
     0,						/* tp_dictoffset */
-    (initproc)SSLSocket_init,			/* tp_init */
+    (initproc)SSLChannelInformation_init,	/* tp_init */
     0,						/* tp_alloc */
-    SSLSocket_new,				/* tp_new */
-};
-
-/* ========================================================================== */
-/* ==================== SSLCipherSuiteInformation Class ===================== */
-/* ========================================================================== */
-
-/* ============================ Attribute Access ============================ */
-
-static PyObject *
-SSLCipherSuiteInformation_get_cipher_suite(SSLCipherSuiteInformation *self, void *closure)
-{
-    TraceMethodEnter(self);
-
-    return PyLong_FromLong(self->info.cipherSuite);
-}
+    SSLChannelInformation_new,			/* tp_new */
+};
 
 static PyObject *
-SSLCipherSuiteInformation_get_cipher_suite_name(SSLCipherSuiteInformation *self, void *closure)
+SSLChannelInformation_new_from_SSLChannelInfo(SSLChannelInfo *info)
 {
-    TraceMethodEnter(self);
+    SSLChannelInformation *self = NULL;
 
-    return PyUnicode_FromString(self->info.cipherSuiteName);
-}
+    TraceObjNewEnter(NULL);
 
-static PyObject *
-SSLCipherSuiteInformation_get_auth_algorithm(SSLCipherSuiteInformation *self, void *closure)
-{
-    TraceMethodEnter(self);
+    if ((self = (SSLChannelInformation *) SSLChannelInformationType.tp_new(&SSLChannelInformationType, NULL, NULL)) == NULL) {
+        return NULL;
+    }
 
-    return PyLong_FromLong(self->info.authAlgorithm);
+    self->info = *info;
+
+    TraceObjNewLeave(self);
+    return (PyObject *) self;
 }
 
-static PyObject *
-SSLCipherSuiteInformation_get_auth_algorithm_name(SSLCipherSuiteInformation *self, void *closure)
+/* ========================================================================== */
+/* ============================== TLSConfig Class =========================== */
+/* ========================================================================== */
+
+/*
+ * A TLSConfig callback argument is either a callable or a tuple whose
+ * first item is the callable and whose remaining items are passed to it,
+ * the same as the arguments of SSLSocket.set_*_callback(). None leaves
+ * callback and data NULL.
+ */
+static SECStatus
+tls_config_callback_from_pyobject(PyObject *py_value, const char *name,
+                                  PyObject **callback, PyObject **data)
 {
-    TraceMethodEnter(self);
+    PyObject *py_callback = NULL;
 
-    return PyUnicode_FromString(self->info.authAlgorithmName);
-}
+    *callback = NULL;
+    *data = NULL;
 
-static PyObject *
-SSLCipherSuiteInformation_get_kea_type(SSLCipherSuiteInformation *self, void *closure)
-{
-    TraceMethodEnter(self);
+    if (PyNone_Check(py_value)) {
+        return SECSuccess;
+    }
 
-    return PyLong_FromLong(self->info.keaType);
-}
+    if (PyTuple_Check(py_value) && PyTuple_Size(py_value) > 0) {
+        py_callback = PyTuple_GET_ITEM(py_value, 0);
+        *data = PyTuple_GetSlice(py_value, 1, PyTuple_Size(py_value));
+    } else {
+        py_callback = py_value;
+        *data = PyTuple_New(0);
+    }
+    if (*data == NULL) {
+        return SECFailure;
+    }
 
-static PyObject *
-SSLCipherSuiteInformation_get_kea_type_name(SSLCipherSuiteInformation *self, void *closure)
-{
-    TraceMethodEnter(self);
+    if (!PyCallable_Check(py_callback)) {
+        PyErr_Format(PyExc_TypeError, "%s must be callable or a tuple starting with a callable, not %.200s",
+                     name, Py_TYPE(py_callback)->tp_name);
+        Py_CLEAR(*data);
+        return SECFailure;
+    }
 
-    return PyUnicode_FromString(self->info.keaTypeName);
+    Py_INCREF(py_callback);
+    *callback = py_callback;
+    return SECSuccess;
 }
 
-static PyObject *
-SSLCipherSuiteInformation_get_symmetric_cipher(SSLCipherSuiteInformation *self, void *closure)
+/*
+ * Install the parts of the configuration the model cannot carry, the
+ * hostname and the Python callbacks, on a socket which already has the
+ * model's configuration.
+ */
+static SECStatus
+tls_config_install(TLSConfig *self, SSLSocket *py_sock)
 {
-    TraceMethodEnter(self);
+    PRFileDesc *pr_socket = py_sock->pr_socket;
 
-    return PyLong_FromLong(self->info.symCipher);
-}
+    if (self->py_url) {
+        if (SSL_SetURL(pr_socket, PyBytes_AS_STRING(self->py_url)) != SECSuccess) {
+            set_nspr_error(NULL);
+            return SECFailure;
+        }
+    }
 
-static PyObject *
-SSLCipherSuiteInformation_get_symmetric_cipher_name(SSLCipherSuiteInformation *self, void *closure)
-{
-    TraceMethodEnter(self);
+    if (self->py_auth_certificate_callback) {
+        ASSIGN_REF(py_sock->py_auth_certificate_callback, self->py_auth_certificate_callback);
+        ASSIGN_REF(py_sock->py_auth_certificate_callback_data, self->py_auth_certificate_callback_data);
+        if (SSL_AuthCertificateHook(pr_socket, ssl_auth_certificate, py_sock) != SECSuccess) {
+            set_nspr_error(NULL);
+            return SECFailure;
+        }
+    } else {
+        /* The model carries libssl's default certificate authentication */
+        Py_CLEAR(py_sock->py_auth_certificate_callback);
+        Py_CLEAR(py_sock->py_auth_certificate_callback_data);
+    }
 
-    return PyUnicode_FromString(self->info.symCipherName);
-}
+    if (self->py_handshake_callback) {
+        ASSIGN_REF(py_sock->py_handshake_callback, self->py_handshake_callback);
+        ASSIGN_REF(py_sock->py_handshake_callback_data, self->py_handshake_callback_data);
+        if (SSL_HandshakeCallback(pr_socket, ssl_handshake_callback, py_sock) != SECSuccess) {
+            set_nspr_error(NULL);
+            return SECFailure;
+        }
+    }
 
-static PyObject *
-SSLCipherSuiteInformation_get_symmetric_key_bits(SSLCipherSuiteInformation *self, void *closure)
-{
-    TraceMethodEnter(self);
+    if (self->py_client_auth_data_callback) {
+        ASSIGN_REF(py_sock->py_client_auth_data_callback, self->py_client_auth_data_callback);
+        ASSIGN_REF(py_sock->py_client_auth_data_callback_data, self->py_client_auth_data_callback_data);
+        if (SSL_GetClientAuthDataHook(pr_socket, get_client_auth_data, py_sock) != SECSuccess) {
+            set_nspr_error(NULL);
+            return SECFailure;
+        }
+    }
 
-    return PyLong_FromLong(self->info.symKeyBits);
+    if (self->py_can_false_start_callback) {
+        ASSIGN_REF(py_sock->py_can_false_start_callback, self->py_can_false_start_callback);
+        ASSIGN_REF(py_sock->py_can_false_start_callback_data, self->py_can_false_start_callback_data);
+        if (SSL_SetCanFalseStartCallback(pr_socket, ssl_can_false_start_callback, py_sock) != SECSuccess) {
+            set_nspr_error(NULL);
+            return SECFailure;
+        }
+    }
+
+    return SECSuccess;
 }
 
+/* ============================ Attribute Access ============================ */
+
 static PyObject *
-SSLCipherSuiteInformation_get_symmetric_key_space(SSLCipherSuiteInformation *self, void *closure)
+TLSConfig_get_protocol_variant(TLSConfig *self, void *closure)
 {
     TraceMethodEnter(self);
 
-    return PyLong_FromLong(self->info.symKeySpace);
+    return PyLong_FromLong(self->protocol_variant);
 }
 
 static PyObject *
-SSLCipherSuiteInformation_get_effective_key_bits(SSLCipherSuiteInformation *self, void *closure)
+TLSConfig_get_options(TLSConfig *self, void *closure)
 {
     TraceMethodEnter(self);
 
-    return PyLong_FromLong(self->info.effectiveKeyBits);
+    return PyDict_Copy(self->py_options);
 }
 
 static PyObject *
-SSLCipherSuiteInformation_get_mac_algorithm(SSLCipherSuiteInformation *self, void *closure)
+TLSConfig_get_ciphers(TLSConfig *self, void *closure)
 {
     TraceMethodEnter(self);
 
-    return PyLong_FromLong(self->info.macAlgorithm);
+    Py_INCREF(self->py_ciphers);
+    return self->py_ciphers;
 }
 
 static PyObject *
-SSLCipherSuiteInformation_get_mac_algorithm_name(SSLCipherSuiteInformation *self, void *closure)
+TLSConfig_get_version_range(TLSConfig *self, void *closure)
 {
     TraceMethodEnter(self);
 
-    return PyUnicode_FromString(self->info.macAlgorithmName);
+    Py_INCREF(self->py_version_range);
+    return self->py_version_range;
 }
 
 static PyObject *
-SSLCipherSuiteInformation_get_mac_bits(SSLCipherSuiteInformation *self, void *closure)
+TLSConfig_get_hostname(TLSConfig *self, void *closure)
 {
     TraceMethodEnter(self);
 
-    return PyLong_FromLong(self->info.macBits);
+    Py_INCREF(self->py_hostname);
+    return self->py_hostname;
 }
 
 static PyObject *
-SSLCipherSuiteInformation_get_is_fips(SSLCipherSuiteInformation *self, void *closure)
+TLSConfig_get_server_cert(TLSConfig *self, void *closure)
 {
     TraceMethodEnter(self);
 
-    if (self->info.isFIPS) {
-        Py_RETURN_TRUE;
-    } else {
-        Py_RETURN_FALSE;
-    }
+    Py_INCREF(self->py_server_cert);
+    return self->py_server_cert;
 }
 
 static PyObject *
-SSLCipherSuiteInformation_get_is_exportable(SSLCipherSuiteInformation *self, void *closure)
+TLSConfig_get_priv_key(TLSConfig *self, void *closure)
 {
     TraceMethodEnter(self);
 
-    if (self->info.isExportable) {
-        Py_RETURN_TRUE;
-    } else {
-        Py_RETURN_FALSE;
-    }
+    Py_INCREF(self->py_priv_key);
+    return self->py_priv_key;
 }
 
 static PyObject *
-SSLCipherSuiteInformation_get_is_nonstandard(SSLCipherSuiteInformation *self, void *closure)
+TLSConfig_get_kea(TLSConfig *self, void *closure)
 {
     TraceMethodEnter(self);
 
-    if (self->info.nonStandard) {
-        Py_RETURN_TRUE;
-    } else {
-        Py_RETURN_FALSE;
-    }
+    Py_INCREF(self->py_kea);
+    return self->py_kea;
 }
 
 static
-PyGetSetDef SSLCipherSuiteInformation_getseters[] = {
-    {"cipher_suite",          (getter)SSLCipherSuiteInformation_get_cipher_suite,           NULL, "Returns the cipher suite enum", NULL},
-    {"cipher_suite_name",     (getter)SSLCipherSuiteInformation_get_cipher_suite_name,      NULL, "Returns the cipher suite name", NULL},
-    {"auth_algorithm",        (getter)SSLCipherSuiteInformation_get_auth_algorithm,         NULL, "Returns the auth algorithm enum", NULL},
-    {"auth_algorithm_name",   (getter)SSLCipherSuiteInformation_get_auth_algorithm_name,    NULL, "Returns the auth algorithm name", NULL},
-    {"kea_type",              (getter)SSLCipherSuiteInformation_get_kea_type,               NULL, "Returns the kea type enum", NULL},
-    {"kea_type_name",         (getter)SSLCipherSuiteInformation_get_kea_type_name,          NULL, "Returns the kea type name", NULL},
-    {"symmetric_cipher",      (getter)SSLCipherSuiteInformation_get_symmetric_cipher,       NULL, "Returns the symmetric cipher enum", NULL},
-    {"symmetric_cipher_name", (getter)SSLCipherSuiteInformation_get_symmetric_cipher_name,  NULL, "Returns the symmetric cipher name", NULL},
-    {"symmetric_key_bits",    (getter)SSLCipherSuiteInformation_get_symmetric_key_bits,     NULL, "Returns the symmetric key bits", NULL},
-    {"symmetric_key_space",   (getter)SSLCipherSuiteInformation_get_symmetric_key_space,    NULL, "Returns the symmetric key space", NULL},
-    {"effective_key_bits",    (getter)SSLCipherSuiteInformation_get_effective_key_bits,     NULL, "Returns the effective key bits", NULL},
-    {"mac_algorithm",         (getter)SSLCipherSuiteInformation_get_mac_algorithm,          NULL, "Returns the mac algorithm enum", NULL},
-    {"mac_algorithm_name",    (getter)SSLCipherSuiteInformation_get_mac_algorithm_name,     NULL, "Returns the mac algorithm name", NULL},
-    {"mac_bits",              (getter)SSLCipherSuiteInformation_get_mac_bits,               NULL, "Returns the mac bits", NULL},
-    {"is_fips",               (getter)SSLCipherSuiteInformation_get_is_fips,                NULL, "Returns True if FIPS, False otherwise", NULL},
-    {"is_exportable",         (getter)SSLCipherSuiteInformation_get_is_exportable,          NULL, "Returns True if exportable, False otherwise", NULL},
-    {"is_nonstandard",        (getter)SSLCipherSuiteInformation_get_is_nonstandard,         NULL, "Returns True if nonstandard, False otherwise", NULL},
+PyGetSetDef TLSConfig_getseters[] = {
+    {"protocol_variant", (getter)TLSConfig_get_protocol_variant, (setter)NULL, "SSL_VARIANT_STREAM or SSL_VARIANT_DATAGRAM", NULL},
+    {"options",          (getter)TLSConfig_get_options,          (setter)NULL, "dict mapping SSL option constants to their values", NULL},
+    {"ciphers",          (getter)TLSConfig_get_ciphers,          (setter)NULL, "tuple of the enabled cipher suites, None if the defaults are used", NULL},
+    {"version_range",    (getter)TLSConfig_get_version_range,    (setter)NULL, "(min_version, max_version) tuple, None if the default range is used", NULL},
+    {"hostname",         (getter)TLSConfig_get_hostname,         (setter)NULL, "name of the peer the certificate is verified against, None if not set", NULL},
+    {"server_cert",      (getter)TLSConfig_get_server_cert,      (setter)NULL, "server `Certificate`, None for a client configuration", NULL},
+    {"priv_key",         (getter)TLSConfig_get_priv_key,         (setter)NULL, "`PrivateKey` of server_cert, None for a client configuration", NULL},
+    {"kea",              (getter)TLSConfig_get_kea,              (setter)NULL, "key exchange type of server_cert, None for a client configuration", NULL},
     {NULL}  /* Sentinel */
 };
 
-static PyMemberDef SSLCipherSuiteInformation_members[] = {
+static PyMemberDef TLSConfig_members[] = {
     {NULL}  /* Sentinel */
 };
 
 /* ============================== Class Methods ============================= */
 
+PyDoc_STRVAR(TLSConfig_apply_doc,
+"apply(sock)\n\
+\n\
+:Parameters:\n\
+    sock : SSLSocket object\n\
+        socket to configure, it must not have started a handshake\n\
+\n\
+Replaces the SSL configuration of sock with this configuration:\n\
+options, cipher suites, version range, server certificate, hostname\n\
+and callbacks. Options and cipher suites not named by the\n\
+configuration return to their defaults. Callbacks which are not part\n\
+of the configuration are left in place, except the certificate\n\
+authentication callback which reverts to libssl's default.\n\
+");
+
 static PyObject *
-SSLCipherSuiteInformation_format_lines(SSLCipherSuiteInformation *self, PyObject *args, PyObject *kwds)
+TLSConfig_apply(TLSConfig *self, PyObject *args)
 {
-    static char *kwlist[] = {"level", NULL};
-    int level = 0;
-    PyObject *lines = NULL;
-    PyObject *obj1 = NULL;
+    SSLSocket *py_sock = NULL;
+    PRFileDesc *bottom;
+    int protocol_variant;
 
     TraceMethodEnter(self);
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|i:format_lines", kwlist, &level))
+    if (!PyArg_ParseTuple(args, "O!:apply", &SSLSocketType, &py_sock))
         return NULL;
 
-    if ((lines = PyList_New(0)) == NULL) {
+    if (py_sock->pr_socket == NULL ||
+        (bottom = PR_GetIdentitiesLayer(py_sock->pr_socket, PR_NSPR_IO_LAYER)) == NULL) {
+        PyErr_SetString(PyExc_ValueError, "socket is closed");
         return NULL;
     }
 
-
-    if ((obj1 = PyUnicode_FromFormat("%s (0x%x)",
-                                     self->info.cipherSuiteName,
-                                     self->info.cipherSuite)) == NULL) {
-        goto fail;
-    }
-    FMT_OBJ_AND_APPEND(lines, _("Cipher Suite"), obj1, level, fail);
-    Py_CLEAR(obj1);
-
-    if ((obj1 = PyUnicode_FromFormat("%s (0x%x)",
-                                     self->info.authAlgorithmName,
-                                     self->info.authAlgorithm)) == NULL) {
-        goto fail;
-    }
-    FMT_OBJ_AND_APPEND(lines, _("Auth Algorithm"), obj1, level+1, fail);
-    Py_CLEAR(obj1);
-
-    if ((obj1 = PyUnicode_FromFormat("%s (0x%x)",
-                                     self->info.keaTypeName,
-                                     self->info.keaType)) == NULL) {
-        goto fail;
+    protocol_variant = PR_GetDescType(bottom) == PR_DESC_SOCKET_UDP ?
+        ssl_variant_datagram : ssl_variant_stream;
+    if (protocol_variant != self->protocol_variant) {
+        PyErr_SetString(PyExc_ValueError, "socket and configuration protocol variants differ");
+        return NULL;
     }
-    FMT_OBJ_AND_APPEND(lines, _("Key Exchange Type"), obj1, level+1, fail);
-    Py_CLEAR(obj1);
 
-    if ((obj1 = PyUnicode_FromFormat("%s (0x%x)",
-                                     self->info.symCipherName,
-                                     self->info.symCipher)) == NULL) {
-        goto fail;
+    if (SSL_ReconfigFD(self->model, py_sock->pr_socket) == NULL) {
+        return set_nspr_error(NULL);
     }
-    FMT_OBJ_AND_APPEND(lines, _("Symmetric Cipher"), obj1, level+1, fail);
-    Py_CLEAR(obj1);
-
-    obj1 = PyLong_FromLong(self->info.symKeyBits);
-    FMT_OBJ_AND_APPEND(lines, _("Symmetric Key Bits"), obj1, level+1, fail);
-    Py_CLEAR(obj1);
-
-    obj1 = PyLong_FromLong(self->info.effectiveKeyBits);
-    FMT_OBJ_AND_APPEND(lines, _("Effective Symmetric Key Bits"), obj1, level+1, fail);
-    Py_CLEAR(obj1);
-
-    obj1 = PyLong_FromLong(self->info.symKeySpace);
-    FMT_OBJ_AND_APPEND(lines, _("Symmetric Key Space"), obj1, level+1, fail);
-    Py_CLEAR(obj1);
 
-    if ((obj1 = PyUnicode_FromFormat("%s (0x%x)",
-                                     self->info.macAlgorithmName,
-                                     self->info.macAlgorithm)) == NULL) {
-        goto fail;
+    if (tls_config_install(self, py_sock) != SECSuccess) {
+        return NULL;
     }
-    FMT_OBJ_AND_APPEND(lines, _("MAC Algorithm"), obj1, level+1, fail);
-    Py_CLEAR(obj1);
-
-    obj1 = PyLong_FromLong(self->info.macBits);
-    FMT_OBJ_AND_APPEND(lines, _("MAC Bits"), obj1, level+1, fail);
-    Py_CLEAR(obj1);
-
-    obj1 = PyUnicode_FromString(self->info.isFIPS ? "True" : "False");
-    FMT_OBJ_AND_APPEND(lines, _("FIPS"), obj1, level+1, fail);
-    Py_CLEAR(obj1);
-
-    obj1 = PyUnicode_FromString(self->info.isExportable ? "True" : "False");
-    FMT_OBJ_AND_APPEND(lines, _("Exportable"), obj1, level+1, fail);
-    Py_CLEAR(obj1);
-
-    obj1 = PyUnicode_FromString(self->info.nonStandard ? "True" : "False");
-    FMT_OBJ_AND_APPEND(lines, _("Nonstandard"), obj1, level+1, fail);
-    Py_CLEAR(obj1);
 
-    return lines;
- fail:
-    Py_XDECREF(obj1);
-    Py_XDECREF(lines);
-    return NULL;
+    Py_RETURN_NONE;
 }
 
-static PyObject *
-SSLCipherSuiteInformation_format(SSLCipherSuiteInformation *self, PyObject *args, PyObject *kwds)
-{
-    TraceMethodEnter(self);
-
-    return format_from_lines((format_lines_func)SSLCipherSuiteInformation_format_lines, (PyObject *)self, args, kwds);
-}
+PyDoc_STRVAR(TLSConfig_new_socket_doc,
+"new_socket(family=PR_AF_INET) -> SSLSocket\n\
+\n\
+:Parameters:\n\
+    family : int\n\
+        address family of the socket, PR_AF_INET or PR_AF_INET6\n\
+\n\
+Returns a new `SSLSocket` with this configuration, a TCP socket for\n\
+SSL_VARIANT_STREAM and a UDP socket for SSL_VARIANT_DATAGRAM. The\n\
+configuration is copied when the socket is imported into SSL, which is\n\
+cheaper than creating an `SSLSocket` and calling `TLSConfig.apply()`.\n\
+");
 
 static PyObject *
-SSLCipherSuiteInformation_str(SSLCipherSuiteInformation *self)
+TLSConfig_new_socket(TLSConfig *self, PyObject *args, PyObject *kwds)
 {
-    PyObject *py_formatted_result = NULL;
+    static char *kwlist[] = {"family", NULL};
+    int family = PR_AF_INET;
+    PRFileDesc *pr_socket = NULL;
+    PRFileDesc *ssl_socket = NULL;
+    PyObject *py_sock = NULL;
 
     TraceMethodEnter(self);
 
-    py_formatted_result =  SSLCipherSuiteInformation_format(self, empty_tuple, NULL);
-    return py_formatted_result;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|i:new_socket", kwlist,
+                                     &family))
+        return NULL;
 
-}
+    Py_BEGIN_ALLOW_THREADS
+    if (self->protocol_variant == ssl_variant_datagram) {
+        if ((pr_socket = PR_OpenUDPSocket(family)) != NULL) {
+            ssl_socket = DTLS_ImportFD(self->model, pr_socket);
+        }
+    } else {
+        if ((pr_socket = PR_OpenTCPSocket(family)) != NULL) {
+            ssl_socket = SSL_ImportFD(self->model, pr_socket);
+        }
+    }
+    Py_END_ALLOW_THREADS
 
-static PyMethodDef SSLCipherSuiteInformation_methods[] = {
-    {"format_lines", (PyCFunction)SSLCipherSuiteInformation_format_lines,   METH_VARARGS|METH_KEYWORDS, generic_format_lines_doc},
-    {"format",       (PyCFunction)SSLCipherSuiteInformation_format,         METH_VARARGS|METH_KEYWORDS, generic_format_doc},
-    {NULL, NULL}  /* Sentinel */
-};
+    if (ssl_socket == NULL) {
+        set_nspr_error(NULL);
+        if (pr_socket) {
+            PR_Close(pr_socket);
+        }
+        return NULL;
+    }
+
+    if ((py_sock = SSLSocket_new_from_PRFileDesc(ssl_socket, family)) == NULL) {
+        PR_Close(ssl_socket);
+        return NULL;
+    }
+
+    if (tls_config_install(self, (SSLSocket *)py_sock) != SECSuccess) {
+        Py_DECREF(py_sock);
+        return NULL;
+    }
 
+    return py_sock;
+}
 
+static PyMethodDef TLSConfig_methods[] = {
+    {"apply",      (PyCFunction)TLSConfig_apply,      METH_VARARGS,               TLSConfig_apply_doc},
+    {"new_socket", (PyCFunction)TLSConfig_new_socket, METH_VARARGS|METH_KEYWORDS, TLSConfig_new_socket_doc},
+    {NULL, NULL}  /* Sentinel */
+};
 
 /* =========================== Class Construction =========================== */
 
 static PyObject *
-SSLCipherSuiteInformation_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+TLSConfig_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 {
-    SSLCipherSuiteInformation *self;
+    TLSConfig *self;
 
     TraceObjNewEnter(type);
 
-    if ((self = (SSLCipherSuiteInformation *)type->tp_alloc(type, 0)) == NULL) {
+    if ((self = (TLSConfig *)type->tp_alloc(type, 0)) == NULL) {
         return NULL;
     }
 
+    self->model = NULL;
+    self->protocol_variant = ssl_variant_stream;
+    self->py_options = NULL;
+    self->py_ciphers = NULL;
+    self->py_version_range = NULL;
+    self->py_hostname = NULL;
+    self->py_url = NULL;
+    self->py_server_cert = NULL;
+    self->py_priv_key = NULL;
+    self->py_kea = NULL;
+    self->py_auth_certificate_callback = NULL;
+    self->py_auth_certificate_callback_data = NULL;
+    self->py_handshake_callback = NULL;
+    self->py_handshake_callback_data = NULL;
+    self->py_client_auth_data_callback = NULL;
+    self->py_client_auth_data_callback_data = NULL;
+    self->py_can_false_start_callback = NULL;
+    self->py_can_false_start_callback_data = NULL;
+
     TraceObjNewLeave(self);
     return (PyObject *)self;
 }
 
+static int
+TLSConfig_traverse(TLSConfig *self, visitproc visit, void *arg)
+{
+    TraceMethodEnter(self);
+
+    Py_VISIT(self->py_auth_certificate_callback);
+    Py_VISIT(self->py_auth_certificate_callback_data);
+    Py_VISIT(self->py_handshake_callback);
+    Py_VISIT(self->py_handshake_callback_data);
+    Py_VISIT(self->py_client_auth_data_callback);
+    Py_VISIT(self->py_client_auth_data_callback_data);
+    Py_VISIT(self->py_can_false_start_callback);
+    Py_VISIT(self->py_can_false_start_callback_data);
+    return 0;
+}
+
+static int
+TLSConfig_clear(TLSConfig* self)
+{
+    TraceMethodEnter(self);
+
+    Py_CLEAR(self->py_auth_certificate_callback);
+    Py_CLEAR(self->py_auth_certificate_callback_data);
+    Py_CLEAR(self->py_handshake_callback);
+    Py_CLEAR(self->py_handshake_callback_data);
+    Py_CLEAR(self->py_client_auth_data_callback);
+    Py_CLEAR(self->py_client_auth_data_callback_data);
+    Py_CLEAR(self->py_can_false_start_callback);
+    Py_CLEAR(self->py_can_false_start_callback_data);
+    return 0;
+}
+
 static void
-SSLCipherSuiteInformation_dealloc(SSLCipherSuiteInformation* self)
+TLSConfig_dealloc(TLSConfig* self)
 {
     TraceMethodEnter(self);
 
+    PyObject_GC_UnTrack(self);
+    if (self->model) {
+        PR_Close(self->model);
+    }
+    TLSConfig_clear(self);
+    Py_CLEAR(self->py_options);
+    Py_CLEAR(self->py_ciphers);
+    Py_CLEAR(self->py_version_range);
+    Py_CLEAR(self->py_hostname);
+    Py_CLEAR(self->py_url);
+    Py_CLEAR(self->py_server_cert);
+    Py_CLEAR(self->py_priv_key);
+    Py_CLEAR(self->py_kea);
     Py_TYPE(self)->tp_free((PyObject*)self);
 }
 
-PyDoc_STRVAR(SSLCipherSuiteInformation_doc,
-"SSLCipherSuiteInformation(obj)\n\
+PyDoc_STRVAR(TLSConfig_doc,
+"TLSConfig(protocol_variant=SSL_VARIANT_STREAM, options=None, ciphers=None, version_range=None, hostname=None, server_cert=None, priv_key=None, kea=None, auth_certificate_callback=None, handshake_callback=None, client_auth_data_callback=None, can_false_start_callback=None)\n\
 \n\
-An object representing SSLCipherSuiteInformation.\n\
+:Parameters:\n\
+    protocol_variant : int\n\
+        SSL_VARIANT_STREAM for TLS or SSL_VARIANT_DATAGRAM for DTLS\n\
+    options : dict or None\n\
+        maps SSL option constants to values, as passed to\n\
+        `SSLSocket.set_ssl_option()`\n\
+    ciphers : sequence or None\n\
+        cipher suites to enable, as integers or names, every other\n\
+        implemented suite is disabled. None keeps the default preferences.\n\
+    version_range : (min_version, max_version) tuple or None\n\
+        SSL_LIBRARY_VERSION_* constants or their names, see\n\
+        `SSLSocket.set_ssl_version_range()`\n\
+    hostname : string or None\n\
+        name of the peer, see `SSLSocket.set_hostname()`\n\
+    server_cert : Certificate object or None\n\
+        server certificate, see `SSLSocket.config_secure_server()`\n\
+    priv_key : PrivateKey object or None\n\
+        private key of server_cert, required with server_cert\n\
+    kea : int or None\n\
+        key exchange type of server_cert, None finds it from the certificate\n\
+    auth_certificate_callback : callable, tuple or None\n\
+        see `SSLSocket.set_auth_certificate_callback()`\n\
+    handshake_callback : callable, tuple or None\n\
+        see `SSLSocket.set_handshake_callback()`\n\
+    client_auth_data_callback : callable, tuple or None\n\
+        see `SSLSocket.set_client_auth_data_callback()`\n\
+    can_false_start_callback : callable, tuple or None\n\
+        see `SSLSocket.set_can_false_start_callback()`\n\
+\n\
+An immutable SSL configuration profile. A callback is given either as\n\
+a callable or as a tuple whose first item is the callable and whose\n\
+remaining items are passed to it as the extra arguments of the\n\
+corresponding SSLSocket.set_*_callback() method.\n\
+\n\
+The configuration is validated once, when the object is created, by\n\
+applying it to a private model socket; an invalid option, cipher\n\
+suite, version range or certificate raises an exception here rather\n\
+than when a connection is made. `TLSConfig.apply()` then copies it to\n\
+an existing socket and `TLSConfig.new_socket()` creates a configured\n\
+socket, each in a single call. To configure a `Server`, apply the\n\
+configuration to `Server.socket` before starting it.\n\
+\n\
+The model socket holds a reference to server_cert, delete the\n\
+TLSConfig before calling `nss.nss_shutdown()`.\n\
+\n\
+Example::\n\
+\n\
+    config = ssl.TLSConfig(version_range=('tls1.2', 'tls1.3'),\n\
+                           ciphers=['TLS_AES_128_GCM_SHA256',\n\
+                                    'TLS_ECDHE_ECDSA_WITH_AES_128_GCM_SHA256'],\n\
+                           hostname='www.example.com',\n\
+                           auth_certificate_callback=(auth_certificate_callback,\n\
+                                                      nss.get_default_certdb()))\n\
+    sock = config.new_socket()\n\
+    sock.connect(net_addr)\n\
 ");
 
 static int
-SSLCipherSuiteInformation_init(SSLCipherSuiteInformation *self, PyObject *args, PyObject *kwds)
-{
-    static char *kwlist[] = {"arg", NULL};
-    PyObject *arg;
+TLSConfig_init(TLSConfig *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"protocol_variant", "options", "ciphers", "version_range",
+                             "hostname", "server_cert", "priv_key", "kea",
+                             "auth_certificate_callback", "handshake_callback",
+                             "client_auth_data_callback", "can_false_start_callback", NULL};
+    int protocol_variant = ssl_variant_stream;
+    PyObject *py_options = Py_None;
+    PyObject *py_ciphers = Py_None;
+    PyObject *py_version_range = Py_None;
+    PyObject *py_hostname = Py_None;
+    PyObject *py_server_cert = Py_None;
+    PyObject *py_priv_key = Py_None;
+    PyObject *py_kea = Py_None;
+    PyObject *py_auth_certificate_callback = Py_None;
+    PyObject *py_handshake_callback = Py_None;
+    PyObject *py_client_auth_data_callback = Py_None;
+    PyObject *py_can_false_start_callback = Py_None;
+    PRUint16 n_implemented_ciphers = SSL_GetNumImplementedCiphers();
+    const PRUint16 *implemented_ciphers = SSL_GetImplementedCiphers();
+    PRFileDesc *pr_socket = NULL;
+    PyObject *py_option, *py_value;
+    PyObject *py_seq = NULL;
+    PyObject *py_item = NULL;
+    Py_ssize_t pos = 0;
+    Py_ssize_t n_items, i;
+    long option, value;
+    unsigned long suite;
+    unsigned long min_version, max_version;
+    SSLVersionRange range;
+    SSLKEAType kea;
 
     TraceMethodEnter(self);
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|i:SSLCipherSuiteInformation", kwlist,
-                                     &arg))
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|iOOOOOOOOOOO:TLSConfig", kwlist,
+                                     &protocol_variant, &py_options, &py_ciphers,
+                                     &py_version_range, &py_hostname,
+                                     &py_server_cert, &py_priv_key, &py_kea,
+                                     &py_auth_certificate_callback,
+                                     &py_handshake_callback,
+                                     &py_client_auth_data_callback,
+                                     &py_can_false_start_callback))
+        return -1;
+
+    if (self->model) {
+        PyErr_SetString(PyExc_ValueError, "TLSConfig already initialized");
+        return -1;
+    }
+
+    if (protocol_variant != ssl_variant_stream && protocol_variant != ssl_variant_datagram) {
+        PyErr_Format(PyExc_ValueError, "invalid protocol_variant: %d", protocol_variant);
+        return -1;
+    }
+    self->protocol_variant = protocol_variant;
+
+    if (!PyNone_Check(py_options) && !PyDict_Check(py_options)) {
+        PyErr_Format(PyExc_TypeError, "options must be a dict or None, not %.200s",
+                     Py_TYPE(py_options)->tp_name);
+        return -1;
+    }
+
+    if (!PyNone_Check(py_hostname) && !PyBaseString_Check(py_hostname)) {
+        PyErr_Format(PyExc_TypeError, "hostname must be a string or None, not %.200s",
+                     Py_TYPE(py_hostname)->tp_name);
+        return -1;
+    }
+
+    if (!PyNone_Check(py_server_cert) && !PyCertificate_Check(py_server_cert)) {
+        PyErr_Format(PyExc_TypeError, "server_cert must be a Certificate or None, not %.200s",
+                     Py_TYPE(py_server_cert)->tp_name);
+        return -1;
+    }
+
+    if (!PyNone_Check(py_priv_key) && !PyPrivateKey_Check(py_priv_key)) {
+        PyErr_Format(PyExc_TypeError, "priv_key must be a PrivateKey or None, not %.200s",
+                     Py_TYPE(py_priv_key)->tp_name);
+        return -1;
+    }
+
+    if (PyNone_Check(py_server_cert) != PyNone_Check(py_priv_key)) {
+        PyErr_SetString(PyExc_ValueError, "server_cert and priv_key must be given together");
+        return -1;
+    }
+
+    if (tls_config_callback_from_pyobject(py_auth_certificate_callback, "auth_certificate_callback",
+                                          &self->py_auth_certificate_callback,
+                                          &self->py_auth_certificate_callback_data) != SECSuccess ||
+        tls_config_callback_from_pyobject(py_handshake_callback, "handshake_callback",
+                                          &self->py_handshake_callback,
+                                          &self->py_handshake_callback_data) != SECSuccess ||
+        tls_config_callback_from_pyobject(py_client_auth_data_callback, "client_auth_data_callback",
+                                          &self->py_client_auth_data_callback,
+                                          &self->py_client_auth_data_callback_data) != SECSuccess ||
+        tls_config_callback_from_pyobject(py_can_false_start_callback, "can_false_start_callback",
+                                          &self->py_can_false_start_callback,
+                                          &self->py_can_false_start_callback_data) != SECSuccess) {
         return -1;
+    }
+
+    /* Build the model socket, every value is validated by libssl */
+    if (protocol_variant == ssl_variant_datagram) {
+        if ((pr_socket = PR_NewUDPSocket()) != NULL) {
+            self->model = DTLS_ImportFD(NULL, pr_socket);
+        }
+    } else {
+        if ((pr_socket = PR_NewTCPSocket()) != NULL) {
+            self->model = SSL_ImportFD(NULL, pr_socket);
+        }
+    }
+    if (self->model == NULL) {
+        set_nspr_error(NULL);
+        if (pr_socket) {
+            PR_Close(pr_socket);
+        }
+        return -1;
+    }
+
+    if ((self->py_options = PyDict_New()) == NULL) {
+        return -1;
+    }
+    if (!PyNone_Check(py_options)) {
+        while (PyDict_Next(py_options, &pos, &py_option, &py_value)) {
+            option = PyLong_AsLong(py_option);
+            if (option == -1 && PyErr_Occurred()) {
+                return -1;
+            }
+            value = PyLong_AsLong(py_value);
+            if (value == -1 && PyErr_Occurred()) {
+                return -1;
+            }
+            if (SSL_OptionSet(self->model, option, value) != SECSuccess) {
+                set_nspr_error("invalid value %ld for option %ld", value, option);
+                return -1;
+            }
+            if ((py_option = PyLong_FromLong(option)) == NULL) {
+                return -1;
+            }
+            if ((py_value = PyLong_FromLong(value)) == NULL) {
+                Py_DECREF(py_option);
+                return -1;
+            }
+            if (PyDict_SetItem(self->py_options, py_option, py_value) < 0) {
+                Py_DECREF(py_option);
+                Py_DECREF(py_value);
+                return -1;
+            }
+            Py_DECREF(py_option);
+            Py_DECREF(py_value);
+        }
+    }
+
+    if (PyNone_Check(py_ciphers)) {
+        Py_INCREF(Py_None);
+        self->py_ciphers = Py_None;
+    } else {
+        if ((py_seq = PySequence_Fast(py_ciphers, "ciphers must be a sequence or None")) == NULL) {
+            return -1;
+        }
+        n_items = PySequence_Fast_GET_SIZE(py_seq);
+        if ((self->py_ciphers = PyTuple_New(n_items)) == NULL) {
+            Py_DECREF(py_seq);
+            return -1;
+        }
+        for (i = 0; i < n_implemented_ciphers; i++) {
+            if (SSL_CipherPrefSet(self->model, implemented_ciphers[i], PR_FALSE) != SECSuccess) {
+                Py_DECREF(py_seq);
+                set_nspr_error(NULL);
+                return -1;
+            }
+        }
+        for (i = 0; i < n_items; i++) {
+            py_item = PySequence_Fast_GET_ITEM(py_seq, i);
+            if (PyInteger_Check(py_item)) {
+                suite = PyLong_AsUnsignedLong(py_item);
+                if (PyErr_Occurred()) {
+                    Py_DECREF(py_seq);
+                    return -1;
+                }
+            } else if (cipher_suite_from_name(py_item, &suite) != SECSuccess) {
+                Py_DECREF(py_seq);
+                return -1;
+            }
+            if (SSL_CipherPrefSet(self->model, suite, PR_TRUE) != SECSuccess) {
+                Py_DECREF(py_seq);
+                set_nspr_error("cannot enable cipher suite 0x%04lx", suite);
+                return -1;
+            }
+            if ((py_value = PyLong_FromUnsignedLong(suite)) == NULL) {
+                Py_DECREF(py_seq);
+                return -1;
+            }
+            PyTuple_SET_ITEM(self->py_ciphers, i, py_value);
+        }
+        Py_DECREF(py_seq);
+    }
+
+    if (PyNone_Check(py_version_range)) {
+        Py_INCREF(Py_None);
+        self->py_version_range = Py_None;
+    } else {
+        if (!PySequence_Check(py_version_range) || PySequence_Size(py_version_range) != 2) {
+            PyErr_SetString(PyExc_TypeError, "version_range must be a (min_version, max_version) tuple or None");
+            return -1;
+        }
+        if ((py_item = PySequence_GetItem(py_version_range, 0)) == NULL) {
+            return -1;
+        }
+        if (ssl_library_version_from_pyobject(py_item, "min", &min_version) != SECSuccess) {
+            Py_DECREF(py_item);
+            return -1;
+        }
+        Py_DECREF(py_item);
+        if ((py_item = PySequence_GetItem(py_version_range, 1)) == NULL) {
+            return -1;
+        }
+        if (ssl_library_version_from_pyobject(py_item, "max", &max_version) != SECSuccess) {
+            Py_DECREF(py_item);
+            return -1;
+        }
+        Py_DECREF(py_item);
+
+        range.min = min_version;
+        range.max = max_version;
+        if (SSL_VersionRangeSet(self->model, &range) != SECSuccess) {
+            set_nspr_error(NULL);
+            return -1;
+        }
+        if ((self->py_version_range = Py_BuildValue("(kk)", min_version, max_version)) == NULL) {
+            return -1;
+        }
+    }
+
+    Py_INCREF(py_hostname);
+    self->py_hostname = py_hostname;
+    if (!PyNone_Check(py_hostname)) {
+        if ((self->py_url = PyUnicode_AsEncodedString(py_hostname, "idna", NULL)) == NULL) {
+            return -1;
+        }
+    }
+
+    Py_INCREF(py_server_cert);
+    self->py_server_cert = py_server_cert;
+    Py_INCREF(py_priv_key);
+    self->py_priv_key = py_priv_key;
+
+    if (PyNone_Check(py_server_cert)) {
+        Py_INCREF(Py_None);
+        self->py_kea = Py_None;
+    } else {
+        if (PyNone_Check(py_kea)) {
+            kea = NSS_FindCertKEAType(((Certificate *)py_server_cert)->cert);
+        } else {
+            kea = PyLong_AsLong(py_kea);
+            if (PyErr_Occurred()) {
+                return -1;
+            }
+        }
+        if (SSL_ConfigSecureServer(self->model, ((Certificate *)py_server_cert)->cert,
+                                   ((PrivateKey *)py_priv_key)->private_key, kea) != SECSuccess) {
+            set_nspr_error(NULL);
+            return -1;
+        }
+        if ((self->py_kea = PyLong_FromLong(kea)) == NULL) {
+            return -1;
+        }
+    }
 
     return 0;
 }
 
-static PyTypeObject SSLCipherSuiteInformationType = {
+static PyTypeObject TLSConfigType = {
     PyVarObject_HEAD_INIT(NULL, 0)
-    "nss.ssl.SSLCipherSuiteInfo",		/* tp_name */
-    sizeof(SSLCipherSuiteInformation),		/* tp_basicsize */
+    "nss.ssl.TLSConfig",			/* tp_name */
+    sizeof(TLSConfig),				/* tp_basicsize */
     0,						/* tp_itemsize */
-    (destructor)SSLCipherSuiteInformation_dealloc,	/* tp_dealloc */
+    (destructor)TLSConfig_dealloc,		/* tp_dealloc */
     0,						/* tp_print */
     0,						/* tp_getattr */
     0,						/* tp_setattr */
@@ -2737,420 +6143,959 @@ static PyTypeObject SSLCipherSuiteInformationType = {
     0,						/* tp_as_mapping */
     0,						/* tp_hash */
     0,						/* tp_call */
-    (reprfunc)SSLCipherSuiteInformation_str,	/* tp_str */
+    0,						/* tp_str */
     0,						/* tp_getattro */
     0,						/* tp_setattro */
     0,						/* tp_as_buffer */
-    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE,	/* tp_flags */
-    SSLCipherSuiteInformation_doc,		/* tp_doc */
-    (traverseproc)0,				/* tp_traverse */
-    (inquiry)0,					/* tp_clear */
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | Py_TPFLAGS_HAVE_GC,	/* tp_flags */
+    TLSConfig_doc,				/* tp_doc */
+    (traverseproc)TLSConfig_traverse,		/* tp_traverse */
+    (inquiry)TLSConfig_clear,			/* tp_clear */
     0,						/* tp_richcompare */
     0,						/* tp_weaklistoffset */
     0,						/* tp_iter */
     0,						/* tp_iternext */
-    SSLCipherSuiteInformation_methods,		/* tp_methods */
-    SSLCipherSuiteInformation_members,		/* tp_members */
-    SSLCipherSuiteInformation_getseters,	/* tp_getset */
+    TLSConfig_methods,				/* tp_methods */
+    TLSConfig_members,				/* tp_members */
+    TLSConfig_getseters,			/* tp_getset */
     0,						/* tp_base */
     0,						/* tp_dict */
     0,						/* tp_descr_get */
     0,						/* tp_descr_set */
     0,						/* tp_dictoffset */
-    (initproc)SSLCipherSuiteInformation_init,	/* tp_init */
+    (initproc)TLSConfig_init,			/* tp_init */
     0,						/* tp_alloc */
-    SSLCipherSuiteInformation_new,		/* tp_new */
+    TLSConfig_new,				/* tp_new */
 };
 
-static PyObject *
-SSLCipherSuiteInformation_new_from_SSLCipherSuiteInfo(SSLCipherSuiteInfo *info)
-{
-    SSLCipherSuiteInformation *self = NULL;
-
-    TraceObjNewEnter(NULL);
-
-    if ((self = (SSLCipherSuiteInformation *) SSLCipherSuiteInformationType.tp_new(&SSLCipherSuiteInformationType, NULL, NULL)) == NULL) {
-        return NULL;
-    }
-
-    self->info = *info;
-
-    TraceObjNewLeave(self);
-    return (PyObject *) self;
-}
-
 /* ========================================================================== */
-/* ==================== SSLChannelInformation Class ===================== */
+/* ============================== Server Class ============================== */
 /* ========================================================================== */
 
-/* ============================ Attribute Access ============================ */
-
-static PyObject *
-SSLChannelInformation_get_protocol_version(SSLChannelInformation *self, void *closure)
+static void
+server_latency_add(ServerLatency *latency, PRTime start, PRTime end)
 {
-    TraceMethodEnter(self);
+    double value = (double)(end - start) / PR_USEC_PER_SEC;
 
-    return PyLong_FromLong(self->info.protocolVersion);
+    latency->count++;
+    latency->total += value;
+    if (value > latency->max) {
+        latency->max = value;
+    }
+    latency->samples[latency->next] = value;
+    latency->next = (latency->next + 1) % SERVER_LATENCY_SAMPLES;
 }
 
-static PyObject *
-SSLChannelInformation_get_protocol_version_str(SSLChannelInformation *self, void *closure)
+static int
+compare_doubles(const void *a, const void *b)
 {
-    unsigned int major, minor;
+    double x = *(const double *)a;
+    double y = *(const double *)b;
 
-    TraceMethodEnter(self);
-
-    major = self->info.protocolVersion >> 8;
-    minor = self->info.protocolVersion & 0xff;
-    return ssl_version_to_repr_kind(major, minor, AsString);
+    return (x > y) - (x < y);
 }
 
 static PyObject *
-SSLChannelInformation_get_protocol_version_enum(SSLChannelInformation *self, void *closure)
+server_latency_to_dict(ServerLatency *latency)
+{
+    double samples[SERVER_LATENCY_SAMPLES];
+    unsigned int n_samples;
+    double mean = 0.0;
+    double p50 = 0.0, p90 = 0.0, p99 = 0.0;
+
+    n_samples = MIN(latency->count, SERVER_LATENCY_SAMPLES);
+    if (n_samples) {
+        memcpy(samples, latency->samples, n_samples * sizeof(double));
+        qsort(samples, n_samples, sizeof(double), compare_doubles);
+        p50 = samples[n_samples * 50 / 100];
+        p90 = samples[n_samples * 90 / 100];
+        p99 = samples[n_samples * 99 / 100];
+        mean = latency->total / latency->count;
+    }
+
+    return Py_BuildValue("{sksdsdsdsdsd}",
+                         "count", latency->count,
+                         "mean",  mean,
+                         "max",   latency->max,
+                         "p50",   p50,
+                         "p90",   p90,
+                         "p99",   p99);
+}
+
+/*
+ * Called by a native thread when it exits. Once n_threads has been
+ * decremented the thread no longer touches the server state, the
+ * reference it holds is released with the GIL.
+ */
+static void
+server_thread_exit(Server *self)
 {
-    unsigned int major, minor;
+    PyGILState_STATE gstate;
 
-    TraceMethodEnter(self);
+    PR_Lock(self->lock);
+    self->n_threads--;
+    PR_NotifyAllCondVar(self->thread_exit);
+    PR_Unlock(self->lock);
 
-    major = self->info.protocolVersion >> 8;
-    minor = self->info.protocolVersion & 0xff;
-    return ssl_version_to_repr_kind(major, minor, AsEnum);
+    gstate = PyGILState_Ensure();
+    Py_DECREF(self);
+    PyGILState_Release(gstate);
 }
 
-static PyObject *
-SSLChannelInformation_get_major_protocol_version(SSLChannelInformation *self, void *closure)
+/*
+ * Closes the listening socket if the server created it. The caller must
+ * hold the GIL.
+ */
+static PRStatus
+server_close_socket(Server *self)
 {
-    TraceMethodEnter(self);
+    PRStatus status = PR_SUCCESS;
 
-    return PyLong_FromLong(self->info.protocolVersion >> 8);
+    if (self->owns_socket && self->py_socket && self->py_socket->pr_socket) {
+        status = PR_Close(self->py_socket->pr_socket);
+        self->py_socket->pr_socket = NULL;
+    }
+    return status;
 }
 
-static PyObject *
-SSLChannelInformation_get_minor_protocol_version(SSLChannelInformation *self, void *closure)
-{
-    TraceMethodEnter(self);
+/*
+ * Accepts connections on the listening socket and queues them for the
+ * workers. Every connection pending on the socket, up to accept_batch,
+ * is accepted each time the socket polls readable and the batch is
+ * queued under a single acquisition of the lock. When the queue is full
+ * the thread waits for the workers, new connections then back up in the
+ * listen backlog.
+ */
+static void
+server_acceptor_thread(void *arg)
+{
+    Server *self = arg;
+    PRFileDesc *listen_socket = self->py_socket->pr_socket;
+    PRPollDesc poll_descs[2];
+    ServerConnection *batch = NULL;
+    unsigned int n_batch, i;
+    PRFileDesc *pr_socket;
+    PRNetAddr pr_netaddr;
+    PRErrorCode error;
+    PyGILState_STATE gstate;
 
-    return PyLong_FromLong(self->info.protocolVersion & 0xff);
+    PR_SetThreadPrivate(server_thread_index, self);
+
+    if ((batch = PR_Calloc(self->accept_batch, sizeof(ServerConnection))) == NULL) {
+        goto exit;
+    }
+
+    poll_descs[0].fd = listen_socket;
+    poll_descs[0].in_flags = PR_POLL_READ;
+    poll_descs[1].fd = self->wakeup_event;
+    poll_descs[1].in_flags = PR_POLL_READ;
+
+    while (PR_TRUE) {
+        poll_descs[0].out_flags = 0;
+        poll_descs[1].out_flags = 0;
+
+        if (PR_Poll(poll_descs, 2, PR_INTERVAL_NO_TIMEOUT) < 0) {
+            if (PR_GetError() == PR_PENDING_INTERRUPT_ERROR) {
+                continue;
+            }
+            break;
+        }
+
+        if (poll_descs[1].out_flags & PR_POLL_READ) {
+            break;
+        }
+
+        if (!(poll_descs[0].out_flags & PR_POLL_READ)) {
+            continue;
+        }
+
+        for (n_batch = 0; n_batch < self->accept_batch; n_batch++) {
+            if ((pr_socket = PR_Accept(listen_socket, &pr_netaddr, PR_INTERVAL_NO_WAIT)) == NULL) {
+                break;
+            }
+            batch[n_batch].pr_socket = pr_socket;
+            batch[n_batch].pr_netaddr = pr_netaddr;
+            batch[n_batch].accepted = PR_Now();
+        }
+
+        if (n_batch == 0) {
+            error = PR_GetError();
+            if (error != PR_IO_TIMEOUT_ERROR && error != PR_WOULD_BLOCK_ERROR) {
+                /* e.g. out of file descriptors, give the workers a chance to close some */
+                PR_Sleep(PR_MillisecondsToInterval(10));
+            }
+            continue;
+        }
+
+        PR_Lock(self->lock);
+        self->n_accept_batches++;
+        for (i = 0; i < n_batch; i++) {
+            while (self->n_pending == self->max_pending) {
+                PR_WaitCondVar(self->not_full, PR_INTERVAL_NO_TIMEOUT);
+            }
+            self->pending[(self->pending_head + self->n_pending) % self->max_pending] = batch[i];
+            self->n_pending++;
+            self->n_accepted++;
+            PR_NotifyCondVar(self->not_empty);
+        }
+        PR_Unlock(self->lock);
+    }
+
+ exit:
+    PR_Free(batch);
+
+    /* Release the port even if nobody waits in shutdown() */
+    gstate = PyGILState_Ensure();
+    server_close_socket(self);
+    PyGILState_Release(gstate);
+
+    /* Workers exit once the acceptor has stopped and the queue is drained */
+    PR_Lock(self->lock);
+    self->acceptor_running = PR_FALSE;
+    PR_NotifyAllCondVar(self->not_empty);
+    PR_Unlock(self->lock);
+
+    server_thread_exit(self);
 }
 
-static PyObject *
-SSLChannelInformation_get_cipher_suite(SSLChannelInformation *self, void *closure)
+/*
+ * Performs the handshake without the GIL, then runs the handler on the
+ * connection with the GIL held. The connection is closed when the
+ * handler returns.
+ */
+static void
+server_serve_connection(Server *self, ServerConnection *connection)
 {
-    TraceMethodEnter(self);
+    PyGILState_STATE gstate;
+    PRFileDesc *pr_socket = connection->pr_socket;
+    PyObject *py_ssl_socket = NULL;
+    PyObject *py_netaddr = NULL;
+    PyObject *result = NULL;
+    PRTime start, end;
+    SECStatus status;
 
-    return PyLong_FromLong(self->info.cipherSuite);
-}
+    start = PR_Now();
+    if ((status = SSL_ResetHandshake(pr_socket, PR_TRUE)) == SECSuccess) {
+        if (self->handshake_timeout == PR_INTERVAL_NO_TIMEOUT) {
+            status = SSL_ForceHandshake(pr_socket);
+        } else {
+            status = SSL_ForceHandshakeWithTimeout(pr_socket, self->handshake_timeout);
+        }
+    }
+    end = PR_Now();
+
+    PR_Lock(self->lock);
+    if (status == SECSuccess) {
+        server_latency_add(&self->handshake_time, start, end);
+    } else {
+        self->n_handshake_failures++;
+    }
+    PR_Unlock(self->lock);
+
+    if (status != SECSuccess) {
+        PR_Close(pr_socket);
+        return;
+    }
+
+    gstate = PyGILState_Ensure();
+
+    start = PR_Now();
+    if ((py_ssl_socket = SSLSocket_new_from_PRFileDesc(pr_socket, self->family)) == NULL) {
+        PR_Close(pr_socket);
+        goto fail;
+    }
+
+    if ((py_netaddr = NetworkAddress_new_from_PRNetAddr(&connection->pr_netaddr)) == NULL) {
+        goto fail;
+    }
 
-static PyObject *
-SSLChannelInformation_get_auth_key_bits(SSLChannelInformation *self, void *closure)
-{
-    TraceMethodEnter(self);
+    if ((result = PyObject_CallFunctionObjArgs(self->py_handler, py_ssl_socket, py_netaddr, NULL)) == NULL) {
+        goto fail;
+    }
+    Py_DECREF(result);
 
-    return PyLong_FromLong(self->info.authKeyBits);
-}
+    if (((SSLSocket *)py_ssl_socket)->pr_socket) {
+        if ((result = PyObject_CallMethod(py_ssl_socket, "close", NULL)) == NULL) {
+            goto fail;
+        }
+        Py_DECREF(result);
+    }
+    end = PR_Now();
 
-static PyObject *
-SSLChannelInformation_get_kea_key_bits(SSLChannelInformation *self, void *closure)
-{
-    TraceMethodEnter(self);
+    Py_DECREF(py_ssl_socket);
+    Py_DECREF(py_netaddr);
+    PyGILState_Release(gstate);
 
-    return PyLong_FromLong(self->info.keaKeyBits);
-}
+    PR_Lock(self->lock);
+    server_latency_add(&self->handler_time, start, end);
+    self->n_completed++;
+    PR_Unlock(self->lock);
+    return;
 
-static PyObject *
-SSLChannelInformation_get_creation_time(SSLChannelInformation *self, void *closure)
-{
-    TraceMethodEnter(self);
+ fail:
+    PySys_WriteStderr("exception in nss.ssl.Server handler\n");
+    PyErr_Print();  /* this also clears the error */
 
-    return timestamp_to_DateTime(self->info.creationTime, false);
+    if (py_ssl_socket && ((SSLSocket *)py_ssl_socket)->pr_socket) {
+        if ((result = PyObject_CallMethod(py_ssl_socket, "close", NULL)) == NULL) {
+            PyErr_Clear();
+        }
+        Py_XDECREF(result);
+    }
+    Py_XDECREF(py_ssl_socket);
+    Py_XDECREF(py_netaddr);
+    PyGILState_Release(gstate);
+
+    PR_Lock(self->lock);
+    self->n_handler_errors++;
+    PR_Unlock(self->lock);
 }
 
-static PyObject *
-SSLChannelInformation_get_creation_time_utc(SSLChannelInformation *self, void *closure)
+static void
+server_worker_thread(void *arg)
 {
-    TraceMethodEnter(self);
+    Server *self = arg;
+    ServerConnection connection;
 
-    return timestamp_to_DateTime(self->info.creationTime, true);
-}
+    PR_SetThreadPrivate(server_thread_index, self);
 
-static PyObject *
-SSLChannelInformation_get_last_access_time(SSLChannelInformation *self, void *closure)
-{
-    TraceMethodEnter(self);
+    while (PR_TRUE) {
+        PR_Lock(self->lock);
+        while (self->n_pending == 0 && self->acceptor_running) {
+            PR_WaitCondVar(self->not_empty, PR_INTERVAL_NO_TIMEOUT);
+        }
+        if (self->n_pending == 0) {
+            PR_Unlock(self->lock);
+            break;
+        }
+        connection = self->pending[self->pending_head];
+        self->pending_head = (self->pending_head + 1) % self->max_pending;
+        self->n_pending--;
+        self->n_active++;
+        server_latency_add(&self->queue_time, connection.accepted, PR_Now());
+        PR_NotifyCondVar(self->not_full);
+        PR_Unlock(self->lock);
 
-    return timestamp_to_DateTime(self->info.lastAccessTime, false);
-}
+        server_serve_connection(self, &connection);
 
-static PyObject *
-SSLChannelInformation_get_last_access_time_utc(SSLChannelInformation *self, void *closure)
-{
-    TraceMethodEnter(self);
+        PR_Lock(self->lock);
+        self->n_active--;
+        PR_Unlock(self->lock);
+    }
 
-    return timestamp_to_DateTime(self->info.lastAccessTime, true);
+    server_thread_exit(self);
 }
 
+/* ============================ Attribute Access ============================ */
+
 static PyObject *
-SSLChannelInformation_get_expiration_time(SSLChannelInformation *self, void *closure)
+Server_get_socket(Server *self, void *closure)
 {
     TraceMethodEnter(self);
 
-    return timestamp_to_DateTime(self->info.creationTime, false);
+    Py_INCREF(self->py_socket);
+    return (PyObject *)self->py_socket;
 }
 
 static PyObject *
-SSLChannelInformation_get_expiration_time_utc(SSLChannelInformation *self, void *closure)
+Server_get_net_addr(Server *self, void *closure)
 {
+    PRNetAddr pr_netaddr;
+
     TraceMethodEnter(self);
 
-    return timestamp_to_DateTime(self->info.creationTime, true);
-}
+    if (self->py_socket->pr_socket == NULL) {
+        Py_RETURN_NONE;
+    }
 
-static PyObject *
-SSLChannelInformation_get_compression_method(SSLChannelInformation *self, void *closure)
-{
-    TraceMethodEnter(self);
+    if (PR_GetSockName(self->py_socket->pr_socket, &pr_netaddr) != PR_SUCCESS) {
+        return set_nspr_error(NULL);
+    }
 
-    return PyLong_FromLong(self->info.compressionMethod);
+    return NetworkAddress_new_from_PRNetAddr(&pr_netaddr);
 }
 
 static PyObject *
-SSLChannelInformation_get_compression_method_name(SSLChannelInformation *self, void *closure)
+Server_get_workers(Server *self, void *closure)
 {
     TraceMethodEnter(self);
 
-    return PyUnicode_FromString(self->info.compressionMethodName);
+    return PyLong_FromUnsignedLong(self->n_workers);
 }
 
 static PyObject *
-SSLChannelInformation_get_session_id(SSLChannelInformation *self, void *closure)
+Server_get_running(Server *self, void *closure)
 {
-    SECItem item;
+    PRBool running;
+
     TraceMethodEnter(self);
 
-    item.data = self->info.sessionID;
-    item.len = self->info.sessionIDLength;
-    return SecItem_new_from_SECItem(&item, SECITEM_buffer);
+    PR_Lock(self->lock);
+    running = self->started && !self->stopping;
+    PR_Unlock(self->lock);
+
+    return PyBool_FromLong(running);
 }
 
 static
-PyGetSetDef SSLChannelInformation_getseters[] = {
-    {"protocol_version",        (getter)SSLChannelInformation_get_protocol_version,        NULL, "Returns the protocol version, major in octet[1], minor in octet[0] ", NULL},
-    {"protocol_version_str",    (getter)SSLChannelInformation_get_protocol_version_str,    NULL, "Returns the protocol version as a descriptive string", NULL},
-    {"protocol_version_enum",   (getter)SSLChannelInformation_get_protocol_version_enum,   NULL, "Returns the protocol version as an enumerated constant", NULL},
-    {"major_protocol_version",  (getter)SSLChannelInformation_get_major_protocol_version,  NULL, "Returns the major protocol version", NULL},
-    {"minor_protocol_version",  (getter)SSLChannelInformation_get_minor_protocol_version,  NULL, "Returns the minor protocol version", NULL},
-    {"cipher_suite",            (getter)SSLChannelInformation_get_cipher_suite,            NULL, "Returns the cipher suite enum", NULL},
-    {"auth_key_bits",           (getter)SSLChannelInformation_get_auth_key_bits,           NULL, "Returns the auth key bits", NULL},
-    {"kea_key_bits",            (getter)SSLChannelInformation_get_kea_key_bits,            NULL, "Returns the kea key bits", NULL},
-    {"creation_time",           (getter)SSLChannelInformation_get_creation_time,           NULL, "Returns creation time as a DateTime object in local time zone", NULL},
-    {"creation_time_utc",       (getter)SSLChannelInformation_get_creation_time_utc,       NULL, "Returns creation time as a DateTime object in UTC time zone", NULL},
-    {"last_access_time",        (getter)SSLChannelInformation_get_last_access_time,        NULL, "Returns last access time as a DateTime object in local time zone", NULL},
-    {"last_access_time_utc",    (getter)SSLChannelInformation_get_last_access_time_utc,    NULL, "Returns last access time as a DateTime object in UTC time zone", NULL},
-    {"expiration_time",         (getter)SSLChannelInformation_get_expiration_time,         NULL, "Returns expiration time as a DateTime object in local time zone", NULL},
-    {"expiration_time_utc",     (getter)SSLChannelInformation_get_expiration_time_utc,     NULL, "Returns expiration time as a DateTime object in UTC time zone", NULL},
-    {"compression_method",      (getter)SSLChannelInformation_get_compression_method,      NULL, "Returns the compression method enum", NULL},
-    {"compression_method_name", (getter)SSLChannelInformation_get_compression_method_name, NULL, "Returns the compression method name", NULL},
-    {"session_id",              (getter)SSLChannelInformation_get_session_id,              NULL, "Returns the session ID as a SecItem object", NULL},
+PyGetSetDef Server_getseters[] = {
+    {"socket",  (getter)Server_get_socket,   (setter)NULL, "listening `SSLSocket`, configure it before calling `Server.start()`", NULL},
+    {"net_addr",(getter)Server_get_net_addr, (setter)NULL, "`io.NetworkAddress` the server is bound to, None after shutdown", NULL},
+    {"workers", (getter)Server_get_workers,  (setter)NULL, "number of worker threads", NULL},
+    {"running", (getter)Server_get_running,  (setter)NULL, "True if the server has been started and not shut down", NULL},
     {NULL}  /* Sentinel */
 };
 
-static PyMemberDef SSLChannelInformation_members[] = {
+static PyMemberDef Server_members[] = {
     {NULL}  /* Sentinel */
 };
 
 /* ============================== Class Methods ============================= */
 
+PyDoc_STRVAR(Server_start_doc,
+"start()\n\
+\n\
+Starts the acceptor and worker threads and returns immediately.\n\
+Connections are served until `Server.shutdown()` is called. A server\n\
+can only be started once.\n\
+");
+
 static PyObject *
-SSLChannelInformation_format_lines(SSLChannelInformation *self, PyObject *args, PyObject *kwds)
+Server_start(Server *self, PyObject *args)
 {
-    static char *kwlist[] = {"level", NULL};
-    int level = 0;
-    PyObject *lines = NULL;
-    PyObject *obj1 = NULL;
-    PyObject *obj2 = NULL;
-    PyObject *obj3 = NULL;
-    unsigned int major, minor;
+    PRThread *thread;
+    unsigned int i;
 
     TraceMethodEnter(self);
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|i:format_lines", kwlist,
-                                     &level))
-        return NULL;
-
-    if ((lines = PyList_New(0)) == NULL) {
+    PR_Lock(self->lock);
+    if (self->started) {
+        PR_Unlock(self->lock);
+        PyErr_SetString(PyExc_ValueError, "server has already been started");
         return NULL;
     }
+    self->started = PR_TRUE;
+    self->acceptor_running = PR_TRUE;
+    PR_Unlock(self->lock);
+
+    /* Each thread holds a reference which it releases when it exits */
+    for (i = 0; i < self->n_workers + 1; i++) {
+        Py_INCREF(self);
+        PR_Lock(self->lock);
+        self->n_threads++;
+        PR_Unlock(self->lock);
+
+        thread = PR_CreateThread(PR_USER_THREAD,
+                                 i == 0 ? server_acceptor_thread : server_worker_thread,
+                                 self, PR_PRIORITY_NORMAL, PR_GLOBAL_THREAD,
+                                 PR_UNJOINABLE_THREAD, 0);
+        if (thread == NULL) {
+            PR_Lock(self->lock);
+            self->n_threads--;
+            if (i == 0) {
+                self->acceptor_running = PR_FALSE;
+            }
+            PR_Unlock(self->lock);
+            Py_DECREF(self);
+
+            set_nspr_error(NULL);
+            PR_SetPollableEvent(self->wakeup_event);
+            PR_Lock(self->lock);
+            self->stopping = PR_TRUE;
+            PR_Unlock(self->lock);
+            return NULL;
+        }
+    }
 
+    Py_RETURN_NONE;
+}
 
-    major = self->info.protocolVersion >> 8;
-    minor = self->info.protocolVersion & 0xff;
-    if ((obj2 = ssl_version_to_repr_kind(major, minor, AsString)) == NULL) {
-        goto fail;
-    }
-    if ((obj3 = PyBaseString_UTF8(obj2, "ssl_version_to_repr_kind")) == NULL) {
-        goto fail;
-    }
-    if ((obj1 = PyUnicode_FromFormat("%d.%d (%s)",
-                                     self->info.protocolVersion >> 8,
-                                     self->info.protocolVersion & 0xff,
-                                     PyBytes_AsString(obj3))) == NULL) {
-        goto fail;
-    }
-    FMT_OBJ_AND_APPEND(lines, _("Protocol Version"), obj1, level, fail);
-    Py_CLEAR(obj1);
-    Py_CLEAR(obj2);
-    Py_CLEAR(obj3);
+PyDoc_STRVAR(Server_shutdown_doc,
+"shutdown(timeout=PR_INTERVAL_NO_TIMEOUT) -> bool\n\
+\n\
+:Parameters:\n\
+    timeout : integer\n\
+        optional timeout interval to wait for the threads to exit\n\
+\n\
+Stops accepting connections and closes the listening socket.\n\
+Connections which have already been accepted are still served, the\n\
+workers exit once the handlers running on them return and no\n\
+connections are pending.\n\
+\n\
+Returns True if all threads have exited, False if the timeout expired\n\
+first, in which case the remaining threads exit on their own.\n\
+\n\
+A handler may call shutdown() on its own server. The server is told to\n\
+stop but the call does not wait for the threads, the handler's worker\n\
+is one of them, and returns False.\n\
+");
 
-    if ((obj2 = cipher_suite_to_name(self->info.cipherSuite)) == NULL) {
-        goto fail;
-    }
-    if ((obj3 = PyBaseString_UTF8(obj2, "cipher_suite_to_name")) == NULL) {
-        goto fail;
-    }
-    if ((obj1 = PyUnicode_FromFormat("%s (0x%x)",
-                                     PyBytes_AsString(obj3),
-                                     self->info.cipherSuite)) == NULL) {
-        goto fail;
-    }
-    FMT_OBJ_AND_APPEND(lines, _("Cipher Suite"), obj1, level, fail);
-    Py_CLEAR(obj1);
-    Py_CLEAR(obj2);
-    Py_CLEAR(obj3);
+static PyObject *
+Server_shutdown(Server *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"timeout", NULL};
+    unsigned int timeout = PR_INTERVAL_NO_TIMEOUT;
+    PRIntervalTime start, elapsed;
+    PRBool acceptor_running;
+    PRBool done;
 
-    obj1 = PyLong_FromLong(self->info.authKeyBits);
-    FMT_OBJ_AND_APPEND(lines, _("Auth Key Bits"), obj1, level, fail);
-    Py_CLEAR(obj1);
+    TraceMethodEnter(self);
 
-    obj1 = PyLong_FromLong(self->info.keaKeyBits);
-    FMT_OBJ_AND_APPEND(lines, _("Key Exchange Key Bits"), obj1, level, fail);
-    Py_CLEAR(obj1);
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|I:shutdown", kwlist,
+                                     &timeout))
+        return NULL;
 
-    if ((obj1 = timestamp_to_DateTime(self->info.creationTime, false)) == NULL) {
-        goto fail;
-    }
-    FMT_OBJ_AND_APPEND(lines, _("Creation Time"), obj1, level, fail);
-    Py_CLEAR(obj1);
+    PR_Lock(self->lock);
+    self->stopping = PR_TRUE;
+    PR_Unlock(self->lock);
 
-    if ((obj1 = timestamp_to_DateTime(self->info.lastAccessTime, false)) == NULL) {
-        goto fail;
+    if (PR_SetPollableEvent(self->wakeup_event) != PR_SUCCESS) {
+        return set_nspr_error(NULL);
     }
-    FMT_OBJ_AND_APPEND(lines, _("Last Access Time"), obj1, level, fail);
-    Py_CLEAR(obj1);
 
-    if ((obj1 = timestamp_to_DateTime(self->info.expirationTime, false)) == NULL) {
-        goto fail;
+    /* Waiting on a server thread would wait for the calling thread */
+    if (PR_GetThreadPrivate(server_thread_index) == self) {
+        Py_RETURN_FALSE;
     }
-    FMT_OBJ_AND_APPEND(lines, _("Expiration Time"), obj1, level, fail);
-    Py_CLEAR(obj1);
 
-    if ((obj1 = PyUnicode_FromFormat("%s (0x%x)",
-                                     self->info.compressionMethodName,
-                                     self->info.compressionMethod)) == NULL) {
-        goto fail;
+    Py_BEGIN_ALLOW_THREADS
+    start = PR_IntervalNow();
+    PR_Lock(self->lock);
+    while (self->n_threads > 0) {
+        if (timeout != PR_INTERVAL_NO_TIMEOUT) {
+            elapsed = PR_IntervalNow() - start;
+            if (elapsed >= timeout) {
+                break;
+            }
+            PR_WaitCondVar(self->thread_exit, timeout - elapsed);
+        } else {
+            PR_WaitCondVar(self->thread_exit, PR_INTERVAL_NO_TIMEOUT);
+        }
     }
-    FMT_OBJ_AND_APPEND(lines, _("Compression Method"), obj1, level, fail);
-    Py_CLEAR(obj1);
-
+    done = self->n_threads == 0;
+    acceptor_running = self->acceptor_running;
+    PR_Unlock(self->lock);
+    Py_END_ALLOW_THREADS
 
-    if ((obj1 = raw_data_to_hex(self->info.sessionID,
-                                self->info.sessionIDLength,
-                                OCTETS_PER_LINE_DEFAULT,
-                                HEX_SEPARATOR_DEFAULT)) == NULL) {
-        goto fail;
+    if (!acceptor_running && server_close_socket(self) != PR_SUCCESS) {
+        return set_nspr_error(NULL);
     }
-    FMT_LABEL_AND_APPEND(lines, _("Session ID"), level, fail);
-    APPEND_LINES_AND_CLEAR(lines, obj1, level+1, fail);
-
 
-    return lines;
- fail:
-    Py_XDECREF(obj1);
-    Py_XDECREF(obj2);
-    Py_XDECREF(obj3);
-    Py_XDECREF(lines);
-    return NULL;
+    return PyBool_FromLong(done);
 }
 
-static PyObject *
-SSLChannelInformation_format(SSLChannelInformation *self, PyObject *args, PyObject *kwds)
-{
-    TraceMethodEnter(self);
-
-    return format_from_lines((format_lines_func)SSLChannelInformation_format_lines, (PyObject *)self, args, kwds);
-}
+PyDoc_STRVAR(Server_get_stats_doc,
+"get_stats() -> dict\n\
+\n\
+Returns a dict of connection counters and latencies:\n\
+\n\
+accepted\n\
+    connections accepted\n\
+accept_batches\n\
+    number of times connections were accepted, accepted / accept_batches\n\
+    is the average number of connections accepted at once\n\
+pending\n\
+    connections waiting for a worker\n\
+active\n\
+    connections being handled by a worker\n\
+completed\n\
+    connections whose handler returned normally\n\
+handshake_failures\n\
+    connections closed because the handshake failed or timed out\n\
+handler_errors\n\
+    connections whose handler raised an exception\n\
+queue_time\n\
+    time from accept until a worker picked up the connection\n\
+handshake_time\n\
+    time to complete the handshake\n\
+handler_time\n\
+    time spent in the handler, including closing the connection\n\
+\n\
+The latencies are dicts with the keys count, mean, max, p50, p90 and\n\
+p99, all in seconds. The percentiles are computed from the most recent\n\
+1024 connections, count, mean and max cover all connections.\n\
+");
 
 static PyObject *
-SSLChannelInformation_str(SSLChannelInformation *self)
-{
-    PyObject *py_formatted_result = NULL;
+Server_get_stats(Server *self, PyObject *args)
+{
+    ServerLatency *latencies = NULL;
+    unsigned long n_accepted, n_accept_batches, n_pending, n_active;
+    unsigned long n_completed, n_handshake_failures, n_handler_errors;
+    PyObject *py_queue_time = NULL;
+    PyObject *py_handshake_time = NULL;
+    PyObject *py_handler_time = NULL;
+    PyObject *result = NULL;
 
     TraceMethodEnter(self);
 
-    py_formatted_result =  SSLChannelInformation_format(self, empty_tuple, NULL);
-    return py_formatted_result;
+    /* Copy under the lock, sort for the percentiles outside of it */
+    if ((latencies = PyMem_New(ServerLatency, 3)) == NULL) {
+        return PyErr_NoMemory();
+    }
+
+    PR_Lock(self->lock);
+    n_accepted           = self->n_accepted;
+    n_accept_batches     = self->n_accept_batches;
+    n_pending            = self->n_pending;
+    n_active             = self->n_active;
+    n_completed          = self->n_completed;
+    n_handshake_failures = self->n_handshake_failures;
+    n_handler_errors     = self->n_handler_errors;
+    latencies[0]         = self->queue_time;
+    latencies[1]         = self->handshake_time;
+    latencies[2]         = self->handler_time;
+    PR_Unlock(self->lock);
+
+    if ((py_queue_time = server_latency_to_dict(&latencies[0])) == NULL ||
+        (py_handshake_time = server_latency_to_dict(&latencies[1])) == NULL ||
+        (py_handler_time = server_latency_to_dict(&latencies[2])) == NULL) {
+        goto exit;
+    }
+
+    result = Py_BuildValue("{sksksksksksksksOsOsO}",
+                           "accepted",           n_accepted,
+                           "accept_batches",     n_accept_batches,
+                           "pending",            n_pending,
+                           "active",             n_active,
+                           "completed",          n_completed,
+                           "handshake_failures", n_handshake_failures,
+                           "handler_errors",     n_handler_errors,
+                           "queue_time",         py_queue_time,
+                           "handshake_time",     py_handshake_time,
+                           "handler_time",       py_handler_time);
 
+ exit:
+    PyMem_Free(latencies);
+    Py_XDECREF(py_queue_time);
+    Py_XDECREF(py_handshake_time);
+    Py_XDECREF(py_handler_time);
+    return result;
 }
 
-static PyMethodDef SSLChannelInformation_methods[] = {
-    {"format_lines", (PyCFunction)SSLChannelInformation_format_lines,   METH_VARARGS|METH_KEYWORDS, generic_format_lines_doc},
-    {"format",       (PyCFunction)SSLChannelInformation_format,         METH_VARARGS|METH_KEYWORDS, generic_format_doc},
+static PyMethodDef Server_methods[] = {
+    {"start",     (PyCFunction)Server_start,     METH_NOARGS,                Server_start_doc},
+    {"shutdown",  (PyCFunction)Server_shutdown,  METH_VARARGS|METH_KEYWORDS, Server_shutdown_doc},
+    {"get_stats", (PyCFunction)Server_get_stats, METH_NOARGS,                Server_get_stats_doc},
     {NULL, NULL}  /* Sentinel */
 };
 
-
-
 /* =========================== Class Construction =========================== */
 
 static PyObject *
-SSLChannelInformation_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+Server_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 {
-    SSLChannelInformation *self;
+    Server *self;
 
     TraceObjNewEnter(type);
 
-    if ((self = (SSLChannelInformation *)type->tp_alloc(type, 0)) == NULL) {
-        return NULL;
-    }
+    if ((self = (Server *)type->tp_alloc(type, 0)) == NULL) {
+        return NULL;
+    }
+
+    self->py_socket = NULL;
+    self->py_handler = NULL;
+    self->owns_socket = PR_FALSE;
+    self->wakeup_event = NULL;
+    self->lock = NULL;
+    self->not_empty = NULL;
+    self->not_full = NULL;
+    self->thread_exit = NULL;
+    self->pending = NULL;
+    self->started = PR_FALSE;
+    self->stopping = PR_FALSE;
+    self->acceptor_running = PR_FALSE;
+    self->n_threads = 0;
+
+    if ((self->lock = PR_NewLock()) == NULL ||
+        (self->not_empty = PR_NewCondVar(self->lock)) == NULL ||
+        (self->not_full = PR_NewCondVar(self->lock)) == NULL ||
+        (self->thread_exit = PR_NewCondVar(self->lock)) == NULL ||
+        (self->wakeup_event = PR_NewPollableEvent()) == NULL) {
+        set_nspr_error(NULL);
+        Py_DECREF(self);
+        return NULL;
+    }
+
+    TraceObjNewLeave(self);
+    return (PyObject *)self;
+}
+
+static int
+Server_traverse(Server *self, visitproc visit, void *arg)
+{
+    TraceMethodEnter(self);
+
+    Py_VISIT(self->py_socket);
+    Py_VISIT(self->py_handler);
+    return 0;
+}
+
+static int
+Server_clear(Server* self)
+{
+    TraceMethodEnter(self);
 
-    TraceObjNewLeave(self);
-    return (PyObject *)self;
+    Py_CLEAR(self->py_handler);
+    return 0;
 }
 
 static void
-SSLChannelInformation_dealloc(SSLChannelInformation* self)
+Server_dealloc(Server* self)
 {
+    unsigned int i;
+
     TraceMethodEnter(self);
 
+    /* The threads hold a reference, none are running */
+    if (self->pending) {
+        for (i = 0; i < self->n_pending; i++) {
+            PR_Close(self->pending[(self->pending_head + i) % self->max_pending].pr_socket);
+        }
+        PyMem_Free(self->pending);
+    }
+
+    if (self->wakeup_event) {
+        PR_DestroyPollableEvent(self->wakeup_event);
+    }
+    if (self->thread_exit) {
+        PR_DestroyCondVar(self->thread_exit);
+    }
+    if (self->not_full) {
+        PR_DestroyCondVar(self->not_full);
+    }
+    if (self->not_empty) {
+        PR_DestroyCondVar(self->not_empty);
+    }
+    if (self->lock) {
+        PR_DestroyLock(self->lock);
+    }
+
+    server_close_socket(self);
+
+    PyObject_GC_UnTrack(self);
+    Server_clear(self);
+    Py_CLEAR(self->py_socket);
     Py_TYPE(self)->tp_free((PyObject*)self);
 }
 
-PyDoc_STRVAR(SSLChannelInformation_doc,
-"SSLChannelInformation(obj)\n\
+PyDoc_STRVAR(Server_doc,
+"Server(net_addr, server_cert, priv_key, handler, kea=None, workers=8, options=None, backlog=128, accept_batch=16, max_pending=None, handshake_timeout=PR_INTERVAL_NO_TIMEOUT)\n\
 \n\
-An object representing SSLChannelInformation.\n\
+:Parameters:\n\
+    net_addr : NetworkAddress object\n\
+        address to listen on, a port of 0 picks a free port\n\
+    server_cert : Certificate object\n\
+        server's certificate\n\
+    priv_key : PrivateKey object\n\
+        server's private key\n\
+    handler : function pointer\n\
+        callback invoked for each connection\n\
+    kea : integer\n\
+        key exchange type of server_cert (e.g. nss.ssl_kea_rsa), None\n\
+        determines it from the certificate\n\
+    workers : integer\n\
+        number of worker threads, at most this many connections are\n\
+        served at the same time\n\
+    options : dict or None\n\
+        SSL options applied to the listening socket, maps an option\n\
+        (e.g. ssl.SSL_REQUEST_CERTIFICATE) to its value, see\n\
+        `SSLSocket.set_ssl_option()`\n\
+    backlog : integer\n\
+        listen backlog\n\
+    accept_batch : integer\n\
+        maximum number of connections accepted each time the listening\n\
+        socket becomes readable\n\
+    max_pending : integer or None\n\
+        maximum number of accepted connections waiting for a worker,\n\
+        None means 4 times the number of workers\n\
+    handshake_timeout : integer\n\
+        timeout interval for the handshake\n\
+\n\
+A TLS server which accepts connections on a dedicated thread and\n\
+serves them on a fixed pool of worker threads. The threads are native\n\
+threads which only hold the GIL while Python code runs, accepting\n\
+connections and the handshake run without it.\n\
+\n\
+The handler is called once the handshake has completed with the\n\
+following signature::\n\
+    \n\
+    handler(sock, client_addr)\n\
+\n\
+sock\n\
+    the connection, an `SSLSocket` in blocking mode\n\
+client_addr\n\
+    the client's `io.NetworkAddress`\n\
+\n\
+The connection is closed when the handler returns, it must not be used\n\
+afterwards. Exceptions raised by the handler are printed and counted\n\
+in `Server.get_stats()`.\n\
+\n\
+Options the constructor does not cover (e.g. the protocol version\n\
+range or callbacks) can be set on `Server.socket` before calling\n\
+`Server.start()`, accepted connections inherit them. Callbacks run on\n\
+the worker threads. Rotating OCSP staples with\n\
+`SSLSocket.start_ocsp_staple_refresh()` is not supported on the\n\
+listening socket, use `SSLSocket.set_stapled_ocsp_responses()`.\n\
+\n\
+Example::\n\
+    \n\
+    def handler(sock, client_addr):\n\
+        request = sock.readline()\n\
+        sock.send(response)\n\
+    \n\
+    net_addr = io.NetworkAddress(io.PR_IpAddrAny, 443)\n\
+    server = ssl.Server(net_addr, server_cert, priv_key, handler)\n\
+    server.start()\n\
+    ...\n\
+    server.shutdown()\n\
 ");
 
 static int
-SSLChannelInformation_init(SSLChannelInformation *self, PyObject *args, PyObject *kwds)
+Server_init(Server *self, PyObject *args, PyObject *kwds)
 {
-    static char *kwlist[] = {"arg", NULL};
-    PyObject *arg;
+    static char *kwlist[] = {"net_addr", "server_cert", "priv_key", "handler",
+                             "kea", "workers", "options", "backlog",
+                             "accept_batch", "max_pending", "handshake_timeout", NULL};
+    NetworkAddress *py_netaddr = NULL;
+    Certificate *py_cert = NULL;
+    PrivateKey *py_priv_key = NULL;
+    PyObject *py_handler = NULL;
+    PyObject *py_kea = Py_None;
+    unsigned int workers = 8;
+    PyObject *py_options = Py_None;
+    int backlog = 128;
+    unsigned int accept_batch = 16;
+    PyObject *py_max_pending = Py_None;
+    unsigned int handshake_timeout = PR_INTERVAL_NO_TIMEOUT;
+    unsigned long max_pending;
+    SSLKEAType kea;
+    PyObject *py_option, *py_value;
+    Py_ssize_t pos = 0;
+    long option, value;
+    PRSocketOptionData sock_opt;
+    PRFileDesc *pr_socket;
 
     TraceMethodEnter(self);
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|i:SSLChannelInformation", kwlist,
-                                     &arg))
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O!O!O!O|OIOiIOI:Server", kwlist,
+                                     &NetworkAddressType, &py_netaddr,
+                                     &CertificateType, &py_cert,
+                                     &PrivateKeyType, &py_priv_key,
+                                     &py_handler, &py_kea, &workers,
+                                     &py_options, &backlog, &accept_batch,
+                                     &py_max_pending, &handshake_timeout))
+        return -1;
+
+    if (self->py_socket) {
+        PyErr_SetString(PyExc_ValueError, "Server already initialized");
+        return -1;
+    }
+
+    if (!PyCallable_Check(py_handler)) {
+        PyErr_SetString(PyExc_TypeError, "handler must be callable");
+        return -1;
+    }
+
+    if (workers == 0 || accept_batch == 0) {
+        PyErr_SetString(PyExc_ValueError, "workers and accept_batch must be positive");
+        return -1;
+    }
+
+    if (PyNone_Check(py_max_pending)) {
+        max_pending = 4UL * workers;
+    } else {
+        max_pending = PyLong_AsUnsignedLong(py_max_pending);
+        if (PyErr_Occurred()) {
+            return -1;
+        }
+        if (max_pending == 0 || max_pending > PR_UINT32_MAX / sizeof(ServerConnection)) {
+            PyErr_Format(PyExc_ValueError, "max_pending out of range: %lu", max_pending);
+            return -1;
+        }
+    }
+
+    if (PyNone_Check(py_kea)) {
+        kea = NSS_FindCertKEAType(py_cert->cert);
+    } else {
+        kea = PyLong_AsLong(py_kea);
+        if (PyErr_Occurred()) {
+            return -1;
+        }
+    }
+
+    if (!PyNone_Check(py_options) && !PyDict_Check(py_options)) {
+        PyErr_Format(PyExc_TypeError, "options must be a dict or None, not %.200s",
+                     Py_TYPE(py_options)->tp_name);
+        return -1;
+    }
+
+    if ((self->pending = PyMem_New(ServerConnection, max_pending)) == NULL) {
+        PyErr_NoMemory();
         return -1;
+    }
+    self->max_pending = max_pending;
+    self->pending_head = 0;
+    self->n_pending = 0;
+    self->n_workers = workers;
+    self->accept_batch = accept_batch;
+    self->handshake_timeout = handshake_timeout;
+    self->family = PR_NetAddrFamily(&py_netaddr->pr_netaddr);
+
+    if ((self->py_socket = (SSLSocket *)PyObject_CallFunction((PyObject *)&SSLSocketType,
+                                                              "i", self->family)) == NULL) {
+        return -1;
+    }
+    self->owns_socket = PR_TRUE;
+    pr_socket = self->py_socket->pr_socket;
+
+    Py_INCREF(py_handler);
+    self->py_handler = py_handler;
+
+    if (!PyNone_Check(py_options)) {
+        while (PyDict_Next(py_options, &pos, &py_option, &py_value)) {
+            option = PyLong_AsLong(py_option);
+            if (option == -1 && PyErr_Occurred()) {
+                return -1;
+            }
+            value = PyLong_AsLong(py_value);
+            if (value == -1 && PyErr_Occurred()) {
+                return -1;
+            }
+            if (SSL_OptionSet(pr_socket, option, value) != SECSuccess) {
+                set_nspr_error(NULL);
+                return -1;
+            }
+        }
+    }
+
+    if (SSL_ConfigSecureServer(pr_socket, py_cert->cert, py_priv_key->private_key, kea) != SECSuccess) {
+        set_nspr_error(NULL);
+        return -1;
+    }
+
+    sock_opt.option = PR_SockOpt_Reuseaddr;
+    sock_opt.value.reuse_addr = PR_TRUE;
+    if (PR_SetSocketOption(pr_socket, &sock_opt) != PR_SUCCESS) {
+        set_nspr_error(NULL);
+        return -1;
+    }
+
+    if (PR_Bind(pr_socket, &py_netaddr->pr_netaddr) != PR_SUCCESS ||
+        PR_Listen(pr_socket, backlog) != PR_SUCCESS) {
+        set_nspr_error(NULL);
+        return -1;
+    }
 
     return 0;
 }
 
-static PyTypeObject SSLChannelInformationType = {
+static PyTypeObject ServerType = {
     PyVarObject_HEAD_INIT(NULL, 0)
-    "nss.ssl.SSLChannelInfo",			/* tp_name */
-    sizeof(SSLChannelInformation),		/* tp_basicsize */
+    "nss.ssl.Server",				/* tp_name */
+    sizeof(Server),				/* tp_basicsize */
     0,						/* tp_itemsize */
-    (destructor)SSLChannelInformation_dealloc,	/* tp_dealloc */
+    (destructor)Server_dealloc,			/* tp_dealloc */
     0,						/* tp_print */
     0,						/* tp_getattr */
     0,						/* tp_setattr */
@@ -3161,48 +7106,31 @@ static PyTypeObject SSLChannelInformationType = {
     0,						/* tp_as_mapping */
     0,						/* tp_hash */
     0,						/* tp_call */
-    (reprfunc)SSLChannelInformation_str,	/* tp_str */
+    0,						/* tp_str */
     0,						/* tp_getattro */
     0,						/* tp_setattro */
     0,						/* tp_as_buffer */
-    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE,	/* tp_flags */
-    SSLChannelInformation_doc,			/* tp_doc */
-    (traverseproc)0,				/* tp_traverse */
-    (inquiry)0,					/* tp_clear */
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | Py_TPFLAGS_HAVE_GC,	/* tp_flags */
+    Server_doc,					/* tp_doc */
+    (traverseproc)Server_traverse,		/* tp_traverse */
+    (inquiry)Server_clear,			/* tp_clear */
     0,						/* tp_richcompare */
     0,						/* tp_weaklistoffset */
     0,						/* tp_iter */
     0,						/* tp_iternext */
-    SSLChannelInformation_methods,		/* tp_methods */
-    SSLChannelInformation_members,		/* tp_members */
-    SSLChannelInformation_getseters,		/* tp_getset */
+    Server_methods,				/* tp_methods */
+    Server_members,				/* tp_members */
+    Server_getseters,				/* tp_getset */
     0,						/* tp_base */
     0,						/* tp_dict */
     0,						/* tp_descr_get */
     0,						/* tp_descr_set */
     0,						/* tp_dictoffset */
-    (initproc)SSLChannelInformation_init,	/* tp_init */
+    (initproc)Server_init,			/* tp_init */
     0,						/* tp_alloc */
-    SSLChannelInformation_new,			/* tp_new */
+    Server_new,					/* tp_new */
 };
 
-static PyObject *
-SSLChannelInformation_new_from_SSLChannelInfo(SSLChannelInfo *info)
-{
-    SSLChannelInformation *self = NULL;
-
-    TraceObjNewEnter(NULL);
-
-    if ((self = (SSLChannelInformation *) SSLChannelInformationType.tp_new(&SSLChannelInformationType, NULL, NULL)) == NULL) {
-        return NULL;
-    }
-
-    self->info = *info;
-
-    TraceObjNewLeave(self);
-    return (PyObject *) self;
-}
-
 /* ========================================================================== */
 /* ================================= Module ================================= */
 /* ========================================================================== */
@@ -3406,6 +7334,39 @@ SSL_get_cipher_policy(PyObject *self, PyObject *args)
         Py_RETURN_FALSE;
 }
 
+static long
+server_sid_cache_inserted_count(SSL3Statistics *stats)
+{
+    /*
+     * A server inserts a new entry into the session ID cache each time
+     * it completes a full handshake, i.e. whenever the client hello did
+     * not resume a cached session.
+     */
+    return stats->hch_sid_cache_misses + stats->hch_sid_cache_not_ok;
+}
+
+static void
+server_sid_cache_config_set(int max_cache_entries, PRUint32 ssl3_timeout, PRBool multi_process)
+{
+    if (max_cache_entries <= 0) {
+        max_cache_entries = SID_CACHE_DEFAULT_ENTRIES;
+    }
+
+    if (ssl3_timeout == 0) {
+        ssl3_timeout = SID_CACHE_MAX_SSL3_TIMEOUT;
+    } else if (ssl3_timeout < SID_CACHE_MIN_SSL3_TIMEOUT) {
+        ssl3_timeout = SID_CACHE_MIN_SSL3_TIMEOUT;
+    } else if (ssl3_timeout > SID_CACHE_MAX_SSL3_TIMEOUT) {
+        ssl3_timeout = SID_CACHE_MAX_SSL3_TIMEOUT;
+    }
+
+    server_sid_cache_config.configured = PR_TRUE;
+    server_sid_cache_config.multi_process = multi_process;
+    server_sid_cache_config.max_cache_entries = max_cache_entries;
+    server_sid_cache_config.ssl3_timeout = ssl3_timeout;
+    server_sid_cache_config.inserted_base = server_sid_cache_inserted_count(SSL_GetStatistics());
+}
+
 PyDoc_STRVAR(SSL_config_server_session_id_cache_doc,
 "config_server_session_id_cache(max_cache_entries=0, ssl2_timeout=0, ssl3_timeout=0, directory=None)\n\
 \n\
@@ -3483,6 +7444,8 @@ SSL_config_server_session_id_cache(PyObject *self, PyObject *args, PyObject *kwd
         return set_nspr_error(NULL);
     }
 
+    server_sid_cache_config_set(max_cache_entries, ssl3_timeout, PR_FALSE);
+
     Py_XDECREF(py_directory_fs_encoded);
     Py_RETURN_NONE;
 }
@@ -3573,6 +7536,8 @@ SSL_config_server_session_id_cache_with_opt(PyObject *self, PyObject *args, PyOb
         return set_nspr_error(NULL);
     }
 
+    server_sid_cache_config_set(max_cache_entries, ssl3_timeout, enable_mp_cache);
+
     Py_XDECREF(py_directory_fs_encoded);
     Py_RETURN_NONE;
 }
@@ -3643,6 +7608,8 @@ SSL_config_mp_server_sid_cache(PyObject *self, PyObject *args, PyObject *kwds)
         return set_nspr_error(NULL);
     }
 
+    server_sid_cache_config_set(max_cache_entries, ssl3_timeout, PR_TRUE);
+
     Py_XDECREF(py_directory_fs_encoded);
     Py_RETURN_NONE;
 }
@@ -3730,6 +7697,264 @@ SSL_shutdown_server_session_id_cache(PyObject *self, PyObject *args)
     TraceMethodEnter(self);
 
     SSL_ShutdownServerSessionIDCache();
+    server_sid_cache_config.configured = PR_FALSE;
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(SSL_get_statistics_doc,
+"get_statistics() -> dict\n\
+\n\
+Returns a dict containing the SSL session cache statistics maintained\n\
+by NSS for the whole process. The counters accumulate from the time\n\
+the library was loaded or since the last call to\n\
+`ssl.reset_statistics()`. The dict keys are the names of the\n\
+SSL3Statistics fields:\n\
+\n\
+sch_sid_cache_hits\n\
+    Client hellos sent offering a cached session (client side).\n\
+sch_sid_cache_misses\n\
+    Client hellos sent without a cached session (client side).\n\
+sch_sid_cache_not_ok\n\
+    Client hellos sent where the cached session could not be\n\
+    used, e.g. it had expired (client side).\n\
+hsh_sid_cache_hits\n\
+    Server hellos which resumed the offered session, i.e. resumed\n\
+    handshakes (client side).\n\
+hsh_sid_cache_misses\n\
+    Server hellos which did not resume the offered session, i.e. full\n\
+    handshakes (client side).\n\
+hsh_sid_cache_not_ok\n\
+    Server hellos which resumed a session that could not be used\n\
+    (client side).\n\
+hch_sid_cache_hits\n\
+    Client hellos resumed from the server session ID cache, i.e.\n\
+    resumed handshakes (server side).\n\
+hch_sid_cache_misses\n\
+    Client hellos whose session ID was not found in the server session\n\
+    ID cache, i.e. full handshakes (server side).\n\
+hch_sid_cache_not_ok\n\
+    Client hellos whose session was found in the server session ID\n\
+    cache but could not be resumed, e.g. because it timed out or the\n\
+    cipher suite is no longer enabled (server side).\n\
+sch_sid_stateless_resumes\n\
+    Client hellos sent offering a session ticket (client side).\n\
+hsh_sid_stateless_resumes\n\
+    Handshakes resumed from a session ticket (client side).\n\
+hch_sid_stateless_resumes\n\
+    Handshakes resumed from a session ticket (server side).\n\
+hch_sid_ticket_parse_failures\n\
+    Session tickets received which could not be parsed (server side).\n\
+\n\
+Example::\n\
+    \n\
+    stats = ssl.get_statistics()\n\
+    resumed = stats['hch_sid_cache_hits'] + stats['hch_sid_stateless_resumes']\n\
+    full = stats['hch_sid_cache_misses'] + stats['hch_sid_cache_not_ok']\n\
+");
+
+static PyObject *
+SSL_get_statistics(PyObject *self, PyObject *args)
+{
+    SSL3Statistics *stats = NULL;
+
+    TraceMethodEnter(self);
+
+    if ((stats = SSL_GetStatistics()) == NULL) {
+        return set_nspr_error(NULL);
+    }
+
+    return Py_BuildValue("{s:l,s:l,s:l,s:l,s:l,s:l,s:l,s:l,s:l,s:l,s:l,s:l,s:l}",
+                         "sch_sid_cache_hits",            stats->sch_sid_cache_hits,
+                         "sch_sid_cache_misses",          stats->sch_sid_cache_misses,
+                         "sch_sid_cache_not_ok",          stats->sch_sid_cache_not_ok,
+                         "hsh_sid_cache_hits",            stats->hsh_sid_cache_hits,
+                         "hsh_sid_cache_misses",          stats->hsh_sid_cache_misses,
+                         "hsh_sid_cache_not_ok",          stats->hsh_sid_cache_not_ok,
+                         "hch_sid_cache_hits",            stats->hch_sid_cache_hits,
+                         "hch_sid_cache_misses",          stats->hch_sid_cache_misses,
+                         "hch_sid_cache_not_ok",          stats->hch_sid_cache_not_ok,
+                         "sch_sid_stateless_resumes",     stats->sch_sid_stateless_resumes,
+                         "hsh_sid_stateless_resumes",     stats->hsh_sid_stateless_resumes,
+                         "hch_sid_stateless_resumes",     stats->hch_sid_stateless_resumes,
+                         "hch_sid_ticket_parse_failures", stats->hch_sid_ticket_parse_failures);
+}
+
+PyDoc_STRVAR(SSL_reset_statistics_doc,
+"reset_statistics()\n\
+\n\
+Sets all of the counters reported by `ssl.get_statistics()` to zero.\n\
+Use this to measure the session cache behavior over a specific\n\
+interval, e.g. after a server has warmed up. The counters are process\n\
+wide, so this affects every user of the statistics in the process.\n\
+");
+
+static PyObject *
+SSL_reset_statistics(PyObject *self, PyObject *args)
+{
+    SSL3Statistics *stats = NULL;
+
+    TraceMethodEnter(self);
+
+    if ((stats = SSL_GetStatistics()) == NULL) {
+        return set_nspr_error(NULL);
+    }
+
+    memset(stats, 0, sizeof(*stats));
+    server_sid_cache_config.inserted_base = 0;
+
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(SSL_get_server_session_cache_info_doc,
+"get_server_session_cache_info() -> dict\n\
+\n\
+Returns a dict describing the server session ID cache configured by\n\
+`ssl.config_server_session_id_cache()`,\n\
+`ssl.config_mp_server_sid_cache()` or\n\
+`ssl.config_server_session_id_cache_with_opt()` and how much of it\n\
+has been used. The dict contains:\n\
+\n\
+configured\n\
+    True if a server session ID cache has been configured in this\n\
+    process and not shut down. If False the remaining size related\n\
+    values are zero.\n\
+multi_process\n\
+    True if the cache is shared between processes.\n\
+max_cache_entries\n\
+    The maximum number of entries, after the server default has been\n\
+    substituted for zero.\n\
+ssl3_timeout\n\
+    The lifetime of a cache entry in seconds, after the server default\n\
+    and limits have been applied.\n\
+max_locks\n\
+    The value of `ssl.get_max_server_cache_locks()`.\n\
+inserted\n\
+    The number of full server handshakes, each of which inserts an\n\
+    entry into the cache, since the cache was configured or the\n\
+    statistics were last reset with `ssl.reset_statistics()`.\n\
+occupancy\n\
+    inserted / max_cache_entries capped at 1.0. NSS does not expose\n\
+    the number of live entries, entries which have expired or which\n\
+    were evicted are still counted, so this is an upper bound on how\n\
+    full the cache is. A value which reaches 1.0 well before\n\
+    ssl3_timeout seconds have elapsed indicates entries are being\n\
+    evicted before they expire and the cache is too small.\n\
+\n\
+In a multi-process server each process only counts the handshakes\n\
+it performed itself, sum inserted across the processes to size a\n\
+cache configured with `ssl.config_mp_server_sid_cache()`. TLS 1.3\n\
+resumption uses session tickets rather than the session ID cache.\n\
+");
+
+static PyObject *
+SSL_get_server_session_cache_info(PyObject *self, PyObject *args)
+{
+    SSL3Statistics *stats = NULL;
+    long inserted = 0;
+    double occupancy = 0.0;
+    int max_cache_entries = 0;
+    PRUint32 ssl3_timeout = 0;
+
+    TraceMethodEnter(self);
+
+    if ((stats = SSL_GetStatistics()) == NULL) {
+        return set_nspr_error(NULL);
+    }
+
+    if (server_sid_cache_config.configured) {
+        max_cache_entries = server_sid_cache_config.max_cache_entries;
+        ssl3_timeout = server_sid_cache_config.ssl3_timeout;
+        inserted = server_sid_cache_inserted_count(stats) - server_sid_cache_config.inserted_base;
+        if (inserted < 0) {
+            inserted = 0;
+        }
+        occupancy = MIN(1.0, (double)inserted / (double)max_cache_entries);
+    }
+
+    return Py_BuildValue("{s:N,s:N,s:i,s:k,s:I,s:l,s:d}",
+                         "configured",        PyBool_FromLong(server_sid_cache_config.configured),
+                         "multi_process",     PyBool_FromLong(server_sid_cache_config.configured &&
+                                                              server_sid_cache_config.multi_process),
+                         "max_cache_entries", max_cache_entries,
+                         "ssl3_timeout",      (unsigned long)ssl3_timeout,
+                         "max_locks",         SSL_GetMaxServerCacheLocks(),
+                         "inserted",          inserted,
+                         "occupancy",         occupancy);
+}
+
+PyDoc_STRVAR(SSL_config_anti_replay_doc,
+"config_anti_replay(window, k=7, bits=14)\n\
+\n\
+:Parameters:\n\
+    window : number\n\
+        Width of the replay window in seconds. This must account for\n\
+        clock error between client and server in both directions,\n\
+        e.g. 10 allows 5 seconds of error either way.\n\
+    k : integer\n\
+        Number of hash functions used by the Bloom filter.\n\
+    bits : integer\n\
+        log2 of the number of bits in each Bloom filter.\n\
+\n\
+Configures the replay protection a TLS 1.3 server uses to decide\n\
+whether to accept early data (0-RTT). ClientHellos are tracked for the\n\
+duration of the window in a pair of Bloom filters, early data in a\n\
+ClientHello seen before, or whose ticket age falls outside the window,\n\
+is rejected while the handshake itself proceeds.\n\
+\n\
+k and bits trade memory for the false positive rate. For a false\n\
+positive rate p with n handshakes per window::\n\
+\n\
+    bits = log2(n) + log2(-ln(1 - sqrt(1 - p))) + 1.0575327458897952\n\
+    k = -log2(p)\n\
+\n\
+The defaults suit about 1000 handshakes per window at a 1% false\n\
+positive rate and use two 2 KiB filters.\n\
+\n\
+All early data is rejected until one window has elapsed after this is\n\
+called, this prevents replay across server restarts. Call it once at\n\
+server start up, calling it again replaces the replay state and\n\
+restarts that period. Sockets pick up the configuration when\n\
+`SSLSocket.enable_early_data()` is called.\n\
+\n\
+The replay state is local to the process, servers sharing session\n\
+ticket keys do not share it.\n\
+");
+
+static PyObject *
+SSL_config_anti_replay(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"window", "k", "bits", NULL};
+    double window = 0.0;
+    unsigned int k = 7;
+    unsigned int bits = 14;
+    SSLAntiReplayContext *context = NULL;
+    SSLAntiReplayContext *prev_context = NULL;
+
+    TraceMethodEnter(self);
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "d|II:config_anti_replay", kwlist,
+                                     &window, &k, &bits))
+        return NULL;
+
+    if (window <= 0.0) {
+        PyErr_Format(PyExc_ValueError, "window must be positive, not %f", window);
+        return NULL;
+    }
+
+    if (SSL_CreateAntiReplayContext(PR_Now(), (PRTime)(window * PR_USEC_PER_SEC),
+                                    k, bits, &context) != SECSuccess) {
+        return set_nspr_error(NULL);
+    }
+
+    prev_context = anti_replay_context;
+    anti_replay_context = context;
+
+    if (prev_context) {
+        SSL_ReleaseAntiReplayContext(prev_context);
+    } else {
+        NSS_RegisterShutdown(anti_replay_context_shutdown, NULL);
+    }
+
     Py_RETURN_NONE;
 }
 
@@ -4171,7 +8396,11 @@ PyDoc_STRVAR(SSL_get_cipher_suite_info_doc,
     suite : int\n\
         a cipher suite enumerated constant\n\
 \n\
-Returns a `ssl.SSLCipherSuiteInfo`.\n\
+Returns a `ssl.SSLCipherSuiteInfo`. The objects for the implemented\n\
+cipher suites are created once and shared, calling this again for the\n\
+same suite returns the same object.\n\
+\n\
+See also `ssl.cipher_suites()`.\n\
 ");
 
 static PyObject *
@@ -4179,6 +8408,8 @@ SSL_get_cipher_suite_info(PyObject *self, PyObject *args)
 {
     unsigned int suite;
     SSLCipherSuiteInfo info;
+    PyObject *py_suite = NULL;
+    PyObject *py_info = NULL;
 
     TraceMethodEnter(self);
 
@@ -4186,6 +8417,20 @@ SSL_get_cipher_suite_info(PyObject *self, PyObject *args)
                           &suite))
         return NULL;
 
+    if (get_cipher_suite_table() == NULL) {
+        return NULL;
+    }
+
+    if ((py_suite = PyLong_FromUnsignedLong(suite)) == NULL) {
+        return NULL;
+    }
+    py_info = PyDict_GetItem(cipher_suite_info_table, py_suite);
+    Py_DECREF(py_suite);
+    if (py_info) {
+        Py_INCREF(py_info);
+        return py_info;
+    }
+
     if (SSL_GetCipherSuiteInfo(suite, &info, sizeof(info)) != SECSuccess) {
         return set_nspr_error(NULL);
     }
@@ -4194,6 +8439,100 @@ SSL_get_cipher_suite_info(PyObject *self, PyObject *args)
 
 }
 
+PyDoc_STRVAR(SSL_cipher_suites_doc,
+"cipher_suites(kea=None, auth=None, fips=None) -> (SSLCipherSuiteInfo, ...)\n\
+\n\
+:Parameters:\n\
+    kea : int or None\n\
+        only return suites with this key exchange type\n\
+        (e.g. nss.ssl_kea_rsa, nss.ssl_kea_ecdh, etc.)\n\
+    auth : int or None\n\
+        only return suites with this authentication algorithm\n\
+        (e.g. ssl.ssl_auth_rsa_sign, ssl.ssl_auth_ecdsa, etc.)\n\
+    fips : bool or None\n\
+        if True only return FIPS approved suites, if False only\n\
+        return suites which are not FIPS approved\n\
+\n\
+Returns a tuple of `ssl.SSLCipherSuiteInfo` objects for the cipher\n\
+suites implemented by libssl, in the order of\n\
+`ssl.ssl_implemented_ciphers`. The objects are created once and are\n\
+the same objects `ssl.get_cipher_suite_info()` returns. A filter which\n\
+is None is not applied.\n\
+");
+
+static PyObject *
+SSL_cipher_suites(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"kea", "auth", "fips", NULL};
+    PyObject *py_kea = Py_None;
+    PyObject *py_auth = Py_None;
+    PyObject *py_fips = Py_None;
+    long kea = -1;
+    long auth = -1;
+    int fips = -1;
+    PyObject *list = NULL;
+    PyObject *result = NULL;
+    SSLCipherSuiteInformation *py_info = NULL;
+    Py_ssize_t n_suites, i;
+
+    TraceMethodEnter(self);
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|OOO:cipher_suites", kwlist,
+                                     &py_kea, &py_auth, &py_fips))
+        return NULL;
+
+    if (py_kea != Py_None) {
+        if ((kea = PyLong_AsLong(py_kea)) == -1 && PyErr_Occurred()) {
+            return NULL;
+        }
+    }
+    if (py_auth != Py_None) {
+        if ((auth = PyLong_AsLong(py_auth)) == -1 && PyErr_Occurred()) {
+            return NULL;
+        }
+    }
+    if (py_fips != Py_None) {
+        if ((fips = PyObject_IsTrue(py_fips)) < 0) {
+            return NULL;
+        }
+    }
+
+    if ((list = get_cipher_suite_table()) == NULL) {
+        return NULL;
+    }
+
+    if (kea == -1 && auth == -1 && fips == -1) {
+        Py_INCREF(list);
+        return list;
+    }
+
+    n_suites = PyTuple_GET_SIZE(list);
+    if ((result = PyList_New(0)) == NULL) {
+        return NULL;
+    }
+
+    for (i = 0; i < n_suites; i++) {
+        py_info = (SSLCipherSuiteInformation *)PyTuple_GET_ITEM(list, i);
+        if (kea != -1 && py_info->info.keaType != kea) {
+            continue;
+        }
+        if (auth != -1 && py_info->info.authAlgorithm != auth) {
+            continue;
+        }
+        if (fips != -1 && (py_info->info.isFIPS ? 1 : 0) != fips) {
+            continue;
+        }
+        if (PyList_Append(result, (PyObject *)py_info) < 0) {
+            Py_DECREF(result);
+            return NULL;
+        }
+    }
+
+    list = PyList_AsTuple(result);
+    Py_DECREF(result);
+    return list;
+}
+
 PyDoc_STRVAR(SSL_ssl_cipher_suite_name_doc,
 "ssl_cipher_suite_name(cipher) -> string\n\
 \n\
@@ -4265,6 +8604,10 @@ static PyMethodDef module_methods[] = {
 {"set_max_server_cache_locks",              (PyCFunction)SSL_set_max_server_cache_locks,              METH_VARARGS,               SSL_set_max_server_cache_locks_doc},
 {"clear_session_cache",                     (PyCFunction)SSL_clear_session_cache,                     METH_NOARGS,                SSL_clear_session_cache_doc},
 {"shutdown_server_session_id_cache",        (PyCFunction)SSL_shutdown_server_session_id_cache,        METH_NOARGS,                SSL_shutdown_server_session_id_cache_doc},
+{"get_statistics",                          (PyCFunction)SSL_get_statistics,                          METH_NOARGS,                SSL_get_statistics_doc},
+{"reset_statistics",                        (PyCFunction)SSL_reset_statistics,                        METH_NOARGS,                SSL_reset_statistics_doc},
+{"get_server_session_cache_info",           (PyCFunction)SSL_get_server_session_cache_info,           METH_NOARGS,                SSL_get_server_session_cache_info_doc},
+{"config_anti_replay",                      (PyCFunction)SSL_config_anti_replay,                      METH_VARARGS|METH_KEYWORDS, SSL_config_anti_replay_doc},
 {"set_domestic_policy",                     (PyCFunction)NSS_set_domestic_policy,                     METH_NOARGS,                NSS_set_domestic_policy_doc},
 {"set_export_policy",                       (PyCFunction)NSS_set_export_policy,                       METH_NOARGS,                NSS_set_export_policy_doc},
 {"set_france_policy",                       (PyCFunction)NSS_set_france_policy,                       METH_NOARGS,                NSS_set_france_policy_doc},
@@ -4275,6 +8618,7 @@ static PyMethodDef module_methods[] = {
 {"get_default_ssl_version_range",           (PyCFunction)SSL_get_default_ssl_version_range,           METH_VARARGS|METH_KEYWORDS, SSL_get_default_ssl_version_range_doc},
 {"set_default_ssl_version_range",           (PyCFunction)SSL_set_default_ssl_version_range,           METH_VARARGS|METH_KEYWORDS, SSL_set_default_ssl_version_range_doc},
 {"get_cipher_suite_info",                   (PyCFunction)SSL_get_cipher_suite_info,                   METH_VARARGS,               SSL_get_cipher_suite_info_doc},
+{"cipher_suites",                           (PyCFunction)SSL_cipher_suites,                           METH_VARARGS|METH_KEYWORDS, SSL_cipher_suites_doc},
 {"ssl_cipher_suite_name",                   (PyCFunction)SSL_ssl_cipher_suite_name,                   METH_VARARGS,               SSL_ssl_cipher_suite_name_doc},
 {"ssl_cipher_suite_from_name",              (PyCFunction)SSL_ssl_cipher_suite_from_name,              METH_VARARGS,               SSL_ssl_cipher_suite_from_name_doc},
 {NULL, NULL}            /* Sentinel */
@@ -4386,6 +8730,11 @@ MOD_INIT(ssl)
         return MOD_ERROR_VAL;
     }
 
+    if (PR_NewThreadPrivateIndex(&server_thread_index, NULL) != PR_SUCCESS) {
+        set_nspr_error(NULL);
+        return MOD_ERROR_VAL;
+    }
+
     if ((empty_tuple = PyTuple_New(0)) == NULL) {
         return MOD_ERROR_VAL;
     }
@@ -4394,6 +8743,8 @@ MOD_INIT(ssl)
     TYPE_READY(SSLSocketType);
     TYPE_READY(SSLCipherSuiteInformationType);
     TYPE_READY(SSLChannelInformationType);
+    TYPE_READY(TLSConfigType);
+    TYPE_READY(ServerType);
 
     /* Export C API */
     if (PyModule_AddObject(m, "_C_API",
@@ -4457,9 +8808,37 @@ if (_AddIntConstantWithLookup(m, alias, constant, \
     ExportConstantAlias(SSL_LIBRARY_VERSION_TLS_1_2, "tls1.2");
     ExportConstantAlias(SSL_LIBRARY_VERSION_TLS_1_3, "tls1.3");
 
+    /*
+     * DTLS versions share the values of the TLS versions they are based
+     * on, they are only added to the name lookup so the reverse lookup
+     * keeps returning the TLS names.
+     */
+    AddIntConstant(SSL_LIBRARY_VERSION_DTLS_1_0);
+    AddIntConstant(SSL_LIBRARY_VERSION_DTLS_1_2);
+    AddIntConstant(SSL_LIBRARY_VERSION_DTLS_1_3);
+
+#define ExportDTLSAlias(constant, alias)                                \
+{                                                                       \
+    PyObject *py_value;                                                 \
+                                                                        \
+    if ((py_value = PyLong_FromLong(constant)) == NULL) {               \
+        return MOD_ERROR_VAL;                                           \
+    }                                                                   \
+    if (PyDict_SetItemString(ssl_library_version_alias_to_value, alias, py_value) < 0) { \
+        Py_DECREF(py_value);                                            \
+        return MOD_ERROR_VAL;                                           \
+    }                                                                   \
+    Py_DECREF(py_value);                                                \
+}
+
+    ExportDTLSAlias(SSL_LIBRARY_VERSION_DTLS_1_0, "dtls1.0");
+    ExportDTLSAlias(SSL_LIBRARY_VERSION_DTLS_1_2, "dtls1.2");
+    ExportDTLSAlias(SSL_LIBRARY_VERSION_DTLS_1_3, "dtls1.3");
+
 
 #undef ExportConstant
 #undef ExportConstantAlias
+#undef ExportDTLSAlias
 
     AddIntConstantName(SSL_VARIANT_STREAM, ssl_variant_stream);
     AddIntConstantName(SSL_VARIANT_DATAGRAM, ssl_variant_datagram);
@@ -4482,6 +8861,24 @@ if (_AddIntConstantWithLookup(m, alias, constant, \
     AddIntConstant(SSL_NO_STEP_DOWN);
     AddIntConstant(SSL_BYPASS_PKCS11);
     AddIntConstant(SSL_NO_LOCKS);
+    AddIntConstant(SSL_ENABLE_OCSP_STAPLING);
+    AddIntConstant(SSL_ENABLE_SESSION_TICKETS);
+    AddIntConstant(SSL_ENABLE_FALSE_START);
+    AddIntConstant(SSL_ENABLE_0RTT_DATA);
+    AddIntConstant(SSL_RECORD_SIZE_LIMIT);
+    AddIntConstant(SSL_ENABLE_DTLS_SHORT_HEADER);
+
+    /* Authentication algorithms, see ssl.cipher_suites() */
+    AddIntConstant(ssl_auth_null);
+    AddIntConstant(ssl_auth_rsa_decrypt);
+    AddIntConstant(ssl_auth_dsa);
+    AddIntConstant(ssl_auth_ecdsa);
+    AddIntConstant(ssl_auth_ecdh_rsa);
+    AddIntConstant(ssl_auth_ecdh_ecdsa);
+    AddIntConstant(ssl_auth_rsa_sign);
+    AddIntConstant(ssl_auth_rsa_pss);
+    AddIntConstant(ssl_auth_psk);
+    AddIntConstant(ssl_auth_tls13_any);
 
     /* Values for "policy" argument to SSL_PolicySet and returned by SSL_CipherPolicyGet. */
     AddIntConstant(SSL_NOT_ALLOWED);
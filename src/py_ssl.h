@@ -15,6 +15,26 @@
 /* ============================== SSLSocket Class =========================== */
 /* ========================================================================== */
 
+/*
+ * State shared between an SSLSocket and the native thread started by
+ * SSLSocket.start_ocsp_staple_refresh(). All members are protected by
+ * lock. responses holds the most recent staple, it is applied to each
+ * connection accepted on the socket. sock is a borrowed reference, the
+ * socket stops the thread before it is deallocated.
+ */
+typedef struct {
+    void *sock;
+    PRLock *lock;
+    PRCondVar *cv;
+    PRThread *thread;
+    PRBool stop;
+    PRBool done;
+    PRBool detached;
+    PRIntervalTime interval;
+    SSLKEAType kea;
+    SECItemArray *responses;
+} OCSPStapleRefresh;
+
 typedef struct {
     SOCKET_HEAD;
     PyObject *py_auth_certificate_callback;
@@ -24,6 +44,11 @@ typedef struct {
     PyObject *py_handshake_callback_data;
     PyObject *py_client_auth_data_callback;
     PyObject *py_client_auth_data_callback_data;
+    PyObject *py_can_false_start_callback;
+    PyObject *py_can_false_start_callback_data;
+    PyObject *py_ocsp_staple_callback;
+    PyObject *py_ocsp_staple_callback_data;
+    OCSPStapleRefresh *ocsp_staple_refresh;
 } SSLSocket;
 
 #define PySSLSocket_Check(op) PyObject_TypeCheck(op, &SSLSocketType)
@@ -32,9 +57,18 @@ typedef struct {
 /* ====================== SSLCipherSuiteInformation Class =================== */
 /* ========================================================================== */
 
+/*
+ * The name members hold interned copies of the name strings in info,
+ * they are NULL unless the object was created from an SSLCipherSuiteInfo.
+ */
 typedef struct {
     PyObject_HEAD
     SSLCipherSuiteInfo info;
+    PyObject *py_cipher_suite_name;
+    PyObject *py_auth_algorithm_name;
+    PyObject *py_kea_type_name;
+    PyObject *py_symmetric_cipher_name;
+    PyObject *py_mac_algorithm_name;
 } SSLCipherSuiteInformation;
 
 /* ========================================================================== */
@@ -46,6 +80,107 @@ typedef struct {
     SSLChannelInfo info;
 } SSLChannelInformation;
 
+/* ========================================================================== */
+/* ============================== TLSConfig Class =========================== */
+/* ========================================================================== */
+
+/*
+ * model is an SSL socket which is never connected, the configuration is
+ * applied to it once and copied from it by SSL_ReconfigFD() or
+ * SSL_ImportFD(). The Python callbacks are not part of the model, libssl
+ * passes the SSLSocket to them, they are installed on each socket.
+ * py_url is the IDNA encoded py_hostname.
+ */
+typedef struct {
+    PyObject_HEAD
+    PRFileDesc *model;
+    int protocol_variant;
+    PyObject *py_options;
+    PyObject *py_ciphers;
+    PyObject *py_version_range;
+    PyObject *py_hostname;
+    PyObject *py_url;
+    PyObject *py_server_cert;
+    PyObject *py_priv_key;
+    PyObject *py_kea;
+    PyObject *py_auth_certificate_callback;
+    PyObject *py_auth_certificate_callback_data;
+    PyObject *py_handshake_callback;
+    PyObject *py_handshake_callback_data;
+    PyObject *py_client_auth_data_callback;
+    PyObject *py_client_auth_data_callback_data;
+    PyObject *py_can_false_start_callback;
+    PyObject *py_can_false_start_callback_data;
+} TLSConfig;
+
+#define PyTLSConfig_Check(op) PyObject_TypeCheck(op, &TLSConfigType)
+
+/* ========================================================================== */
+/* ============================== Server Class ============================== */
+/* ========================================================================== */
+
+/* Connection accepted by a Server waiting for a worker thread */
+typedef struct {
+    PRFileDesc *pr_socket;
+    PRNetAddr pr_netaddr;
+    PRTime accepted;
+} ServerConnection;
+
+#define SERVER_LATENCY_SAMPLES 1024
+
+/*
+ * Latency of one stage of connection processing. samples is a ring
+ * buffer holding the most recent SERVER_LATENCY_SAMPLES values in
+ * seconds, percentiles are computed from it.
+ */
+typedef struct {
+    unsigned long count;
+    double total;
+    double max;
+    unsigned int next;
+    double samples[SERVER_LATENCY_SAMPLES];
+} ServerLatency;
+
+/*
+ * All members below the Python object references are protected by
+ * lock. Each native thread holds a reference to the Server object, the
+ * object cannot be deallocated while they run.
+ */
+typedef struct {
+    PyObject_HEAD
+    SSLSocket *py_socket;
+    PyObject *py_handler;
+    PRBool owns_socket;
+    int family;
+    PRFileDesc *wakeup_event;
+    PRLock *lock;
+    PRCondVar *not_empty;
+    PRCondVar *not_full;
+    PRCondVar *thread_exit;
+    ServerConnection *pending;
+    unsigned int max_pending;
+    unsigned int pending_head;
+    unsigned int n_pending;
+    unsigned int n_workers;
+    unsigned int accept_batch;
+    PRIntervalTime handshake_timeout;
+    PRBool started;
+    PRBool stopping;
+    PRBool acceptor_running;
+    unsigned int n_threads;
+    unsigned long n_accepted;
+    unsigned long n_accept_batches;
+    unsigned long n_active;
+    unsigned long n_completed;
+    unsigned long n_handshake_failures;
+    unsigned long n_handler_errors;
+    ServerLatency queue_time;
+    ServerLatency handshake_time;
+    ServerLatency handler_time;
+} Server;
+
+#define PyServer_Check(op) PyObject_TypeCheck(op, &ServerType)
+
 /* =========================== C API =========================== */
 
 typedef struct {
@@ -0,0 +1,276 @@
+import io
+
+import pytest
+
+from nss.error import NSPRError
+import nss.nss as nss
+
+# AES-GCM test case 4 from "The Galois/Counter Mode of Operation (GCM)"
+GCM_KEY = bytes.fromhex("feffe9928665731c6d6a8f9467308308")
+GCM_NONCE = bytes.fromhex("cafebabefacedbaddecaf888")
+GCM_AAD = bytes.fromhex("feedfacedeadbeeffeedfacedeadbeefabaddad2")
+GCM_PLAIN = bytes.fromhex(
+    "d9313225f88406e5a55909c5aff5269a86a7a9531534f7da2e4c303d8a318a72"
+    "1c3c0c95956809532fcf0e2449a6b525b16aedf5aa0de657ba637b39")
+GCM_CIPHER = bytes.fromhex(
+    "42831ec2217774244b7221b784d0d49ce3aa212f2c02a4e035c17e2329aca12e"
+    "21d514b25466931c7d8f6a5aac84aa051ba30b396a0aac973d58e091"
+    "5bc94fbc3221a5db94fae95ae7121a47")
+
+# ChaCha20-Poly1305 test vector from RFC 8439 section 2.8.2
+CHACHA_KEY = bytes(range(0x80, 0xa0))
+CHACHA_NONCE = bytes.fromhex("070000004041424344454647")
+CHACHA_AAD = bytes.fromhex("50515253c0c1c2c3c4c5c6c7")
+CHACHA_PLAIN = (b"Ladies and Gentlemen of the class of '99: If I could offer you "
+                b"only one tip for the future, sunscreen would be it.")
+CHACHA_CIPHER = bytes.fromhex(
+    "d31a8d34648e60db7b86afbc53ef7ec2a4aded51296e08fea9e2b5a736ee62d6"
+    "3dbea45e8ca9671282fafb69da92728b1a71de0a9e060b2905d6a5b67ecd3b36"
+    "92ddbd7f2d778b8c9803aee328091b58fab324e4fad675945585808b4831d7bc"
+    "3ff4def08e4b7a9de576d26586cec64b6116"
+    "1ae10b594f09e26a7e902ecbd0600691")
+
+
+# Magic, version, algorithm, chunk size and salt
+STREAM_HEADER_LEN = 4 + 1 + 1 + 4 + 32
+
+
+def import_key(mechanism, key):
+    slot = nss.get_best_slot(mechanism)
+    return nss.import_sym_key(slot, mechanism, nss.PK11_OriginUnwrap, nss.CKA_ENCRYPT, nss.SecItem(key))
+
+
+class TestAEAD:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    def test_gcm(self):
+        sym_key = import_key(nss.CKM_AES_GCM, GCM_KEY)
+        assert sym_key.encrypt_aead(nss.CKM_AES_GCM, GCM_NONCE, GCM_PLAIN, GCM_AAD) == GCM_CIPHER
+        assert sym_key.decrypt_aead(nss.CKM_AES_GCM, GCM_NONCE, GCM_CIPHER, GCM_AAD) == GCM_PLAIN
+
+    def test_chacha20_poly1305(self):
+        for mechanism in (nss.CKM_CHACHA20_POLY1305, nss.CKM_NSS_CHACHA20_POLY1305):
+            sym_key = import_key(mechanism, CHACHA_KEY)
+            assert sym_key.encrypt_aead(mechanism, CHACHA_NONCE, CHACHA_PLAIN,
+                                        aad=CHACHA_AAD) == CHACHA_CIPHER
+            assert sym_key.decrypt_aead(mechanism, CHACHA_NONCE, CHACHA_CIPHER,
+                                        aad=CHACHA_AAD) == CHACHA_PLAIN
+
+    def test_tag_len(self):
+        sym_key = import_key(nss.CKM_AES_GCM, GCM_KEY)
+        cipher_text = sym_key.encrypt_aead(nss.CKM_AES_GCM, GCM_NONCE, GCM_PLAIN, tag_len=12)
+        assert len(cipher_text) == len(GCM_PLAIN) + 12
+        assert sym_key.decrypt_aead(nss.CKM_AES_GCM, GCM_NONCE, cipher_text, tag_len=12) == GCM_PLAIN
+        with pytest.raises(ValueError):
+            sym_key.encrypt_aead(nss.CKM_AES_GCM, GCM_NONCE, GCM_PLAIN, tag_len=20)
+
+    def test_authentication(self):
+        sym_key = import_key(nss.CKM_AES_GCM, GCM_KEY)
+        tampered = bytearray(GCM_CIPHER)
+        tampered[0] ^= 1
+        with pytest.raises(NSPRError):
+            sym_key.decrypt_aead(nss.CKM_AES_GCM, GCM_NONCE, tampered, GCM_AAD)
+        with pytest.raises(NSPRError):
+            sym_key.decrypt_aead(nss.CKM_AES_GCM, GCM_NONCE, GCM_CIPHER, b"other aad")
+        with pytest.raises(ValueError):
+            sym_key.decrypt_aead(nss.CKM_AES_GCM, GCM_NONCE, b"short")
+
+    def test_out(self):
+        sym_key = import_key(nss.CKM_AES_GCM, GCM_KEY)
+        out = bytearray(len(GCM_CIPHER) + 10)
+        n = sym_key.encrypt_aead(nss.CKM_AES_GCM, GCM_NONCE, memoryview(GCM_PLAIN), GCM_AAD, out=out)
+        assert n == len(GCM_CIPHER)
+        assert out[:n] == GCM_CIPHER
+
+        plain = bytearray(len(GCM_PLAIN))
+        assert sym_key.decrypt_aead(nss.CKM_AES_GCM, GCM_NONCE, out[:n], GCM_AAD, out=plain) == len(GCM_PLAIN)
+        assert plain == GCM_PLAIN
+
+        with pytest.raises(ValueError):
+            sym_key.encrypt_aead(nss.CKM_AES_GCM, GCM_NONCE, GCM_PLAIN, out=bytearray(10))
+
+    def test_large(self):
+        sym_key = import_key(nss.CKM_AES_GCM, GCM_KEY)
+        data = GCM_PLAIN * 10000
+        cipher_text = sym_key.encrypt_aead(nss.CKM_AES_GCM, GCM_NONCE, data)
+        assert sym_key.decrypt_aead(nss.CKM_AES_GCM, GCM_NONCE, cipher_text) == data
+
+    def test_many(self):
+        sym_key = import_key(nss.CKM_AES_GCM, GCM_KEY)
+        records = [(i.to_bytes(12, "big"), GCM_PLAIN[:i], b"record %d" % i) for i in range(40)]
+        records.append((GCM_NONCE, GCM_PLAIN, GCM_AAD))
+        cipher_texts = sym_key.encrypt_aead_many(nss.CKM_AES_GCM, records)
+        assert cipher_texts[-1] == GCM_CIPHER
+        assert cipher_texts[:-1] == [sym_key.encrypt_aead(nss.CKM_AES_GCM, *record)
+                                     for record in records[:-1]]
+
+        plain_texts = sym_key.decrypt_aead_many(
+            nss.CKM_AES_GCM, [(r[0], c, r[2]) for r, c in zip(records, cipher_texts)])
+        assert plain_texts == [r[1] for r in records]
+
+        assert sym_key.encrypt_aead_many(nss.CKM_AES_GCM, [(GCM_NONCE, GCM_PLAIN)]) == \
+            [sym_key.encrypt_aead(nss.CKM_AES_GCM, GCM_NONCE, GCM_PLAIN)]
+        assert sym_key.encrypt_aead_many(nss.CKM_AES_GCM, []) == []
+
+        with pytest.raises(NSPRError, match="record 1"):
+            sym_key.decrypt_aead_many(nss.CKM_AES_GCM, [(GCM_NONCE, GCM_CIPHER, GCM_AAD),
+                                                        (GCM_NONCE, GCM_CIPHER)])
+
+    def test_errors(self):
+        sym_key = import_key(nss.CKM_AES_GCM, GCM_KEY)
+        with pytest.raises(ValueError):
+            sym_key.encrypt_aead(nss.CKM_AES_CBC_PAD, GCM_NONCE, GCM_PLAIN)
+        with pytest.raises(TypeError):
+            sym_key.encrypt_aead(nss.CKM_AES_GCM, GCM_NONCE, GCM_PLAIN, "text")
+        with pytest.raises(TypeError):
+            sym_key.encrypt_aead_many(nss.CKM_AES_GCM, [GCM_PLAIN])
+
+
+class TestStream:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    @pytest.mark.parametrize("size", [0, 1, 1000, 4096, 100000])
+    @pytest.mark.parametrize("threads", [1, 3])
+    def test_roundtrip(self, tmp_path, size, threads):
+        sym_key = import_key(nss.CKM_AES_GCM, GCM_KEY)
+        data = (GCM_PLAIN * (size // len(GCM_PLAIN) + 1))[:size]
+        (tmp_path / "plain").write_bytes(data)
+
+        assert nss.encrypt_stream(sym_key, tmp_path / "plain", tmp_path / "cipher",
+                                  chunk_size=1024, threads=threads) == size
+        # A header, then chunks of 1024 octets ending with a shorter one
+        assert (tmp_path / "cipher").stat().st_size == STREAM_HEADER_LEN + size + (size // 1024 + 1) * 16
+        assert nss.decrypt_stream(sym_key, str(tmp_path / "cipher"), str(tmp_path / "decrypted"),
+                                  threads=threads) == size
+        assert (tmp_path / "decrypted").read_bytes() == data
+
+    def test_file_objects(self, tmp_path):
+        sym_key = import_key(nss.CKM_AES_GCM, GCM_KEY)
+        data = GCM_PLAIN * 1000
+        path = tmp_path / "plain"
+        path.write_bytes(b"skipped" + data)
+
+        cipher = io.BytesIO()
+        with open(path, "rb") as f:
+            f.read(7)
+            assert nss.encrypt_stream(sym_key, f, cipher, chunk_size=5000) == len(data)
+            assert f.read() == b""
+
+        cipher.seek(0)
+        plain = io.BytesIO()
+        assert nss.decrypt_stream(sym_key, cipher, plain) == len(data)
+        assert plain.getvalue() == data
+
+        with open(tmp_path / "cipher", "wb") as f:
+            f.write(cipher.getvalue())
+        with open(tmp_path / "cipher", "rb") as f, open(tmp_path / "decrypted", "wb") as g:
+            nss.decrypt_stream(sym_key, f, g, threads=2)
+        assert (tmp_path / "decrypted").read_bytes() == data
+
+    def test_chacha20_poly1305(self):
+        sym_key = import_key(nss.CKM_CHACHA20_POLY1305, CHACHA_KEY)
+        cipher = io.BytesIO()
+        nss.encrypt_stream(sym_key, io.BytesIO(CHACHA_PLAIN), cipher, chunk_size=16,
+                           mechanism=nss.CKM_CHACHA20_POLY1305)
+        plain = io.BytesIO()
+        cipher.seek(0)
+        nss.decrypt_stream(sym_key, cipher, plain, mechanism=nss.CKM_CHACHA20_POLY1305)
+        assert plain.getvalue() == CHACHA_PLAIN
+
+        cipher.seek(0)
+        with pytest.raises(ValueError):
+            nss.decrypt_stream(sym_key, cipher, io.BytesIO())
+
+    def test_tampering(self):
+        sym_key = import_key(nss.CKM_AES_GCM, GCM_KEY)
+        cipher = io.BytesIO()
+        nss.encrypt_stream(sym_key, io.BytesIO(GCM_PLAIN * 10), cipher, chunk_size=64)
+        stream = cipher.getvalue()
+        record = 64 + 16
+
+        def decrypt(stream):
+            return nss.decrypt_stream(sym_key, io.BytesIO(stream), io.BytesIO())
+
+        assert decrypt(stream) == len(GCM_PLAIN * 10)
+
+        tampered = bytearray(stream)
+        tampered[100] ^= 1
+        with pytest.raises(NSPRError):
+            decrypt(bytes(tampered))
+
+        # Dropping or swapping chunks is detected
+        body = stream[STREAM_HEADER_LEN:]
+        n_full = len(body) // record
+        with pytest.raises(NSPRError):
+            decrypt(stream[:STREAM_HEADER_LEN] + body[record:])
+        with pytest.raises(ValueError):
+            decrypt(stream[:STREAM_HEADER_LEN + n_full * record])
+        with pytest.raises(NSPRError):
+            decrypt(stream[:STREAM_HEADER_LEN] + body[record:2 * record] + body[:record] + body[2 * record:])
+
+        with pytest.raises(ValueError):
+            decrypt(b"not a stream at all")
+
+        # The key of a stream is derived from the salt in its header
+        tampered = bytearray(stream)
+        tampered[STREAM_HEADER_LEN - 1] ^= 1
+        with pytest.raises(NSPRError):
+            decrypt(bytes(tampered))
+
+    def test_salt(self):
+        sym_key = import_key(nss.CKM_AES_GCM, GCM_KEY)
+        streams = []
+        for i in range(2):
+            cipher = io.BytesIO()
+            nss.encrypt_stream(sym_key, io.BytesIO(GCM_PLAIN), cipher)
+            streams.append(cipher.getvalue())
+        # Each stream has its own salt and key, nothing is repeated
+        assert streams[0][:10] == streams[1][:10]
+        assert streams[0][10:STREAM_HEADER_LEN] != streams[1][10:STREAM_HEADER_LEN]
+        assert streams[0][STREAM_HEADER_LEN:] != streams[1][STREAM_HEADER_LEN:]
+
+        with pytest.raises(NSPRError):
+            nss.decrypt_stream(import_key(nss.CKM_AES_GCM, bytes(16)), io.BytesIO(streams[0]), io.BytesIO())
+
+    def test_errors(self, tmp_path):
+        sym_key = import_key(nss.CKM_AES_GCM, GCM_KEY)
+        with pytest.raises(ValueError):
+            nss.encrypt_stream(sym_key, io.BytesIO(), io.BytesIO(), chunk_size=0)
+        with pytest.raises(ValueError):
+            nss.encrypt_stream(sym_key, io.BytesIO(), io.BytesIO(), mechanism=nss.CKM_AES_CBC_PAD)
+        with pytest.raises(NSPRError):
+            nss.encrypt_stream(sym_key, tmp_path / "missing", io.BytesIO())
+
+        # Invalid arguments leave an existing dst untouched
+        dst = tmp_path / "dst"
+        dst.write_bytes(b"keep")
+        with pytest.raises(ValueError):
+            nss.encrypt_stream(sym_key, io.BytesIO(b"data"), dst, chunk_size=0)
+        with pytest.raises(ValueError):
+            nss.encrypt_stream(sym_key, io.BytesIO(b"data"), dst, mechanism=nss.CKM_AES_CBC_PAD)
+        assert dst.read_bytes() == b"keep"
+
+        # As does a source which is not a stream encrypted with mechanism
+        cipher = tmp_path / "cipher"
+        nss.encrypt_stream(sym_key, io.BytesIO(b"data"), cipher)
+        src = tmp_path / "src"
+        src.write_bytes(b"not a stream at all")
+        with pytest.raises(ValueError):
+            nss.decrypt_stream(sym_key, src, dst)
+        with pytest.raises(ValueError):
+            nss.decrypt_stream(sym_key, io.BytesIO(), dst)
+        with pytest.raises(ValueError):
+            nss.decrypt_stream(sym_key, cipher, dst, mechanism=nss.CKM_CHACHA20_POLY1305)
+        assert dst.read_bytes() == b"keep"
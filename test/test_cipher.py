@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 import nss.nss as nss
 
 # -------------------------------------------------------------------------------
@@ -108,3 +110,43 @@ class TestCipher:
 
         assert decrypted_data == in_data
         assert encrypted_data != in_data
+
+    def test_buffer_types(self):
+        plain_text = PLAIN_TEXT * 1000
+
+        (encoding_ctx, decoding_ctx) = setup_contexts()
+        cipher_text = encoding_ctx.cipher_op(plain_text) + encoding_ctx.digest_final()
+
+        for buf in (bytearray(cipher_text), memoryview(cipher_text)):
+            (encoding_ctx, decoding_ctx) = setup_contexts()
+            assert decoding_ctx.cipher_op(buf) + decoding_ctx.digest_final() == plain_text
+
+    def test_into(self):
+        (encoding_ctx, decoding_ctx) = setup_contexts()
+        records = [PLAIN_TEXT, b"x" * 100, b"", b"y" * 7]
+        out_buf = bytearray(256)
+
+        cipher_text = bytearray()
+        for record in records:
+            n = encoding_ctx.cipher_op_into(record, out_buf)
+            cipher_text += out_buf[:n]
+        n = encoding_ctx.digest_final_into(out_buf)
+        cipher_text += out_buf[:n]
+
+        (reference_ctx, _) = setup_contexts()
+        assert cipher_text == reference_ctx.cipher_op(b"".join(records)) + reference_ctx.digest_final()
+
+        view = memoryview(out_buf)
+        n = decoding_ctx.cipher_op_into(cipher_text, view)
+        n += decoding_ctx.digest_final_into(view[n:])
+        assert out_buf[:n] == b"".join(records)
+
+    def test_into_too_small(self):
+        (encoding_ctx, decoding_ctx) = setup_contexts()
+        # DES has an 8 octet block
+        with pytest.raises(ValueError):
+            encoding_ctx.cipher_op_into(PLAIN_TEXT, bytearray(len(PLAIN_TEXT) + 7))
+        with pytest.raises(ValueError):
+            encoding_ctx.digest_final_into(bytearray(7))
+        with pytest.raises(TypeError):
+            encoding_ctx.cipher_op_into(PLAIN_TEXT, bytes(64))
@@ -0,0 +1,55 @@
+import pytest
+
+from nss.error import NSPRError
+import nss.nss as nss
+import nss.ssl as ssl
+
+
+class TestCipherSuites:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    def test_table(self):
+        suites = ssl.cipher_suites()
+        assert isinstance(suites, tuple)
+        assert [info.cipher_suite for info in suites] == list(ssl.ssl_implemented_ciphers)
+        assert ssl.cipher_suites() is suites
+
+    def test_cached_lookup(self):
+        info = ssl.get_cipher_suite_info(ssl.TLS_AES_128_GCM_SHA256)
+        assert ssl.get_cipher_suite_info(ssl.TLS_AES_128_GCM_SHA256) is info
+        assert info.cipher_suite_name == 'TLS_AES_128_GCM_SHA256'
+        assert info.cipher_suite_name is info.cipher_suite_name
+        assert info in ssl.cipher_suites()
+
+    def test_unknown_suite(self):
+        with pytest.raises(NSPRError):
+            ssl.get_cipher_suite_info(0xfefe)
+
+    def test_filters(self):
+        suites = ssl.cipher_suites()
+
+        ecdh = ssl.cipher_suites(kea=nss.ssl_kea_ecdh)
+        assert ecdh
+        assert all(info.kea_type == nss.ssl_kea_ecdh for info in ecdh)
+
+        ecdsa = ssl.cipher_suites(auth=ssl.ssl_auth_ecdsa)
+        assert ecdsa
+        assert all(info.auth_algorithm == ssl.ssl_auth_ecdsa for info in ecdsa)
+
+        fips = ssl.cipher_suites(fips=True)
+        non_fips = ssl.cipher_suites(fips=False)
+        assert all(info.is_fips for info in fips)
+        assert not any(info.is_fips for info in non_fips)
+        assert len(fips) + len(non_fips) == len(suites)
+
+        both = ssl.cipher_suites(kea=nss.ssl_kea_ecdh, auth=ssl.ssl_auth_ecdsa)
+        assert set(both) == set(ecdh) & set(ecdsa)
+
+        with pytest.raises(TypeError):
+            ssl.cipher_suites(kea='rsa')
@@ -0,0 +1,122 @@
+import gc
+import hashlib
+import hmac
+import threading
+
+import pytest
+
+import nss.nss as nss
+
+KEY = b"0123456789abcdef0123456789abcdef"
+DATA = b"The quick brown fox jumps over the lazy dog"
+
+
+def import_key(mechanism, operation, key=KEY):
+    slot = nss.get_best_slot(mechanism)
+    return nss.import_sym_key(slot, mechanism, nss.PK11_OriginUnwrap, operation, nss.SecItem(key))
+
+
+class TestContextPool:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    def test_mac(self):
+        sym_key = import_key(nss.CKM_SHA256_HMAC, nss.CKA_SIGN)
+        pool = nss.PK11ContextPool()
+        for data in (DATA, b"", DATA * 1000):
+            assert pool.mac(nss.CKM_SHA256_HMAC, sym_key, data) == \
+                hmac.new(KEY, data, hashlib.sha256).digest()
+        assert pool.size == 1
+        assert pool.in_use == 0
+
+    def test_reuse(self):
+        sym_key = import_key(nss.CKM_SHA256_HMAC, nss.CKA_SIGN)
+        pool = nss.PK11ContextPool()
+        ctx = pool.acquire(nss.CKM_SHA256_HMAC, nss.CKA_SIGN, sym_key)
+        ctx.digest_op(b"partial")
+        pool.release(ctx)
+        assert pool.acquire(nss.CKM_SHA256_HMAC, nss.CKA_SIGN, sym_key) is ctx
+        # Released mid-operation, reacquired reset
+        ctx.digest_op(DATA)
+        assert ctx.digest_final() == hmac.new(KEY, DATA, hashlib.sha256).digest()
+        pool.release(ctx)
+
+        other_key = import_key(nss.CKM_SHA256_HMAC, nss.CKA_SIGN, b"other key")
+        assert pool.acquire(nss.CKM_SHA256_HMAC, nss.CKA_SIGN, other_key) is not ctx
+
+    def test_cipher(self):
+        mechanism = nss.CKM_AES_CBC_PAD
+        sym_key = import_key(mechanism, nss.CKA_ENCRYPT, KEY[:16])
+        iv_param = nss.param_from_iv(mechanism, nss.SecItem(b"\0" * 16))
+        pool = nss.PK11ContextPool()
+
+        def encrypt():
+            ctx = pool.acquire(mechanism, nss.CKA_ENCRYPT, sym_key, iv_param)
+            cipher_text = ctx.cipher_op(DATA) + ctx.digest_final()
+            pool.release(ctx)
+            return cipher_text
+
+        reference = nss.create_context_by_sym_key(mechanism, nss.CKA_ENCRYPT, sym_key, iv_param)
+        expected = reference.cipher_op(DATA) + reference.digest_final()
+        assert encrypt() == expected
+        assert encrypt() == expected
+        assert pool.size == 1
+
+    def test_max_size(self):
+        sym_key = import_key(nss.CKM_SHA256_HMAC, nss.CKA_SIGN)
+        pool = nss.PK11ContextPool(max_size=2)
+        assert pool.max_size == 2
+        contexts = [pool.acquire(nss.CKM_SHA256_HMAC, nss.CKA_SIGN, sym_key) for i in range(3)]
+        assert pool.in_use == 3
+        for ctx in contexts:
+            pool.release(ctx)
+        assert pool.size == 2
+        assert pool.in_use == 0
+        pool.clear()
+        assert pool.size == 0
+
+    def test_release_errors(self):
+        sym_key = import_key(nss.CKM_SHA256_HMAC, nss.CKA_SIGN)
+        pool = nss.PK11ContextPool()
+        ctx = nss.create_context_by_sym_key(nss.CKM_SHA256_HMAC, nss.CKA_SIGN, sym_key)
+        with pytest.raises(ValueError):
+            pool.release(ctx)
+        ctx = pool.acquire(nss.CKM_SHA256_HMAC, nss.CKA_SIGN, sym_key)
+        pool.release(ctx)
+        with pytest.raises(ValueError):
+            pool.release(ctx)
+        with pytest.raises(ValueError):
+            nss.PK11ContextPool(max_size=-1)
+
+    def test_gc(self):
+        sym_key = import_key(nss.CKM_SHA256_HMAC, nss.CKA_SIGN)
+        pool = nss.PK11ContextPool()
+        pool.mac(nss.CKM_SHA256_HMAC, sym_key, b"data")
+        assert gc.is_tracked(pool)
+        assert len([obj for obj in gc.get_referents(pool) if isinstance(obj, dict)]) == 2
+        gc.collect()
+        assert len(pool.mac(nss.CKM_SHA256_HMAC, sym_key, b"data")) == 32
+
+    def test_threads(self):
+        sym_key = import_key(nss.CKM_SHA256_HMAC, nss.CKA_SIGN)
+        pool = nss.PK11ContextPool()
+        data = DATA * 1000
+        expected = hmac.new(KEY, data, hashlib.sha256).digest()
+        results = []
+
+        def worker():
+            for i in range(20):
+                results.append(pool.mac(nss.CKM_SHA256_HMAC, sym_key, data))
+
+        threads = [threading.Thread(target=worker) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [expected] * 80
+        assert pool.in_use == 0
@@ -1,5 +1,10 @@
 import hashlib
+import hmac
+import mmap
 import os
+import threading
+
+import pytest
 
 from conftest import digest_test
 import nss.nss as nss
@@ -28,3 +33,66 @@ class TestDigest:
 
     def test_sha512(self):
         digest_test("sha512", self.reference_file, hashlib.sha512(), nss.sha512_digest, nss.SEC_OID_SHA512)
+
+    def test_buffer_types(self):
+        with open(self.reference_file, "rb") as f:
+            data = f.read()
+        reference_digest = hashlib.sha256(data).digest()
+
+        with open(self.reference_file, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for buf in (bytearray(data), memoryview(data), mapped):
+                    assert nss.sha256_digest(buf) == reference_digest
+                    assert nss.hash_buf(nss.SEC_OID_SHA256, buf) == reference_digest
+
+                    context = nss.create_digest_context(nss.SEC_OID_SHA256)
+                    context.digest_begin()
+                    context.digest_op(buf)
+                    assert context.digest_final() == reference_digest
+
+        with pytest.raises(TypeError):
+            nss.sha256_digest("text")
+
+    def test_threads(self):
+        # Large inputs are digested with the GIL released
+        data = os.urandom(1024 * 1024)
+        reference_digest = hashlib.sha512(data).digest()
+        results = []
+
+        def digest():
+            results.append(nss.sha512_digest(data))
+
+        threads = [threading.Thread(target=digest) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == [reference_digest] * 4
+
+    def test_digest_final_into(self):
+        context = nss.create_digest_context(nss.SEC_OID_SHA256)
+        context.digest_begin()
+        context.digest_op(b"abc")
+        out_buf = bytearray(40)
+        assert context.digest_final_into(out_buf) == 32
+        assert out_buf[:32] == hashlib.sha256(b"abc").digest()
+
+        context = nss.create_digest_context(nss.SEC_OID_SHA256)
+        context.digest_begin()
+        with pytest.raises(ValueError):
+            context.digest_final_into(bytearray(31))
+
+        # HMAC contexts know their output length too
+        key = b"0123456789abcdef0123456789abcdef"
+        slot = nss.get_best_slot(nss.CKM_SHA256_HMAC)
+        sym_key = nss.import_sym_key(slot, nss.CKM_SHA256_HMAC, nss.PK11_OriginUnwrap,
+                                     nss.CKA_SIGN, nss.SecItem(key))
+        context = nss.create_context_by_sym_key(nss.CKM_SHA256_HMAC, nss.CKA_SIGN, sym_key)
+        context.digest_begin()
+        context.digest_op(b"abc")
+        with pytest.raises(ValueError):
+            context.digest_final_into(bytearray(31))
+        out_buf = bytearray(32)
+        assert context.digest_final_into(out_buf) == 32
+        assert out_buf == hmac.new(key, b"abc", hashlib.sha256).digest()
@@ -0,0 +1,192 @@
+import pathlib
+import tempfile
+import threading
+
+import pytest
+
+from nss.error import NSPRError
+import nss.io as io
+import nss.nss as nss
+import nss.ssl as ssl
+from setup_certs import CertificateDatabase
+
+timeout = io.seconds_to_interval(10)
+
+
+def auth_certificate_callback(sock, check_sig, is_server, certdb):
+    return True
+
+
+class LossyRelay:
+    '''
+    Relays datagrams between a client and port, dropping the first
+    datagram in each direction so both ends have to retransmit.
+    '''
+
+    def __init__(self, port):
+        self.front = io.Socket(io.PR_AF_INET, io.PR_DESC_SOCKET_UDP)
+        self.front.bind(io.NetworkAddress(io.PR_IpAddrLoopback, 0))
+        self.back = io.Socket(io.PR_AF_INET, io.PR_DESC_SOCKET_UDP)
+        self.back.connect(io.NetworkAddress(io.PR_IpAddrLoopback, port))
+        self.port = self.front.get_sock_name().port
+        self.client_addr = io.NetworkAddress()
+        self.client_known = threading.Event()
+        self.dropped = 0
+        self.stop = False
+        self.threads = [threading.Thread(target=self.forward),
+                        threading.Thread(target=self.backward)]
+        for thread in self.threads:
+            thread.start()
+
+    def forward(self):
+        first = True
+        while not self.stop:
+            try:
+                buf = self.front.recv_from(4096, self.client_addr, io.milliseconds_to_interval(50))
+            except NSPRError:
+                continue
+            self.client_known.set()
+            if first:
+                first = False
+                self.dropped += 1
+                continue
+            self.back.send(buf)
+
+    def backward(self):
+        first = True
+        while not self.stop:
+            try:
+                buf = self.back.recv(4096, io.milliseconds_to_interval(50))
+            except NSPRError:
+                continue
+            if first:
+                first = False
+                self.dropped += 1
+                continue
+            self.client_known.wait()
+            self.front.send_to(buf, self.client_addr)
+
+    def close(self):
+        self.stop = True
+        for thread in self.threads:
+            thread.join()
+        self.front.close()
+        self.back.close()
+
+
+class TestDTLSOptions:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    def test_socket(self):
+        sock = ssl.SSLSocket(io.PR_AF_INET, io.PR_DESC_SOCKET_UDP)
+        sock.set_ssl_version_range("dtls1.2", "dtls1.3")
+        assert sock.get_ssl_version_range() == (ssl.SSL_LIBRARY_VERSION_DTLS_1_2,
+                                                ssl.SSL_LIBRARY_VERSION_DTLS_1_3)
+        sock.set_ssl_option(ssl.SSL_RECORD_SIZE_LIMIT, 1200)
+        assert sock.get_ssl_option(ssl.SSL_RECORD_SIZE_LIMIT) == 1200
+        assert sock.get_dtls_handshake_timeout() is None
+        sock.close()
+
+    def test_supported_versions(self):
+        min_version, max_version = ssl.get_supported_ssl_version_range(ssl.SSL_VARIANT_DATAGRAM)
+        assert min_version >= ssl.SSL_LIBRARY_VERSION_DTLS_1_0
+        assert max_version >= ssl.SSL_LIBRARY_VERSION_DTLS_1_2
+
+    def test_dtls_listen_tcp(self):
+        sock = ssl.SSLSocket(io.PR_AF_INET)
+        with pytest.raises(ValueError):
+            sock.dtls_listen()
+        sock.close()
+
+
+class TestDTLS:
+    @classmethod
+    def setup_class(cls):
+        cls.basedir = tempfile.TemporaryDirectory()
+        cls.certdb = CertificateDatabase(pathlib.Path(cls.basedir.name))
+        nss.nss_init(cls.certdb.db_name)
+        nss.set_password_callback(lambda slot, retry: cls.certdb.db_passwd)
+        ssl.set_domestic_policy()
+        ssl.config_server_session_id_cache()
+
+    @classmethod
+    def teardown_class(cls):
+        # DTLS 1.2 sessions in the client cache hold the server certificate
+        ssl.clear_session_cache()
+        ssl.shutdown_server_session_id_cache()
+        nss.nss_shutdown()
+        cls.basedir.cleanup()
+        del cls.basedir
+
+    def new_server(self, version):
+        server_cert = nss.find_cert_from_nickname(self.certdb.server_nickname)
+        priv_key = nss.find_key_by_any_cert(server_cert)
+        sock = ssl.SSLSocket(io.PR_AF_INET, io.PR_DESC_SOCKET_UDP)
+        sock.bind(io.NetworkAddress(io.PR_IpAddrLoopback, 0))
+        sock.config_secure_server(server_cert, priv_key, server_cert.find_kea_type())
+        sock.set_ssl_version_range(version, version)
+        return sock
+
+    def serve(self, sock, n_messages, result):
+        try:
+            result['client_addr'] = sock.dtls_listen(timeout)
+            sock.dtls_handshake(timeout)
+            for i in range(n_messages):
+                sock.send(sock.recv(4096, timeout).upper())
+        except NSPRError as e:
+            result['error'] = e
+        finally:
+            sock.close()
+
+    def exchange(self, version, expected_version, relay=False):
+        server_sock = self.new_server(version)
+        port = server_sock.get_sock_name().port
+        messages = [b"ping", b"x" * 1000, b"pong"]
+        result = {}
+        server = threading.Thread(target=self.serve, args=(server_sock, len(messages), result))
+        server.start()
+
+        lossy_relay = None
+        if relay:
+            lossy_relay = LossyRelay(port)
+            port = lossy_relay.port
+
+        sock = ssl.SSLSocket(io.PR_AF_INET, io.PR_DESC_SOCKET_UDP)
+        try:
+            sock.set_hostname("localhost")
+            sock.set_auth_certificate_callback(auth_certificate_callback, nss.get_default_certdb())
+            sock.set_ssl_version_range(version, version)
+            sock.connect(io.NetworkAddress(io.PR_IpAddrLoopback, port))
+            sock.dtls_handshake(timeout)
+            replies = []
+            for message in messages:
+                sock.send(message)
+                replies.append(sock.recv(4096, timeout))
+            info = sock.get_ssl_channel_info()
+        finally:
+            sock.close()
+            server.join()
+            if lossy_relay:
+                lossy_relay.close()
+
+        assert 'error' not in result
+        assert replies == [message.upper() for message in messages]
+        assert info.protocol_version == expected_version
+        return lossy_relay
+
+    @pytest.mark.parametrize("version, expected_version", [
+        ("dtls1.2", ssl.SSL_LIBRARY_VERSION_DTLS_1_2),
+        ("dtls1.3", ssl.SSL_LIBRARY_VERSION_DTLS_1_3),
+    ])
+    def test_exchange(self, version, expected_version):
+        self.exchange(version, expected_version)
+
+    def test_retransmit(self):
+        lossy_relay = self.exchange("dtls1.3", ssl.SSL_LIBRARY_VERSION_DTLS_1_3, relay=True)
+        assert lossy_relay.dropped == 2
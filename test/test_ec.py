@@ -0,0 +1,123 @@
+import pytest
+
+from nss.error import NSPRError
+import nss.nss as nss
+
+MECHANISM = nss.CKM_EC_KEY_PAIR_GEN
+NONCE = b"\0" * 12
+
+
+def generate_key_pair(curve):
+    slot = nss.get_best_slot(MECHANISM)
+    return slot.generate_key_pair(MECHANISM, nss.ECParams(curve), False, False)
+
+
+class TestEC:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    def test_params(self):
+        params = nss.ECParams()
+        assert params.curve == nss.SEC_OID_ANSIX962_EC_PRIME256V1
+        assert params.curve_name == "P-256"
+        assert params.key_size == 256
+        assert str(params) == "curve=P-256"
+
+        for curve, alias, key_size in (("P-384", "secp384r1", 384),
+                                       ("P-521", "SECP521R1", 521),
+                                       ("X25519", "curve25519", 255)):
+            params = nss.ECParams(curve)
+            assert params.curve_name == curve
+            assert params.key_size == key_size
+            assert nss.ECParams(alias).der == params.der
+            assert nss.ECParams(params.curve).der == params.der
+
+        params = nss.ECParams(nss.SEC_OID_SECG_EC_SECP256K1)
+        assert params.curve == nss.SEC_OID_SECG_EC_SECP256K1
+        assert params.key_size is None
+
+    @pytest.mark.parametrize("curve", ["P-256", "P-384", "P-521"])
+    def test_ecdsa(self, curve):
+        pub_key, priv_key = generate_key_pair(curve)
+        assert pub_key.key_type == nss.ecKey
+        assert pub_key.ec.params.curve_name == curve
+        assert "EC Public Key" in str(pub_key)
+
+        signature = priv_key.sign(b"data", "sha256")
+        assert pub_key.verify(signature, b"data", "sha256")
+        assert not pub_key.verify(signature, b"date", "sha256")
+        # ECDSA signatures are randomized
+        assert signature != priv_key.sign(b"data", "sha256")
+
+        items = [(pub_key, signature, b"data"), (pub_key, signature, b"date")]
+        assert nss.verify_many(items, "sha256") == [True, False]
+
+    @pytest.mark.parametrize("curve", ["P-256", "P-384", "P-521", "X25519"])
+    def test_ecdh(self, curve):
+        a_pub, a_priv = generate_key_pair(curve)
+        b_pub, b_priv = generate_key_pair(curve)
+
+        # The peer's key, as received over the wire
+        b_peer = nss.import_ec_public_key(b_pub.ec.params, b_pub.ec.public_value)
+        assert b_peer.ec.public_value.data == b_pub.ec.public_value.data
+
+        a_key = a_priv.derive(b_peer, nss.CKM_AES_GCM, key_size=16)
+        b_key = b_priv.derive(a_pub, nss.CKM_AES_GCM, key_size=16)
+        cipher_text = a_key.encrypt_aead(nss.CKM_AES_GCM, NONCE, b"secret")
+        assert b_key.decrypt_aead(nss.CKM_AES_GCM, NONCE, cipher_text) == b"secret"
+
+        a_key = a_priv.derive(b_pub, nss.CKM_AES_GCM, key_size=32,
+                              kdf=nss.CKD_SHA256_KDF, shared_data=nss.SecItem(b"info"))
+        b_key = b_priv.derive(a_pub, nss.CKM_AES_GCM, key_size=32,
+                              kdf=nss.CKD_SHA256_KDF, shared_data=nss.SecItem(b"info"))
+        cipher_text = a_key.encrypt_aead(nss.CKM_AES_GCM, NONCE, b"secret")
+        assert b_key.decrypt_aead(nss.CKM_AES_GCM, NONCE, cipher_text) == b"secret"
+
+    def test_key_pair_pool(self):
+        pool = nss.KeyPairPool(nss.get_best_slot(MECHANISM), MECHANISM,
+                               nss.ECParams("P-384"), high_water=4)
+        try:
+            pool.fill()
+            pub_key, priv_key = pool.get()
+            assert pub_key.ec.params.curve_name == "P-384"
+            assert pub_key.verify(priv_key.sign(b"data", "sha384"), b"data", "sha384")
+        finally:
+            pool.close()
+
+    def test_errors(self):
+        with pytest.raises(KeyError):
+            nss.ECParams("P-999")
+        with pytest.raises(ValueError):
+            nss.ECParams(nss.SEC_OID_SHA256)
+        with pytest.raises(TypeError):
+            slot = nss.get_best_slot(MECHANISM)
+            slot.generate_key_pair(MECHANISM, nss.RSAGenParams(), False, False)
+
+        pub_key, priv_key = generate_key_pair("X25519")
+        with pytest.raises(ValueError):
+            priv_key.sign(b"data", "sha256")
+
+        # A peer's point must be on the curve and not the point at infinity
+        pub_key, priv_key = generate_key_pair("P-256")
+        point = bytearray(pub_key.ec.public_value.data)
+        point[-1] ^= 1
+        for public_value in (bytes(point), b"\4" + b"\0" * 64, b"\0"):
+            with pytest.raises(NSPRError):
+                nss.import_ec_public_key(nss.ECParams("P-256"), public_value)
+        with pytest.raises(NSPRError):
+            nss.import_ec_public_key(nss.ECParams("X25519"), b"\0" * 32)
+        with pytest.raises(ValueError):
+            nss.import_ec_public_key(nss.ECParams("P-256"), b"")
+        with pytest.raises(TypeError):
+            priv_key.derive(priv_key, nss.CKM_AES_GCM)
+
+        mechanism = nss.CKM_RSA_PKCS_KEY_PAIR_GEN
+        slot = nss.get_best_slot(mechanism)
+        rsa_pub, rsa_priv = slot.generate_key_pair(mechanism, nss.RSAGenParams(), False, False)
+        with pytest.raises(ValueError):
+            rsa_priv.derive(rsa_pub, nss.CKM_AES_GCM, key_size=16)
@@ -0,0 +1,255 @@
+import hashlib
+import hmac
+import io
+import os
+import subprocess
+import threading
+
+import pytest
+
+from nss.error import NSPRError
+import nss.hashlib as nss_hashlib
+import nss.hmac as nss_hmac
+import nss.nss as nss
+
+DATA = b"The quick brown fox jumps over the lazy dog" * 100
+
+
+class TestHashlib:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    @pytest.mark.parametrize("name", sorted(nss_hashlib.algorithms_guaranteed))
+    def test_digest(self, name):
+        reference = hashlib.new(name, DATA)
+
+        h = nss_hashlib.new(name, DATA)
+        assert h.name == name
+        assert h.digest_size == reference.digest_size
+        assert h.block_size == reference.block_size
+        assert h.digest() == reference.digest()
+        assert h.hexdigest() == reference.hexdigest()
+
+        h = getattr(nss_hashlib, name)()
+        for i in range(0, len(DATA), 1000):
+            h.update(DATA[i:i + 1000])
+        assert h.digest() == reference.digest()
+
+    def test_names(self):
+        assert nss_hashlib.new("SHA256").name == "sha256"
+        assert nss_hashlib.new(nss.SEC_OID_SHA256).name == "sha256"
+        with pytest.raises(ValueError):
+            nss_hashlib.new("whirlpool")
+        with pytest.raises(TypeError):
+            nss_hashlib.new(1.0)
+
+    def test_copy(self):
+        h = nss_hashlib.sha256(b"prefix")
+        # digest() does not finalize the object
+        assert h.digest() == h.digest()
+        c = h.copy()
+        h.update(b"one")
+        c.update(b"two")
+        assert h.digest() == hashlib.sha256(b"prefixone").digest()
+        assert c.digest() == hashlib.sha256(b"prefixtwo").digest()
+        assert type(c) is nss.Hash
+
+    def test_buffer_types(self):
+        h = nss_hashlib.sha1(bytearray(DATA))
+        h.update(memoryview(DATA))
+        assert h.digest() == hashlib.sha1(DATA + DATA).digest()
+        with pytest.raises(TypeError):
+            h.update("text")
+
+    def test_threads(self):
+        data = DATA * 1000
+        h = nss_hashlib.sha512()
+        threads = [threading.Thread(target=h.update, args=(data,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert h.digest() == hashlib.sha512(data * 4).digest()
+
+    @pytest.mark.parametrize("cls", [nss.Hash, nss.HMAC])
+    def test_uninitialized(self, cls):
+        h = cls.__new__(cls)
+        assert "object at" in repr(h)
+        with pytest.raises(ValueError):
+            h.update(b"x")
+        with pytest.raises(ValueError):
+            h.digest()
+        with pytest.raises(ValueError):
+            h.hexdigest()
+        with pytest.raises(ValueError):
+            h.copy()
+        with pytest.raises(ValueError):
+            h.name
+
+
+class TestHMAC:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    @pytest.mark.parametrize("key", [b"", b"key", b"k" * 64, b"k" * 200])
+    @pytest.mark.parametrize("name", ["md5", "sha1", "sha256", "sha512"])
+    def test_hmac(self, key, name):
+        reference = hmac.new(key, DATA, name)
+        h = nss_hmac.new(key, DATA, name)
+        assert h.name == reference.name
+        assert h.digest_size == reference.digest_size
+        assert h.block_size == reference.block_size
+        assert h.hexdigest() == reference.hexdigest()
+        assert nss_hmac.digest(key, DATA, name) == reference.digest()
+
+    def test_digestmod(self):
+        reference = hmac.new(b"key", DATA, "sha256").digest()
+        assert nss_hmac.new(b"key", DATA, nss_hashlib.sha256).digest() == reference
+        assert nss_hmac.new(b"key", DATA, hashlib.sha256).digest() == reference
+        assert nss_hmac.new(b"key", DATA, nss.SEC_OID_SHA256).digest() == reference
+        with pytest.raises(TypeError):
+            nss_hmac.new(b"key", DATA)
+
+    def test_copy(self):
+        h = nss_hmac.new(b"key", b"prefix", "sha256")
+        c = h.copy()
+        c.update(b"more")
+        assert h.digest() == hmac.new(b"key", b"prefix", "sha256").digest()
+        assert c.digest() == hmac.new(b"key", b"prefixmore", "sha256").digest()
+        assert type(c) is nss.HMAC
+
+
+class TestHashFile:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        path = tmp_path / "data"
+        path.write_bytes(DATA * 1000)
+        return path
+
+    def test_path(self, path):
+        reference = hashlib.sha256(DATA * 1000).digest()
+        assert nss.hash_file(path, "sha256") == reference
+        assert nss.hash_file(str(path), "sha256", chunk_size=1000) == reference
+        assert nss.hash_file(str(path).encode(), nss.SEC_OID_SHA256) == reference
+
+    def test_multiple(self, path):
+        digests = nss.hash_file(path, ["sha256", "sha512"])
+        assert digests == (hashlib.sha256(DATA * 1000).digest(),
+                           hashlib.sha512(DATA * 1000).digest())
+
+    def test_file_object(self, path):
+        with open(path, "rb") as f:
+            f.read(100)
+            assert nss.hash_file(f, "sha1") == hashlib.sha1((DATA * 1000)[100:]).digest()
+            assert f.read() == b""
+        assert nss.hash_file(io.BytesIO(DATA), "md5", chunk_size=7) == hashlib.md5(DATA).digest()
+
+    def test_pipe(self, path):
+        with open(path, "rb") as f, open(path, "rb") as reference:
+            # A pipe file object cannot tell() its position, it is read with readinto()
+            proc = subprocess.Popen(["cat"], stdin=reference, stdout=subprocess.PIPE)
+            assert nss.hash_file(proc.stdout, "sha384", chunk_size=4096) == \
+                hashlib.sha384(f.read()).digest()
+            proc.stdout.close()
+            proc.wait()
+
+    def test_fifo(self, path, tmp_path):
+        # A FIFO is read through its file descriptor instead of mapped
+        fifo = tmp_path / "fifo"
+        os.mkfifo(fifo)
+        writer = threading.Thread(target=lambda: fifo.write_bytes(path.read_bytes()))
+        writer.start()
+        try:
+            assert nss.hash_file(fifo, "sha256", chunk_size=4096) == \
+                hashlib.sha256(DATA * 1000).digest()
+        finally:
+            if writer.is_alive():
+                # Unblock the writer's open() if hash_file() never opened the FIFO
+                with open(fifo, "rb") as f:
+                    f.read()
+            writer.join()
+
+    def test_empty(self, tmp_path):
+        path = tmp_path / "empty"
+        path.write_bytes(b"")
+        assert nss.hash_file(path, "sha256") == hashlib.sha256().digest()
+
+    def test_hmac_file(self, path):
+        assert nss.hmac_file(path, b"key", "sha256") == \
+            hmac.new(b"key", DATA * 1000, "sha256").digest()
+        assert nss.hmac_file(path, b"key", ("sha1", "md5")) == \
+            (hmac.new(b"key", DATA * 1000, "sha1").digest(),
+             hmac.new(b"key", DATA * 1000, "md5").digest())
+
+    def test_errors(self, tmp_path):
+        with pytest.raises(NSPRError):
+            nss.hash_file(tmp_path / "missing", "sha256")
+        with pytest.raises(ValueError):
+            nss.hash_file(io.BytesIO(DATA), [])
+        with pytest.raises(ValueError):
+            nss.hash_file(io.BytesIO(DATA), "sha256", chunk_size=0)
+        with pytest.raises(TypeError):
+            nss.hash_file(42, "sha256")
+        with pytest.raises(TypeError):
+            nss.hmac_file(io.StringIO("text"), b"key", "sha256")
+
+
+class TestHashMany:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    @pytest.mark.parametrize("threads", [0, 1, 4, 100000])
+    def test_buffers(self, threads):
+        items = [DATA[:i] for i in range(0, len(DATA), 37)]
+        items.append(bytearray(DATA * 1000))
+        reference = [hashlib.sha256(item).digest() for item in items]
+        assert nss.hash_many("sha256", items, threads=threads) == reference
+        assert nss.hash_many(nss.SEC_OID_SHA256, items, threads=threads,
+                             contiguous=True) == b"".join(reference)
+
+    def test_offsets(self):
+        offsets = list(range(0, len(DATA), 100)) + [len(DATA)]
+        reference = [hashlib.sha1(DATA[offsets[i]:offsets[i + 1]]).digest()
+                     for i in range(len(offsets) - 1)]
+        assert nss.hash_many("sha1", memoryview(DATA), offsets=offsets) == reference
+        assert nss.hash_many("sha1", DATA, offsets=[5, 5]) == [hashlib.sha1().digest()]
+        assert nss.hash_many("sha1", DATA, offsets=[0]) == []
+
+    def test_empty(self):
+        assert nss.hash_many("md5", []) == []
+        assert nss.hash_many("md5", [], contiguous=True) == b""
+
+    def test_errors(self):
+        with pytest.raises(TypeError):
+            nss.hash_many("sha256", [b"data", "text"])
+        with pytest.raises(ValueError):
+            nss.hash_many("sha256", DATA, offsets=[10, 5])
+        with pytest.raises(ValueError):
+            nss.hash_many("sha256", DATA, offsets=[0, len(DATA) + 1])
+        with pytest.raises(ValueError):
+            nss.hash_many("sha256", DATA, offsets=[])
+        with pytest.raises(ValueError):
+            nss.hash_many("sha256", [DATA], threads=-1)
@@ -0,0 +1,99 @@
+import hashlib
+
+import pytest
+
+from nss.error import NSPRError
+import nss.nss as nss
+
+# RFC 5869 A.1 and A.3
+IKM = bytes.fromhex("0b" * 22)
+SALT = bytes.fromhex("000102030405060708090a0b0c")
+INFO = bytes.fromhex("f0f1f2f3f4f5f6f7f8f9")
+OKM = bytes.fromhex("3cb25f25faacd57a90434f64d0362f2a2d2d0a90cf1a5a4c"
+                    "5db02d56ecc4c5bf34007208d5b887185865")
+OKM_NO_SALT = bytes.fromhex("8da4e775a563c18f715f802a063c5a31b8a11f5c5ee1879e"
+                            "c3454e5f3c738d2d9d201395faa4b61a96c8")
+NONCE = b"\0" * 12
+
+
+class TestKDF:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    def test_pbkdf2(self):
+        for hash_alg, length in (("sha256", 32), ("sha1", 77), ("sha512", 16)):
+            expected = hashlib.pbkdf2_hmac(hash_alg, b"password", b"salt", 1000, length)
+            assert nss.pbkdf2("password", b"salt", 1000, hash_alg, length) == expected
+            assert nss.pbkdf2(b"password", bytearray(b"salt"), 1000, hash_alg, length) == expected
+
+        assert nss.pbkdf2("pässword", b"salt", 1, nss.SEC_OID_SHA256, 32) == \
+            hashlib.pbkdf2_hmac("sha256", "pässword".encode("utf-8"), b"salt", 1, 32)
+
+        sym_key = nss.pbkdf2("password", b"salt", 1000, "sha256", 16, nss.CKM_AES_GCM)
+        assert sym_key.mechanism == nss.CKM_AES_GCM
+        assert sym_key.key_data == hashlib.pbkdf2_hmac("sha256", b"password", b"salt", 1000, 16)
+
+    def test_hkdf(self):
+        assert nss.hkdf(IKM, SALT, INFO, "sha256", 42) == OKM
+        assert nss.hkdf(IKM, None, None, "sha256", 42) == OKM_NO_SALT
+        assert nss.hkdf(IKM, b"", b"", "sha256", 42) == OKM_NO_SALT
+
+        sym_key = nss.hkdf(IKM, SALT, INFO, "sha256", 16, nss.CKM_AES_GCM)
+        assert sym_key.mechanism == nss.CKM_AES_GCM
+        assert sym_key.key_data == OKM[:16]
+
+    def test_hkdf_ecdh(self):
+        mechanism = nss.CKM_EC_KEY_PAIR_GEN
+        slot = nss.get_best_slot(mechanism)
+        a_pub, a_priv = slot.generate_key_pair(mechanism, nss.ECParams("X25519"), False, False)
+        b_pub, b_priv = slot.generate_key_pair(mechanism, nss.ECParams("X25519"), False, False)
+
+        a_secret = a_priv.derive(b_pub, nss.CKM_HKDF_DERIVE, nss.CKA_DERIVE)
+        b_secret = b_priv.derive(a_pub, nss.CKM_HKDF_DERIVE, nss.CKA_DERIVE)
+        a_key = nss.hkdf(a_secret, SALT, b"handshake", "sha256", 16, nss.CKM_AES_GCM)
+        b_key = nss.hkdf(b_secret, SALT, b"handshake", "sha256", 16, nss.CKM_AES_GCM)
+        cipher_text = a_key.encrypt_aead(nss.CKM_AES_GCM, NONCE, b"secret")
+        assert b_key.decrypt_aead(nss.CKM_AES_GCM, NONCE, cipher_text) == b"secret"
+
+    @pytest.mark.parametrize("threads", [0, 1, 4])
+    def test_pbkdf2_many(self, threads):
+        items = [("password %d" % i, b"salt %d" % i) for i in range(10)]
+        expected = [hashlib.pbkdf2_hmac("sha256", password.encode(), salt, 100, 32)
+                    for password, salt in items]
+        assert nss.pbkdf2_many(items, 100, "sha256", 32, threads=threads) == expected
+        assert nss.pbkdf2_many([], 100, "sha256", 32) == []
+
+        sym_keys = nss.pbkdf2_many(items, 100, "sha256", 32, nss.CKM_AES_GCM, threads=threads)
+        assert [sym_key.key_data for sym_key in sym_keys] == expected
+
+    @pytest.mark.parametrize("threads", [0, 1, 4])
+    def test_hkdf_many(self, threads):
+        items = [(IKM, SALT, INFO), (IKM, None, None)] * 5
+        assert nss.hkdf_many(items, "sha256", 42, threads=threads) == [OKM, OKM_NO_SALT] * 5
+
+        sym_keys = nss.hkdf_many(items, "sha256", 16, nss.CKM_AES_GCM, threads=threads)
+        assert [sym_key.key_data for sym_key in sym_keys] == [OKM[:16], OKM_NO_SALT[:16]] * 5
+
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            nss.pbkdf2("password", b"salt", 0, "sha256", 32)
+        with pytest.raises(ValueError):
+            nss.pbkdf2("password", b"salt", 1, "md5", 32)
+        with pytest.raises(ValueError):
+            nss.hkdf(IKM, None, None, "sha256", 0)
+        with pytest.raises(TypeError):
+            nss.pbkdf2("password", None, 1, "sha256", 32)
+        with pytest.raises(TypeError):
+            nss.hkdf(IKM, None, None, "sha256", 16, "aes")
+        with pytest.raises(TypeError):
+            nss.pbkdf2_many([("password",)], 1, "sha256", 32)
+        with pytest.raises(TypeError):
+            nss.hkdf_many([(IKM, None)], "sha256", 32)
+        # HKDF output is limited to 255 blocks
+        with pytest.raises(NSPRError, match="item 0"):
+            nss.hkdf_many([(IKM, None, None), (IKM, None, None)], "sha256", 255 * 32 + 1)
@@ -0,0 +1,95 @@
+import pytest
+
+import nss.nss as nss
+
+MECHANISM = nss.CKM_RSA_PKCS_KEY_PAIR_GEN
+
+
+def create_pool(**kwds):
+    slot = nss.get_best_slot(MECHANISM)
+    return nss.KeyPairPool(slot, MECHANISM, nss.RSAGenParams(), **kwds)
+
+
+class TestKeyPairPool:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    def test_get(self):
+        pool = create_pool(high_water=4, threads=2)
+        try:
+            assert pool.high_water == 4
+            assert pool.low_water == 2
+            pool.fill()
+            assert pool.available == 4
+            assert pool.generated == 4
+
+            pub_key, priv_key = pool.get()
+            assert pool.available == 3
+            assert (pool.hits, pool.misses) == (1, 0)
+            assert pub_key.key_type == nss.rsaKey
+            assert pub_key.rsa.modulus.len == 128
+            signature = priv_key.sign(b"data", "sha256")
+            assert pub_key.verify(signature, b"data", "sha256")
+
+            # Every key pair is distinct
+            moduli = {pub_key.rsa.modulus.data}
+            for i in range(6):
+                moduli.add(pool.get()[0].rsa.modulus.data)
+            assert len(moduli) == 7
+            assert pool.hits + pool.misses == 7
+        finally:
+            pool.close()
+
+    def test_refill(self):
+        pool = create_pool(high_water=3, low_water=1)
+        try:
+            pool.fill()
+            pool.get()
+            # Above the low water mark nothing is generated
+            assert pool.generated == 3
+            assert pool.available == 2
+
+            # Unless the pool is explicitly filled
+            pool.fill()
+            assert pool.generated == 4
+
+            pool.get()
+            pool.get()
+            pool.get()
+            pool.fill()
+            assert pool.available == 3
+            assert pool.generated == 7
+            assert pool.failures == 0
+        finally:
+            pool.close()
+
+    def test_close(self):
+        pool = create_pool(high_water=1, low_water=0)
+        try:
+            pool.fill()
+            pool.close()
+            pool.close()
+            with pytest.raises(ValueError):
+                pool.get()
+            with pytest.raises(ValueError):
+                pool.fill()
+        finally:
+            pool.close()
+
+        pool = create_pool(high_water=1, low_water=0)
+        del pool
+
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            create_pool(high_water=0)
+        with pytest.raises(ValueError):
+            create_pool(high_water=2, low_water=2)
+        with pytest.raises(ValueError):
+            create_pool(threads=0)
+        with pytest.raises(TypeError):
+            nss.KeyPairPool(nss.get_best_slot(MECHANISM), MECHANISM, None)
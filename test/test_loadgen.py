@@ -0,0 +1,112 @@
+import json
+import pathlib
+import tempfile
+
+import pytest
+
+import nss.ssl as ssl
+from nss import loadgen
+from setup_certs import CertificateDatabase
+
+
+class TestOptions:
+    def test_target(self):
+        options = loadgen.parse_args(["example.com:8443"])
+        assert (options.host, options.port) == ("example.com", 8443)
+        assert options.hostname == "example.com"
+        assert options.request == b"64 1024\n" + b"q" * 64
+
+        options = loadgen.parse_args(["[::1]:443", "--hostname", "server.example.com"])
+        assert (options.host, options.port) == ("::1", 443)
+        assert options.hostname == "server.example.com"
+
+    def test_literal_request(self):
+        options = loadgen.parse_args(["example.com:443", "--request", r"GET / HTTP/1.0\r\n\r\n"])
+        assert options.request == b"GET / HTTP/1.0\r\n\r\n"
+        assert options.response_size is None
+
+    def test_version_range(self):
+        options = loadgen.parse_args(["example.com:443", "--version-range", "tls1.2:tls1.3"])
+        assert options.version_range == (ssl.SSL_LIBRARY_VERSION_TLS_1_2, ssl.SSL_LIBRARY_VERSION_TLS_1_3)
+
+    @pytest.mark.parametrize(
+        "argv",
+        [
+            [],
+            ["example.com"],
+            ["example.com:443", "--reuse", "2"],
+            ["example.com:443", "--version-range", "tls9"],
+            ["--local"],
+            ["--local", "-d", "sql:pki", "example.com:443"],
+        ],
+    )
+    def test_invalid(self, argv):
+        with pytest.raises(SystemExit):
+            loadgen.parse_args(argv)
+
+
+class TestHistogram:
+    def test_percentiles(self):
+        histogram = loadgen.Histogram()
+        for i in range(1, 101):
+            histogram.add(i / 1000.0)
+        summary = histogram.to_dict()
+        assert summary["count"] == 100
+        # Percentiles come from buckets about 2% wide
+        assert summary["p50"] == pytest.approx(0.05, rel=0.02)
+        assert summary["p99"] == pytest.approx(0.099, rel=0.02)
+        assert summary["min"] == 0.001
+        assert summary["max"] == 0.1
+        assert summary["mean"] == pytest.approx(0.0505)
+        assert sum(bucket["count"] for bucket in summary["buckets"]) == 100
+        assert summary["buckets"][-1] == {"le": None, "count": 0}
+        assert histogram.format_lines()
+
+    def test_merge(self):
+        histograms = [loadgen.Histogram() for i in range(2)]
+        for i in range(1, 101):
+            histograms[i % 2].add(i / 1000.0)
+        histograms[0].merge(histograms[1])
+        histograms[0].merge(loadgen.Histogram())
+        summary = histograms[0].to_dict()
+        assert summary["count"] == 100
+        assert summary["min"] == 0.001
+        assert summary["max"] == 0.1
+        assert summary["p50"] == pytest.approx(0.05, rel=0.02)
+        assert sum(bucket["count"] for bucket in summary["buckets"]) == 100
+
+        # Memory does not grow with the number of samples
+        histogram = loadgen.Histogram()
+        for i in range(100000):
+            histogram.add(0.001)
+        assert len(histogram.percentile_counts) == 1
+        assert histogram.percentile(99.9) == 0.001
+
+    def test_empty(self):
+        histogram = loadgen.Histogram()
+        assert histogram.to_dict()["p50"] == 0.0
+        assert histogram.format_lines() == []
+
+
+class TestLocal:
+    @classmethod
+    def setup_class(cls):
+        cls.basedir = tempfile.TemporaryDirectory()
+        cls.certdb = CertificateDatabase(pathlib.Path(cls.basedir.name))
+
+    @classmethod
+    def teardown_class(cls):
+        cls.basedir.cleanup()
+        del cls.basedir
+
+    def test_local(self, capsys):
+        argv = [
+            "--local", "-d", self.certdb.db_name, "-n", self.certdb.server_nickname,
+            "-w", self.certdb.db_passwd, "-c", "2", "-t", "0.5", "--reuse", "0.5", "--json",
+        ]
+        assert loadgen.main(argv) == 0
+        report = json.loads(capsys.readouterr().out)
+        assert report["requests"] > 0
+        assert report["errors"] == 0
+        assert report["bytes_received"] == report["requests"] * 1024
+        assert report["handshake_latency"]["count"] == report["connections"]
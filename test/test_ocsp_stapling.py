@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+import nss.io as io
+import nss.nss as nss
+import nss.ssl as ssl
+
+
+class TestOCSPStapling:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    def test_stapling_option(self):
+        sock = ssl.SSLSocket(io.PR_AF_INET)
+        sock.set_ssl_option(ssl.SSL_ENABLE_OCSP_STAPLING, True)
+        assert sock.get_ssl_option(ssl.SSL_ENABLE_OCSP_STAPLING)
+        sock.set_ssl_option(ssl.SSL_ENABLE_OCSP_STAPLING, False)
+        assert not sock.get_ssl_option(ssl.SSL_ENABLE_OCSP_STAPLING)
+
+    def test_set_stapled_responses(self):
+        sock = ssl.SSLSocket(io.PR_AF_INET)
+        sock.set_stapled_ocsp_responses(b"response", nss.ssl_kea_rsa)
+        sock.set_stapled_ocsp_responses([nss.SecItem(b"r1"), bytearray(b"r2")])
+        sock.set_stapled_ocsp_responses(None)
+        with pytest.raises(TypeError):
+            sock.set_stapled_ocsp_responses(1)
+        with pytest.raises(TypeError):
+            sock.set_stapled_ocsp_responses([b"r1", 2])
+
+    def test_staple_refresh(self):
+        sock = ssl.SSLSocket(io.PR_AF_INET)
+        refreshed = threading.Event()
+        calls = []
+
+        def refresh(s, tag):
+            assert s is sock
+            calls.append(tag)
+            if len(calls) > 1:
+                refreshed.set()
+            return b"response %d" % len(calls)
+
+        sock.start_ocsp_staple_refresh(0.01, nss.ssl_kea_rsa, refresh, "tag")
+        # The callback is invoked once before returning
+        assert calls == ["tag"]
+        assert refreshed.wait(10)
+        sock.stop_ocsp_staple_refresh()
+
+        n_calls = len(calls)
+        sock.stop_ocsp_staple_refresh()
+        assert len(calls) == n_calls
+
+    def test_staple_refresh_error(self):
+        sock = ssl.SSLSocket(io.PR_AF_INET)
+
+        def refresh(s):
+            raise ValueError("no response")
+
+        with pytest.raises(ValueError):
+            sock.start_ocsp_staple_refresh(60, nss.ssl_kea_rsa, refresh)
+        with pytest.raises(ValueError):
+            sock.start_ocsp_staple_refresh(0, nss.ssl_kea_rsa, lambda s: None)
+        with pytest.raises(TypeError):
+            sock.start_ocsp_staple_refresh(60, nss.ssl_kea_rsa, None)
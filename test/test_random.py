@@ -0,0 +1,129 @@
+import os
+
+import pytest
+
+import nss.nss as nss
+
+
+class TestRandom:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    def test_generate_random_into(self):
+        buf = bytearray(64)
+        assert nss.generate_random_into(buf) == 64
+        assert buf != bytearray(64)
+
+        buf = bytearray(64)
+        assert nss.generate_random_into(memoryview(buf)[16:48]) == 32
+        assert buf[:16] == bytearray(16) and buf[48:] == bytearray(16)
+        assert buf[16:48] != bytearray(32)
+
+        assert nss.generate_random_into(bytearray()) == 0
+        with pytest.raises(TypeError):
+            nss.generate_random_into(b"read only")
+
+    def test_pool(self):
+        pool = nss.RandomPool(1024)
+        try:
+            assert (pool.size, pool.low_water, pool.max_request) == (1024, 512, 256)
+            pool.fill()
+            assert pool.available == 1024
+
+            values = {pool.generate(16) for i in range(10)}
+            assert len(values) == 10
+            assert pool.available == 1024 - 160
+            assert (pool.hits, pool.misses) == (10, 0)
+
+            # Larger requests bypass the pool
+            assert len(pool.generate(1000)) == 1000
+            assert pool.available == 1024 - 160
+            assert pool.misses == 1
+
+            buf = bytearray(32)
+            assert pool.generate_into(buf) == 32
+            assert buf != bytearray(32)
+            assert pool.generate(0) == b""
+
+            # Draining to low_water starts a refill
+            for i in range(40):
+                pool.generate(16)
+            pool.fill()
+            assert pool.available == 1024
+            assert pool.failures == 0
+        finally:
+            pool.close()
+
+    def test_fork(self):
+        pool = nss.RandomPool(1024, max_request=32)
+        try:
+            pool.fill()
+            read_fd, write_fd = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                # The child must not hand out octets the parent also holds,
+                # nor generate the same octets as the parent's DRBG
+                os.write(write_fd, pool.generate(32) + nss.generate_random(32))
+                os._exit(0)
+            os.close(write_fd)
+            child_values = os.read(read_fd, 64)
+            os.close(read_fd)
+            assert os.waitpid(pid, 0)[1] == 0
+
+            parent_values = [pool.generate(32) for i in range(32)]
+            parent_values.append(nss.generate_random(32))
+            assert len(child_values) == 64
+            assert child_values[:32] not in parent_values
+            assert child_values[32:] not in parent_values
+            assert pool.hits == 32
+        finally:
+            pool.close()
+
+    def test_close(self):
+        pool = nss.RandomPool(64)
+        pool.close()
+        pool.close()
+        with pytest.raises(ValueError):
+            pool.generate(16)
+        with pytest.raises(ValueError):
+            pool.fill()
+
+        pool = nss.RandomPool(64)
+        del pool
+
+    def test_uninitialized(self):
+        pool = nss.RandomPool.__new__(nss.RandomPool)
+        with pytest.raises(ValueError):
+            pool.fill()
+        with pytest.raises(ValueError):
+            pool.generate(16)
+        with pytest.raises(ValueError):
+            pool.generate_into(bytearray(16))
+        assert pool.available == 0
+        pool.close()
+
+        # A failed __init__ leaves the pool uninitialized
+        pool = nss.RandomPool.__new__(nss.RandomPool)
+        with pytest.raises(ValueError):
+            pool.__init__(0)
+        with pytest.raises(ValueError):
+            pool.fill()
+        pool.__init__(64)
+        pool.fill()
+        assert pool.available == 64
+        pool.close()
+
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            nss.RandomPool(0)
+        with pytest.raises(ValueError):
+            nss.RandomPool(64, low_water=64)
+        with pytest.raises(ValueError):
+            nss.RandomPool(64, max_request=65)
+        with pytest.raises(ValueError):
+            nss.generate_random(-1)
@@ -0,0 +1,174 @@
+import mmap
+
+import pytest
+
+import nss.nss as nss
+
+
+def tlv(tag, value):
+    if len(value) < 0x80:
+        length = bytes([len(value)])
+    else:
+        length = len(value).to_bytes(2, "big")
+        length = bytes([0x80 | len(length)]) + length
+    return tag.to_bytes((tag.bit_length() + 7) // 8, "big") + length + value
+
+
+# A certificate shaped structure, the OCTET STRING encapsulates DER
+OID = tlv(0x06, bytes.fromhex("2a864886f70d01010b"))
+TBS = tlv(0x30, tlv(0xa0, tlv(0x02, b"\2")) +
+          tlv(0x02, b"\x12\x34") +
+          tlv(0x30, OID + tlv(0x05, b"")) +
+          tlv(0x04, tlv(0x30, tlv(0x01, b"\xff"))))
+SIGNATURE = tlv(0x03, b"\0" + b"\xab" * 300)
+DER = tlv(0x30, TBS + SIGNATURE)
+
+
+class TestSecItem:
+    def test_copy(self):
+        buf = bytearray(b"0123456789")
+        item = nss.SecItem(buf)
+        buf[0:1] = b"X"
+        assert item.data == b"0123456789"
+        assert item[2:5] == b"234"
+        assert nss.SecItem("text").data == b"text"
+        assert nss.SecItem(None).data == b""
+
+    def test_view(self):
+        item = nss.SecItem(b"0123456789")
+        view = item.view()
+        assert view.readonly
+        assert view == b"0123456789"
+        assert view[2:5] == b"234"
+        with pytest.raises(TypeError):
+            view[0] = 0
+
+        # The item cannot change under an exported view
+        with pytest.raises(BufferError):
+            item.__init__(b"other")
+        view.release()
+        item.__init__(b"other")
+        assert item.data == b"other"
+
+        assert nss.SecItem().view() == b""
+
+    def test_borrow(self):
+        buf = bytearray(b"0123456789")
+        item = nss.SecItem(buf, copy=False)
+        buf[0:1] = b"X"
+        assert item.data == b"X123456789"
+        assert len(item) == 10
+        # The borrowed buffer cannot be resized
+        with pytest.raises(BufferError):
+            buf.append(0)
+
+        # Sub-items share storage with their parent
+        sub_item = nss.SecItem(item.view()[2:5], copy=False)
+        buf[2:3] = b"Y"
+        assert sub_item.data == b"Y34"
+        assert sub_item.view().readonly
+        del item
+        assert sub_item.data == b"Y34"
+        del sub_item
+        buf.append(0)
+
+    def test_borrow_mmap(self):
+        m = mmap.mmap(-1, 4096)
+        m[:5] = b"hello"
+        item = nss.SecItem(m, copy=False)
+        assert item.view()[:5] == b"hello"
+        assert not memoryview(item).readonly
+        with pytest.raises(BufferError):
+            m.close()
+        del item
+        m.close()
+
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            nss.SecItem("AAAA", ascii=True, copy=False)
+        with pytest.raises(TypeError):
+            nss.SecItem("text", copy=False)
+        with pytest.raises(TypeError):
+            nss.SecItem(1)
+
+
+class TestDER:
+    def test_iter_tlv(self):
+        item = nss.SecItem(DER)
+        records = list(item.iter_tlv())
+        assert len(records) == 1
+        tag, offset, header_len, value = records[0]
+        assert (tag, offset, header_len) == (0x30, 0, 4)
+        assert value.readonly
+        assert value == DER[4:]
+
+        assert [tag for tag, offset, header_len, value in item.iter_tlv((0,))] == \
+            [nss.SEC_ASN1_SEQUENCE | nss.SEC_ASN1_CONSTRUCTED, nss.SEC_ASN1_BIT_STRING]
+        tag, offset, header_len, value = list(item.iter_tlv(0))[1]
+        assert item.view()[offset:offset + header_len + len(value)] == SIGNATURE
+
+        # Primitive TLV's are not descended into
+        assert [tag for tag, offset, header_len, value in item.iter_tlv(recursive=True)] == \
+            [0x30, 0x30, 0xa0, 0x02, 0x02, 0x30, 0x06, 0x05, 0x04, 0x03]
+        assert list(nss.SecItem().iter_tlv()) == []
+
+    def test_child(self):
+        item = nss.SecItem(DER)
+        assert item.child(0)[3] == DER[4:]
+        assert item.child((0, 0, 1))[3] == b"\x12\x34"
+        assert item.child([0, 0, 0, 0])[3] == b"\2"
+        # Paths may continue into the DER encapsulated by a primitive TLV
+        assert item.child((0, 0, 3, 0, 0))[::3] == (0x01, b"\xff")
+
+        # Sub-items share storage with their parent
+        tbs = nss.SecItem(item.child((0, 0))[3], copy=False)
+        assert tbs.child(1)[3] == b"\x12\x34"
+
+    def test_find(self):
+        item = nss.SecItem(DER)
+        tag, offset, header_len, value = item.find(nss.SEC_ASN1_OBJECT_ID)
+        assert DER[offset:offset + header_len + len(value)] == OID
+        assert item.find(nss.SEC_ASN1_BOOLEAN) is None
+        assert item.find(nss.SEC_ASN1_BOOLEAN, (0, 0, 3))[3] == b"\xff"
+
+        item = nss.SecItem(tlv(0x30, tlv(0x9f2a, b"high")))
+        assert item.find(0x9f2a)[1:] == (2, 3, b"high")
+
+    def test_lazy(self):
+        # Malformed DER is only reported when it is reached
+        item = nss.SecItem(tlv(0x02, b"\1") + b"\x30\x05\x01")
+        records = item.iter_tlv()
+        assert next(records)[3] == b"\1"
+        with pytest.raises(ValueError):
+            next(records)
+        with pytest.raises(StopIteration):
+            next(records)
+        assert item.child(0)[3] == b"\1"
+
+        # The iterator keeps the item from changing under it
+        records = item.iter_tlv()
+        with pytest.raises(BufferError):
+            item.__init__(b"other")
+        del records
+        item.__init__(b"other")
+
+    def test_errors(self):
+        item = nss.SecItem(DER)
+        with pytest.raises(IndexError):
+            item.child((0, 2))
+        with pytest.raises(IndexError):
+            item.child(-1)
+        with pytest.raises(ValueError):
+            item.child(())
+        with pytest.raises(TypeError):
+            item.child("0")
+        with pytest.raises(ValueError):
+            list(nss.SecItem(b"\x30\x80\0\0").iter_tlv())
+        with pytest.raises(ValueError):
+            nss.SecItem(b"\x30\x84\xff\xff\xff\xff").child(0)
+
+        nested = b""
+        for i in range(100):
+            nested = tlv(0x30, nested)
+        with pytest.raises(ValueError):
+            nss.SecItem(nested).find(0x02)
@@ -0,0 +1,105 @@
+import base64
+
+import pytest
+
+from nss.error import NSPRError
+import nss.nss as nss
+
+# Self-signed P-256 certificate, and a signature of MESSAGE made with its
+# key, both generated by OpenSSL:
+#
+# % openssl req -x509 -newkey ec -pkeyopt ec_paramgen_curve:P-256 -nodes \
+#       -keyout key.pem -out cert.pem -days 36500 -subj /CN=signer -sha256
+# % openssl dgst -sha256 -sign key.pem -out sig msg
+CERT_PEM = """
+-----BEGIN CERTIFICATE-----
+MIIBeTCCAR+gAwIBAgIUUbOhJGhysl6e/fjAcMBEvdV6EyUwCgYIKoZIzj0EAwIw
+ETEPMA0GA1UEAwwGc2lnbmVyMCAXDTI2MTAxOTA0MDIzN1oYDzIxMjYwOTI1MDQw
+MjM3WjARMQ8wDQYDVQQDDAZzaWduZXIwWTATBgcqhkjOPQIBBggqhkjOPQMBBwNC
+AAQYJUNHdT/p1pWkKSQQZjPYiWXj7iL7tBzGldY+eblXPbTQk5RH7IRAR0dPX+i+
+aNHqKQuElypsPXmUsyVAwrjOo1MwUTAdBgNVHQ4EFgQUUTIUy4qI6IuczTPmB+WV
+y7uPzeowHwYDVR0jBBgwFoAUUTIUy4qI6IuczTPmB+WVy7uPzeowDwYDVR0TAQH/
+BAUwAwEB/zAKBggqhkjOPQQDAgNIADBFAiEA6oTw3PeZ2Coc3UUpPuRNQeWQdMMv
+y5vPCNDosd2MoyQCIEDWGU0J+VNT2W5t8GdrLdWfjR5T+auQrhhCDNOoAQM8
+-----END CERTIFICATE-----
+"""
+MESSAGE = b"The quick brown fox jumps over the lazy dog"
+SIGNATURE = base64.b64decode(
+    "MEQCICWxIn5x6ONmyo5rV7U4M2E8cU3dN+DSLCdjY0R7yyw7AiADJR+NIiEcPUz0"
+    "aDV1zcyNhCGr6TKpe4441v5F+yIq1w==")
+
+
+class TestSignature:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+        mechanism = nss.CKM_RSA_PKCS_KEY_PAIR_GEN
+        slot = nss.get_best_slot(mechanism)
+        cls.pub_key, cls.priv_key = slot.generate_key_pair(mechanism, nss.RSAGenParams(), False, False)
+        cls.cert = nss.Certificate(nss.SecItem(CERT_PEM, ascii=True))
+        cls.ec_key = cls.cert.subject_public_key_info.public_key
+
+    @classmethod
+    def teardown_class(cls):
+        del cls.pub_key, cls.priv_key, cls.cert, cls.ec_key
+        nss.nss_shutdown()
+
+    def test_sign_verify(self):
+        for alg in ("sha256", nss.SEC_OID_SHA512, nss.SEC_OID_PKCS1_SHA384_WITH_RSA_ENCRYPTION):
+            signature = self.priv_key.sign(MESSAGE, alg)
+            assert len(signature) == 128
+            assert self.pub_key.verify(signature, MESSAGE, alg)
+            assert self.pub_key.verify(bytearray(signature), memoryview(MESSAGE), alg=alg)
+            assert not self.pub_key.verify(signature, MESSAGE + b".", alg)
+
+        # PKCS #1 v1.5 signatures are deterministic
+        assert self.priv_key.sign(MESSAGE, "sha256") == \
+            self.priv_key.sign(MESSAGE, nss.SEC_OID_PKCS1_SHA256_WITH_RSA_ENCRYPTION)
+
+    def test_openssl_signature(self):
+        assert self.ec_key.verify(SIGNATURE, MESSAGE, "sha256")
+        assert self.ec_key.verify(SIGNATURE, MESSAGE, nss.SEC_OID_ANSIX962_ECDSA_SHA256_SIGNATURE)
+        assert not self.ec_key.verify(SIGNATURE, MESSAGE[1:], "sha256")
+        assert not self.ec_key.verify(b"garbage", MESSAGE, "sha256")
+
+    def test_signed_data(self):
+        signed_data = self.cert.signed_data
+        assert signed_data.verify(self.ec_key)
+        # An RSA key cannot check an ECDSA signature
+        with pytest.raises(NSPRError):
+            signed_data.verify(self.pub_key)
+        with pytest.raises(TypeError):
+            signed_data.verify(self.priv_key)
+
+    def test_errors(self):
+        with pytest.raises(NSPRError):
+            self.pub_key.verify(b"\0" * 128, MESSAGE, nss.SEC_OID_ANSIX962_ECDSA_SHA256_SIGNATURE)
+        with pytest.raises(ValueError):
+            self.priv_key.sign(MESSAGE, "sec_oid_unknown")
+        with pytest.raises(KeyError):
+            self.priv_key.sign(MESSAGE, "no such algorithm")
+
+    @pytest.mark.parametrize("threads", [0, 1, 4])
+    def test_verify_many(self, threads):
+        messages = [b"token %d" % i for i in range(50)]
+        items = [(self.pub_key, self.priv_key.sign(message, "sha256"), message) for message in messages]
+        items[7] = (self.pub_key, items[7][1], b"forged")
+        items.append((self.ec_key, SIGNATURE, MESSAGE, nss.SEC_OID_ANSIX962_ECDSA_SHA256_SIGNATURE))
+
+        expected = [True] * 51
+        expected[7] = False
+        assert nss.verify_many(items, "sha256", threads=threads) == expected
+        assert nss.verify_many([], "sha256") == []
+
+    def test_verify_many_errors(self):
+        signature = self.priv_key.sign(MESSAGE, "sha256")
+        with pytest.raises(TypeError):
+            nss.verify_many([(self.pub_key, signature, MESSAGE)])
+        with pytest.raises(TypeError):
+            nss.verify_many([(self.priv_key, signature, MESSAGE)], "sha256")
+        with pytest.raises(TypeError):
+            nss.verify_many([signature], "sha256")
+        with pytest.raises(NSPRError, match="item 1"):
+            nss.verify_many([(self.pub_key, signature, MESSAGE),
+                             (self.pub_key, signature, MESSAGE, nss.SEC_OID_ANSIX962_ECDSA_SHA256_SIGNATURE)],
+                            "sha256")
@@ -0,0 +1,44 @@
+import pytest
+
+import nss.io as io
+import nss.nss as nss
+import nss.ssl as ssl
+
+
+class TestEarlyData:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    def test_options(self):
+        sock = ssl.SSLSocket(io.PR_AF_INET)
+        for option in (ssl.SSL_ENABLE_FALSE_START, ssl.SSL_ENABLE_SESSION_TICKETS, ssl.SSL_ENABLE_0RTT_DATA):
+            sock.set_ssl_option(option, True)
+            assert sock.get_ssl_option(option)
+            sock.set_ssl_option(option, False)
+            assert not sock.get_ssl_option(option)
+
+    def test_enable_early_data(self):
+        ssl.config_anti_replay(0.5)
+        sock = ssl.SSLSocket(io.PR_AF_INET)
+        sock.enable_early_data(4096)
+        assert sock.get_ssl_option(ssl.SSL_ENABLE_0RTT_DATA)
+        assert sock.get_ssl_option(ssl.SSL_ENABLE_SESSION_TICKETS)
+        # The socket holds a reference to the anti-replay state
+        sock.close()
+
+    def test_config_anti_replay(self):
+        ssl.config_anti_replay(1.0, k=4, bits=10)
+        with pytest.raises(ValueError):
+            ssl.config_anti_replay(0)
+
+    def test_can_false_start_callback(self):
+        sock = ssl.SSLSocket(io.PR_AF_INET)
+        sock.set_can_false_start_callback(lambda s, data: True, "data")
+        sock.set_can_false_start_callback(None)
+        with pytest.raises(TypeError):
+            sock.set_can_false_start_callback(1)
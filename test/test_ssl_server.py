@@ -0,0 +1,154 @@
+import pathlib
+import tempfile
+import threading
+
+import pytest
+
+import nss.io as io
+import nss.nss as nss
+import nss.ssl as ssl
+from setup_certs import CertificateDatabase
+
+timeout = io.seconds_to_interval(10)
+
+
+def auth_certificate_callback(sock, check_sig, is_server, certdb):
+    return True
+
+
+def client(port, request):
+    net_addr = io.NetworkAddress(io.PR_IpAddrLoopback, port)
+    sock = ssl.SSLSocket(net_addr.family)
+    sock.set_hostname("localhost")
+    sock.set_auth_certificate_callback(auth_certificate_callback, nss.get_default_certdb())
+    sock.connect(net_addr, timeout=timeout)
+    try:
+        sock.send(request + b"\n")
+        return sock.readline()
+    finally:
+        sock.close()
+
+
+def echo_handler(sock, client_addr):
+    buf = sock.readline()
+    if buf == b"raise\n":
+        raise ValueError("handler failed")
+    sock.send(b"{" + buf.rstrip() + b"}\n")
+
+
+class TestServer:
+    @classmethod
+    def setup_class(cls):
+        cls.basedir = tempfile.TemporaryDirectory()
+        cls.certdb = CertificateDatabase(pathlib.Path(cls.basedir.name))
+        nss.nss_init(cls.certdb.db_name)
+        nss.set_password_callback(lambda slot, retry: cls.certdb.db_passwd)
+        ssl.set_domestic_policy()
+        ssl.config_server_session_id_cache()
+
+    @classmethod
+    def teardown_class(cls):
+        ssl.shutdown_server_session_id_cache()
+        nss.nss_shutdown()
+        cls.basedir.cleanup()
+        del cls.basedir
+
+    def new_server(self, handler, **kwds):
+        server_cert = nss.find_cert_from_nickname(self.certdb.server_nickname)
+        priv_key = nss.find_key_by_any_cert(server_cert)
+        net_addr = io.NetworkAddress(io.PR_IpAddrLoopback, 0)
+        return ssl.Server(net_addr, server_cert, priv_key, handler, **kwds)
+
+    def test_serve(self):
+        server = self.new_server(echo_handler, workers=4, accept_batch=4)
+        server.start()
+        assert server.running
+        port = server.net_addr.port
+
+        replies = []
+        clients = [
+            threading.Thread(target=lambda i=i: replies.append(client(port, b"%d" % i)))
+            for i in range(16)
+        ]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+
+        assert sorted(replies) == sorted(b"{%d}\n" % i for i in range(16))
+        assert server.shutdown(timeout)
+        assert not server.running
+        assert server.net_addr is None
+
+        stats = server.get_stats()
+        assert stats["accepted"] == 16
+        assert stats["completed"] == 16
+        assert stats["pending"] == 0
+        assert stats["active"] == 0
+        assert 1 <= stats["accept_batches"] <= 16
+        assert stats["handshake_time"]["count"] == 16
+        assert 0 < stats["handshake_time"]["p50"] <= stats["handshake_time"]["max"]
+
+    def test_failures(self):
+        server = self.new_server(echo_handler, workers=1)
+        server.start()
+        with pytest.raises(ValueError):
+            server.start()
+        port = server.net_addr.port
+
+        # Not a TLS client, the handshake fails
+        net_addr = io.NetworkAddress(io.PR_IpAddrLoopback, port)
+        sock = io.Socket(net_addr.family)
+        sock.connect(net_addr, timeout=timeout)
+        sock.send(b"not a ClientHello\r\n\r\n" * 10)
+        sock.close()
+
+        # The connection is closed when the handler raises
+        assert client(port, b"raise") == b""
+        assert client(port, b"ok") == b"{ok}\n"
+
+        assert server.shutdown(timeout)
+        stats = server.get_stats()
+        assert stats["handshake_failures"] == 1
+        assert stats["handler_errors"] == 1
+        assert stats["completed"] == 1
+
+    def test_shutdown_from_handler(self):
+        results = []
+
+        def handler(sock, client_addr):
+            sock.readline()
+            # Must not wait for the worker running this handler
+            results.append(server.shutdown(timeout))
+            sock.send(b"stopping\n")
+
+        server = self.new_server(handler, workers=1)
+        server.start()
+        port = server.net_addr.port
+        assert client(port, b"stop") == b"stopping\n"
+        assert server.shutdown(timeout)
+        assert results == [False]
+        assert not server.running
+        assert server.net_addr is None
+
+    def test_close_socket(self):
+        server = self.new_server(echo_handler)
+        sock = server.socket
+        port = server.net_addr.port
+        del server
+
+        # The listening socket is closed although sock still refers to it
+        net_addr = io.NetworkAddress(io.PR_IpAddrLoopback, port)
+        listener = io.Socket(net_addr.family)
+        listener.bind(net_addr)
+        listener.listen()
+        listener.close()
+        del sock
+
+    def test_invalid_arguments(self):
+        with pytest.raises(TypeError):
+            self.new_server(None)
+        with pytest.raises(ValueError):
+            self.new_server(echo_handler, workers=0)
+        with pytest.raises(TypeError):
+            self.new_server(echo_handler, options=[])
@@ -0,0 +1,59 @@
+import nss.nss as nss
+import nss.ssl as ssl
+
+STATISTICS_KEYS = {
+    "sch_sid_cache_hits",
+    "sch_sid_cache_misses",
+    "sch_sid_cache_not_ok",
+    "hsh_sid_cache_hits",
+    "hsh_sid_cache_misses",
+    "hsh_sid_cache_not_ok",
+    "hch_sid_cache_hits",
+    "hch_sid_cache_misses",
+    "hch_sid_cache_not_ok",
+    "sch_sid_stateless_resumes",
+    "hsh_sid_stateless_resumes",
+    "hch_sid_stateless_resumes",
+    "hch_sid_ticket_parse_failures",
+}
+
+
+class TestStatistics:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    def test_get_statistics(self):
+        stats = ssl.get_statistics()
+        assert set(stats) == STATISTICS_KEYS
+        for value in stats.values():
+            assert isinstance(value, int)
+
+    def test_reset_statistics(self):
+        ssl.reset_statistics()
+        assert all(value == 0 for value in ssl.get_statistics().values())
+
+    def test_server_session_cache_info(self):
+        info = ssl.get_server_session_cache_info()
+        assert info["configured"] is False
+        assert info["occupancy"] == 0.0
+
+        ssl.config_server_session_id_cache(max_cache_entries=0, ssl3_timeout=1)
+        try:
+            info = ssl.get_server_session_cache_info()
+            assert info["configured"] is True
+            assert info["multi_process"] is False
+            # Zero and out of range values are replaced by the server defaults
+            assert info["max_cache_entries"] == 10000
+            assert info["ssl3_timeout"] == 5
+            assert info["max_locks"] == ssl.get_max_server_cache_locks()
+            assert info["inserted"] == 0
+            assert info["occupancy"] == 0.0
+        finally:
+            ssl.shutdown_server_session_id_cache()
+
+        assert ssl.get_server_session_cache_info()["configured"] is False
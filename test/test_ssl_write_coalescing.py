@@ -0,0 +1,180 @@
+import pathlib
+import tempfile
+import threading
+
+import pytest
+
+import nss.io as io
+import nss.nss as nss
+import nss.ssl as ssl
+from setup_certs import CertificateDatabase
+
+timeout = io.seconds_to_interval(10)
+
+
+def auth_certificate_callback(sock, check_sig, is_server, certdb):
+    return True
+
+
+def connect(port):
+    net_addr = io.NetworkAddress(io.PR_IpAddrLoopback, port)
+    sock = ssl.SSLSocket(net_addr.family)
+    sock.set_hostname("localhost")
+    sock.set_auth_certificate_callback(auth_certificate_callback, nss.get_default_certdb())
+    sock.connect(net_addr, timeout=timeout)
+    return sock
+
+
+class TestWriteCoalescingOptions:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    def test_enable_disable(self):
+        sock = ssl.SSLSocket(io.PR_AF_INET)
+        assert sock.get_write_coalescing_stats() is None
+        sock.flush()
+
+        sock.enable_write_coalescing()
+        stats = sock.get_write_coalescing_stats()
+        assert stats == {"buffer_size": 16384, "flush_delay": None,
+                         "buffered": 0, "writes": 0, "flushes": 0}
+
+        sock.enable_write_coalescing(1024, flush_delay=0.01)
+        stats = sock.get_write_coalescing_stats()
+        assert stats["buffer_size"] == 1024
+        assert stats["flush_delay"] == pytest.approx(0.01, abs=0.001)
+
+        sock.disable_write_coalescing()
+        assert sock.get_write_coalescing_stats() is None
+        sock.disable_write_coalescing()
+        sock.close()
+
+    def test_close(self):
+        sock = ssl.SSLSocket(io.PR_AF_INET)
+        sock.enable_write_coalescing(flush_delay=0.01)
+        sock.close()
+
+    def test_accept(self):
+        listener = ssl.SSLSocket(io.PR_AF_INET)
+        listener.bind(io.NetworkAddress(io.PR_IpAddrLoopback, 0))
+        listener.listen()
+        listener.enable_write_coalescing(flush_delay=0.01)
+        net_addr = io.NetworkAddress(io.PR_IpAddrLoopback, listener.get_sock_name().port)
+
+        # Accepted connections do not share the listener's buffer
+        for i in range(2):
+            client = io.Socket(net_addr.family)
+            client.connect(net_addr, timeout=timeout)
+            sock, addr = listener.accept(timeout=timeout)
+            assert sock.get_write_coalescing_stats() is None
+            sock.close()
+            client.close()
+
+        assert listener.get_write_coalescing_stats()["buffer_size"] == 16384
+        listener.close()
+
+    def test_invalid_arguments(self):
+        sock = ssl.SSLSocket(io.PR_AF_INET)
+        with pytest.raises(ValueError):
+            sock.enable_write_coalescing(0)
+        with pytest.raises(ValueError):
+            sock.enable_write_coalescing(16385)
+        with pytest.raises(ValueError):
+            sock.enable_write_coalescing(flush_delay=-1)
+        sock.set_socket_option(io.PR_SockOpt_Nonblocking, True)
+        with pytest.raises(ValueError):
+            sock.enable_write_coalescing()
+        sock.close()
+
+
+class TestWriteCoalescing:
+    @classmethod
+    def setup_class(cls):
+        cls.basedir = tempfile.TemporaryDirectory()
+        cls.certdb = CertificateDatabase(pathlib.Path(cls.basedir.name))
+        nss.nss_init(cls.certdb.db_name)
+        nss.set_password_callback(lambda slot, retry: cls.certdb.db_passwd)
+        ssl.set_domestic_policy()
+        ssl.config_server_session_id_cache()
+
+    @classmethod
+    def teardown_class(cls):
+        ssl.shutdown_server_session_id_cache()
+        nss.nss_shutdown()
+        cls.basedir.cleanup()
+        del cls.basedir
+
+    def new_server(self, handler):
+        server_cert = nss.find_cert_from_nickname(self.certdb.server_nickname)
+        priv_key = nss.find_key_by_any_cert(server_cert)
+        net_addr = io.NetworkAddress(io.PR_IpAddrLoopback, 0)
+        server = ssl.Server(net_addr, server_cert, priv_key, handler, workers=1)
+        server.start()
+        return server
+
+    def test_coalesce(self):
+        stats = []
+
+        def handler(sock, client_addr):
+            request = sock.readline()
+            sock.enable_write_coalescing(1024)
+            for i in range(100):
+                sock.send(b"%03d," % i)
+            sock.send(b"x" * 3000)
+            sock.send(request)
+            stats.append(sock.get_write_coalescing_stats())
+
+        server = self.new_server(handler)
+        sock = connect(server.net_addr.port)
+        # The request is only written when the client starts reading
+        sock.enable_write_coalescing()
+        sock.send(b"get")
+        sock.send(b"\n")
+        assert sock.get_write_coalescing_stats()["buffered"] == 4
+        response = sock.readline()
+        assert sock.get_write_coalescing_stats()["flushes"] == 1
+        sock.close()
+        assert server.shutdown(timeout)
+
+        assert response == b"".join(b"%03d," % i for i in range(100)) + b"x" * 3000 + b"get\n"
+        assert stats[0]["writes"] == 102
+        # The buffer is topped up with the first 624 octets of the
+        # large send, the rest of it is written directly
+        assert stats[0]["flushes"] == 2
+        assert stats[0]["buffered"] == 4
+
+    def test_flush_delay(self):
+        received = threading.Event()
+
+        def handler(sock, client_addr):
+            sock.enable_write_coalescing(flush_delay=0.05)
+            sock.send(b"hello\n")
+            # Only the timer can deliver the reply
+            received.wait(10)
+
+        server = self.new_server(handler)
+        sock = connect(server.net_addr.port)
+        assert sock.readline() == b"hello\n"
+        received.set()
+        sock.close()
+        assert server.shutdown(timeout)
+
+    def test_flush(self):
+        def handler(sock, client_addr):
+            sock.send(sock.readline())
+
+        server = self.new_server(handler)
+        sock = connect(server.net_addr.port)
+        sock.enable_write_coalescing()
+        sock.send(b"ping\n")
+        sock.flush()
+        assert sock.get_write_coalescing_stats()["buffered"] == 0
+        sock.disable_write_coalescing()
+        assert sock.recv(5) == b"ping\n"
+        sock.close()
+        assert server.shutdown(timeout)
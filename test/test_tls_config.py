@@ -0,0 +1,124 @@
+import pytest
+
+from nss.error import NSPRError
+import nss.io as io
+import nss.nss as nss
+import nss.ssl as ssl
+
+
+def auth_certificate_callback(sock, check_sig, is_server, certdb):
+    return True
+
+
+def handshake_callback(sock):
+    pass
+
+
+class TestTLSConfig:
+    @classmethod
+    def setup_class(cls):
+        nss.nss_init_nodb()
+
+    @classmethod
+    def teardown_class(cls):
+        nss.nss_shutdown()
+
+    def new_config(self, **kwargs):
+        return ssl.TLSConfig(options={ssl.SSL_ENABLE_SESSION_TICKETS: True},
+                             ciphers=[ssl.TLS_AES_128_GCM_SHA256,
+                                      'TLS_ECDHE_ECDSA_WITH_AES_128_GCM_SHA256'],
+                             version_range=('tls1.2', 'tls1.3'),
+                             hostname='www.example.com',
+                             auth_certificate_callback=(auth_certificate_callback,
+                                                        nss.get_default_certdb()),
+                             handshake_callback=handshake_callback,
+                             **kwargs)
+
+    def check_socket(self, sock):
+        assert sock.get_ssl_option(ssl.SSL_ENABLE_SESSION_TICKETS) == 1
+        assert sock.get_ssl_version_range() == (ssl.SSL_LIBRARY_VERSION_TLS_1_2,
+                                                ssl.SSL_LIBRARY_VERSION_TLS_1_3)
+        assert sock.get_cipher_pref(ssl.TLS_AES_128_GCM_SHA256)
+        assert sock.get_cipher_pref(ssl.TLS_ECDHE_ECDSA_WITH_AES_128_GCM_SHA256)
+        assert not sock.get_cipher_pref(ssl.TLS_AES_256_GCM_SHA384)
+        assert sock.get_hostname() == 'www.example.com'
+
+    def test_attributes(self):
+        config = self.new_config()
+        assert config.protocol_variant == ssl.SSL_VARIANT_STREAM
+        assert config.options == {ssl.SSL_ENABLE_SESSION_TICKETS: 1}
+        assert config.ciphers == (ssl.TLS_AES_128_GCM_SHA256,
+                                  ssl.TLS_ECDHE_ECDSA_WITH_AES_128_GCM_SHA256)
+        assert config.version_range == (ssl.SSL_LIBRARY_VERSION_TLS_1_2,
+                                        ssl.SSL_LIBRARY_VERSION_TLS_1_3)
+        assert config.hostname == 'www.example.com'
+        assert config.server_cert is None
+        assert config.priv_key is None
+        assert config.kea is None
+
+        # The object is immutable
+        config.options[ssl.SSL_ENABLE_SESSION_TICKETS] = 0
+        assert config.options == {ssl.SSL_ENABLE_SESSION_TICKETS: 1}
+        with pytest.raises(AttributeError):
+            config.hostname = 'www.example.org'
+
+    def test_defaults(self):
+        config = ssl.TLSConfig()
+        assert config.options == {}
+        assert config.ciphers is None
+        assert config.version_range is None
+        assert config.hostname is None
+
+    def test_apply(self):
+        config = self.new_config()
+        sock = ssl.SSLSocket(io.PR_AF_INET)
+        sock.set_ssl_option(ssl.SSL_ENABLE_SESSION_TICKETS, False)
+        config.apply(sock)
+        self.check_socket(sock)
+        sock.close()
+
+    def test_new_socket(self):
+        config = self.new_config()
+        sock = config.new_socket()
+        self.check_socket(sock)
+        assert sock.family == io.PR_AF_INET
+        sock.close()
+
+        sock = config.new_socket(io.PR_AF_INET6)
+        assert sock.family == io.PR_AF_INET6
+        sock.close()
+
+    def test_datagram(self):
+        config = ssl.TLSConfig(ssl.SSL_VARIANT_DATAGRAM,
+                               version_range=('dtls1.2', 'dtls1.3'))
+        sock = config.new_socket()
+        assert sock.get_ssl_version_range() == (ssl.SSL_LIBRARY_VERSION_DTLS_1_2,
+                                                ssl.SSL_LIBRARY_VERSION_DTLS_1_3)
+        sock.close()
+
+        sock = ssl.SSLSocket(io.PR_AF_INET)
+        with pytest.raises(ValueError):
+            config.apply(sock)
+        sock.close()
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            ssl.TLSConfig(protocol_variant=5)
+        with pytest.raises(TypeError):
+            ssl.TLSConfig(options=[ssl.SSL_ENABLE_SESSION_TICKETS])
+        with pytest.raises(NSPRError):
+            ssl.TLSConfig(options={0xffff: True})
+        with pytest.raises(KeyError):
+            ssl.TLSConfig(ciphers=['no_such_cipher'])
+        with pytest.raises(NSPRError):
+            ssl.TLSConfig(ciphers=[0xfefe])
+        with pytest.raises(TypeError):
+            ssl.TLSConfig(version_range='tls1.2')
+        with pytest.raises(NSPRError):
+            ssl.TLSConfig(version_range=('tls1.3', 'tls1.2'))
+        with pytest.raises(NSPRError):
+            ssl.TLSConfig(ssl.SSL_VARIANT_DATAGRAM, version_range=('tls1.0', 'tls1.0'))
+        with pytest.raises(TypeError):
+            ssl.TLSConfig(auth_certificate_callback=(1, 2))
+        with pytest.raises(TypeError):
+            ssl.TLSConfig(server_cert='cert')